@@ -220,6 +220,15 @@ class EngineConfig:
         wide_root_noise: ルートノードのワイドノイズ
         enable_ownership: オーナーシップ表示の有効化
         disabled: エンジンを無効化するかどうか
+        multi_turn_queries: 全局解析を分岐ごとのマルチターンクエリで送るかどうか
+        pool_size: ``KataGoEnginePool`` が起動する KataGo プロセス数
+        analysis_cache: 局面キーの永続解析キャッシュを使うかどうか
+        analysis_cache_path: キャッシュDBのパス（None で DATA_FOLDER 配下）
+        analysis_cache_max_entries: キャッシュの最大局面数
+        analysis_cache_max_mb: キャッシュの最大サイズ（MB）
+        coalesce_queries: 同一局面の実行中クエリを共有するかどうか
+        batch_stdin_writes: 待機中のクエリをまとめて1回の書き込みで送るかどうか
+        partial_result_interval: クエリごとの途中結果を配信する最小間隔（秒、0 で毎回配信）
 
     Note:
         - config keyは `_enable_ownership`（先頭アンダースコア）
@@ -244,6 +253,24 @@ class EngineConfig:
     # layer to wire up two ``KataGoEngine`` instances (tracked
     # separately as a follow-up).
     enable_dual_katago: bool = False
+    # Full-game analysis sends one multi-turn query per branch (every turn
+    # listed in ``analyzeTurns``) instead of one query per node. Default
+    # ``False`` keeps the per-node behaviour used by the GUI.
+    multi_turn_queries: bool = False
+    # Number of KataGo processes started by ``KataGoEnginePool``.
+    pool_size: int = 1
+    # Persistent position-keyed analysis cache (katrain.core.analysis_cache).
+    analysis_cache: bool = False
+    analysis_cache_path: str | None = None
+    analysis_cache_max_entries: int = 200_000
+    analysis_cache_max_mb: int = 2048
+    # Equivalent in-flight queries share one KataGo query (engine_query.coalesce_key).
+    coalesce_queries: bool = True
+    # The stdin writer drains every ready query into one write/flush (engine_io.write_stdin_thread).
+    batch_stdin_writes: bool = True
+    # Minimum seconds between partial results delivered per query; newer partials
+    # replace held ones (engine_io.PartialResultMerger). 0 delivers every line.
+    partial_result_interval: float = 0.2
 
     @classmethod
     def from_dict(cls, d: dict[str, Any]) -> EngineConfig:
@@ -285,6 +312,15 @@ class EngineConfig:
             # Phase LV3-5: opt-in dual-KataGo flag. ``None``/missing means
             # the historical single-process behaviour.
             enable_dual_katago=safe_bool(d.get("enable_dual_katago"), default=False),
+            multi_turn_queries=safe_bool(d.get("multi_turn_queries"), default=False),
+            pool_size=max(1, safe_int(d.get("pool_size"), 1)),
+            analysis_cache=safe_bool(d.get("analysis_cache"), default=False),
+            analysis_cache_path=normalize_path(d.get("analysis_cache_path")),
+            analysis_cache_max_entries=max(1, safe_int(d.get("analysis_cache_max_entries"), 200_000)),
+            analysis_cache_max_mb=max(1, safe_int(d.get("analysis_cache_max_mb"), 2048)),
+            coalesce_queries=safe_bool(d.get("coalesce_queries"), default=True),
+            batch_stdin_writes=safe_bool(d.get("batch_stdin_writes"), default=True),
+            partial_result_interval=max(0.0, safe_float(d.get("partial_result_interval"), 0.2)),
         )
 
 
@@ -17,6 +17,7 @@ Removed during Phase 280 (no surviving caller):
 import time
 from abc import ABC, abstractmethod
 from collections.abc import Callable
+from concurrent.futures import wait as wait_futures
 from typing import Any
 
 from katrain.core.constants.output import OUTPUT_DEBUG, OUTPUT_ERROR
@@ -29,6 +30,10 @@ from katrain.core.game import Game, Move
 
 STRATEGY_REGISTRY: dict[str, type] = {}
 
+# Waits block on the engine's completion handle / state condition; this only
+# bounds how long an engine that died without answering goes unnoticed.
+ALIVE_CHECK_INTERVAL_S = 0.5
+
 
 def register_strategy(strategy_name: str) -> Callable[[type["AIStrategy"]], type["AIStrategy"]]:
     """Decorator to register a strategy class in the registry."""
@@ -107,7 +112,7 @@ class AIStrategy(ABC):
             error = True
 
         engine = self.game.engines[self.cn.player]
-        engine.request_analysis(
+        handle = engine.request_analysis(
             self.cn,
             callback=set_analysis,
             error_callback=set_error,
@@ -127,7 +132,16 @@ class AIStrategy(ABC):
                     raise TimeoutError(
                         f"[{self.strategy_name}] Timed out after {_wait_timeout_s}s waiting for analysis"
                     )
-                time.sleep(0.01)
+                wait_futures([handle], timeout=ALIVE_CHECK_INTERVAL_S)
+                if handle.done() and not analysis:
+                    # Rejected / failed / cancelled: error_callback may still be
+                    # queued for the main thread, so don't wait for it.
+                    self.game.katrain.log(
+                        f"[{self.strategy_name}] Additional analysis query did not complete: "
+                        f"{'cancelled' if handle.cancelled() else handle.exception()}",
+                        OUTPUT_ERROR,
+                    )
+                    return None
                 try:
                     engine.check_alive(exception_if_dead=True)
                 except Exception:
@@ -153,9 +167,10 @@ class AIStrategy(ABC):
             f"[{self.strategy_name}] Waiting for regular analysis to complete...",
             OUTPUT_DEBUG,
         )
+        engine = self.game.engines[self.cn.next_player]
         while not self.cn.analysis_complete:
-            time.sleep(0.01)
-            self.game.engines[self.cn.next_player].check_alive(exception_if_dead=True)
+            engine.wait_until(lambda: self.cn.analysis_complete, timeout=ALIVE_CHECK_INTERVAL_S)
+            engine.check_alive(exception_if_dead=True)
         self.game.katrain.log(f"[{self.strategy_name}] Regular analysis completed", OUTPUT_DEBUG)
 
 
@@ -160,13 +160,16 @@ def compute_stones_at_node(
     node: SGFNode,
     board_size: tuple[int, int],
 ) -> StoneSet:
-    """Compute stone positions at a node by replaying from root.
+    """Compute stone positions at a node.
 
     Does NOT modify current_node. No side effects. Thread-safe.
+    Served by the shared position cache
+    (:data:`katrain.core.game.position_cache.RECORDED_POSITIONS`), which replays
+    only the nodes below the nearest cached ancestor.
 
     Processing order per node:
     1. placements (AB/AW): Place stones WITHOUT capture logic
-    2. moves (B/W): Place stones WITH capture logic
+    2. moves (B/W): Place stones WITH capture logic (suicide removes the own group)
     3. clear_placements (AE): Remove stones
 
     Args:
@@ -182,66 +185,9 @@ def compute_stones_at_node(
         row: bottom to top (0 = bottom edge)
         Reference: sgf_parser.py Move.from_sgf()
     """
-    width, height = board_size
-    # board[row][col] = player ("B", "W", or None)
-    board: list[list[str | None]] = [[None] * width for _ in range(height)]
-
-    for n in node.nodes_from_root:
-        # Step 1: placements (AB/AW) - NO CAPTURE LOGIC
-        for move in n.placements:
-            if move.is_pass or move.coords is None:
-                continue
-            col, row = move.coords
-            board[row][col] = move.player
-
-        # Step 2: moves (B/W) - WITH CAPTURE LOGIC
-        for move in n.moves:
-            if move.is_pass or move.coords is None:
-                continue
-            col, row = move.coords
-            player = move.player
-
-            # Place the stone
-            board[row][col] = player
-
-            # Capture opponent stones (check adjacent groups).
-            # ``_find_group`` / ``_has_liberty`` live in ``cluster_geometry``;
-            # imported lazily here to keep ``cluster_classifier`` free of a
-            # top-level dependency on it (avoids an import cycle).
-
-            opponent = "W" if player == "B" else "B"
-            for dc, dr in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                nc, nr = col + dc, row + dr
-                if 0 <= nc < width and 0 <= nr < height and board[nr][nc] == opponent:
-                    group = _find_group(board, nc, nr, width, height)
-                    if not _has_liberty(board, group, width, height):
-                        for gc, gr in group:
-                            board[gr][gc] = None
-
-            # Suicide check (Rev.6: remove self-group)
-            # After capturing opponent, if self has no liberties, remove self.
-            # Suicide is illegal in standard rules but may appear in SGF.
-            # Handle gracefully without exception.
-            own_group = _find_group(board, col, row, width, height)
-            if not _has_liberty(board, own_group, width, height):
-                for gc, gr in own_group:
-                    board[gr][gc] = None
-
-        # Step 3: AE (clear) handling
-        for clear_move in n.clear_placements:
-            if not clear_move.is_pass and clear_move.coords is not None:
-                col, row = clear_move.coords
-                board[row][col] = None
-
-    # Convert to StoneSet
-    stones: set[StonePosition] = set()
-    for row in range(height):
-        for col in range(width):
-            cell_player = board[row][col]
-            if cell_player is not None:
-                stones.add((col, row, cell_player))
-
-    return frozenset(stones)
+    from katrain.core.game.position_cache import RECORDED_POSITIONS
+
+    return RECORDED_POSITIONS.get(node, board_size).stones
 
 
 # =====================================================================
@@ -603,8 +549,15 @@ def get_cluster_context_for_move(
 def _find_mainline_node(game: Game, move_number: int) -> GameNode | None:
     """Find node by move number on mainline.
 
-    Uses ordered_children[0] for mainline traversal.
+    Uses the game's ``tree_index`` (main branch = children[0], the branch the
+    move numbers are taken from). Games without one (e.g. test doubles) are
+    walked through ordered_children[0].
     """
+    from katrain.core.game.tree_index import TreeIndex
+
+    tree_index = getattr(game, "tree_index", None)
+    if isinstance(tree_index, TreeIndex):
+        return tree_index.main_node(move_number) if move_number >= 0 else None
     node = game.root
     for _ in range(move_number):
         if not node.children:
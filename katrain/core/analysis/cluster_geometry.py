@@ -23,9 +23,9 @@ classifier only imports geometry symbols that it actually needs.
 from __future__ import annotations
 
 from collections import deque
-from typing import TYPE_CHECKING, cast
+from typing import TYPE_CHECKING
 
-from katrain.core.analysis.cluster_classifier import compute_stones_at_node
+from katrain.core.analysis.cluster_classifier import _find_mainline_node, compute_stones_at_node
 
 if TYPE_CHECKING:
     from katrain.core.analysis.cluster_classifier import StoneSet
@@ -118,15 +118,5 @@ class StoneCache:
         return stones
 
     def _find_node_by_move_number(self, move_number: int) -> GameNode | None:
-        """Find node by move number on mainline.
-
-        Uses ordered_children[0] for mainline traversal
-        (KaTrain convention, game.py:841 pattern).
-        """
-        node = self._game.root
-        for _ in range(move_number):
-            if not node.children:
-                return None
-            # ordered_children[0] = mainline
-            node = cast("GameNode", node.ordered_children[0])
-        return node
+        """Find node by move number on mainline (see ``_find_mainline_node``)."""
+        return _find_mainline_node(self._game, move_number)
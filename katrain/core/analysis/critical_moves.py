@@ -347,8 +347,15 @@ def build_node_map(game: Any) -> dict[int, "GameNode"]:
     - MoveEval.move_number=N -> node_map[N] OK
 
     Rationale: Same pattern used in engine_compare.py:379
+
+    A Game answers from its ``tree_index`` without walking the main branch.
     """
     from katrain.core.analysis import iter_main_branch_nodes
+    from katrain.core.game.tree_index import TreeIndex
+
+    tree_index = getattr(game, "tree_index", None)
+    if isinstance(tree_index, TreeIndex):
+        return dict(tree_index.main_move_nodes())
 
     node_map: dict[int, Any] = {}
     for node in iter_main_branch_nodes(game):
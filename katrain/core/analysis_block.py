@@ -0,0 +1,301 @@
+"""Per-game columnar encoding of saved analysis (analysis format 2.0).
+
+Format 1.0 stores three separately gzipped, base64-encoded values in the
+``KT`` property of every analyzed node: ownership, policy and the main JSON.
+Each node is compressed alone, so gzip headers repeat and the redundancy
+between nodes (move info keys, similar ownership maps) is never exploited.
+
+Format 2.0 stores the analysis of the whole game once, in the root's ``KTB``
+property, and every analyzed node only carries a reference ``KT[@<entry>]``.
+The block is compressed once (zlib, then base64) and laid out by column::
+
+    header     b"KTB2", squares (u16), entries (u32), table bytes (u32)
+    table      JSON {"schemas": [[move info key, ...], ...],
+                     "entries": [{main analysis, "moves": [[move, schema, *values], ...]}, ...]}
+    ownership  one presence byte per entry, then float16[squares] per present entry
+    policy     one presence byte per entry, then float16[squares + 1] per present entry
+
+Move infos are stored as rows against a shared list of key schemas rather
+than as repeated dicts. Per-move ownership is dropped, as in format 1.0.
+
+Readers get each entry's main data plus its still-packed float16 arrays, so
+``GameNode`` can defer unpacking ownership / policy until they are read.
+Files in format 1.0 (per-node ``KT`` values) remain readable.
+
+Sidecar:
+    Instead of the ``KTB`` property the same entries can be written to a
+    sidecar file next to the SGF (``<name>.kta``, named by the root's
+    ``KTS`` property), uncompressed so readers can ``mmap`` it and slice a
+    single node's arrays without reading the rest::
+
+        header     b"KTA1", squares (u16), reserved (u16), entries (u32),
+                   table offset (u64), table bytes (u64)
+        index      per entry: ownership offset (u64), policy offset (u64); 0 = absent
+        arrays     raw float16 ownership / policy
+        table      zlib-compressed JSON, as in the block
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import itertools
+import json
+import mmap
+import os
+import struct
+import zlib
+from collections.abc import Callable
+from typing import Any
+
+from katrain.core.utils import pack_floats, replacing_file
+
+BLOCK_MAGIC = b"KTB2"
+BLOCK_REF_PREFIX = "@"  # KT[@<entry>] refers to an entry of the root's KTB block
+FLOAT_KEYS = ("ownership", "policy")
+
+SIDECAR_MAGIC = b"KTA1"
+SIDECAR_EXTENSION = ".kta"
+
+_HEADER = struct.Struct("<4sHII")
+_SIDECAR_HEADER = struct.Struct("<4sHHIQQ")
+_SIDECAR_INDEX = struct.Struct("<QQ")
+
+
+def sidecar_path(sgf_path: str) -> str:
+    """The analysis sidecar file written next to ``sgf_path``."""
+    return os.path.splitext(sgf_path)[0] + SIDECAR_EXTENSION
+
+
+def _float_count(key: str, squares: int) -> int:
+    return squares + 1 if key == "policy" else squares  # policy includes pass
+
+
+class AnalysisBlockWriter:
+    """Collects node analyses and encodes them into one ``KTB`` value.
+
+    ``packed_floats(analysis, key)`` may be given to supply ownership / policy
+    that are still packed (e.g. analysis loaded from an SGF and never read),
+    so they are not unpacked just to be packed again.
+    """
+
+    def __init__(self, squares: int, packed_floats: Any = None) -> None:
+        self.squares = squares
+        self._packed_floats = packed_floats
+        self._schemas: dict[tuple[str, ...], int] = {}
+        self._entries: list[dict[str, Any]] = []
+        self._floats: dict[str, list[bytes]] = {key: [] for key in FLOAT_KEYS}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, analysis: dict[str, Any]) -> int | None:
+        """Adds one node's analysis, returning its entry index.
+
+        Returns None when the ownership / policy do not fit the board size;
+        such nodes should be saved in the per-node format instead.
+        """
+        floats = {}
+        for key in FLOAT_KEYS:
+            packed = self._packed_floats(analysis, key) if self._packed_floats else None
+            if packed is None:
+                packed = pack_floats(analysis.get(key))
+            if packed and len(packed) != 2 * _float_count(key, self.squares):
+                return None
+            floats[key] = packed
+
+        entry: dict[str, Any] = {}
+        for key, value in dict.items(analysis):
+            if key in FLOAT_KEYS:
+                continue
+            entry[key] = self._move_table(value) if key == "moves" else value
+        for key in FLOAT_KEYS:
+            self._floats[key].append(floats[key])
+        self._entries.append(entry)
+        return len(self._entries) - 1
+
+    def _move_table(self, moves: dict[str, dict[str, Any]]) -> list[list[Any]]:
+        rows = []
+        for move, move_info in moves.items():
+            columns = tuple(k for k in move_info if k != "ownership")  # per-move ownership rarely used
+            schema = self._schemas.setdefault(columns, len(self._schemas))
+            rows.append([move, schema, *(move_info[c] for c in columns)])
+        return rows
+
+    def _table(self) -> bytes:
+        return json.dumps({"schemas": list(self._schemas), "entries": self._entries}).encode("utf-8")
+
+    def dumps(self) -> str:
+        table = self._table()
+        parts = [_HEADER.pack(BLOCK_MAGIC, self.squares, len(self._entries), len(table)), table]
+        for key in FLOAT_KEYS:
+            columns = self._floats[key]
+            parts.append(bytes(1 if data else 0 for data in columns))
+            parts.extend(data for data in columns if data)
+        return base64.standard_b64encode(zlib.compress(b"".join(parts), 9)).decode("ascii")
+
+    def write_sidecar(self, path: str, before_replace: Callable[[], None] | None = None) -> None:
+        """Writes the entries as a sidecar file, atomically replacing ``path``.
+
+        The writer gives up its arrays once they are written, then calls ``before_replace``
+        (e.g. to unmap an old sidecar at ``path``, which Windows will not replace while mapped).
+        """
+        count = len(self._entries)
+        sizes = [(len(o), len(p)) for o, p in zip(self._floats["ownership"], self._floats["policy"], strict=True)]
+        offset = _SIDECAR_HEADER.size + count * _SIDECAR_INDEX.size
+        index = []
+        for ownership_size, policy_size in sizes:
+            ownership_offset = offset if ownership_size else 0
+            offset += ownership_size
+            policy_offset = offset if policy_size else 0
+            offset += policy_size
+            index.append(_SIDECAR_INDEX.pack(ownership_offset, policy_offset))
+        table = zlib.compress(self._table(), 9)
+
+        with replacing_file(path, "wb") as f:
+            f.write(_SIDECAR_HEADER.pack(SIDECAR_MAGIC, self.squares, 0, count, offset, len(table)))
+            f.write(b"".join(index))
+            f.writelines(
+                itertools.chain.from_iterable(zip(self._floats["ownership"], self._floats["policy"], strict=True))
+            )
+            f.write(table)
+            self._floats = {key: [] for key in FLOAT_KEYS}  # may be views into the sidecar being replaced
+            if before_replace is not None:
+                before_replace()
+
+
+def _main_analysis(schemas: list[list[str]], entry: dict[str, Any]) -> dict[str, Any]:
+    main = {}
+    for key, value in entry.items():
+        if key == "moves":
+            value = {row[0]: dict(zip(schemas[row[1]], row[2:], strict=True)) for row in value}
+        main[key] = value
+    return main
+
+
+class AnalysisBlock:
+    """A decoded ``KTB`` value; entries are materialized one at a time.
+
+    The header and array layout are checked up front, the table is parsed on the first ``entry`` call.
+    """
+
+    def __init__(self, data: str) -> None:
+        try:
+            raw = zlib.decompress(base64.standard_b64decode(data))
+            magic, self.squares, count, table_size = _HEADER.unpack_from(raw)
+        except (binascii.Error, zlib.error, struct.error) as e:
+            raise ValueError(f"Invalid analysis block: {e}") from e
+        if magic != BLOCK_MAGIC:
+            raise ValueError(f"Invalid analysis block header {magic!r}")
+        self._count: int = count
+        offset = _HEADER.size
+        self._table_span = (offset, offset + table_size)
+        self._table: tuple[list[list[str]], list[dict[str, Any]]] | None = None
+        offset += table_size
+
+        # per float key: entry index -> (start, end) in raw
+        self._raw = raw
+        self._float_ranges: dict[str, list[tuple[int, int] | None]] = {}
+        for key in FLOAT_KEYS:
+            size = 2 * _float_count(key, self.squares)
+            presence = raw[offset : offset + count]
+            if len(presence) != count:
+                raise ValueError("Analysis block is truncated")
+            offset += count
+            ranges: list[tuple[int, int] | None] = []
+            for present in presence:
+                ranges.append((offset, offset + size) if present else None)
+                offset += size if present else 0
+            self._float_ranges[key] = ranges
+        if offset != len(raw):
+            raise ValueError("Analysis block size does not match its header")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _load_table(self) -> tuple[list[list[str]], list[dict[str, Any]]]:
+        if self._table is None:
+            table = json.loads(self._raw[self._table_span[0] : self._table_span[1]])
+            if len(table["entries"]) != self._count:
+                raise ValueError("Analysis block entry count does not match its table")
+            self._table = (table["schemas"], table["entries"])
+        return self._table
+
+    def entry(self, index: int) -> tuple[dict[str, Any], dict[str, tuple[bytes, int]]]:
+        """Main analysis of entry ``index`` and its packed ``{key: (float16 bytes, count)}``."""
+        schemas, entries = self._load_table()
+        main = _main_analysis(schemas, entries[index])
+        packed = {}
+        for key in FLOAT_KEYS:
+            span = self._float_ranges[key][index]
+            packed[key] = (self._raw[span[0] : span[1]] if span else b"", _float_count(key, self.squares))
+        return main, packed
+
+
+class AnalysisSidecar:
+    """A memory-mapped sidecar file; arrays are returned as views into the mapping.
+
+    The table (main analysis of every entry) is decompressed on the first
+    ``entry`` call. The mapping stays open while views handed out are alive.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        size = len(self._mmap)
+        try:
+            magic, squares, _, count, table_offset, table_size = _SIDECAR_HEADER.unpack_from(self._mmap)
+        except struct.error as e:
+            raise ValueError(f"Invalid analysis sidecar {path}: {e}") from e
+        if magic != SIDECAR_MAGIC:
+            raise ValueError(f"Invalid analysis sidecar header {magic!r} in {path}")
+        self.squares: int = squares
+        self._count: int = count
+        self._table_offset: int = table_offset
+        index_end = _SIDECAR_HEADER.size + self._count * _SIDECAR_INDEX.size
+        if self._table_offset < index_end or self._table_offset + table_size != size:
+            raise ValueError(f"Analysis sidecar {path} is truncated")
+        self._table_size = table_size
+        self._view = memoryview(self._mmap)
+        self._table: tuple[list[list[str]], list[dict[str, Any]]] | None = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        """Unmaps the file; raises BufferError while views handed out are still alive."""
+        self._view.release()
+        self._mmap.close()
+
+    def _load_table(self) -> tuple[list[list[str]], list[dict[str, Any]]]:
+        if self._table is None:
+            try:
+                data = zlib.decompress(self._view[self._table_offset : self._table_offset + self._table_size])
+            except zlib.error as e:
+                raise ValueError(f"Invalid analysis sidecar table: {e}") from e
+            table = json.loads(data)
+            if len(table["entries"]) != self._count:
+                raise ValueError("Analysis sidecar entry count does not match its table")
+            self._table = (table["schemas"], table["entries"])
+        return self._table
+
+    def packed(self, index: int) -> dict[str, tuple[memoryview, int]]:
+        """``{key: (float16 view, count)}`` of entry ``index``, without touching the table."""
+        if not 0 <= index < self._count:
+            raise IndexError(f"Analysis sidecar entry {index} out of range")
+        offsets = _SIDECAR_INDEX.unpack_from(self._mmap, _SIDECAR_HEADER.size + index * _SIDECAR_INDEX.size)
+        packed = {}
+        for key, offset in zip(FLOAT_KEYS, offsets, strict=True):
+            count = _float_count(key, self.squares)
+            end = offset + 2 * count
+            if offset and end > self._table_offset:
+                raise ValueError(f"Analysis sidecar entry {index} points outside its arrays")
+            packed[key] = (self._view[offset:end] if offset else memoryview(b""), count)
+        return packed
+
+    def entry(self, index: int) -> tuple[dict[str, Any], dict[str, tuple[memoryview, int]]]:
+        """Main analysis of entry ``index`` and views of its packed float16 arrays."""
+        packed = self.packed(index)
+        schemas, entries = self._load_table()
+        return _main_analysis(schemas, entries[index]), packed
@@ -0,0 +1,253 @@
+"""Persistent, position-keyed cache of KataGo analysis results.
+
+Opening positions repeat heavily across a game library, yet every time a
+game is opened or re-batched ``GameNode.analyze`` asks KataGo again. This
+module stores final analysis results in a local ``sqlite3`` database keyed
+by a canonical position key, so ``engine_query.request_analysis`` can answer
+repeated positions without queuing a query.
+
+Key:
+    ``blake2b`` over the canonical JSON of everything that determines the
+    result: rules, komi, board size, initial stones / player, the move
+    sequence up to the analyzed turn, visits, ownership / policy flags,
+    ``overrideSettings``, ``avoidMoves``, ``analysisPVs`` and the model
+    name. Query bookkeeping (``id``, ``priority``, report interval, the
+    ponder flag and ``analyzeTurns``) is excluded, so a node analyzed by a
+    single-turn query and by a multi-turn branch query share one entry.
+
+Eviction:
+    Least-recently-used rows are deleted once either ``max_entries`` or
+    ``max_bytes`` is exceeded.
+
+Counters:
+    ``hits`` / ``misses`` / ``stores`` / ``evictions`` for the lifetime of
+    the instance, exposed through :meth:`AnalysisCache.stats`.
+
+The cache is enabled per engine with the ``analysis_cache`` engine config
+flag (see :func:`open_analysis_cache`). A ``KataGoEnginePool`` opens one
+cache for all of its members. A database that cannot be opened disables
+the cache, and sqlite errors during a lookup or store count as a miss or
+a skipped store; the cache never stops analysis.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from katrain.core.constants.metadata import DATA_FOLDER
+from katrain.core.constants.output import OUTPUT_INFO
+
+DEFAULT_CACHE_FILENAME = "analysis_cache.sqlite"
+DEFAULT_MAX_ENTRIES = 200_000
+DEFAULT_MAX_BYTES = 2 * 1024**3
+
+# Query fields that influence the analysis result. Everything else
+# (id, priority, reportDuringSearchEvery, ponder key, analyzeTurns) is
+# bookkeeping and deliberately not part of the key.
+_KEY_FIELDS = (
+    "rules",
+    "komi",
+    "boardXSize",
+    "boardYSize",
+    "initialStones",
+    "initialPlayer",
+    "maxVisits",
+    "includeOwnership",
+    "includeMovesOwnership",
+    "includePolicy",
+    "overrideSettings",
+    "avoidMoves",
+    "analysisPVs",
+)
+
+
+class AnalysisCache:
+    """LRU-evicted sqlite store of final KataGo results.
+
+    Thread-safe: the engine read thread stores results while the GUI /
+    batch thread looks them up, so every database access holds ``_lock``.
+
+    Args:
+        path: Database file. ``":memory:"`` gives a process-local cache.
+        max_entries: Maximum number of cached positions.
+        max_bytes: Maximum total size of the compressed results.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10.0, check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS analysis ("
+                "key TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS analysis_last_used ON analysis(last_used)")
+            self._conn.commit()
+            self._entries, self._bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analysis"
+            ).fetchone()
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def key_for_query(query: dict[str, Any], model: str, turn: int | None = None) -> str:
+        """Canonical key of the position at ``turn`` of ``query``.
+
+        Args:
+            query: KataGo query dict (as built by ``build_analysis_query``).
+            model: Model name (or any string identifying the network).
+            turn: Turn to key. ``None`` uses the single entry of
+                ``analyzeTurns`` (or the end of the move sequence).
+        """
+        moves = query.get("moves", [])
+        if turn is None:
+            turns = query.get("analyzeTurns") or [len(moves)]
+            turn = turns[-1]
+        canonical = {k: query.get(k) for k in _KEY_FIELDS}
+        canonical["moves"] = moves[:turn]
+        canonical["model"] = model
+        blob = json.dumps(canonical, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        return hashlib.blake2b(blob, digest_size=20).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Lookup / store
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Return a fresh copy of the cached result for ``key``, or ``None``."""
+        with self._lock:
+            try:
+                row = self._conn.execute("SELECT data FROM analysis WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._conn.execute("UPDATE analysis SET last_used = ? WHERE key = ?", (time.time(), key))
+                    self._conn.commit()
+            except sqlite3.Error:  # locked or closed database: analyze instead
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        result: dict[str, Any] = json.loads(gzip.decompress(row[0]))
+        return result
+
+    def put(self, key: str, analysis: dict[str, Any]) -> None:
+        """Store a final analysis result, evicting LRU rows if over budget."""
+        data = gzip.compress(json.dumps(analysis, separators=(",", ":")).encode("utf-8"), compresslevel=5, mtime=0)
+        with self._lock:
+            try:
+                old = self._conn.execute("SELECT size FROM analysis WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO analysis (key, data, size, last_used) VALUES (?, ?, ?, ?)",
+                    (key, data, len(data), time.time()),
+                )
+                if old is None:
+                    self._entries += 1
+                else:
+                    self._bytes -= old[0]
+                self._bytes += len(data)
+                self.stores += 1
+                self._evict_locked()
+                self._conn.commit()
+            except sqlite3.Error:  # locked or closed database: the result is simply not cached
+                with contextlib.suppress(sqlite3.Error):
+                    self._conn.rollback()
+
+    def _evict_locked(self) -> None:
+        while self._entries > self.max_entries or (self._bytes > self.max_bytes and self._entries > 1):
+            excess = max(1, self._entries - self.max_entries)
+            rows = self._conn.execute("SELECT key, size FROM analysis ORDER BY last_used LIMIT ?", (excess,)).fetchall()
+            if not rows:
+                return
+            self._conn.executemany("DELETE FROM analysis WHERE key = ?", [(k,) for k, _ in rows])
+            self._entries -= len(rows)
+            self._bytes -= sum(size for _, size in rows)
+            self.evictions += len(rows)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def stats(self) -> dict[str, Any]:
+        """Hit/miss counters and current size, e.g. for diagnostics."""
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": self._entries,
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM analysis")
+            self._conn.commit()
+            self._entries = self._bytes = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def close_analysis_cache(katrain: Any, cache: AnalysisCache) -> None:
+    """Log the lifetime counters of ``cache`` and close it."""
+    stats = cache.stats()
+    katrain.log(
+        f"Analysis cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%}), "
+        f"{stats['stores']} stored, {stats['entries']} entries",
+        OUTPUT_INFO,
+    )
+    cache.close()
+
+
+def open_analysis_cache(config: dict[str, Any], log_cb: Callable[[str], None] | None = None) -> AnalysisCache | None:
+    """Open the cache configured in an engine config section.
+
+    Returns ``None`` unless ``analysis_cache`` is set, or if the database
+    cannot be opened (locked, corrupt, read-only folder); the reason is
+    passed to ``log_cb``. Optional keys:
+    ``analysis_cache_path`` (default ``DATA_FOLDER/analysis_cache.sqlite``),
+    ``analysis_cache_max_entries`` and ``analysis_cache_max_mb``.
+    """
+    if not config.get("analysis_cache"):
+        return None
+    path = config.get("analysis_cache_path") or os.path.join(os.path.expanduser(DATA_FOLDER), DEFAULT_CACHE_FILENAME)
+    max_mb = config.get("analysis_cache_max_mb")
+    try:
+        return AnalysisCache(
+            path,
+            max_entries=int(config.get("analysis_cache_max_entries") or DEFAULT_MAX_ENTRIES),
+            max_bytes=int(max_mb * 1024**2) if max_mb else DEFAULT_MAX_BYTES,
+        )
+    except (sqlite3.Error, OSError) as e:
+        if log_cb:
+            log_cb(f"Analysis cache disabled, could not open {path}: {e}")
+        return None
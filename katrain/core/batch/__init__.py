@@ -8,8 +8,9 @@ Usage:
 
 Structure (Phase 158-B + Phase 197 subpackaging):
     - models.py:        WriteError, BatchResult dataclasses
-    - discovery.py:     SGF file collection (recursive / non-recursive)
-    - sgf_io.py:        SGF parsing, has_analysis, encoding fallback
+    - discovery.py:     SGF file collection (recursive / non-recursive), collection games
+    - sgf_io.py:        SGF parsing, header scan / has_analysis, encoding fallback, collection reader
+    - library_index.py: sqlite index of SGF files (stat-based refresh)
     - inputs.py:        parse_timeout_input, safe_int, DEFAULT_TIMEOUT_SECONDS
     - io_safe.py:       safe_write_file with structured error reporting
     - filenames.py:     filename sanitization + uniqueness helpers
@@ -17,8 +18,8 @@ Structure (Phase 158-B + Phase 197 subpackaging):
     - loss.py:          get_canonical_loss helper
     - engine_polling.py: wait_for_analysis (CLI tool only)
     - analysis.py:      analyze_single_file (lazy)
-    - orchestration/    run_batch + helpers (lazy, subpackage)
-    - stats/            extract_game_stats / build_player_summary (lazy, subpackage)
+    - orchestration/    run_batch / run_summary_batch + helpers (lazy, subpackage)
+    - stats/            extract_game_stats / extract_stats_parallel / build_player_summary (lazy, subpackage)
 """
 
 from typing import Any
@@ -26,11 +27,17 @@ from typing import Any
 # =============================================================================
 # Explicit imports from input/IO helpers
 # =============================================================================
-from katrain.core.batch.discovery import collect_sgf_files, collect_sgf_files_recursive
+from katrain.core.batch.discovery import (
+    collect_sgf_files,
+    collect_sgf_files_recursive,
+    expand_sgf_collections,
+    split_analyzed,
+)
 from katrain.core.batch.engine_polling import wait_for_analysis
 from katrain.core.batch.filenames import get_unique_filename, normalize_player_name, sanitize_filename
 from katrain.core.batch.inputs import DEFAULT_TIMEOUT_SECONDS, parse_timeout_input, safe_int
 from katrain.core.batch.io_safe import safe_write_file
+from katrain.core.batch.library_index import LibraryEntry, LibraryIndex, open_library_index
 from katrain.core.batch.loss import get_canonical_loss
 
 # =============================================================================
@@ -42,9 +49,13 @@ from katrain.core.batch.models import (
 )
 from katrain.core.batch.sgf_io import (
     ENCODINGS_TO_TRY,
+    SGFCollectionReader,
+    SGFHeader,
+    count_sgf_games,
     has_analysis,
     parse_sgf_with_fallback,
     read_sgf_with_fallback,
+    scan_sgf_header,
 )
 from katrain.core.batch.visits import choose_visits_for_sgf
 
@@ -71,9 +82,19 @@ __all__ = [
     "read_sgf_with_fallback",
     "parse_sgf_with_fallback",
     "has_analysis",
+    "scan_sgf_header",
+    "SGFHeader",
+    "count_sgf_games",
+    "SGFCollectionReader",
+    # Library index
+    "LibraryIndex",
+    "LibraryEntry",
+    "open_library_index",
     # File discovery
     "collect_sgf_files_recursive",
     "collect_sgf_files",
+    "expand_sgf_collections",
+    "split_analyzed",
     # Engine polling
     "wait_for_analysis",
     # Filename sanitization
@@ -87,8 +108,10 @@ __all__ = [
     "analyze_single_file",
     # orchestration.py
     "run_batch",
+    "run_summary_batch",
     # stats.py
     "extract_game_stats",
+    "extract_stats_parallel",
     "build_batch_summary",
     "extract_players_from_stats",
     "build_player_summary",
@@ -104,9 +127,9 @@ def __getattr__(name: str) -> Any:
     """Lazy import for heavy modules to avoid circular imports.
 
     Available:
-    - run_batch (from orchestration)
+    - run_batch, run_summary_batch (from orchestration)
     - analyze_single_file (from analysis)
-    - extract_game_stats, build_batch_summary, extract_players_from_stats,
+    - extract_game_stats, extract_stats_parallel, build_batch_summary, extract_players_from_stats,
       build_player_summary (from stats)
 
     Note: Caches imported objects in globals() to avoid repeated imports.
@@ -125,6 +148,12 @@ def __getattr__(name: str) -> Any:
         globals()["run_batch"] = run_batch
         return run_batch
 
+    if name == "run_summary_batch":
+        from katrain.core.batch.orchestration import run_summary_batch
+
+        globals()["run_summary_batch"] = run_summary_batch
+        return run_summary_batch
+
     # Stats functions
     if name == "extract_game_stats":
         from katrain.core.batch.stats import extract_game_stats
@@ -132,6 +161,12 @@ def __getattr__(name: str) -> Any:
         globals()["extract_game_stats"] = extract_game_stats
         return extract_game_stats
 
+    if name == "extract_stats_parallel":
+        from katrain.core.batch.stats import extract_stats_parallel
+
+        globals()["extract_stats_parallel"] = extract_stats_parallel
+        return extract_stats_parallel
+
     if name == "build_batch_summary":
         from katrain.core.batch.stats import build_batch_summary
 
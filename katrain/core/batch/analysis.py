@@ -9,24 +9,25 @@ All functions are Kivy-independent and can be used in headless contexts.
 from __future__ import annotations
 
 import os
-import time
 import traceback
 from collections.abc import Callable
 from pathlib import Path
 from typing import TYPE_CHECKING
 
-from katrain.core.batch.sgf_io import parse_sgf_with_fallback
+from katrain.core.batch.sgf_io import SGFCollectionReader, parse_sgf_with_fallback
 from katrain.core.errors import AnalysisTimeoutError, SGFError
 
 if TYPE_CHECKING:
     from katrain.core.base_katrain import KaTrainBase
+    from katrain.core.batch.library_index import LibraryIndex
     from katrain.core.engine import KataGoEngine
+    from katrain.core.engine_pool import KataGoEnginePool
     from katrain.core.game import Game
 
 
 def analyze_single_file(
     katrain: KaTrainBase,
-    engine: KataGoEngine,
+    engine: KataGoEngine | KataGoEnginePool,
     sgf_path: str,
     output_path: str | None = None,
     visits: int | None = None,
@@ -35,13 +36,17 @@ def analyze_single_file(
     log_cb: Callable[[str], None] | None = None,
     save_sgf: bool = True,
     return_game: bool = False,
+    analysis_sidecar: bool = False,
+    game_index: int | None = None,
+    sgf_games: SGFCollectionReader | None = None,
+    library_index: LibraryIndex | None = None,
 ) -> bool | Game | None:
     """
     Analyze a single SGF file and optionally save with analysis data.
 
     Args:
         katrain: KaTrainBase instance
-        engine: KataGo engine instance
+        engine: KataGo engine instance (or a ``KataGoEnginePool``)
         sgf_path: Path to input SGF file
         output_path: Path to save analyzed SGF (required if save_sgf=True)
         visits: Number of visits per move (None = use default)
@@ -50,6 +55,14 @@ def analyze_single_file(
         log_cb: Optional callback for logging messages
         save_sgf: If True, save the analyzed SGF to output_path
         return_game: If True, return the Game object instead of bool
+        analysis_sidecar: If True, save the analysis to a ``.kta`` sidecar file
+            next to output_path instead of embedding it in the SGF
+        game_index: Game to analyze (0-based) when sgf_path is a collection file;
+            None for a file holding a single game
+        sgf_games: Reader of collection games shared across calls, so that the
+            games of a collection analyzed in order are read in one pass
+        library_index: Library index whose cached encoding of sgf_path is used
+            while the file is unchanged; detected otherwise
 
     Returns:
         If return_game=False: True if successful, False otherwise
@@ -79,7 +92,13 @@ def analyze_single_file(
 
         # Step 1: Parse SGF
         log(f"    [1/{total_steps}] Parsing SGF...")
-        move_tree = parse_sgf_with_fallback(sgf_path, log_cb)
+        sgf_filename = sgf_path
+        if game_index is None:
+            move_tree = parse_sgf_with_fallback(sgf_path, log_cb, index=library_index)
+        else:
+            encoding = library_index.cached_encoding(sgf_path) if library_index is not None else None
+            move_tree = (sgf_games or SGFCollectionReader()).game(sgf_path, game_index, encoding)
+            sgf_filename = f"{sgf_path}#{game_index + 1}"  # a game id of its own
         if move_tree is None:
             log("    ERROR: Failed to parse SGF file")
             return fail_result()
@@ -96,7 +115,7 @@ def analyze_single_file(
             engine=engine,
             move_tree=move_tree,
             analyze_fast=False,
-            sgf_filename=sgf_path,
+            sgf_filename=sgf_filename,
         )
         katrain.game = game
 
@@ -106,21 +125,16 @@ def analyze_single_file(
 
         # Step 3: Wait for analysis to complete (with cancellation check)
         log(f"    [3/{total_steps}] Waiting for analysis to complete...")
-        start_time = time.time()
-        poll_interval = 0.5
-        while not engine.is_idle():
+        # Blocks until the read thread has stored the last result (no sleep slack);
+        # the cancel flag is re-checked at least every WAIT_RECHECK_INTERVAL.
+        if not engine.wait_until_idle(timeout=timeout, should_stop=lambda: bool(cancel_flag and cancel_flag[0])):
             if cancel_flag and cancel_flag[0]:
                 log("    Cancelled during analysis")
                 return fail_result()
-            if time.time() - start_time > timeout:
-                log(f"    ERROR: Analysis timed out after {timeout}s")
-                raise AnalysisTimeoutError(
-                    f"Analysis timed out after {timeout}s", user_message="Analysis timeout - engine may be unresponsive"
-                )
-            time.sleep(poll_interval)
-
-        # Give a moment for final processing
-        time.sleep(0.5)
+            log(f"    ERROR: Analysis timed out after {timeout}s")
+            raise AnalysisTimeoutError(
+                f"Analysis timed out after {timeout}s", user_message="Analysis timeout - engine may be unresponsive"
+            )
 
         # Step 4: Save with analysis (KT property) - only if save_sgf is True
         if save_sgf:
@@ -146,7 +160,7 @@ def analyze_single_file(
                 # Default: save feedback for all evaluation classes
                 trainer_config["save_feedback"] = [True, True, True, True, True, True]
 
-            game.write_sgf(output_path, trainer_config=trainer_config)
+            game.write_sgf(output_path, trainer_config=trainer_config, analysis_sidecar=analysis_sidecar)
 
         return success_result(game)
 
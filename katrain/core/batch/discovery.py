@@ -1,18 +1,24 @@
-"""SGF file discovery (recursive + non-recursive)."""
+"""SGF file discovery (recursive + non-recursive, games of collection files)."""
 
 from __future__ import annotations
 
 import os
+import sqlite3
 from collections.abc import Callable
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from katrain.core.batch.sgf_io import has_analysis
+from katrain.core.batch.sgf_io import count_sgf_games, has_analysis
+
+if TYPE_CHECKING:
+    from katrain.core.batch.library_index import LibraryIndex
 
 
 def collect_sgf_files_recursive(
     input_dir: str,
     skip_analyzed: bool = False,
     log_cb: Callable[[str], None] | None = None,
+    index: LibraryIndex | None = None,
 ) -> list[tuple[str, str]]:
     """Collect all SGF files from the input directory recursively.
 
@@ -20,15 +26,11 @@ def collect_sgf_files_recursive(
         input_dir: Directory to search for SGF files
         skip_analyzed: If True, skip files that already have analysis
         log_cb: Optional callback for logging messages
+        index: Library index answering skip_analyzed for unchanged files
 
     Returns:
         List of tuples (absolute_path, relative_path) for each file to process
     """
-
-    def log(msg: str) -> None:
-        if log_cb:
-            log_cb(msg)
-
     sgf_files: list[tuple[str, str]] = []
     input_path = Path(input_dir).resolve()
 
@@ -45,18 +47,82 @@ def collect_sgf_files_recursive(
             if ext not in extensions:
                 continue
 
-            abs_path = str(file_path)
-            rel_path = str(file_path.relative_to(input_path))
-
-            if skip_analyzed and has_analysis(abs_path):
-                log(f"Skipping (already analyzed): {rel_path}")
-                continue
-
-            sgf_files.append((abs_path, rel_path))
+            sgf_files.append((str(file_path), str(file_path.relative_to(input_path))))
 
     # Sort by relative path for consistent ordering
     sgf_files.sort(key=lambda x: x[1])
-    return sgf_files
+    if not skip_analyzed:
+        return sgf_files
+    return split_analyzed(sgf_files, index=index, log_cb=log_cb)[0]
+
+
+def split_analyzed(
+    sgf_files: list[tuple[str, str]],
+    index: LibraryIndex | None = None,
+    log_cb: Callable[[str], None] | None = None,
+) -> tuple[list[tuple[str, str]], list[tuple[str, str]]]:
+    """Split (absolute_path, relative_path) tuples into files without and with KaTrain analysis.
+
+    Args:
+        sgf_files: List of (absolute_path, relative_path) tuples
+        index: Library index answering for unchanged files; without it every file is scanned
+        log_cb: Optional callback, told about every analyzed file
+
+    Returns:
+        (unanalyzed, analyzed), each in the order of ``sgf_files``
+    """
+    entries = None
+    if index is not None:
+        try:
+            entries = index.refresh(abs_path for abs_path, _ in sgf_files)
+        except sqlite3.Error as e:
+            if log_cb:
+                log_cb(f"Library index unavailable, scanning all files: {e}")
+    if entries is not None:
+        analyzed_paths = {abs_path for abs_path, entry in entries.items() if entry.has_analysis}
+    else:
+        analyzed_paths = {abs_path for abs_path, _ in sgf_files if has_analysis(abs_path)}
+    unanalyzed, analyzed = [], []
+    for abs_path, rel_path in sgf_files:
+        if abs_path in analyzed_paths:
+            if log_cb:
+                log_cb(f"Skipping (already analyzed): {rel_path}")
+            analyzed.append((abs_path, rel_path))
+        else:
+            unanalyzed.append((abs_path, rel_path))
+    return unanalyzed, analyzed
+
+
+def expand_sgf_collections(
+    sgf_files: list[tuple[str, str]],
+    log_cb: Callable[[str], None] | None = None,
+) -> list[tuple[str, str, int | None]]:
+    """Turn each game of an SGF collection file into its own work item.
+
+    Args:
+        sgf_files: List of (absolute_path, relative_path) tuples
+        log_cb: Optional callback for logging messages
+
+    Returns:
+        List of (absolute_path, relative_path, game_index) tuples. game_index is
+        None for a file holding a single game. For game k (0-based) of a
+        collection it is k, and relative_path becomes "<name>#<k + 1>.sgf".
+    """
+
+    def log(msg: str) -> None:
+        if log_cb:
+            log_cb(msg)
+
+    items: list[tuple[str, str, int | None]] = []
+    for abs_path, rel_path in sgf_files:
+        games = count_sgf_games(abs_path)
+        if games <= 1:
+            items.append((abs_path, rel_path, None))
+            continue
+        log(f"Collection with {games} games: {rel_path}")
+        stem, ext = os.path.splitext(rel_path)
+        items.extend((abs_path, f"{stem}#{k + 1}{ext}", k) for k in range(games))
+    return items
 
 
 def collect_sgf_files(input_dir: str, skip_analyzed: bool = False) -> list[str]:
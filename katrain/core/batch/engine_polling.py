@@ -12,14 +12,21 @@ if TYPE_CHECKING:
 def wait_for_analysis(engine: KataGoEngine, timeout: float = 300.0, poll_interval: float = 0.5) -> bool:
     """Wait for the engine to finish all pending analysis queries.
 
+    Engines providing ``wait_until_idle`` (``KataGoEngine`` / ``KataGoEnginePool``)
+    are waited on directly and wake as soon as the last result is stored;
+    other engines (anything with only ``is_idle()``) are polled.
+
     Args:
         engine: KataGo engine instance (or any engine with is_idle() method)
         timeout: Maximum time to wait in seconds
-        poll_interval: Time between checks in seconds
+        poll_interval: Time between checks in seconds (polling fallback only)
 
     Returns:
         True if analysis completed, False if timeout
     """
+    wait_until_idle = getattr(engine, "wait_until_idle", None)
+    if callable(wait_until_idle):
+        return bool(wait_until_idle(timeout=timeout))
     start_time = time.time()
     while not engine.is_idle():
         if time.time() - start_time > timeout:
@@ -0,0 +1,336 @@
+"""Persistent index of the SGF files in a game library.
+
+Batch runs and summary runs walk the same folders again and again, and
+every visit re-reads every file just to learn whether it is analyzed or who
+played it. This module keeps one row per file in a local ``sqlite3``
+database, so an unchanged library costs one ``stat`` per file.
+
+Freshness:
+    A row is reused while the file's size and ``st_mtime_ns`` are unchanged.
+    Otherwise the file is read and hashed (``blake2b``); if the content hash
+    is unchanged (a touched or copied file) only the stat is updated, else
+    the file is rescanned with :func:`~katrain.core.batch.sgf_io.scan_sgf_data`.
+
+Row:
+    Root metadata (PB / PW / BR / WR / DT / RE / SZ / KM), main line move
+    count, whether the file has KaTrain analysis (same answer as
+    :func:`~katrain.core.batch.sgf_io.has_analysis`), the analysis format
+    version, the visits of the saved root analysis, and the text encoding
+    chosen by :meth:`~katrain.core.sgf_parser.SGF.detect_encoding`, so later
+    reads decode the file once without detecting again.
+
+Each library (input folder) gets its own database in the KaTrain data
+folder, named after a hash of the folder's path (see
+:func:`open_library_index`), so read-only libraries work and output
+folders stay free of cache files.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, replace
+
+from katrain.core.batch.sgf_io import SGFHeader, has_analysis, has_single_game_start, scan_sgf_data
+from katrain.core.constants.metadata import DATA_FOLDER
+from katrain.core.sgf_parser import SGF
+
+logger = logging.getLogger(__name__)
+
+# One database per library folder, named after a hash of the folder's path.
+INDEX_FOLDER = os.path.join(DATA_FOLDER, "library_index")
+
+# Bump when the columns or their meaning change; older databases are rebuilt.
+_SCHEMA_VERSION = 2
+
+_COLUMNS = (
+    "path",
+    "size",
+    "mtime_ns",
+    "content_hash",
+    "valid",
+    "has_analysis",
+    "analysis_version",
+    "board_x",
+    "board_y",
+    "player_black",
+    "player_white",
+    "rank_black",
+    "rank_white",
+    "date",
+    "result",
+    "komi",
+    "move_count",
+    "visits",
+    "encoding",
+    "indexed_at",
+)
+
+
+@dataclass
+class LibraryEntry:
+    """Index row of one file.
+
+    Attributes:
+        path: Absolute path of the file
+        size: File size in bytes when indexed
+        mtime_ns: File modification time (ns) when indexed
+        content_hash: blake2b of the file contents
+        has_analysis: Whether the file contains KaTrain analysis (KT)
+        header: Scanned metadata, None if the file is not well-formed SGF
+        encoding: Text encoding of the file (see ``SGF.detect_encoding``)
+    """
+
+    path: str
+    size: int
+    mtime_ns: int
+    content_hash: str
+    has_analysis: bool
+    header: SGFHeader | None
+    encoding: str | None = None
+
+
+def _content_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class LibraryIndex:
+    """sqlite-backed file index with stat-based incremental refresh.
+
+    Thread-safe: every database access holds ``_lock``.
+
+    Args:
+        path: Database file. ``":memory:"`` gives a process-local index.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.scanned = 0
+        self.rehashed = 0
+        self.reused = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10.0, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+                self._conn.execute("DROP TABLE IF EXISTS files")
+                self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+                "content_hash TEXT NOT NULL, valid INTEGER NOT NULL, has_analysis INTEGER NOT NULL, "
+                "analysis_version TEXT, board_x INTEGER, board_y INTEGER, player_black TEXT, player_white TEXT, "
+                "rank_black TEXT, rank_white TEXT, date TEXT, result TEXT, komi REAL, move_count INTEGER, "
+                "visits INTEGER, encoding TEXT, indexed_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    # ------------------------------------------------------------------
+    # Lookup / refresh
+    # ------------------------------------------------------------------
+
+    def entry(self, path: str) -> LibraryEntry | None:
+        """The up-to-date entry of ``path``, or ``None`` if it cannot be read."""
+        return self.refresh([path]).get(os.path.abspath(path))
+
+    def cached_encoding(self, path: str) -> str | None:
+        """Encoding stored for ``path`` while the file is unchanged; unlike ``entry``, never reads the file."""
+        abs_path = os.path.abspath(path)
+        try:
+            stat = os.stat(abs_path)
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT size, mtime_ns, encoding FROM files WHERE path = ?", (abs_path,)
+                ).fetchone()
+        except (OSError, sqlite3.Error):
+            return None
+        if row is None or row["size"] != stat.st_size or row["mtime_ns"] != stat.st_mtime_ns:
+            return None
+        encoding: str | None = row["encoding"]
+        return encoding
+
+    def has_analysis(self, path: str) -> bool:
+        """Indexed equivalent of ``sgf_io.has_analysis``."""
+        entry = self.entry(path)
+        return entry is not None and entry.has_analysis
+
+    def refresh(self, paths: Iterable[str]) -> dict[str, LibraryEntry]:
+        """Bring the rows of ``paths`` up to date, in one transaction.
+
+        Returns:
+            ``{absolute path: entry}`` for every path that could be read.
+            Rows of files that no longer exist are deleted.
+        """
+        entries: dict[str, LibraryEntry] = {}
+        with self._lock:
+            for path in paths:
+                abs_path = os.path.abspath(path)
+                entry = self._refresh_locked(abs_path)
+                if entry is not None:
+                    entries[abs_path] = entry
+            self._conn.commit()
+        return entries
+
+    def _refresh_locked(self, path: str) -> LibraryEntry | None:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+            return None
+        row = self._conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM files WHERE path = ?", (path,)).fetchone()
+        if row is not None and row["size"] == stat.st_size and row["mtime_ns"] == stat.st_mtime_ns:
+            self.reused += 1
+            return self._entry_from_row(row)
+
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        content_hash = _content_hash(data)
+        if row is not None and row["content_hash"] == content_hash:
+            self.rehashed += 1
+            self._conn.execute(
+                "UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?", (stat.st_size, stat.st_mtime_ns, path)
+            )
+            return replace(self._entry_from_row(row), size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+
+        self.scanned += 1
+        is_sgf = path.lower().endswith(".sgf")
+        header = scan_sgf_data(data, count_moves=True, read_visits=True, sgf_path=path) if is_sgf else None
+        # files the scan rejects, and collections (every game is checked), go through has_analysis
+        if header is not None and (not header.has_kt or has_single_game_start([data])):
+            analyzed = header.has_kt
+        else:
+            analyzed = is_sgf and has_analysis(path)
+        encoding = SGF.detect_encoding(data, path)
+        entry = LibraryEntry(path, stat.st_size, stat.st_mtime_ns, content_hash, analyzed, header, encoding)
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO files ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+            self._row_from_entry(entry),
+        )
+        return entry
+
+    @staticmethod
+    def _row_from_entry(entry: LibraryEntry) -> tuple[object, ...]:
+        header = entry.header or SGFHeader()
+        return (
+            entry.path,
+            entry.size,
+            entry.mtime_ns,
+            entry.content_hash,
+            entry.header is not None,
+            entry.has_analysis,
+            header.analysis_version,
+            header.board_size[0],
+            header.board_size[1],
+            header.player_black,
+            header.player_white,
+            header.rank_black,
+            header.rank_white,
+            header.date,
+            header.result,
+            header.komi,
+            header.move_count,
+            header.visits,
+            entry.encoding,
+            time.time(),
+        )
+
+    @staticmethod
+    def _entry_from_row(row: sqlite3.Row) -> LibraryEntry:
+        header = None
+        if row["valid"]:
+            header = SGFHeader(
+                has_kt=bool(row["has_analysis"]),
+                analysis_version=row["analysis_version"],
+                board_size=(row["board_x"], row["board_y"]),
+                player_black=row["player_black"],
+                player_white=row["player_white"],
+                rank_black=row["rank_black"],
+                rank_white=row["rank_white"],
+                date=row["date"],
+                result=row["result"],
+                komi=row["komi"],
+                move_count=row["move_count"],
+                visits=row["visits"],
+                complete=True,
+            )
+        return LibraryEntry(
+            row["path"],
+            row["size"],
+            row["mtime_ns"],
+            row["content_hash"],
+            bool(row["has_analysis"]),
+            header,
+            row["encoding"],
+        )
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def stats(self) -> dict[str, object]:
+        """Refresh counters and current size, e.g. for logging."""
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()
+        return {
+            "path": self.path,
+            "entries": entries,
+            "scanned": self.scanned,
+            "rehashed": self.rehashed,
+            "reused": self.reused,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def library_index_path(library_dir: str) -> str:
+    """Database file of the index for the library in ``library_dir``."""
+    key = hashlib.blake2b(os.path.normcase(os.path.abspath(library_dir)).encode("utf-8"), digest_size=8).hexdigest()
+    return os.path.join(os.path.expanduser(INDEX_FOLDER), f"{key}.sqlite")
+
+
+def open_library_index(library_dir: str) -> LibraryIndex | None:
+    """Open (or create) the index of the library in ``library_dir``.
+
+    Returns ``None`` if the database cannot be opened, e.g. when the data
+    folder is read-only; callers then fall back to scanning every file.
+    """
+    path = library_index_path(library_dir)
+    try:
+        return LibraryIndex(path)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning("Library index %s unavailable: %s", path, e)
+        return None
+
+
+def lookup_cached_encoding(path: str) -> str | None:
+    """Encoding of ``path`` cached by the index of a library folder containing it, if any.
+
+    Only folders that already have an index are opened, nearest first; no index is created.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    while True:
+        if os.path.exists(library_index_path(directory)):
+            index = open_library_index(directory)
+            if index is not None:
+                try:
+                    encoding = index.cached_encoding(path)
+                finally:
+                    index.close()
+                if encoding:
+                    return encoding
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
@@ -8,6 +8,7 @@ Public entry: :func:`run_batch`. Implementation is split across:
 * :mod:`._handle`   — post-success karte/stats generation
 * :mod:`._summary`  — per-player summary markdown
 * :mod:`._curator`  — curator outputs
+* :mod:`._summary_only` — :func:`run_summary_batch`, summaries of analyzed files
 
 The legacy ``katrain.core.batch.orchestration`` *module* is preserved
 as a thin re-export shim, so existing imports like
@@ -25,6 +26,7 @@ from katrain.common.short_hash import (
     short_hash,  # noqa: F401  # Phase H-3 source-level regression test requires this import line
 )
 from katrain.core.analysis import DEFAULT_SKILL_PRESET
+from katrain.core.batch.discovery import expand_sgf_collections
 from katrain.core.batch.inputs import DEFAULT_TIMEOUT_SECONDS
 from katrain.core.batch.models import BatchResult
 from katrain.core.batch.orchestration._context import (
@@ -49,6 +51,8 @@ from katrain.core.batch.orchestration._process import (
 )
 from katrain.core.batch.orchestration._setup import _setup_batch
 from katrain.core.batch.orchestration._summary import _generate_summaries
+from katrain.core.batch.orchestration._summary_only import run_summary_batch
+from katrain.core.batch.sgf_io import SGFCollectionReader
 
 
 def run_batch(
@@ -74,6 +78,7 @@ def run_batch(
     lang: str = "jp",
     generate_curator: bool = False,
     user_aggregate: Any = None,
+    analysis_sidecar: bool = False,
 ) -> BatchResult:
     """Run batch analysis on a folder of SGF files (including subfolders).
 
@@ -81,6 +86,10 @@ def run_batch(
     KaTrain and engine instance (no new engine startup required).
 
     See orchestration.py history for the full argument reference.
+    ``analysis_sidecar`` saves the analysis of each analyzed SGF to a
+    memory-mappable ``.kta`` file next to it instead of embedding it.
+    Each game of an SGF collection file is analyzed as its own item,
+    reading the collection once, one game at a time.
     """
     result = BatchResult()
 
@@ -112,50 +121,63 @@ def run_batch(
         selected_visits_list,
         karte_path_map,
         tracker,
+        library_index,
     ) = setup
 
-    for i, (abs_path, rel_path) in enumerate(sgf_files):
-        if cancel_flag and cancel_flag[0]:
-            log("Cancelled by user")
-            result.cancelled = True
-            break
-
-        if progress_cb:
-            progress_cb(i + 1, total, rel_path)
-
-        _process_single_file(
-            ctx=_BatchFileContext(
-                katrain=katrain,
-                engine=engine,
-                result=result,
-                i=i,
-                total=total,
-                abs_path=abs_path,
-                rel_path=rel_path,
-                output_dir=output_dir,
-                visits=visits,
-                effective_visits=None,
-                timeout=timeout,
-                cancel_flag=cancel_flag,
-                log_cb=log_cb,
-                save_analyzed_sgf=save_analyzed_sgf,
-                generate_karte=generate_karte,
-                generate_summary=generate_summary,
-                generate_curator=generate_curator,
-                karte_player_filter=karte_player_filter,
-                tracker=tracker,
-                game_stats_list=game_stats_list,
-                games_for_curator=games_for_curator,
-                karte_path_map=karte_path_map,
-                selected_visits_list=selected_visits_list,
-                variable_visits=variable_visits,
-                jitter_pct=jitter_pct,
-                deterministic=deterministic,
-                batch_timestamp=batch_timestamp,
-                skill_preset=skill_preset,
-            ),
-            log=log,
-        )
+    sgf_games = SGFCollectionReader()
+    try:
+        work_items = expand_sgf_collections(sgf_files, log_cb)
+        total = len(work_items)
+        for i, (abs_path, rel_path, game_index) in enumerate(work_items):
+            if cancel_flag and cancel_flag[0]:
+                log("Cancelled by user")
+                result.cancelled = True
+                break
+
+            if progress_cb:
+                progress_cb(i + 1, total, rel_path)
+
+            _process_single_file(
+                ctx=_BatchFileContext(
+                    katrain=katrain,
+                    engine=engine,
+                    result=result,
+                    i=i,
+                    total=total,
+                    abs_path=abs_path,
+                    rel_path=rel_path,
+                    output_dir=output_dir,
+                    visits=visits,
+                    effective_visits=None,
+                    timeout=timeout,
+                    cancel_flag=cancel_flag,
+                    log_cb=log_cb,
+                    save_analyzed_sgf=save_analyzed_sgf,
+                    generate_karte=generate_karte,
+                    generate_summary=generate_summary,
+                    generate_curator=generate_curator,
+                    karte_player_filter=karte_player_filter,
+                    tracker=tracker,
+                    game_stats_list=game_stats_list,
+                    games_for_curator=games_for_curator,
+                    karte_path_map=karte_path_map,
+                    selected_visits_list=selected_visits_list,
+                    variable_visits=variable_visits,
+                    jitter_pct=jitter_pct,
+                    deterministic=deterministic,
+                    batch_timestamp=batch_timestamp,
+                    skill_preset=skill_preset,
+                    analysis_sidecar=analysis_sidecar,
+                    game_index=game_index,
+                    sgf_games=sgf_games,
+                    library_index=library_index,
+                ),
+                log=log,
+            )
+    finally:  # also on errors, so the index's sqlite connection is not left open
+        sgf_games.close()
+        if library_index is not None:
+            library_index.close()
 
     if generate_summary and game_stats_list and not result.cancelled:
         _generate_summaries(
@@ -207,6 +229,7 @@ def run_batch(
 
 __all__ = [
     "run_batch",
+    "run_summary_batch",
     "EngineFailureTracker",
     "_AnalysisAborted",
     "_BatchFileContext",
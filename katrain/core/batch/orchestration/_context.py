@@ -14,6 +14,8 @@ from typing import TYPE_CHECKING, Any
 
 if TYPE_CHECKING:
     from katrain.core.base_katrain import KaTrainBase
+    from katrain.core.batch.library_index import LibraryIndex
+    from katrain.core.batch.sgf_io import SGFCollectionReader
     from katrain.core.engine import KataGoEngine
     from katrain.core.game import Game
 
@@ -94,6 +96,10 @@ class _BatchFileContext:
     deterministic: bool
     batch_timestamp: str
     skill_preset: str
+    analysis_sidecar: bool = False
+    game_index: int | None = None  # game of a collection file
+    sgf_games: SGFCollectionReader | None = None
+    library_index: LibraryIndex | None = None  # cached encodings of unchanged files
 
 
 @dataclass
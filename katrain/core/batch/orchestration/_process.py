@@ -98,6 +98,10 @@ def _run_analysis_with_circuit_breaker(
             log_cb=ctx.log_cb,
             save_sgf=ctx.save_analyzed_sgf,
             return_game=need_game,
+            analysis_sidecar=ctx.analysis_sidecar,
+            game_index=ctx.game_index,
+            sgf_games=ctx.sgf_games,
+            library_index=ctx.library_index,
         )
 
         if need_game:
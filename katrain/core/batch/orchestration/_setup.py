@@ -10,13 +10,14 @@ pipeline stages.
 from __future__ import annotations
 
 import os
+import sqlite3
 from collections.abc import Callable
 from datetime import datetime
 from typing import Any
 
-from katrain.core.batch.discovery import collect_sgf_files_recursive
+from katrain.core.batch.discovery import collect_sgf_files_recursive, split_analyzed
+from katrain.core.batch.library_index import LibraryIndex, open_library_index
 from katrain.core.batch.orchestration._context import EngineFailureTracker
-from katrain.core.batch.sgf_io import has_analysis
 
 
 def _setup_batch(
@@ -41,6 +42,7 @@ def _setup_batch(
         list[int],
         dict[str, str],
         EngineFailureTracker,
+        LibraryIndex | None,
     ]
     | None
 ):
@@ -48,8 +50,9 @@ def _setup_batch(
 
     Returns:
         Tuple of (output_dir, sgf_files, total, batch_timestamp, game_stats_list,
-                  games_for_curator, selected_visits_list, karte_path_map, tracker)
-        or None if validation failed.
+                  games_for_curator, selected_visits_list, karte_path_map, tracker,
+                  library_index) or None if validation failed. library_index is the
+        refreshed index of input_dir (None if it cannot be opened); the caller closes it.
     """
 
     def log(msg: str) -> None:
@@ -87,21 +90,27 @@ def _setup_batch(
 
     log(f"Scanning for SGF files in: {input_dir}")
 
-    all_files = collect_sgf_files_recursive(input_dir, skip_analyzed=False, log_cb=None)
-    sgf_files: list[tuple[str, str]] = []
+    sgf_files = collect_sgf_files_recursive(input_dir)
     skip_count = 0
-
-    for abs_path, rel_path in all_files:
-        if skip_analyzed and has_analysis(abs_path):
-            log(f"Skipping (already analyzed): {rel_path}")
-            skip_count += 1
-        else:
-            sgf_files.append((abs_path, rel_path))
+    # Unchanged files are answered from the library's index, which also caches their encodings
+    index = open_library_index(input_dir)
+    if skip_analyzed:
+        sgf_files, skipped = split_analyzed(sgf_files, index=index, log_cb=log_cb)
+        skip_count = len(skipped)
+    elif index is not None:
+        try:
+            index.refresh(abs_path for abs_path, _ in sgf_files)
+        except sqlite3.Error as e:
+            log(f"Library index unavailable: {e}")
+    if index is not None:
+        log(f"Library index: {index.reused + index.rehashed} unchanged, {index.scanned} scanned")
 
     result.skip_count = skip_count
 
     if not sgf_files:
         log(f"No SGF files to analyze in {input_dir}")
+        if index is not None:
+            index.close()
         return None
 
     log(f"Found {len(sgf_files)} SGF file(s) to analyze")
@@ -127,4 +136,5 @@ def _setup_batch(
         selected_visits_list,
         karte_path_map,
         tracker,
+        index,
     )
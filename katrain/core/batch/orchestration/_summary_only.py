@@ -0,0 +1,96 @@
+"""Summary generation for a folder of already analyzed SGF files.
+
+No engine is needed: the analysis saved in each SGF is read back and the
+per-game stats are extracted in worker processes
+(:func:`katrain.core.batch.stats.parallel.extract_stats_parallel`), then
+the per-player summaries are written by :func:`._summary._generate_summaries`.
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Callable
+from datetime import datetime
+
+from katrain.core.analysis import DEFAULT_SKILL_PRESET
+from katrain.core.batch.discovery import collect_sgf_files_recursive, expand_sgf_collections
+from katrain.core.batch.models import BatchResult
+from katrain.core.batch.orchestration._context import _BatchSummaryContext
+from katrain.core.batch.orchestration._summary import _generate_summaries
+from katrain.core.batch.sgf_io import has_analysis
+
+
+def run_summary_batch(
+    input_dir: str,
+    output_dir: str | None = None,
+    workers: int | None = 1,
+    min_games_per_player: int = 3,
+    skill_preset: str = DEFAULT_SKILL_PRESET,
+    lang: str = "jp",
+    log_cb: Callable[[str], None] | None = None,
+) -> BatchResult:
+    """Write per-player summaries for the analyzed SGF files of a folder (including subfolders).
+
+    Files without saved analysis are skipped; each game of a collection file
+    is a game of its own. ``workers`` is passed to ``extract_stats_parallel``
+    (``None`` or ``0``: one process per CPU core). ``success_count`` /
+    ``fail_count`` count the games whose stats could / could not be extracted.
+    """
+    from katrain.core.batch.stats.parallel import extract_stats_parallel
+
+    result = BatchResult()
+
+    def log(msg: str) -> None:
+        if log_cb:
+            log_cb(msg)
+
+    if not os.path.isdir(input_dir):
+        log(f"Error: Input directory does not exist: {input_dir}")
+        return result
+
+    output_dir = output_dir if output_dir else input_dir
+    result.output_dir = output_dir
+    os.makedirs(os.path.join(output_dir, "reports", "summary"), exist_ok=True)
+
+    log(f"Scanning for analyzed SGF files in: {input_dir}")
+    all_files = collect_sgf_files_recursive(input_dir, skip_analyzed=False, log_cb=None)
+    sgf_files = [(abs_path, rel_path) for abs_path, rel_path in all_files if has_analysis(abs_path)]
+    if len(sgf_files) < len(all_files):
+        log(f"Skipped {len(all_files) - len(sgf_files)} file(s) without analysis")
+    if not sgf_files:
+        result.summary_error = "No analyzed SGF files found"
+        log(f"No analyzed SGF files in {input_dir}")
+        return result
+    work_items = expand_sgf_collections(sgf_files, log_cb)
+
+    game_stats_list = extract_stats_parallel(work_items, workers=workers, skill_preset=skill_preset, log_cb=log_cb)
+    result.success_count = len(game_stats_list)
+    result.fail_count = len(work_items) - len(game_stats_list)
+    log(f"Extracted stats for {len(game_stats_list)}/{len(work_items)} game(s)")
+
+    if not game_stats_list:
+        result.summary_error = "No valid game statistics available"
+        log("WARNING: Summary generation requested but no valid game statistics available")
+        return result
+
+    _generate_summaries(
+        ctx=_BatchSummaryContext(
+            result=result,
+            output_dir=output_dir,
+            game_stats_list=game_stats_list,
+            min_games_per_player=min_games_per_player,
+            visits=None,
+            variable_visits=False,
+            jitter_pct=0.0,
+            deterministic=True,
+            timeout=0.0,  # nothing is analyzed
+            selected_visits_list=[],
+            skill_preset=skill_preset,
+            karte_path_map={},
+            batch_timestamp=datetime.now().strftime("%Y%m%d-%H%M%S"),
+            lang=lang,
+            log_cb=log_cb,
+            log=log,
+        )
+    )
+    return result
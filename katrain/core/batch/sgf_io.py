@@ -2,27 +2,40 @@
 
 from __future__ import annotations
 
-import os
-from collections.abc import Callable
-from typing import Any
+import codecs
+import functools
+import re
+from collections.abc import Callable, Generator, Iterable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, BinaryIO
 
-# Common encodings for Go SGF files (Fox/Tygem often use GB18030, Nihon-Kiin uses CP932)
-ENCODINGS_TO_TRY: tuple[str, ...] = (
-    "utf-8",
-    "utf-8-sig",
-    "gb18030",
-    "cp932",
-    "euc-kr",
-    "latin-1",
-)
+from katrain.core.sgf_parser import SGF
 
+if TYPE_CHECKING:
+    from katrain.core.batch.library_index import LibraryIndex
 
-def read_sgf_with_fallback(sgf_path: str, log_cb: Callable[[str], None] | None = None) -> tuple[str | None, str]:
-    """Read an SGF file with encoding fallback.
+# Encodings tried when the detected one cannot decode a file
+# (Fox/Tygem often use GB18030, Nihon-Kiin uses CP932)
+ENCODINGS_TO_TRY: tuple[str, ...] = SGF.FALLBACK_ENCODINGS
+
+
+def read_sgf_with_fallback(
+    sgf_path: str,
+    log_cb: Callable[[str], None] | None = None,
+    encoding: str | None = None,
+    index: LibraryIndex | None = None,
+) -> tuple[str | None, str]:
+    """Read an SGF file with encoding detection.
+
+    The encoding is chosen from the start of the file and the CA property
+    (see ``SGF.decode_contents``), and the file is decoded once with it;
+    ENCODINGS_TO_TRY are only tried if that fails.
 
     Args:
         sgf_path: Path to the SGF file
         log_cb: Optional callback for logging messages
+        encoding: Encoding to try first
+        index: Library index whose cached encoding is used when ``encoding`` is not given
 
     Returns:
         Tuple of (content_string, encoding_used) or (None, "") on failure
@@ -40,28 +53,38 @@ def read_sgf_with_fallback(sgf_path: str, log_cb: Callable[[str], None] | None =
         log(f"    Error reading file: {e}")
         return None, ""
 
-    # Try each encoding
-    for encoding in ENCODINGS_TO_TRY:
-        try:
-            content = raw_bytes.decode(encoding)
-            # Basic sanity check: SGF should contain parentheses
-            if "(" in content and ")" in content:
-                if encoding != "utf-8":
-                    log(f"    Using encoding: {encoding}")
-                return content, encoding
-        except (UnicodeDecodeError, LookupError):
-            continue
+    if encoding is None and index is not None:
+        encoding = index.cached_encoding(sgf_path)
+    content, encoding = _decode_sgf_bytes(raw_bytes, sgf_path, encoding)
+    if content is None:
+        log("    Failed to decode: not an SGF file in a known encoding")
+    elif encoding != "utf-8":
+        log(f"    Using encoding: {encoding}")
+    return content, encoding
+
 
-    log(f"    Failed to decode with any encoding: {ENCODINGS_TO_TRY}")
+def _decode_sgf_bytes(raw_bytes: bytes, sgf_path: str = "", encoding: str | None = None) -> tuple[str | None, str]:
+    """Decode file contents once with the detected encoding; None unless the text looks like SGF."""
+    content, encoding = SGF.decode_contents(raw_bytes, sgf_path, encoding)
+    # Basic sanity check: SGF should contain parentheses (GIB / NGF have none)
+    if sgf_path.lower().endswith((".gib", ".ngf")) or ("(" in content and ")" in content):
+        return content, encoding
     return None, ""
 
 
-def parse_sgf_with_fallback(sgf_path: str, log_cb: Callable[[str], None] | None = None) -> Any | None:
-    """Parse an SGF file with encoding fallback.
+def parse_sgf_with_fallback(
+    sgf_path: str,
+    log_cb: Callable[[str], None] | None = None,
+    encoding: str | None = None,
+    index: LibraryIndex | None = None,
+) -> Any | None:
+    """Parse an SGF file with encoding detection.
 
     Args:
         sgf_path: Path to the SGF file
         log_cb: Optional callback for logging messages
+        encoding: Encoding to try first
+        index: Library index whose cached encoding is used when ``encoding`` is not given
 
     Returns:
         Parsed SGF root node, or None on failure
@@ -76,39 +99,337 @@ def parse_sgf_with_fallback(sgf_path: str, log_cb: Callable[[str], None] | None
         if log_cb:
             log_cb(msg)
 
-    content, encoding = read_sgf_with_fallback(sgf_path, log_cb)
+    content, encoding = read_sgf_with_fallback(sgf_path, log_cb, encoding, index)
     if content is None:
         return None
 
     try:
-        # KaTrainSGF.parse_file reads from file, so we need to use parse() with string
-        if hasattr(KaTrainSGF, "parse"):
-            return KaTrainSGF.parse(content)
+        if sgf_path.lower().endswith(".ngf"):
+            root = KaTrainSGF.parse_ngf(content)
+        elif sgf_path.lower().endswith(".gib"):
+            root = KaTrainSGF.parse_gib(content)
         else:
-            # Fallback: write to temp file if only parse_file is available
-            import tempfile
-
-            with tempfile.NamedTemporaryFile(mode="w", suffix=".sgf", delete=False, encoding="utf-8") as tmp:
-                tmp.write(content)
-                tmp_path = tmp.name
-            try:
-                return KaTrainSGF.parse_file(tmp_path)
-            finally:
-                os.unlink(tmp_path)
+            root = KaTrainSGF.parse_sgf(content)
     except Exception as e:  # noqa: BLE001
         log(f"    Parse error: {e}")
         return None
+    if hasattr(root, "source_filename"):
+        root.source_filename = sgf_path  # an analysis sidecar lives next to the original file
+    return root
+
+
+# =============================================================================
+# Header scan (no tree)
+# =============================================================================
+
+SCAN_CHUNK_SIZE = 64 * 1024
+
+# Root properties kept by scan_sgf_header
+_SCAN_ROOT_PROPERTIES = frozenset({b"SZ", b"PB", b"PW", b"BR", b"WR", b"DT", b"RE", b"KM", b"KTV"})
+# ... and the root's analysis, when its visits are wanted
+_SCAN_ANALYSIS_PROPERTIES = frozenset({b"KT", b"KTB", b"KTS"})
+
+# Next token: node / variation start / variation end, a property with its
+# first "[", or a further "[" value of the same property.
+_SCAN_START_PAT = re.compile(rb"\(\s*;")
+_SCAN_TOKEN_PAT = re.compile(rb"\s*(?:([;()])|(\w+)\s*\[|\[)")
+_LOWERCASE = bytes(range(ord("a"), ord("z") + 1))
+_SCAN_UNESCAPE_PAT = re.compile(rb"\\([\]\\])")
+
+
+@dataclass
+class SGFHeader:
+    """What scan_sgf_header learned about the first game of an SGF file.
+
+    Attributes:
+        has_kt: Whether any node carries a KT property (KaTrain analysis)
+        analysis_version: The root's KTV property, if any
+        board_size: The root's SZ property as (x, y), (19, 19) if missing
+        player_black: The root's PB property
+        player_white: The root's PW property
+        rank_black: The root's BR property
+        rank_white: The root's WR property
+        date: The root's DT property
+        result: The root's RE property
+        komi: The root's KM property, None if missing or not a number
+        move_count: Main line nodes with a B or W property, None if not counted
+        visits: Visits of the root node's saved analysis, None if not read
+        complete: Whether the whole game was scanned (False after an early stop)
+    """
+
+    has_kt: bool = False
+    analysis_version: str | None = None
+    board_size: tuple[int, int] = (19, 19)
+    player_black: str = ""
+    player_white: str = ""
+    rank_black: str | None = None
+    rank_white: str | None = None
+    date: str | None = None
+    result: str | None = None
+    komi: float | None = None
+    move_count: int | None = None
+    visits: int | None = None
+    complete: bool = False
+
+
+class _ScanBuffer:
+    """Bytes of a file read on demand, checked to be UTF-8 as they arrive.
+
+    Raises UnicodeDecodeError from ``read_more`` once the file turns out to
+    be in another encoding. In UTF-8 the bytes of "\\" and "]" never occur
+    inside a multi-byte character, so values can be delimited on raw bytes;
+    in Shift-JIS / GBK they can, and such files are converted first.
+    """
+
+    def __init__(self, f: BinaryIO | None, data: bytes = b"") -> None:
+        self.file = f
+        self.data = bytearray(data)
+        self.eof = f is None
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+
+    def read_more(self) -> bool:
+        if self.eof or self.file is None:
+            return False
+        chunk = self.file.read(SCAN_CHUNK_SIZE)
+        self.data += chunk
+        if not chunk:
+            self.eof = True
+            self._decoder.decode(b"", final=True)
+            return False
+        if not chunk.isascii() or self._decoder.getstate()[0]:
+            self._decoder.decode(chunk)
+        return True
+
+
+def _scan(buffer: _ScanBuffer, count_moves: bool, root_values: dict[bytes, list[bytes]]) -> SGFHeader | None:
+    """Tokenize the first game tree; None if it is not well-formed SGF.
+
+    Values of the root properties already in ``root_values`` are collected there.
+    """
+    data = buffer.data
+    while (start_match := _SCAN_START_PAT.search(data)) is None:
+        if not buffer.read_more():
+            return None
+    pos = start_match.start()
+
+    header = SGFHeader(move_count=0 if count_moves else None)
+    branches: list[list[bool]] = []  # per open "(": [on main line, has a child "("]
+    nodes = 0
+    node_has_move = False
+    prop = b""
+
+    while True:
+        match = _SCAN_TOKEN_PAT.match(data, pos)
+        if match is None or match.end() == len(data):  # the token may continue in the next chunk
+            if buffer.read_more():
+                continue
+            if match is None:
+                return None
+        pos = match.end()
+
+        token = match[1]
+        if token is None:  # a value: skip to its closing, unescaped "]"
+            if match[2]:
+                prop = match[2] if match[2].isupper() else match[2].translate(None, _LOWERCASE)  # SiZe -> SZ
+            start = end = pos
+            while True:
+                end = data.find(b"]", end)
+                if end < 0:
+                    end = len(data)
+                    if not buffer.read_more():
+                        return None
+                    continue
+                backslashes = 0
+                while end - backslashes > start and data[end - backslashes - 1] == 0x5C:
+                    backslashes += 1
+                if backslashes % 2 == 0:
+                    break
+                end += 1
+            pos = end + 1
+            if prop == b"KT":
+                header.has_kt = True
+            if nodes == 1 and prop in root_values:
+                root_values[prop].append(bytes(data[start:end]))
+            elif prop in (b"B", b"W") and branches[-1][0]:
+                node_has_move = True
+            continue
+
+        # a ";", "(" or ")" ends the current node
+        if nodes and header.has_kt and not count_moves:
+            break  # the root is complete and analysis was found: nothing else is needed
+        if node_has_move:
+            header.move_count = (header.move_count or 0) + 1
+            node_has_move = False
+        if token == b";":
+            nodes += 1
+        elif token == b"(":
+            if branches:
+                parent = branches[-1]
+                branches.append([parent[0] and not parent[1], False])
+                parent[1] = True
+            else:
+                branches.append([True, False])
+        else:
+            branches.pop()
+            if not branches:
+                header.complete = True
+                break
+    return header
+
+
+def _root_text(root_values: dict[bytes, list[bytes]], prop: bytes) -> str | None:
+    values = root_values.get(prop)
+    if not values:
+        return None
+    return _SCAN_UNESCAPE_PAT.sub(rb"\1", values[0]).decode("utf-8", errors="replace").strip()
+
+
+def _set_root_values(header: SGFHeader, root_values: dict[bytes, list[bytes]]) -> None:
+    header.analysis_version = _root_text(root_values, b"KTV")
+    header.player_black = _root_text(root_values, b"PB") or ""
+    header.player_white = _root_text(root_values, b"PW") or ""
+    header.rank_black = _root_text(root_values, b"BR")
+    header.rank_white = _root_text(root_values, b"WR")
+    header.date = _root_text(root_values, b"DT")
+    header.result = _root_text(root_values, b"RE")
+    try:
+        komi = _root_text(root_values, b"KM")
+        header.komi = float(komi) if komi else None
+    except ValueError:
+        pass
+    size = _root_text(root_values, b"SZ")
+    if size:
+        try:
+            x, _, y = size.partition(":")
+            header.board_size = (int(x), int(y or x))
+        except ValueError:
+            pass
+
+
+def _root_analysis_visits(root_values: dict[bytes, list[bytes]], sgf_path: str) -> int | None:
+    """Visits of the root's saved analysis (any analysis format), decoded like GameNode does."""
+    from katrain.core.game_node import GameNode
+
+    if not root_values.get(b"KT"):
+        return None
+    root = GameNode()
+    for prop, values in root_values.items():
+        if values:
+            unescaped = [_SCAN_UNESCAPE_PAT.sub(rb"\1", v).decode("utf-8", errors="replace") for v in values]
+            root.add_list_property(prop.decode("ascii"), unescaped)
+    root.source_filename = sgf_path
+    try:
+        if not root.load_analysis():
+            return None
+        visits = (root.analysis.get("root") or {}).get("visits")
+        return int(visits) if visits is not None else None
+    except Exception:  # noqa: BLE001 - a damaged analysis only means the visits are unknown
+        return None
+
+
+def _scan_with_root_values(
+    buffer: _ScanBuffer, count_moves: bool, read_visits: bool, sgf_path: str
+) -> SGFHeader | None:
+    properties = _SCAN_ROOT_PROPERTIES | _SCAN_ANALYSIS_PROPERTIES if read_visits else _SCAN_ROOT_PROPERTIES
+    root_values: dict[bytes, list[bytes]] = {prop: [] for prop in properties}
+    header = _scan(buffer, count_moves, root_values)
+    if header is not None:
+        _set_root_values(header, root_values)
+        if read_visits:
+            header.visits = _root_analysis_visits(root_values, sgf_path)
+    return header
+
+
+def scan_sgf_header(sgf_path: str, count_moves: bool = True, read_visits: bool = False) -> SGFHeader | None:
+    """Answer basic questions about an SGF file without building its tree.
+
+    Tokenizes the raw bytes of the first game: values are skipped with
+    ``bytes.find`` and only a few root properties are decoded. The file is
+    read in chunks; with ``count_moves=False`` reading stops as soon as the
+    root is complete and a KT property has been seen, which for games saved
+    by KaTrain is within the first node.
+
+    Files that are not UTF-8 are decoded like ``read_sgf_with_fallback``
+    and scanned from memory.
+
+    Args:
+        sgf_path: Path to the SGF file
+        count_moves: Count main line moves (requires scanning the whole game)
+        read_visits: Decode the root's saved analysis for its visits
+
+    Returns:
+        SGFHeader, or None if the file cannot be read or is not well-formed SGF
+    """
+    try:
+        with open(sgf_path, "rb") as f:
+            buffer = _ScanBuffer(f)
+            try:
+                return _scan_with_root_values(buffer, count_moves, read_visits, sgf_path)
+            except UnicodeDecodeError:
+                raw_bytes = bytes(buffer.data) + f.read()
+    except OSError:
+        return None
+    return scan_sgf_data(raw_bytes, count_moves, read_visits, sgf_path)
+
+
+def scan_sgf_data(
+    raw_bytes: bytes, count_moves: bool = True, read_visits: bool = False, sgf_path: str = ""
+) -> SGFHeader | None:
+    """scan_sgf_header for file contents already in memory.
+
+    ``sgf_path`` locates an analysis sidecar when ``read_visits`` is set.
+    """
+    if not raw_bytes.isascii():
+        try:
+            raw_bytes.decode("utf-8")
+        except UnicodeDecodeError:
+            content, _ = _decode_sgf_bytes(raw_bytes, sgf_path)
+            if content is None:
+                return None
+            raw_bytes = content.encode("utf-8")
+    return _scan_with_root_values(_ScanBuffer(None, raw_bytes), count_moves, read_visits, sgf_path)
 
 
 def has_analysis(sgf_path: str) -> bool:
     """Check if an SGF file already contains KaTrain analysis (KT property).
 
+    Uses scan_sgf_header, which stops reading at the first KT. Only files
+    the scan cannot make sense of are fully parsed. A collection counts as
+    analyzed only if every game has KT: when the first one does, the other
+    games are split off and scanned too. GIB / NGF files never carry KT.
+
     Args:
         sgf_path: Path to the SGF file
 
     Returns:
         True if the file contains analysis data, False otherwise
     """
+    if not sgf_path.lower().endswith(".sgf"):
+        return False
+    header = scan_sgf_header(sgf_path, count_moves=False)
+    if header is None:
+        return _parsed_has_analysis(sgf_path)
+    if not header.has_kt:
+        return False
+    # the scan covers the first game; a collection is analyzed only if every game is
+    try:
+        with open(sgf_path, "rb") as f:
+            if has_single_game_start(iter(functools.partial(f.read, SGF.COLLECTION_CHUNK_SIZE), b"")):
+                return True
+        games = SGF.iter_file_strings(sgf_path)
+        next(games, None)
+        return all(_game_has_analysis(game) for game in games)
+    except OSError:
+        return False
+
+
+def _game_has_analysis(game: str) -> bool:
+    header = scan_sgf_data(game.encode("utf-8"), count_moves=False)
+    return header.has_kt if header is not None else False
+
+
+def _parsed_has_analysis(sgf_path: str) -> bool:
+    """has_analysis by parsing the whole tree (lenient, for files the scan rejects)."""
     from katrain.core.game import KaTrainSGF
 
     try:
@@ -124,3 +445,102 @@ def has_analysis(sgf_path: str) -> bool:
         return False
     except Exception:  # noqa: BLE001
         return False
+
+
+# =============================================================================
+# Collections (several game trees in one file)
+# =============================================================================
+
+
+_GAME_START_PAT = re.compile(rb"\(\s*;")
+
+
+def has_single_game_start(chunks: Iterable[bytes]) -> bool:
+    """Whether raw SGF bytes, arriving in chunks, contain exactly one ``(;``.
+
+    Such a file holds one game without variations. Any other count (a
+    collection, variations, or text in an encoding this does not match)
+    needs the real split of :meth:`SGF.iter_file_strings`.
+    """
+    found = 0
+    carry = b""
+    for chunk in chunks:
+        data = carry + chunk
+        matches = list(_GAME_START_PAT.finditer(data))
+        found += len(matches)
+        if found > 1:
+            return False
+        # a "(" followed only by whitespace may be completed by the next chunk
+        last_open = data.rfind(b"(", matches[-1].end() if matches else 0)
+        carry = data[last_open:] if last_open >= 0 and not data[last_open + 1 :].strip() else b""
+    return found == 1
+
+
+def count_sgf_games(sgf_path: str) -> int:
+    """Number of game trees in an SGF file, counted without parsing them.
+
+    A file with a single ``(;`` is one game, found by a byte scan; only
+    other files are split, decoding them in chunks so a large collection is
+    never held in memory. GIB / NGF files always hold one game; 0 if the
+    file cannot be read.
+    """
+    if not sgf_path.lower().endswith(".sgf"):
+        return 1
+    try:
+        with open(sgf_path, "rb") as f:
+            if has_single_game_start(iter(functools.partial(f.read, SGF.COLLECTION_CHUNK_SIZE), b"")):
+                return 1
+        return sum(1 for _ in SGF.iter_file_strings(sgf_path))
+    except OSError:
+        return 0
+
+
+class SGFCollectionReader:
+    """Games of SGF collection files, parsed one at a time.
+
+    Asking for the games of a file in increasing order continues reading where
+    the previous call stopped, so walking a collection front to back reads it
+    once and holds one game at a time. Going back, or switching files, starts
+    the file over.
+    """
+
+    def __init__(self) -> None:
+        self._path: str | None = None
+        self._games: Generator[str, None, None] | None = None
+        self._next_index = 0
+
+    def game(self, sgf_path: str, index: int, encoding: str | None = None) -> Any:
+        """Root of game ``index`` (0-based) of the file.
+
+        ``encoding`` is used when the file is (re)opened, detected if not given.
+
+        Raises:
+            SGFError: If the file has no such game or the game does not parse
+        """
+        from katrain.core.errors import SGFError
+        from katrain.core.game import KaTrainSGF
+        from katrain.core.sgf_parser import ParseError
+
+        if self._games is None or sgf_path != self._path or index < self._next_index:
+            self.close()
+            self._games = KaTrainSGF.iter_file_strings(sgf_path, encoding)
+            self._path = sgf_path
+        for text in self._games:
+            self._next_index += 1
+            if self._next_index - 1 == index:
+                try:
+                    root = KaTrainSGF.parse_sgf(text)
+                except ParseError as e:
+                    raise SGFError(f"Game {index + 1}: {e}") from e
+                if hasattr(root, "source_filename"):
+                    root.source_filename = sgf_path
+                return root
+        raise SGFError(f"Game {index + 1} not found, the file has {self._next_index} game(s)")
+
+    def close(self) -> None:
+        """Close the file being read, if any."""
+        if self._games is not None:
+            self._games.close()
+        self._games = None
+        self._path = None
+        self._next_index = 0
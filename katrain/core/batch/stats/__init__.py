@@ -25,6 +25,12 @@ from .models import (
     EvidenceMove,
 )
 
+# Parallel extraction - worker processes over analyzed SGF files
+from .parallel import (
+    extract_stats_from_sgf,
+    extract_stats_parallel,
+)
+
 # Pattern Mining - recurring mistake detection (Phase 84)
 from .pattern_miner import (
     AREA_THRESHOLDS,
@@ -99,6 +105,8 @@ __all__ = [
     "extract_game_stats",
     "build_batch_summary",
     "extract_players_from_stats",
+    "extract_stats_from_sgf",
+    "extract_stats_parallel",
     "build_player_summary",
     "EvidenceMove",
     # Pattern Mining (Phase 84)
@@ -0,0 +1,176 @@
+"""Multi-process stats extraction for already analyzed SGF files.
+
+This module contains:
+- extract_stats_from_sgf()
+- extract_stats_parallel()
+- resolve_worker_count()
+
+Each game is parsed, turned into an engine-less ``Game`` and run through
+``extract_game_stats()`` in a worker process. Only the stats dict (plain
+values, enums and the ``GameSummaryData`` dataclass) and the log lines are
+sent back to the parent; the parsed tree and the ``Game`` stay in the worker.
+Results are returned in input order, so summaries do not depend on which
+worker finished first.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from katrain.core.base_katrain import KaTrainBase
+    from katrain.core.batch.sgf_io import SGFCollectionReader
+
+# Games handed to a worker per task; large enough to amortize pickling,
+# small enough to keep all workers busy until the end of a folder.
+STATS_CHUNK_SIZE = 4
+
+_worker_katrain: KaTrainBase | None = None
+_worker_sgf_games: SGFCollectionReader | None = None
+
+
+def resolve_worker_count(workers: int | None) -> int:
+    """Number of worker processes to use; ``None`` or ``0`` means one per CPU core."""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, workers)
+
+
+def _get_worker_katrain() -> KaTrainBase:
+    """Headless KaTrain instance of this process, created on first use."""
+    global _worker_katrain
+    if _worker_katrain is None:
+        from katrain.core.base_katrain import KaTrainBase
+
+        # Package config: stats do not depend on user settings, and workers must not touch the user's config file
+        _worker_katrain = KaTrainBase(force_package_config=True, debug_level=0)
+    return _worker_katrain
+
+
+def _get_worker_sgf_games() -> SGFCollectionReader:
+    """Collection reader of this process; a worker's games of one collection come in file order."""
+    global _worker_sgf_games
+    if _worker_sgf_games is None:
+        from katrain.core.batch.sgf_io import SGFCollectionReader
+
+        _worker_sgf_games = SGFCollectionReader()
+    return _worker_sgf_games
+
+
+def extract_stats_from_sgf(
+    abs_path: str,
+    rel_path: str,
+    source_index: int = 0,
+    target_visits: int | None = None,
+    skill_preset: str | None = None,
+    game_index: int | None = None,
+) -> tuple[dict[str, Any] | None, list[str]]:
+    """Parse an analyzed SGF file and extract its summary stats.
+
+    Args:
+        abs_path: Path of the SGF file
+        rel_path: Relative path of the SGF file (for game_name)
+        source_index: Index for deterministic sorting, see extract_game_stats()
+        target_visits: Target visits for the reliability threshold
+        skill_preset: Skill preset stored in the summary data
+        game_index: Game (0-based) of a collection file, None for a single-game file
+
+    Returns:
+        Tuple of (stats dict or None, log lines produced while extracting)
+    """
+    from katrain.core.batch.sgf_io import parse_sgf_with_fallback
+    from katrain.core.game import Game
+
+    from .extraction import extract_game_stats
+
+    messages: list[str] = []
+    try:
+        sgf_filename = abs_path
+        if game_index is None:
+            move_tree = parse_sgf_with_fallback(abs_path, messages.append)
+        else:
+            move_tree = _get_worker_sgf_games().game(abs_path, game_index)
+            sgf_filename = f"{abs_path}#{game_index + 1}"
+        if move_tree is None:
+            messages.append(f"  Stats skipped for {rel_path}: failed to parse SGF")
+            return None, messages
+        # No engine: the analysis saved in the SGF is decoded when the snapshot reads it
+        game = Game(_get_worker_katrain(), None, move_tree=move_tree, sgf_filename=sgf_filename)
+        stats = extract_game_stats(
+            game,
+            rel_path,
+            log_cb=messages.append,
+            target_visits=target_visits,
+            source_index=source_index,
+            skill_preset=skill_preset,
+        )
+        return stats, messages
+    except Exception as e:  # noqa: BLE001
+        messages.append(f"  Stats extraction failed for {rel_path}: {e}")
+        return None, messages
+
+
+def _extract_stats_task(
+    args: tuple[str, str, int, int | None, str | None, int | None],
+) -> tuple[dict[str, Any] | None, list[str]]:
+    return extract_stats_from_sgf(*args)
+
+
+def extract_stats_parallel(
+    sgf_files: Sequence[tuple[str, str] | tuple[str, str, int | None]],
+    workers: int | None = 1,
+    target_visits: int | None = None,
+    skill_preset: str | None = None,
+    log_cb: Callable[[str], None] | None = None,
+) -> list[dict[str, Any]]:
+    """Extract summary stats for many analyzed SGF files using worker processes.
+
+    Args:
+        sgf_files: List of (abs_path, rel_path) tuples, or the (abs_path, rel_path,
+            game_index) work items of ``expand_sgf_collections``; the position in
+            this list becomes each game's ``source_index``
+        workers: Number of worker processes; ``1`` extracts in this process,
+            ``None`` or ``0`` uses one per CPU core
+        target_visits: Target visits for the reliability threshold
+        skill_preset: Skill preset stored in the summary data
+        log_cb: Optional callback for logging messages
+
+    Returns:
+        Stats dicts of the games that could be extracted, in the order of sgf_files
+    """
+
+    def log(msg: str) -> None:
+        if log_cb:
+            log_cb(msg)
+
+    tasks = [
+        (item[0], item[1], i, target_visits, skill_preset, item[2] if len(item) > 2 else None)
+        for i, item in enumerate(sgf_files)
+    ]
+    workers = min(resolve_worker_count(workers), len(tasks))
+
+    results: list[tuple[dict[str, Any] | None, list[str]]]
+    if workers <= 1:
+        results = [_extract_stats_task(task) for task in tasks]
+    else:
+        log(f"Extracting stats for {len(tasks)} game(s) with {workers} worker processes")
+        try:
+            # spawn: the parent may run engine reader threads or a GUI, which fork would copy mid-state
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                results = list(pool.map(_extract_stats_task, tasks, chunksize=STATS_CHUNK_SIZE))
+        except (BrokenProcessPool, OSError) as e:
+            log(f"Stats worker processes failed ({e}), extracting in this process")
+            results = [_extract_stats_task(task) for task in tasks]
+
+    game_stats_list: list[dict[str, Any]] = []
+    for stats, messages in results:
+        for msg in messages:
+            log(msg)
+        if stats:
+            game_stats_list.append(stats)
+    return game_stats_list
@@ -121,8 +121,9 @@ def extract_groups_from_game(game: Game) -> list[Group]:
         list[Group]: 盤面上のすべてのグループ（空でないもののみ）
     """
     groups = []
-    board = game.board
-    chains = game.chains
+    position = game.position
+    board = position.board
+    chains = position.chains
     board_size_x, board_size_y = game.board_size
 
     for group_id, chain in enumerate(chains):
@@ -133,13 +134,7 @@ def extract_groups_from_game(game: Game) -> list[Group]:
         stones = [m.coords for m in chain if m.coords is not None]
 
         # 呼吸点をカウント
-        liberties: set[tuple[int, int]] = set()
-        for stone in stones:
-            x, y = stone
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < board_size_x and 0 <= ny < board_size_y and board[ny][nx] == -1:  # 空点
-                    liberties.add((nx, ny))
+        liberties = set(position.liberties(group_id))
 
         liberties_count = len(liberties)
         is_in_atari = liberties_count == 1
@@ -237,7 +232,7 @@ def find_connect_points(
         list[tuple[tuple[int, int], list[int], float]]:
         [(座標, [連絡するgroup_ids], 危険度改善値), ...] を改善度上位10件
     """
-    board = game.board
+    board = game.position.board
     board_size_x, board_size_y = game.board_size
     connect_points = []
 
@@ -288,7 +283,7 @@ def find_cut_points(
         list[tuple[tuple[int, int], list[int], float]]:
         [(座標, [リスクのあるgroup_ids], 危険度増加値), ...] を危険度上位10件
     """
-    board = game.board
+    board = game.position.board
     board_size_x, board_size_y = game.board_size
     cut_points = []
 
@@ -352,7 +347,7 @@ def analyze_board_at_node(game: Game, node: Any) -> BoardState:
         BoardState: 戦術的スナップショット
     """
     # ゲームポジションをこのノードに設定
-    # （注: コストが高い、将来キャッシュを検討）
+    # （差分更新: 直前の局面に近いノードほど低コスト、katrain.core.game.position 参照）
     game.set_current_node(node)
 
     # 現在の盤面状態からグループを抽出
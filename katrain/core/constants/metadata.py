@@ -16,7 +16,7 @@ PROGRAM_NAME = "KaTrain"
 VERSION = "1.17.1"
 HOMEPAGE = "https://github.com/sanderland/katrain"
 CONFIG_MIN_VERSION = "1.17.0"
-ANALYSIS_FORMAT_VERSION = "1.0"
+ANALYSIS_FORMAT_VERSION = "2.0"  # 2.0: per-game KTB block (katrain.core.analysis_block)
 
 # --- File paths / markers ---
 DATA_FOLDER = "~/.katrain"
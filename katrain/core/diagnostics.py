@@ -13,7 +13,7 @@ import string
 import sys
 import zipfile
 from collections.abc import Callable
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from pathlib import Path
 from typing import Any
@@ -72,6 +72,8 @@ class DiagnosticsBundle:
     app_info: AppInfo
     settings: dict[str, Any]
     logs: list[str]
+    # Query latency percentiles (KataGoEngine.latency_stats()); empty if no engine
+    engine_latency: dict[str, Any] = field(default_factory=dict)
 
 
 @dataclass
@@ -207,6 +209,18 @@ def collect_app_info(
     )
 
 
+def collect_engine_latency(engine: Any) -> dict[str, Any]:
+    """Query latency percentiles of ``engine`` (``latency_stats()``).
+
+    Returns an empty dict for no engine or engines without instrumentation.
+    """
+    latency_stats = getattr(engine, "latency_stats", None)
+    if not callable(latency_stats):
+        return {}
+    stats = latency_stats()
+    return stats if isinstance(stats, dict) else {}
+
+
 def collect_settings_snapshot(
     config_data: dict[str, Any],
 ) -> dict[str, Any]:
@@ -249,6 +263,7 @@ def collect_diagnostics_bundle(
     data_folder: str = "",
     config_data: dict[str, Any] | None = None,
     logs: list[str] | None = None,
+    engine_latency: dict[str, Any] | None = None,
 ) -> DiagnosticsBundle:
     """Public API to collect diagnostics bundle.
 
@@ -263,6 +278,7 @@ def collect_diagnostics_bundle(
         data_folder: Data folder path.
         config_data: Config dictionary (will be snapshot filtered).
         logs: Log lines list.
+        engine_latency: Query latency snapshot from ``engine.latency_stats()``.
 
     Returns:
         DiagnosticsBundle ready for ZIP generation or LLM text formatting.
@@ -284,6 +300,7 @@ def collect_diagnostics_bundle(
         app_info=app_info,
         settings=settings,
         logs=logs or [],
+        engine_latency=engine_latency or {},
     )
 
 
@@ -410,6 +427,7 @@ def create_diagnostics_zip(
         app_info.json      - App version/paths (sanitized)
         settings.json      - Settings snapshot (engine excluded)
         logs.txt           - Recent logs (sanitized)
+        engine_latency.json - Query latency percentiles (if collected)
         llm_prompt.txt     - LLM-ready text (if extra_files provided)
     """
     try:
@@ -423,6 +441,8 @@ def create_diagnostics_zip(
             {"name": "settings.json", "type": "settings"},
             {"name": "logs.txt", "type": "logs"},
         ]
+        if bundle.engine_latency:
+            files_list.append({"name": "engine_latency.json", "type": "engine"})
 
         # Add extra files to manifest
         if extra_files:
@@ -464,6 +484,10 @@ def create_diagnostics_zip(
             # logs.txt
             _write_logs_entry(zf, "logs.txt", bundle.logs, ctx)
 
+            # engine_latency.json
+            if bundle.engine_latency:
+                _write_json_entry(zf, "engine_latency.json", bundle.engine_latency, ctx)
+
             # Extra files (e.g., llm_prompt.txt)
             if extra_files:
                 for filename, content in extra_files.items():
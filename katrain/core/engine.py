@@ -20,12 +20,16 @@ import subprocess
 import threading
 import time
 from collections.abc import Callable
+from concurrent.futures import Future
 from typing import Any
 
 from katrain.common.platform import get_platform
 from katrain.common.resource_utils import find_package_resource
+from katrain.core.analysis_cache import AnalysisCache, close_analysis_cache, open_analysis_cache
 from katrain.core.constants.metadata import DATA_FOLDER
 from katrain.core.constants.output import OUTPUT_DEBUG, OUTPUT_ERROR, OUTPUT_EXTRA_DEBUG, OUTPUT_INFO
+from katrain.core.engine_io import PARTIAL_RESULT_INTERVAL, PartialResultMerger
+from katrain.core.engine_latency import QueryLatencyTracker
 from katrain.core.game_node import GameNode
 from katrain.core.lang import i18n
 from katrain.core.sgf_parser import Move
@@ -166,6 +170,9 @@ class KataGoEngine(BaseEngine):
     """
 
     PONDER_KEY = "_kt_continuous"
+    # Prefix of generated query ids (``QUERY:1``, ...). ``KataGoEnginePool``
+    # gives each member its own prefix so ids stay unique across the pool.
+    query_id_prefix = "QUERY"
     # Phase LV3-2: tighter Queue.get() timeout in the consumer threads.
     # Previously 5 s; cutting to 1 s makes the stderr / analysis-read
     # threads wake up 5x more often so pending-query checks and shutdown
@@ -179,12 +186,28 @@ class KataGoEngine(BaseEngine):
         status_callback: Callable[[str, str], None] | None = None,
         error_callback: Callable[[str, str | None, bool], None] | None = None,
         main_thread_scheduler: Callable[[Callable[[], None]], None] | None = None,
+        analysis_cache: AnalysisCache | None = None,
     ) -> None:
         super().__init__(katrain, config, error_callback, main_thread_scheduler)
         self.status_callback = status_callback
 
         self.allow_recovery = self.config.get("allow_recovery", True)  # if false, don't give popups
         self.queries: dict[str, Any] = {}  # outstanding query id -> start time and callback
+        # Multi-turn queries (``analyzeTurns`` with several entries) produce
+        # one final result per turn; the query stays in ``queries`` until
+        # the count of outstanding turns recorded here drops to zero.
+        self._turns_remaining: dict[str, int] = {}
+        # Queries removed by terminate_query whose results still arrive:
+        # id -> (final results still expected, pending slot already freed)
+        self._terminated_queries: dict[str, tuple[int, bool]] = {}
+        # Completion handles of sent queries (see engine_query.send_query)
+        self._query_futures: dict[str, Future[dict[str, Any]]] = {}
+        # Notified by the read thread after every processed result so
+        # wait_until() / wait_until_idle() block instead of sleep-polling.
+        self._state_changed = threading.Condition()
+        self._state_generation = 0
+        # Equivalent in-flight queries shared between callers (engine_query.coalesce_key)
+        self._inflight: dict[str, Any] = {}
         self.ponder_query: dict[str, Any] | None = None
         self.query_counter = 0
         self.katago_process: subprocess.Popen[bytes] | None = None
@@ -208,7 +231,8 @@ class KataGoEngine(BaseEngine):
         self._write_queue_seq = itertools.count()
         self._write_queue_payloads: dict[int, tuple[Any, ...]] = {}
         # Output queues for non-blocking I/O (Phase 22)
-        self._stdout_queue: queue.Queue[bytes | None] = queue.Queue()
+        # KataGo output lines, and deliveries of cached results (``engine_query.dispatch_cached``)
+        self._stdout_queue: queue.Queue[bytes | Callable[[], None] | None] = queue.Queue()
         self._stderr_queue: queue.Queue[bytes | None] = queue.Queue()
         # Phase LV1-8: timestamp of the last ``OUTPUT_EXTRA_DEBUG`` JSON
         # dump, used to rate-limit the verbose log stream.
@@ -225,6 +249,17 @@ class KataGoEngine(BaseEngine):
         # Pending query counter for backlog protection (Phase 95B)
         self._pending_query_count = 0
         self._pending_query_lock = threading.Lock()
+        # Queries waiting for a pending slot, heap of (rank, seq, payload)
+        # (engine_query.send_query / release_admitted); guarded by _pending_query_lock.
+        self._admission: list[tuple[tuple[int, int], int, tuple[Any, ...]]] = []
+        # Read-thread merging of isDuringSearch results (engine_io.PartialResultMerger)
+        self._partials = PartialResultMerger(float(config.get("partial_result_interval", PARTIAL_RESULT_INTERVAL)))
+        # Per-stage query timings (engine_latency), shared with the pool's other members
+        self.latency = QueryLatencyTracker()
+        # Persistent position-keyed result cache; None unless ``analysis_cache`` is set.
+        # A cache passed in (shared by a KataGoEnginePool) is closed by its owner.
+        self._owns_analysis_cache = analysis_cache is None
+        self.analysis_cache = analysis_cache if analysis_cache is not None else self._open_analysis_cache()
         if config.get("altcommand", ""):
             # Use shlex.split so we can disable shell=True; this eliminates
             # the risk of the altcommand string being interpreted by the
@@ -369,10 +404,14 @@ class KataGoEngine(BaseEngine):
                 self.terminate_queries(only_for_node=None, lock=False)
                 self.ponder_query = None
                 self.queries = {}
+                self._turns_remaining = {}
+                self._terminated_queries = {}
+                self._inflight = {}
             # Phase 98 fix: Reset pending counter when queries are cleared
             # This is safe because all responses for cleared queries will be ignored
             with self._pending_query_lock:
                 self._pending_query_count = 0
+            self._cancel_query_futures()
 
     def terminate_queries(self, only_for_node: GameNode | None = None, lock: bool = True) -> None:
         from katrain.core.engine_query import terminate_queries as _terminate_queries
@@ -397,12 +436,21 @@ class KataGoEngine(BaseEngine):
     def restart(self) -> None:
         with self.thread_lock:
             self.queries = {}
+            self._turns_remaining = {}
+            self._terminated_queries = {}
+            self._inflight = {}
         # Reset pending counter before shutdown
         with self._pending_query_lock:
             self._pending_query_count = 0
+        self._cancel_query_futures()
         self.shutdown(finish=False)
+        if self._owns_analysis_cache:
+            self.analysis_cache = self._open_analysis_cache()
         self.start()
 
+    def _open_analysis_cache(self) -> AnalysisCache | None:
+        return open_analysis_cache(self.config, lambda msg: self.katrain.log(msg, OUTPUT_ERROR))
+
     def check_alive(
         self, os_error: str = "", exception_if_dead: bool = False, maybe_open_recovery: bool = False
     ) -> bool:
@@ -503,6 +551,13 @@ class KataGoEngine(BaseEngine):
             self.katago_process = None
             self.katrain.log("Terminated KataGo process", OUTPUT_DEBUG)
 
+        # Nothing will resolve the outstanding handles any more
+        self._cancel_query_futures()
+
+        if self._owns_analysis_cache and self.analysis_cache is not None:
+            cache, self.analysis_cache = self.analysis_cache, None
+            close_analysis_cache(self.katrain, cache)
+
         self.katrain.log("Engine shutdown complete", OUTPUT_DEBUG)
 
     def _safe_queue_put(self, q: queue.Queue[Any], item: Any, context: str) -> None:
@@ -595,7 +650,7 @@ class KataGoEngine(BaseEngine):
         # Note: queue.empty() is best-effort and not strictly reliable.
         # This function is advisory; don't use for precise control flow.
         with self.thread_lock:
-            return not self.queries and self.write_queue.empty()
+            return not self.queries and self.write_queue.empty() and not self._admission
 
     @property
     def is_pondering(self) -> bool:
@@ -621,7 +676,32 @@ class KataGoEngine(BaseEngine):
 
     def queries_remaining(self) -> int:
         with self.thread_lock:
-            return len(self.queries) + int(not self.write_queue.empty())
+            return len(self.queries) + int(not self.write_queue.empty()) + len(self._admission)
+
+    def wait_until(
+        self,
+        predicate: Callable[[], bool],
+        timeout: float | None = None,
+        should_stop: Callable[[], bool] | None = None,
+    ) -> bool:
+        from katrain.core.engine_query import wait_until as _impl
+
+        return _impl(self, predicate, timeout=timeout, should_stop=should_stop)
+
+    def wait_until_idle(self, timeout: float | None = None, should_stop: Callable[[], bool] | None = None) -> bool:
+        from katrain.core.engine_query import wait_until_idle as _impl
+
+        return _impl(self, timeout=timeout, should_stop=should_stop)
+
+    def query_id_for_future(self, future: Future[dict[str, Any]]) -> str | None:
+        from katrain.core.engine_query import query_id_for_future as _impl
+
+        return _impl(self, future)
+
+    def _cancel_query_futures(self) -> None:
+        from katrain.core.engine_query import cancel_query_futures as _impl
+
+        _impl(self)
 
     # =================================================================
     # I/O threads (delegated to engine_io)
@@ -666,6 +746,15 @@ class KataGoEngine(BaseEngine):
 
         return _impl(self)
 
+    def latency_stats(self) -> dict[str, dict[str, dict[str, Any]]]:
+        """Query latency percentiles per priority class and stage (see engine_latency)."""
+        return self.latency.snapshot()
+
+    def admission_backlog(self) -> int:
+        from katrain.core.engine_query import admission_backlog as _impl
+
+        return _impl(self)
+
     def has_query_capacity(self, headroom: int = 10) -> bool:
         from katrain.core.engine_query import has_query_capacity as _impl
 
@@ -678,10 +767,11 @@ class KataGoEngine(BaseEngine):
         error_callback: Callable[..., None] | None,
         next_move: Move | None = None,
         node: GameNode | None = None,
+        future: Future[dict[str, Any]] | None = None,
     ) -> bool:
         from katrain.core.engine_query import send_query as _impl
 
-        return _impl(self, query, callback, error_callback, next_move, node)
+        return _impl(self, query, callback, error_callback, next_move, node, future)
 
     def request_analysis(
         self,
@@ -700,10 +790,10 @@ class KataGoEngine(BaseEngine):
         extra_settings: dict[str, Any] | None = None,
         include_policy: bool = True,
         report_every: float | None = None,
-    ) -> None:
+    ) -> Future[dict[str, Any]]:
         from katrain.core.engine_query import request_analysis as _impl
 
-        _impl(
+        return _impl(
             self,
             analysis_node,
             callback,
@@ -722,6 +812,35 @@ class KataGoEngine(BaseEngine):
             report_every,
         )
 
+    def request_multi_turn_analysis(
+        self,
+        analysis_nodes: list[GameNode],
+        callback: Callable[[GameNode, dict[str, Any], bool], None],
+        error_callback: Callable[..., None] | None = None,
+        visits: int | None = None,
+        analyze_fast: bool = False,
+        time_limit: bool = True,
+        priority: int = 0,
+        ownership: bool | None = None,
+        include_policy: bool = True,
+        report_every: float | None = None,
+    ) -> list[Future[dict[str, Any]]]:
+        from katrain.core.engine_query import request_multi_turn_analysis as _impl
+
+        return _impl(
+            self,
+            analysis_nodes,
+            callback,
+            error_callback,
+            visits,
+            analyze_fast,
+            time_limit,
+            priority,
+            ownership,
+            include_policy,
+            report_every,
+        )
+
     def _handle_engine_timeout(self) -> None:
         """Handle engine timeout (called from background thread).
 
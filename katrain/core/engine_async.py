@@ -0,0 +1,129 @@
+"""asyncio front-end for ``KataGoEngine``.
+
+The engine API is thread-callback based: ``callback(analysis, partial_result)``
+runs on the engine read thread. ``AsyncKataGoEngine`` adapts it to asyncio so
+a headless service can keep hundreds of positions in flight from one event
+loop without a waiting thread per position:
+
+    engine = AsyncKataGoEngine(KataGoEngine(katrain, config))
+    analysis = await engine.analyze(node, visits=200)
+    async for update in engine.stream(node):
+        ...  # ``update["isDuringSearch"]`` is False for the final result
+
+Cancelling an awaiting task (or leaving an ``async for`` early) maps to
+``terminate_query`` for a query already sent to KataGo; a query that is
+still queued is dropped by the writer thread instead.
+
+Concurrency is bounded by an ``asyncio.Semaphore`` (``max_in_flight``) kept
+below ``MAX_PENDING_QUERIES`` so excess coroutines wait for a slot on the
+event loop instead of in the engine's admission queue.
+
+Works with ``KataGoEnginePool`` as well (raise ``max_in_flight`` to use the
+extra members' capacity).
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any
+
+from katrain.core.constants.metadata import REPORT_DT
+from katrain.core.engine_query import MAX_PENDING_QUERIES
+
+if TYPE_CHECKING:
+    from katrain.core.engine import KataGoEngine
+    from katrain.core.engine_pool import KataGoEnginePool
+    from katrain.core.game_node import GameNode
+
+
+def _ignore_result(analysis: dict[str, Any], partial_result: bool) -> None:
+    pass
+
+
+class AsyncKataGoEngine:
+    """asyncio adapter over ``KataGoEngine`` / ``KataGoEnginePool``.
+
+    Args:
+        engine: Started engine (or pool) to send queries to.
+        max_in_flight: Maximum concurrently sent queries; defaults to the
+            engine's ``has_query_capacity`` headroom below ``MAX_PENDING_QUERIES``.
+    """
+
+    def __init__(self, engine: KataGoEngine | KataGoEnginePool, max_in_flight: int | None = None) -> None:
+        self.engine = engine
+        self.max_in_flight = max_in_flight or MAX_PENDING_QUERIES - 10
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+
+    async def analyze(self, node: GameNode, **kwargs: Any) -> dict[str, Any]:
+        """Analyze ``node`` and return the final KataGo result.
+
+        ``kwargs`` are passed to ``request_analysis`` (``visits``, ``priority``,
+        ``ownership``, ...). The node itself is not modified beyond
+        ``analysis_visits_requested``.
+
+        Raises:
+            EngineError: The query was rejected or KataGo reported an error.
+            asyncio.CancelledError: The task was cancelled, or the query was
+                dropped by the engine (new game, restart, shutdown).
+        """
+        self._check_kwargs(kwargs)
+        async with self._slots:
+            handle = self.engine.request_analysis(node, callback=_ignore_result, **kwargs)
+            try:
+                return await asyncio.wrap_future(handle)
+            except asyncio.CancelledError:
+                self._terminate(handle)
+                raise
+
+    async def stream(
+        self, node: GameNode, report_every: float = REPORT_DT, **kwargs: Any
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield every ``isDuringSearch`` update for ``node``, then the final result.
+
+        Leaving the loop early (``break``, exception, task cancellation)
+        terminates the query.
+        """
+        self._check_kwargs(kwargs)
+        loop = asyncio.get_running_loop()
+        updates: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+
+        def on_result(analysis: dict[str, Any], partial_result: bool) -> None:
+            # Engine read thread: hand over to the event loop
+            loop.call_soon_threadsafe(updates.put_nowait, analysis)
+
+        async with self._slots:
+            handle = self.engine.request_analysis(node, callback=on_result, report_every=report_every, **kwargs)
+            done = asyncio.wrap_future(handle)
+            try:
+                while True:
+                    # Callbacks are scheduled on the loop before the handle's
+                    # completion, so the final update is always queued first.
+                    if done.done() and updates.empty():
+                        done.result()  # raise EngineError / CancelledError
+                        return  # finished without results (noResults)
+                    next_update = asyncio.ensure_future(updates.get())
+                    await asyncio.wait({next_update, done}, return_when=asyncio.FIRST_COMPLETED)
+                    if not next_update.done():
+                        next_update.cancel()
+                        continue
+                    update = next_update.result()
+                    yield update
+                    if not update.get("isDuringSearch", False):
+                        return
+            finally:
+                if not handle.done():
+                    self._terminate(handle)
+
+    def _terminate(self, handle: Future[dict[str, Any]]) -> None:
+        """Cancel ``handle`` and terminate its query if it was already sent."""
+        handle.cancel()
+        query_id = self.engine.query_id_for_future(handle)
+        if query_id is not None:
+            self.engine.terminate_query(query_id)
+
+    @staticmethod
+    def _check_kwargs(kwargs: dict[str, Any]) -> None:
+        if kwargs.get("ponder"):
+            raise ValueError("AsyncKataGoEngine does not support ponder queries")
@@ -34,6 +34,7 @@ from katrain.core.constants.output import (
     OUTPUT_EXTRA_DEBUG,
     OUTPUT_KATAGO_STDERR,
 )
+from katrain.core.engine_latency import priority_class
 from katrain.core.utils import json_truncate_arrays
 
 if TYPE_CHECKING:
@@ -136,11 +137,24 @@ def read_stderr_thread(widget: KataGoEngine) -> None:
 # =============================================================================
 
 
+# Upper bound on queries drained into one stdin write, so a sweep that keeps
+# enqueueing cannot hold back the flush indefinitely.
+MAX_WRITE_BATCH = 256
+
+_STOP = object()  # _prepare_write: termination signal received
+
+
 def write_stdin_thread(widget: KataGoEngine) -> None:
     """Write queries to KataGo stdin (TOCTOU-safe).
 
     Flush only in a thread since it returns only when the other program reads.
+
+    With ``batch_stdin_writes`` (default on), every item already waiting in
+    ``write_queue`` is drained after the blocking get, each query is
+    serialized once (the same line is used for the debug log), and the
+    whole batch goes out with a single write/flush.
     """
+    batch_writes = bool(widget.config.get("batch_stdin_writes", True))
     while not widget._shutdown_event.is_set():
         # Local capture pattern for TOCTOU safety
         process = widget.katago_process
@@ -150,104 +164,177 @@ def write_stdin_thread(widget: KataGoEngine) -> None:
             # Phase LV3-1: write_queue is a PriorityQueue of
             # ``(priority, seq)``. The actual payload lives in
             # ``_write_queue_payloads`` keyed by seq.
-            priority_item = widget.write_queue.get(block=True, timeout=0.1)
+            priority_items = [widget.write_queue.get(block=True, timeout=0.1)]
         except queue.Empty:
             continue
-        # Check for termination signal (None)
-        if priority_item is None:
+        while batch_writes and len(priority_items) < MAX_WRITE_BATCH:
+            try:
+                priority_items.append(widget.write_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        batch: list[tuple[dict[str, Any], str, bool, float | None]] = []  # (query, line, terminate, enqueued_at)
+        old_ponder_queries: list[dict[str, Any]] = []  # To call terminate_query outside of lock
+        stop = False
+        for priority_item in priority_items:
+            prepared = _prepare_write(widget, priority_item)
+            if prepared is _STOP:
+                stop = True
+                break
+            if prepared is not None:
+                query, line, terminate, enqueued_at, old_ponder_query = prepared
+                batch.append((query, line, terminate, enqueued_at))
+                if old_ponder_query:
+                    old_ponder_queries.append(old_ponder_query)
+
+        if batch and not _write_batch(widget, batch):
+            return  # some other thread will take care of this
+        # Terminate old ponder query outside of lock to avoid deadlock
+        for old_ponder_query in old_ponder_queries:
+            widget.terminate_query(old_ponder_query["id"], ignore_further_results=False)
+        if stop:
             return
-        try:
-            _, seq = priority_item
-            item = widget._write_queue_payloads.pop(seq, None)
-        except (TypeError, ValueError) as e:
-            widget.katrain.log(
-                f"Malformed write_queue priority item dropped: {type(priority_item).__name__} ({e!r})",
-                OUTPUT_ERROR,
-            )
-            continue
-        if item is None:
-            # Sequence id not found in payload dict: must not happen, but
-            # log + continue so we don't silently kill the writer.
-            widget.katrain.log(
-                f"write_queue payload missing for seq={seq}",
-                OUTPUT_ERROR,
-            )
-            continue
-        query: dict[str, Any]
-        callback: Any
-        error_callback: Any
-        next_move: Any
-        node: Any
-        # Phase 159: Defensive unpacking. Production sends only valid 5-tuples
-        # (see engine_query.send_query), but a malformed item (e.g. a 5-char
-        # string from a buggy caller) would unpack into single characters and
-        # then crash on query["id"] = ..., silently killing the writer thread.
-        try:
-            query, callback, error_callback, next_move, node = item
-        except (TypeError, ValueError) as e:
-            widget.katrain.log(
-                f"Malformed write_queue item dropped: {type(item).__name__} ({e!r})",
-                OUTPUT_ERROR,
-            )
-            continue
-        old_ponder_query: dict[str, Any] | None = None  # To call terminate_query outside of lock
-        with widget.thread_lock:
-            if "id" not in query:
-                widget.query_counter += 1
-                query["id"] = f"QUERY:{str(widget.query_counter)}"
-
-            ponder = query.pop(widget.PONDER_KEY, False)
-            if ponder:  # handle pondering in here to be in lock and such
-                pq: dict[str, Any] = widget.ponder_query or {}
-                # basically we handle pondering by just asking for these queries a lot and ignoring duplicates
-                # when a different ponder query comes in, e.g. due to selecting a roi or different node, switch
-                differences = {
-                    k: (pq.get(k), query.get(k))
-                    for k in (query.keys() | pq.keys()) - {"id", "maxVisits", "reportDuringSearchEvery"}
-                    if pq.get(k) != query.get(k)
-                }
-                if differences:
-                    from katrain.core.engine_query import stop_pondering_unlocked  # late import
-
-                    old_ponder_query = stop_pondering_unlocked(widget)
-                    query["maxVisits"] = 10_000_000
-                    query["reportDuringSearchEvery"] = PONDERING_REPORT_DT
-                    widget.ponder_query = query
-                else:
-                    # Duplicate ponder query - discard without sending
-                    # Must decrement counter since send_query already incremented it
-                    from katrain.core.engine_query import decrement_pending_count
 
-                    decrement_pending_count(widget)
-                    continue
 
-            terminate = query.get("action") == "terminate"
-            if not terminate:
-                widget.queries[query["id"]] = (callback, error_callback, time.time(), next_move, node)
-            tag = "ponder " if ponder else ("terminate " if terminate else "")
-            widget.katrain.log(f"Sending {tag}query {query['id']}: {json.dumps(query)}", OUTPUT_DEBUG)
+def _prepare_write(widget: KataGoEngine, priority_item: Any) -> Any:
+    """Register one queued query and serialize it.
 
-        # Write to stdin outside lock (I/O should not be under lock)
-        # Re-capture process reference after lock release
-        process = widget.katago_process
-        if process is None:
-            return
-        try:
-            if process.stdin is None:
-                return
-            process.stdin.write((json.dumps(query) + "\n").encode())
-            process.stdin.flush()
-        except (OSError, AttributeError, ValueError, BrokenPipeError) as e:
-            widget.katrain.log(f"Exception in writing to katago: {e}", OUTPUT_DEBUG)
-            # Decrement pending count for non-terminate queries that failed to send
-            if not terminate:
+    Returns ``(query, line, terminate, enqueued_at, old_ponder_query)``, None if the item
+    is dropped (malformed, cancelled, duplicate ponder), or ``_STOP`` on the
+    termination signal.
+    """
+    # Check for termination signal (None)
+    if priority_item is None:
+        return _STOP
+    try:
+        _, seq = priority_item
+        item = widget._write_queue_payloads.pop(seq, None)
+    except (TypeError, ValueError) as e:
+        widget.katrain.log(
+            f"Malformed write_queue priority item dropped: {type(priority_item).__name__} ({e!r})",
+            OUTPUT_ERROR,
+        )
+        return None
+    if item is None:
+        # Sequence id not found in payload dict: must not happen, but
+        # log + continue so we don't silently kill the writer.
+        widget.katrain.log(
+            f"write_queue payload missing for seq={seq}",
+            OUTPUT_ERROR,
+        )
+        return None
+    query: dict[str, Any]
+    callback: Any
+    error_callback: Any
+    next_move: Any
+    node: Any
+    # Phase 159: Defensive unpacking. Production sends only valid 5-tuples
+    # (see engine_query.send_query), but a malformed item (e.g. a 5-char
+    # string from a buggy caller) would unpack into single characters and
+    # then crash on query["id"] = ..., silently killing the writer thread.
+    try:
+        query, callback, error_callback, next_move, node = item
+    except (TypeError, ValueError) as e:
+        widget.katrain.log(
+            f"Malformed write_queue item dropped: {type(item).__name__} ({e!r})",
+            OUTPUT_ERROR,
+        )
+        return None
+    old_ponder_query: dict[str, Any] | None = None
+    from katrain.core.engine_query import QUERY_ENQUEUED_KEY, QUERY_FUTURE_KEY  # late import
+
+    with widget.thread_lock:
+        future = query.pop(QUERY_FUTURE_KEY, None)
+        enqueued_at = query.pop(QUERY_ENQUEUED_KEY, None)
+        if future is not None and future.cancelled():
+            # Cancelled while still queued (e.g. an abandoned async waiter)
+            from katrain.core.engine_query import decrement_pending_count
+
+            decrement_pending_count(widget)
+            return None
+        if "id" not in query:
+            widget.query_counter += 1
+            query["id"] = f"{widget.query_id_prefix}:{str(widget.query_counter)}"
+
+        ponder = query.pop(widget.PONDER_KEY, False)
+        if ponder:  # handle pondering in here to be in lock and such
+            pq: dict[str, Any] = widget.ponder_query or {}
+            # basically we handle pondering by just asking for these queries a lot and ignoring duplicates
+            # when a different ponder query comes in, e.g. due to selecting a roi or different node, switch
+            differences = {
+                k: (pq.get(k), query.get(k))
+                for k in (query.keys() | pq.keys()) - {"id", "maxVisits", "reportDuringSearchEvery"}
+                if pq.get(k) != query.get(k)
+            }
+            if differences:
+                from katrain.core.engine_query import stop_pondering_unlocked  # late import
+
+                old_ponder_query = stop_pondering_unlocked(widget)
+                query["maxVisits"] = 10_000_000
+                query["reportDuringSearchEvery"] = PONDERING_REPORT_DT
+                widget.ponder_query = query
+            else:
+                # Duplicate ponder query - discard without sending
+                # Must decrement counter since send_query already incremented it
                 from katrain.core.engine_query import decrement_pending_count
 
                 decrement_pending_count(widget)
-            return  # some other thread will take care of this
-        # Terminate old ponder query outside of lock to avoid deadlock
-        if old_ponder_query:
-            widget.terminate_query(old_ponder_query["id"], ignore_further_results=False)
+                if future is not None:
+                    future.cancel()
+                return None
+
+        terminate = query.get("action") == "terminate"
+        if not terminate:
+            widget.queries[query["id"]] = (callback, error_callback, time.time(), next_move, node)
+            if future is not None:
+                widget._query_futures[query["id"]] = future
+            analyze_turns = query.get("analyzeTurns") or []
+            if len(analyze_turns) > 1:
+                widget._turns_remaining[query["id"]] = len(analyze_turns)
+        line = json.dumps(query)
+        tag = "ponder " if ponder else ("terminate " if terminate else "")
+        widget.katrain.log(f"Sending {tag}query {query['id']}: {line}", OUTPUT_DEBUG)
+    return query, line, terminate, enqueued_at, old_ponder_query
+
+
+def _write_batch(widget: KataGoEngine, batch: list[tuple[dict[str, Any], str, bool, float | None]]) -> bool:
+    """Write serialized queries to stdin with one write/flush.
+
+    Returns False if the process is gone or the write failed; the
+    non-terminate queries of the batch are then released and their
+    completion handles failed.
+    """
+    # Write to stdin outside lock (I/O should not be under lock)
+    # Re-capture process reference after lock release
+    process = widget.katago_process
+    if process is None:
+        return False
+    try:
+        if process.stdin is None:
+            return False
+        process.stdin.write("".join(line + "\n" for _, line, _, _ in batch).encode())
+        process.stdin.flush()
+    except (OSError, AttributeError, ValueError, BrokenPipeError) as e:
+        widget.katrain.log(f"Exception in writing to katago: {e}", OUTPUT_DEBUG)
+        from katrain.core.engine_query import decrement_pending_count, fail_query_future
+
+        # Decrement pending count for non-terminate queries that failed to send
+        for query, _, terminate, _ in batch:
+            if terminate:
+                continue
+            decrement_pending_count(widget)
+            with widget.thread_lock:
+                future = widget._query_futures.pop(query["id"], None)
+            fail_query_future(future, {"error": f"Exception in writing to katago: {e}", "id": query["id"]})
+        return False
+    latency = getattr(widget, "latency", None)
+    if latency is not None:
+        written_at = time.monotonic()
+        for query, _, terminate, enqueued_at in batch:
+            if not terminate and enqueued_at is not None:
+                cls = priority_class(query.get("priority", 0) - widget.base_priority)
+                latency.sent(query["id"], cls, enqueued_at, written_at)
+    return True
 
 
 # =============================================================================
@@ -255,18 +342,94 @@ def write_stdin_thread(widget: KataGoEngine) -> None:
 # =============================================================================
 
 
+# Default minimum spacing (seconds) of partial results delivered per query;
+# below PONDERING_REPORT_DT so the built-in report intervals pass unmerged.
+PARTIAL_RESULT_INTERVAL = 0.2
+
+# Delivery timestamps kept by PartialResultMerger before idle ones are pruned
+MAX_TRACKED_PARTIALS = 1000
+
+
+class PartialResultMerger:
+    """Per-query merging of ``isDuringSearch`` results for the read thread.
+
+    A partial result is delivered right away only if its query had no
+    partial delivered within the last ``interval`` seconds and no more
+    output is waiting in the stdout queue; otherwise it replaces the
+    query's held partial (older held partials are stale and dropped).
+    Held partials go out once due, and are discarded when the query's
+    final result or error arrives. ``interval <= 0`` delivers every line.
+
+    Only used from the read thread, so it needs no locking.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._last_delivery: dict[str, float] = {}
+        self._held: dict[str, tuple[dict[str, Any], float]] = {}  # query id -> (analysis, received_at)
+        self.merged = 0  # partials superseded without being delivered
+
+    def hold(self, query_id: str, analysis: dict[str, Any], received_at: float, backlog: bool) -> bool:
+        """True if ``analysis`` was held back instead of being delivered now."""
+        if self.interval <= 0:
+            return False
+        if len(self._last_delivery) > MAX_TRACKED_PARTIALS:
+            # Queries terminated mid-search never finish(); forget long-idle ones
+            self._last_delivery = {
+                qid: t for qid, t in self._last_delivery.items() if received_at - t < 60 or qid in self._held
+            }
+        if not backlog and received_at - self._last_delivery.get(query_id, -self.interval) >= self.interval:
+            self._held.pop(query_id, None)
+            self._last_delivery[query_id] = received_at
+            return False
+        if query_id in self._held:
+            self.merged += 1
+        self._held[query_id] = (analysis, received_at)
+        return True
+
+    def finish(self, query_id: str) -> None:
+        """The query's final result or error arrived: its held partial is stale."""
+        if self._held.pop(query_id, None) is not None:
+            self.merged += 1
+        self._last_delivery.pop(query_id, None)
+
+    def next_due(self) -> float | None:
+        """Monotonic time at which the earliest held partial becomes due."""
+        if not self._held:
+            return None
+        return min(self._last_delivery.get(qid, 0.0) + self.interval for qid in self._held)
+
+    def pop_due(self, now: float) -> list[tuple[dict[str, Any], float]]:
+        due = [qid for qid in self._held if now - self._last_delivery.get(qid, -self.interval) >= self.interval]
+        for qid in due:
+            self._last_delivery[qid] = now
+        return [self._held.pop(qid) for qid in due]
+
+
 def analysis_read_thread(widget: KataGoEngine) -> None:
     """Process analysis results from queue (non-blocking with timeout)."""
+    partials: PartialResultMerger = widget._partials
     while not widget._shutdown_event.is_set():
+        timeout = widget.IO_TIMEOUT
+        next_due = partials.next_due()
+        if next_due is not None:
+            timeout = min(timeout, max(0.0, next_due - time.monotonic()))
         try:
-            raw_line = widget._stdout_queue.get(timeout=widget.IO_TIMEOUT)
+            raw_line = widget._stdout_queue.get(timeout=timeout)
             if raw_line is None:
                 return  # Termination signal from reader thread
+            if callable(raw_line):  # results served from the analysis cache, delivered like KataGo's
+                raw_line()
+                continue
             line = _ensure_str(raw_line).strip()
+            received_at = time.monotonic()
         except queue.Empty:
             # Timeout - check if we should continue or handle timeout
             if widget._shutdown_event.is_set():
                 return
+            if next_due is not None:
+                _deliver_held_partials(widget, partials)
+                continue
             # Check if there are pending queries and process is dead
             with widget.thread_lock:
                 has_pending_queries = bool(widget.queries)
@@ -290,106 +453,207 @@ def analysis_read_thread(widget: KataGoEngine) -> None:
             msg = f"KataGo Engine Failed: {line}"
             widget._fire_engine_error(msg, KATAGO_EXCEPTION)
             return
-        if not line:
-            continue
-        query_found = False
-        try:
-            analysis = json.loads(line)
-            if "id" not in analysis:
-                widget.katrain.log(f"Error without ID {analysis} received from KataGo", OUTPUT_ERROR)
-                continue
-            query_id = analysis["id"]
+        _process_line(widget, line, received_at, partials)
+        if next_due is not None and widget._stdout_queue.empty():
+            _deliver_held_partials(widget, partials)
 
-            # Retrieve query data under lock to prevent race conditions
-            # Callbacks are executed outside the lock to avoid deadlocks
-            callback = None
-            error_callback = None
-            start_time = None
-            next_move = None
 
-            with widget.thread_lock:
-                if query_id not in widget.queries:
-                    # Query was already removed by terminate_queries() or on_new_game()
-                    # This is a normal case when switching games or canceling analysis
-                    if analysis.get("action") != "terminate":
-                        widget.katrain.log(
-                            f"Query result {query_id} discarded -- recent new game or node reset?", OUTPUT_DEBUG
-                        )
-                    # Phase 98 fix: Decrement pending count even for discarded queries
-                    from katrain.core.engine_query import decrement_pending_count
+def _deliver_held_partials(widget: KataGoEngine, partials: PartialResultMerger) -> None:
+    for analysis, received_at in partials.pop_due(time.monotonic()):
+        _dispatch_analysis(widget, analysis, received_at, None, held=True)
 
-                    decrement_pending_count(widget)
-                    continue
-                query_found = True
-                callback, error_callback, start_time, next_move, _ = widget.queries[query_id]
-                if "error" in analysis:
-                    del widget.queries[query_id]
-                elif "warning" in analysis or "terminateId" in analysis:
-                    pass  # No deletion needed for warnings/terminate confirmations
-                else:
-                    partial_result = analysis.get("isDuringSearch", False)
-                    if not partial_result:
-                        del widget.queries[query_id]
 
-            # Process results outside the lock
-            from katrain.core.engine_query import (
-                decrement_pending_count,
-                invoke_error_callback,
-            )
-            from katrain.core.notify_helpers import maybe_notify_analysis_complete
+def _process_line(widget: KataGoEngine, line: str, received_at: float, partials: PartialResultMerger) -> None:
+    """Decode one KataGo output line and dispatch it."""
+    latency = getattr(widget, "latency", None)
+    try:
+        analysis = json.loads(line)
+        decode_time = time.monotonic() - received_at
+        if "id" not in analysis:
+            widget.katrain.log(f"Error without ID {analysis} received from KataGo", OUTPUT_ERROR)
+            return
+        if latency is not None:
+            latency.record(analysis["id"], "decode", decode_time)
+    except Exception as e:  # noqa: BLE001 - thread exception, must log and continue processing
+        widget.katrain.log(
+            f"Unexpected exception {e} while processing KataGo output {line}\n{traceback.format_exc()}",
+            OUTPUT_ERROR,
+        )
+        return
+    _dispatch_analysis(widget, analysis, received_at, partials)
+
+
+def _discard_terminated_result(widget: KataGoEngine, query_id: str, analysis: dict[str, Any]) -> bool:
+    """Account for a result of a query removed by ``terminate_query`` (caller holds thread_lock).
+
+    Returns:
+        True for the first final result of the query, which frees its pending
+        slot. Partial results, further turns and results of queries cleared by
+        on_new_game() / restart() (whose slots were reset) free nothing.
+    """
+    entry = widget._terminated_queries.get(query_id)
+    if entry is None or (analysis.get("isDuringSearch", False) and "error" not in analysis):
+        return False
+    remaining, released = entry
+    if remaining > 1:
+        widget._terminated_queries[query_id] = (remaining - 1, True)
+    else:
+        del widget._terminated_queries[query_id]
+    return not released
+
+
+def _dispatch_analysis(
+    widget: KataGoEngine,
+    analysis: dict[str, Any],
+    received_at: float,
+    partials: PartialResultMerger | None,
+    held: bool = False,
+) -> None:
+    """Route one decoded result to its query's callbacks.
+
+    ``partials`` is None when delivering a partial that ``PartialResultMerger``
+    held back (``held``); such a result is dropped silently if its query is
+    gone by now, since the line was already accounted for when it arrived.
+    """
+    latency = getattr(widget, "latency", None)
+    query_id = analysis["id"]
+    query_found = False
+    try:
+        # Retrieve query data under lock to prevent race conditions
+        # Callbacks are executed outside the lock to avoid deadlocks
+        callback = None
+        error_callback = None
+        start_time = None
+        next_move = None
+        # False while a multi-turn query still has turns outstanding
+        query_complete = True
+        # Completion handle, popped once the query is finished
+        future = None
 
+        with widget.thread_lock:
+            if query_id not in widget.queries:
+                if held:
+                    return
+                # Query was already removed by terminate_queries() or on_new_game()
+                # This is a normal case when switching games or canceling analysis
+                if analysis.get("action") == "terminate":
+                    release = True  # acknowledgement of a terminate query, which took a slot itself
+                else:
+                    widget.katrain.log(
+                        f"Query result {query_id} discarded -- recent new game or node reset?", OUTPUT_DEBUG
+                    )
+                    release = _discard_terminated_result(widget, query_id, analysis)
+                if release:
+                    from katrain.core.engine_query import decrement_pending_count, notify_waiters
+
+                    decrement_pending_count(widget)
+                    notify_waiters(widget)
+                return
+            query_found = True
+            callback, error_callback, start_time, next_move, _ = widget.queries[query_id]
             if "error" in analysis:
-                if error_callback:
-                    invoke_error_callback(widget, error_callback, analysis)
-                elif not (next_move and "Illegal move" in analysis["error"]):  # sweep
-                    widget.katrain.log(f"{analysis} received from KataGo", OUTPUT_ERROR)
-                # Decrement pending count on error completion
-                decrement_pending_count(widget)
+                del widget.queries[query_id]
+                widget._turns_remaining.pop(query_id, None)
+                future = widget._query_futures.pop(query_id, None)
             elif "warning" in analysis or "terminateId" in analysis:
-                widget.katrain.log(f"{analysis} received from KataGo", OUTPUT_DEBUG)
+                pass  # No deletion needed for warnings/terminate confirmations
             else:
                 partial_result = analysis.get("isDuringSearch", False)
-                time_taken = time.time() - start_time
-                results_exist = not analysis.get("noResults", False)
+                if partial_result:
+                    if partials is not None and partials.hold(
+                        query_id, analysis, received_at, backlog=not widget._stdout_queue.empty()
+                    ):
+                        return  # delivered later, or superseded by a newer result
+                else:
+                    turns_left = widget._turns_remaining.get(query_id, 1) - 1
+                    if turns_left > 0:
+                        widget._turns_remaining[query_id] = turns_left
+                        query_complete = False
+                    else:
+                        widget._turns_remaining.pop(query_id, None)
+                        del widget.queries[query_id]
+                        future = widget._query_futures.pop(query_id, None)
+
+        # Process results outside the lock
+        from katrain.core.engine_query import (
+            decrement_pending_count,
+            fail_query_future,
+            invoke_error_callback,
+            notify_waiters,
+        )
+        from katrain.core.notify_helpers import maybe_notify_analysis_complete
+
+        if "error" in analysis:
+            if partials is not None:
+                partials.finish(query_id)
+            if error_callback:
+                invoke_error_callback(widget, error_callback, analysis)
+            elif not (next_move and "Illegal move" in analysis["error"]):  # sweep
+                widget.katrain.log(f"{analysis} received from KataGo", OUTPUT_ERROR)
+            # Decrement pending count on error completion
+            decrement_pending_count(widget)
+            fail_query_future(future, analysis)
+            if latency is not None:
+                latency.discard(query_id)
+        elif "warning" in analysis or "terminateId" in analysis:
+            widget.katrain.log(f"{analysis} received from KataGo", OUTPUT_DEBUG)
+        else:
+            partial_result = analysis.get("isDuringSearch", False)
+            if not partial_result and partials is not None:
+                partials.finish(query_id)
+            time_taken = time.time() - start_time
+            results_exist = not analysis.get("noResults", False)
+            widget.katrain.log(
+                f"[{time_taken:.1f}][{query_id}][{'....' if partial_result else 'done'}] KataGo analysis received: {len(analysis.get('moveInfos', []))} candidate moves, {analysis['rootInfo']['visits'] if results_exist else 'n/a'} visits",
+                OUTPUT_DEBUG,
+            )
+            # Phase LV1-8: rate-limit the verbose JSON dump to at most
+            # once per second so debug runs don't bottleneck on disk I/O.
+            now = time.time()
+            if now - widget._last_extra_debug_log_time > 1.0:
+                widget._last_extra_debug_log_time = now
+                widget.katrain.log(json_truncate_arrays(analysis), OUTPUT_EXTRA_DEBUG)
+            callback_start = time.monotonic()
+            try:
+                if callback and results_exist:
+                    callback(analysis, partial_result)
+            except Exception as e:  # noqa: BLE001 - callback exception, must log and continue
                 widget.katrain.log(
-                    f"[{time_taken:.1f}][{query_id}][{'....' if partial_result else 'done'}] KataGo analysis received: {len(analysis.get('moveInfos', []))} candidate moves, {analysis['rootInfo']['visits'] if results_exist else 'n/a'} visits",
-                    OUTPUT_DEBUG,
+                    f"Error in engine callback for query {query_id}: {e}\n{traceback.format_exc()}",
+                    OUTPUT_ERROR,
                 )
-                # Phase LV1-8: rate-limit the verbose JSON dump to at most
-                # once per second so debug runs don't bottleneck on disk I/O.
-                now = time.time()
-                if now - widget._last_extra_debug_log_time > 1.0:
-                    widget._last_extra_debug_log_time = now
-                    widget.katrain.log(json_truncate_arrays(analysis), OUTPUT_EXTRA_DEBUG)
-                try:
-                    if callback and results_exist:
-                        callback(analysis, partial_result)
-                except Exception as e:  # noqa: BLE001 - callback exception, must log and continue
-                    widget.katrain.log(
-                        f"Error in engine callback for query {query_id}: {e}\n{traceback.format_exc()}",
-                        OUTPUT_ERROR,
-                    )
-                # Decrement pending count on success completion (non-partial only)
-                if not partial_result:
-                    decrement_pending_count(widget)
-
-                # Phase 105: ANALYSIS_COMPLETE通知（キーワード引数必須）
-                maybe_notify_analysis_complete(
-                    katrain=widget.katrain,
-                    partial_result=partial_result,
-                    results_exist=results_exist,
-                    query_id=query_id,
-                )
-
-            if getattr(widget.katrain, "update_state", None):  # easier mocking etc
-                widget.katrain.update_state()
-        except Exception as e:  # noqa: BLE001 - thread exception, must log and continue processing
-            widget.katrain.log(
-                f"Unexpected exception {e} while processing KataGo output {line}\n{traceback.format_exc()}",
-                OUTPUT_ERROR,
+            if latency is not None:
+                if callback and results_exist:
+                    latency.record(query_id, "callback", time.monotonic() - callback_start)
+                if not partial_result and query_complete:
+                    latency.finished(query_id, received_at)
+            # Decrement pending count on success completion (non-partial
+            # only, and only once the last turn of a multi-turn query is in)
+            if not partial_result and query_complete:
+                decrement_pending_count(widget)
+            # Resolve after the callback so waiters see the stored result
+            if future is not None and not future.done():
+                future.set_result(analysis)
+
+            # Phase 105: ANALYSIS_COMPLETE通知（キーワード引数必須）
+            maybe_notify_analysis_complete(
+                katrain=widget.katrain,
+                partial_result=partial_result,
+                results_exist=results_exist,
+                query_id=query_id,
             )
-            # Decrement pending count if query was found but processing failed
-            if query_found:
-                from katrain.core.engine_query import decrement_pending_count
 
-                decrement_pending_count(widget)
+        if getattr(widget.katrain, "update_state", None):  # easier mocking etc
+            widget.katrain.update_state()
+        notify_waiters(widget)
+    except Exception as e:  # noqa: BLE001 - thread exception, must log and continue processing
+        widget.katrain.log(
+            f"Unexpected exception {e} while processing KataGo output {analysis}\n{traceback.format_exc()}",
+            OUTPUT_ERROR,
+        )
+        # Decrement pending count if query was found but processing failed
+        if query_found and not held:
+            from katrain.core.engine_query import decrement_pending_count, notify_waiters
+
+            decrement_pending_count(widget)
+            notify_waiters(widget)
@@ -0,0 +1,153 @@
+"""Per-query latency instrumentation for the KataGo engine pipeline.
+
+Each query is timestamped at every stage between ``send_query`` and the end
+of its result callback:
+
+    queue_wait  send_query accepted it -> written to KataGo stdin
+                (includes time in the admission queue)
+    search      written -> final result line received (all turns)
+    decode      ``json.loads`` of one result line
+    callback    one result callback (e.g. ``GameNode.set_analysis``)
+    total       send_query -> final callback returned
+
+Samples are kept per priority class (see ``priority_class``) in bounded
+windows, so ``snapshot()`` reports p50/p95/p99 over the most recent
+queries at constant memory. ``KataGoEngine.latency_stats()`` exposes the
+snapshot and the diagnostics bundle includes it as ``engine_latency.json``.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any
+
+from katrain.core.constants.priorities import PRIORITY_DEFAULT, PRIORITY_EXTRA_AI_QUERY
+
+STAGES = ("queue_wait", "search", "decode", "callback", "total")
+
+# Most recent samples kept per (priority class, stage)
+LATENCY_WINDOW = 2048
+
+# Queries dropped without a final result (terminate, new game) are never
+# finished; the oldest tracked entries are forgotten beyond this many.
+MAX_TRACKED_QUERIES = 10_000
+
+
+def priority_class(relative_priority: int) -> str:
+    """Bucket a query priority (relative to the engine's base priority).
+
+    ``background`` covers full-game analysis and sweeps, ``extra`` the
+    interactive refinements (alternatives, equalize, extra analysis),
+    ``default`` regular move analysis and ``ai`` AI move queries.
+    """
+    if relative_priority < 0:
+        return "background"
+    if relative_priority < PRIORITY_DEFAULT:
+        return "extra"
+    if relative_priority < PRIORITY_EXTRA_AI_QUERY:
+        return "default"
+    return "ai"
+
+
+class LatencyHistogram:
+    """Sliding window of duration samples with percentile summaries."""
+
+    def __init__(self, window: int = LATENCY_WINDOW) -> None:
+        self.samples: deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def summary(self) -> dict[str, Any]:
+        """Count and mean over all samples; percentiles over the window, in milliseconds."""
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {"count": 0}
+
+        def pct(p: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 3)
+
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3),
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "max_ms": round(ordered[-1] * 1000, 3),
+        }
+
+
+class QueryLatencyTracker:
+    """Thread-safe latency recorder shared by the writer and read threads.
+
+    Timestamps use ``time.monotonic()``. Queries are tracked from
+    ``sent`` (written to stdin) until ``finished`` or ``discard``.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW) -> None:
+        self.window = window
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple[str, str], LatencyHistogram] = {}
+        # query id -> (priority class, enqueued_at, written_at)
+        self._in_flight: dict[str, tuple[str, float, float]] = {}
+
+    def _add(self, cls: str, stage: str, seconds: float) -> None:
+        histogram = self._histograms.get((cls, stage))
+        if histogram is None:
+            histogram = self._histograms[(cls, stage)] = LatencyHistogram(self.window)
+        histogram.add(max(0.0, seconds))
+
+    def sent(self, query_id: str, cls: str, enqueued_at: float, written_at: float | None = None) -> None:
+        """The query was written to KataGo; records its queue wait."""
+        written_at = time.monotonic() if written_at is None else written_at
+        with self._lock:
+            if len(self._in_flight) >= MAX_TRACKED_QUERIES:
+                del self._in_flight[next(iter(self._in_flight))]
+            self._in_flight[query_id] = (cls, enqueued_at, written_at)
+            self._add(cls, "queue_wait", written_at - enqueued_at)
+
+    def record(self, query_id: str, stage: str, seconds: float) -> None:
+        """Record a per-line stage (``decode`` / ``callback``) for a sent query."""
+        with self._lock:
+            entry = self._in_flight.get(query_id)
+            if entry is not None:
+                self._add(entry[0], stage, seconds)
+
+    def finished(self, query_id: str, received_at: float, done_at: float | None = None) -> None:
+        """The last result line arrived at ``received_at`` and its callback returned."""
+        done_at = time.monotonic() if done_at is None else done_at
+        with self._lock:
+            entry = self._in_flight.pop(query_id, None)
+            if entry is None:
+                return
+            cls, enqueued_at, written_at = entry
+            self._add(cls, "search", received_at - written_at)
+            self._add(cls, "total", done_at - enqueued_at)
+
+    def discard(self, query_id: str) -> None:
+        """Stop tracking a query that failed or was dropped."""
+        with self._lock:
+            self._in_flight.pop(query_id, None)
+
+    def snapshot(self) -> dict[str, dict[str, dict[str, Any]]]:
+        """``{priority class: {stage: summary}}`` for every class seen so far."""
+        with self._lock:
+            classes = sorted({cls for cls, _ in self._histograms})
+            return {
+                cls: {
+                    stage: self._histograms[(cls, stage)].summary()
+                    for stage in STAGES
+                    if (cls, stage) in self._histograms
+                }
+                for cls in classes
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
@@ -0,0 +1,325 @@
+"""Pool of KataGo processes behind the single-engine API.
+
+``KataGoEngine`` owns exactly one subprocess. On many-core CPU-only
+machines one KataGo process leaves most cores idle during batch runs, so
+``KataGoEnginePool`` starts several ``KataGoEngine`` members from the same
+engine config and exposes the subset of the ``KataGoEngine`` surface that
+``Game`` / ``GameNode`` / ``katrain.core.batch`` use
+(``request_analysis``, ``terminate_queries``, ``is_idle``, ...).
+
+Dispatch rules:
+
+- Analysis queries go to the alive member with the lowest
+  ``_pending_query_count``.
+- Ponder queries always go to the first alive member, so that member's
+  duplicate-ponder detection keeps working.
+- A member found dead at dispatch time is restarted in place; if it stays
+  dead it is skipped, and not restarted again before a backoff
+  (``RESTART_BACKOFF``, doubling per failed attempt up to
+  ``RESTART_BACKOFF_MAX``) has passed. Errors from one member are only surfaced to the
+  pool's ``error_callback`` once no member is alive any more.
+
+Each member gets its own query id prefix (``POOL0:1``, ``POOL1:1``, ...)
+so ``terminate_query`` can be routed to the member that owns the id.
+
+All members share the pool's state-change condition, so ``wait_until`` /
+``wait_until_idle`` on the pool wake on results from any member, and one
+``AnalysisCache`` (opened and closed by the pool), so its counters cover the
+whole pool.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any
+
+from katrain.core.analysis_cache import close_analysis_cache, open_analysis_cache
+from katrain.core.constants.output import OUTPUT_DEBUG, OUTPUT_ERROR
+from katrain.core.engine import KataGoEngine
+from katrain.core.engine_latency import QueryLatencyTracker
+from katrain.core.game_node import GameNode
+from katrain.core.sgf_parser import Move
+
+
+class KataGoEnginePool:
+    """Several ``KataGoEngine`` processes behind one engine API.
+
+    Args:
+        katrain: KaTrain instance (logging / config access), passed to members.
+        config: Engine config section, shared by all members.
+        size: Number of KataGo processes. ``None`` reads ``pool_size`` from
+            ``config`` (default 1).
+        status_callback: Forwarded to every member.
+        error_callback: Called when the last alive member reports an error.
+        main_thread_scheduler: Forwarded to every member.
+        engine_factory: Builds one member; defaults to ``KataGoEngine``.
+            Exposed so tests can inject fakes.
+    """
+
+    PONDER_KEY = KataGoEngine.PONDER_KEY
+    # Seconds before a member that failed to restart is tried again, doubled per failed attempt
+    RESTART_BACKOFF = 2.0
+    RESTART_BACKOFF_MAX = 120.0
+
+    def __init__(
+        self,
+        katrain: Any,
+        config: dict[str, Any],
+        size: int | None = None,
+        status_callback: Callable[[str, str], None] | None = None,
+        error_callback: Callable[[str, str | None, bool], None] | None = None,
+        main_thread_scheduler: Callable[[Callable[[], None]], None] | None = None,
+        engine_factory: Callable[..., KataGoEngine] | None = None,
+    ) -> None:
+        self.katrain = katrain
+        self.config = config
+        self._error_callback = error_callback
+        size = max(1, int(size if size is not None else config.get("pool_size", 1)))
+        factory = engine_factory or KataGoEngine
+        self._state_changed = threading.Condition()
+        # Query ids carry the member prefix, so one tracker serves the whole pool
+        self.latency = QueryLatencyTracker()
+        self.analysis_cache = open_analysis_cache(config, lambda msg: katrain.log(msg, OUTPUT_ERROR))
+        self.members: list[KataGoEngine] = []
+        # Per member: failed restarts in a row, and time.monotonic() before which it is not restarted
+        self._restart_failures = [0] * size
+        self._restart_after = [0.0] * size
+        for i in range(size):
+            member = factory(
+                katrain,
+                config,
+                status_callback=status_callback,
+                error_callback=self._on_member_error,
+                main_thread_scheduler=main_thread_scheduler,
+                analysis_cache=self.analysis_cache,
+            )
+            member.query_id_prefix = f"POOL{i}"
+            member._state_changed = self._state_changed
+            member.latency = self.latency
+            self.members.append(member)
+
+    # =================================================================
+    # Member selection / health
+    # =================================================================
+
+    def _on_member_error(self, message: str, code: str | None = None, allow_popup: bool = True) -> None:
+        """Error callback of every member: only escalate once the whole pool is down."""
+        if any(m.check_alive() for m in self.members):
+            self.katrain.log(f"Engine pool member error (pool still serving): {message}", OUTPUT_ERROR)
+            return
+        if self._error_callback is not None:
+            self._error_callback(message, code, allow_popup)
+        else:
+            self.katrain.log(message, OUTPUT_ERROR)
+
+    def _ensure_alive(self, i: int) -> bool:
+        """Restart member ``i`` if its process died and its backoff has passed; return whether it is alive."""
+        member = self.members[i]
+        if member.check_alive():
+            self._restart_failures[i] = 0
+            return True
+        now = time.monotonic()
+        if now < self._restart_after[i]:
+            return False
+        self.katrain.log(f"Engine pool: restarting dead member {member.query_id_prefix}", OUTPUT_DEBUG)
+        try:
+            member.restart()
+            alive = member.check_alive()
+        except Exception as e:  # noqa: BLE001 - a failed restart must not fail the pool
+            self.katrain.log(f"Engine pool: restart of {member.query_id_prefix} failed: {e}", OUTPUT_ERROR)
+            alive = False
+        if alive:
+            self._restart_failures[i] = 0
+        else:
+            backoff = min(self.RESTART_BACKOFF * 2 ** self._restart_failures[i], self.RESTART_BACKOFF_MAX)
+            self._restart_failures[i] += 1
+            self._restart_after[i] = now + backoff
+        return alive
+
+    def _alive_members(self) -> list[KataGoEngine]:
+        return [m for i, m in enumerate(self.members) if self._ensure_alive(i)]
+
+    def least_loaded(self) -> KataGoEngine:
+        """Alive member with the fewest pending and waiting queries (first member if none is alive)."""
+        alive = self._alive_members()
+        if not alive:
+            return self.members[0]  # its send_query reports "Engine not alive" to the caller
+        return min(alive, key=lambda m: m.get_pending_count() + m.admission_backlog())
+
+    def _ponder_member(self) -> KataGoEngine:
+        alive = self._alive_members()
+        return alive[0] if alive else self.members[0]
+
+    def _member_for_query_id(self, query_id: str) -> KataGoEngine | None:
+        prefix = str(query_id).split(":", 1)[0]
+        for member in self.members:
+            if member.query_id_prefix == prefix:
+                return member
+        return None
+
+    # =================================================================
+    # KataGoEngine-compatible API
+    # =================================================================
+
+    @staticmethod
+    def get_rules(ruleset: str | dict[str, Any]) -> str | dict[str, Any]:
+        return KataGoEngine.get_rules(ruleset)
+
+    @property
+    def base_priority(self) -> int:
+        return self.members[0].base_priority
+
+    @property
+    def is_pondering(self) -> bool:
+        return any(m.is_pondering for m in self.members)
+
+    def request_analysis(
+        self,
+        analysis_node: GameNode,
+        callback: Callable[..., None],
+        error_callback: Callable[..., None] | None = None,
+        visits: int | None = None,
+        analyze_fast: bool = False,
+        time_limit: bool = True,
+        find_alternatives: bool = False,
+        region_of_interest: list[int] | None = None,
+        priority: int = 0,
+        ponder: bool = False,
+        ownership: bool | None = None,
+        next_move: Move | None = None,
+        extra_settings: dict[str, Any] | None = None,
+        include_policy: bool = True,
+        report_every: float | None = None,
+    ) -> Future[dict[str, Any]]:
+        member = self._ponder_member() if ponder else self.least_loaded()
+        return member.request_analysis(
+            analysis_node,
+            callback,
+            error_callback=error_callback,
+            visits=visits,
+            analyze_fast=analyze_fast,
+            time_limit=time_limit,
+            find_alternatives=find_alternatives,
+            region_of_interest=region_of_interest,
+            priority=priority,
+            ponder=ponder,
+            ownership=ownership,
+            next_move=next_move,
+            extra_settings=extra_settings,
+            include_policy=include_policy,
+            report_every=report_every,
+        )
+
+    def request_multi_turn_analysis(
+        self,
+        analysis_nodes: list[GameNode],
+        callback: Callable[[GameNode, dict[str, Any], bool], None],
+        **kwargs: Any,
+    ) -> list[Future[dict[str, Any]]]:
+        return self.least_loaded().request_multi_turn_analysis(analysis_nodes, callback, **kwargs)
+
+    def send_query(
+        self,
+        query: dict[str, Any],
+        callback: Callable[..., None] | None,
+        error_callback: Callable[..., None] | None,
+        next_move: Move | None = None,
+        node: GameNode | None = None,
+        future: Future[dict[str, Any]] | None = None,
+    ) -> bool:
+        return self.least_loaded().send_query(query, callback, error_callback, next_move, node, future)
+
+    def terminate_query(self, query_id: str, ignore_further_results: bool = True) -> None:
+        owner = self._member_for_query_id(query_id)
+        for member in [owner] if owner is not None else self.members:
+            member.terminate_query(query_id, ignore_further_results=ignore_further_results)
+
+    def query_id_for_future(self, future: Future[dict[str, Any]]) -> str | None:
+        for member in self.members:
+            query_id = member.query_id_for_future(future)
+            if query_id is not None:
+                return query_id
+        return None
+
+    def terminate_queries(self, only_for_node: GameNode | None = None, lock: bool = True) -> None:
+        for member in self.members:
+            member.terminate_queries(only_for_node=only_for_node, lock=lock)
+
+    def stop_pondering(self) -> None:
+        for member in self.members:
+            member.stop_pondering()
+
+    def on_new_game(self) -> None:
+        for member in self.members:
+            member.on_new_game()
+
+    def set_analysis_focus(self, focus: list[int | None] | None) -> None:
+        # Members share ``self.config``, so one call updates all of them.
+        self.members[0].set_analysis_focus(focus)
+
+    def is_idle(self) -> bool:
+        return all(m.is_idle() for m in self.members)
+
+    def queries_remaining(self) -> int:
+        return sum(m.queries_remaining() for m in self.members)
+
+    def get_pending_count(self) -> int:
+        return sum(m.get_pending_count() for m in self.members)
+
+    def latency_stats(self) -> dict[str, dict[str, dict[str, Any]]]:
+        return self.latency.snapshot()
+
+    def admission_backlog(self) -> int:
+        return sum(m.admission_backlog() for m in self.members)
+
+    @property
+    def _state_generation(self) -> int:
+        # Members bump their own counters under the shared condition, so the
+        # sum changes whenever any member notifies.
+        return sum(getattr(m, "_state_generation", 0) for m in self.members)
+
+    def wait_until(
+        self,
+        predicate: Callable[[], bool],
+        timeout: float | None = None,
+        should_stop: Callable[[], bool] | None = None,
+    ) -> bool:
+        from katrain.core.engine_query import wait_until as _impl
+
+        return _impl(self, predicate, timeout=timeout, should_stop=should_stop)  # type: ignore[arg-type]
+
+    def wait_until_idle(self, timeout: float | None = None, should_stop: Callable[[], bool] | None = None) -> bool:
+        from katrain.core.engine_query import wait_until_idle as _impl
+
+        return _impl(self, timeout=timeout, should_stop=should_stop)  # type: ignore[arg-type]
+
+    def has_query_capacity(self, headroom: int = 10) -> bool:
+        return any(m.has_query_capacity(headroom) for m in self.members if m.check_alive())
+
+    def check_alive(
+        self, os_error: str = "", exception_if_dead: bool = False, maybe_open_recovery: bool = False
+    ) -> bool:
+        """True while at least one member process is alive."""
+        return any(m.check_alive() for m in self.members)
+
+    def is_alive(self) -> bool:
+        return self.check_alive()
+
+    def restart(self) -> None:
+        for member in self.members:
+            member.restart()
+
+    def wait_to_finish(self, timeout: float = 30.0) -> bool:
+        return all([m.wait_to_finish(timeout) for m in self.members])
+
+    def shutdown(self, finish: bool = False) -> None:
+        for member in self.members:
+            member.shutdown(finish=finish)
+        if self.analysis_cache is not None:
+            cache, self.analysis_cache = self.analysis_cache, None
+            for member in self.members:
+                member.analysis_cache = None
+            close_analysis_cache(self.katrain, cache)
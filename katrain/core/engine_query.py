@@ -10,19 +10,55 @@ break the historical cycle between ``engine.py`` and this module.
 """
 
 import copy
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
 from collections.abc import Callable
+from concurrent.futures import Future
 from typing import TYPE_CHECKING, Any
 
 from katrain.core.constants.output import OUTPUT_DEBUG, OUTPUT_ERROR
-from katrain.core.sgf_parser import Move
+from katrain.core.errors import EngineError
+from katrain.core.sgf_parser import Move, SGFNode
 
 if TYPE_CHECKING:
     from katrain.core._engine_types import GameNode, KataGoEngine
+    from katrain.core.analysis_cache import AnalysisCache
 
 
 # Maximum pending queries before rejecting new ones
 MAX_PENDING_QUERIES = 100
 
+# Queries beyond MAX_PENDING_QUERIES wait in the admission queue (up to this
+# many) and are fed to the engine as results free slots; only beyond this
+# bound are queries rejected.
+MAX_ADMISSION_QUEUE = 10_000
+
+# Slots below MAX_PENDING_QUERIES that background work (negative relative
+# priority: full-game sweeps, batch re-analysis) never takes, so GUI queries
+# are admitted immediately even while a sweep saturates the engine.
+FOREGROUND_RESERVE = 10
+
+# Private query key carrying the completion ``Future`` from send_query to the
+# writer thread (popped before the query is serialized, like PONDER_KEY).
+QUERY_FUTURE_KEY = "_kt_future"
+
+# Private query key with the ``time.monotonic()`` at which send_query accepted
+# the query; popped by the writer thread for latency instrumentation.
+QUERY_ENQUEUED_KEY = "_kt_enqueued"
+
+# Terminated queries whose remaining results are still expected (see
+# terminate_query); the oldest are forgotten beyond this many.
+MAX_TERMINATED_TRACKED = 1024
+
+# Upper bound for a single Condition.wait() in wait_until(): waiters re-check
+# their predicate / stop flag at least this often even without a notification.
+WAIT_RECHECK_INTERVAL = 0.5
+
 
 def build_analysis_query(
     analysis_node: "GameNode",
@@ -50,6 +86,7 @@ def build_analysis_query(
     # the engine returns extra PVs in the same query instead of forcing
     # a new round-trip per move.
     analysis_pvs: int = 1,
+    analyze_turns: list[int] | None = None,
 ) -> dict[str, Any]:
     """Build a KataGo analysis query dict.
 
@@ -75,6 +112,8 @@ def build_analysis_query(
         include_policy: Whether to include policy data.
         report_every: Interval for partial results (None = no partial results).
         ponder_key: Key name for ponder flag (default: "_kt_continuous").
+        analyze_turns: Turn numbers to analyze along the move sequence of
+            ``analysis_node``. ``None`` analyzes only the final position.
 
     Returns:
         A dict suitable for sending to KataGo as JSON.
@@ -111,7 +150,7 @@ def build_analysis_query(
     query: dict[str, Any] = {
         "rules": rules,
         "priority": base_priority + priority,
-        "analyzeTurns": [len(moves)],
+        "analyzeTurns": list(analyze_turns) if analyze_turns is not None else [len(moves)],
         "maxVisits": visits,
         "komi": analysis_node.komi,
         "boardXSize": size_x,
@@ -198,6 +237,7 @@ def send_query(
     error_callback: Callable[..., None] | None,
     next_move: Move | None = None,
     node: "GameNode | None" = None,
+    future: "Future[dict[str, Any]] | None" = None,
 ) -> bool:
     """Send query to engine with safety checks.
 
@@ -206,38 +246,78 @@ def send_query(
                    Use Clock.schedule_once() if UI update needed.
         - error_callback: Scheduled on Kivy main thread via invoke_error_callback().
                          Safe to touch UI.
+        - future: Optional completion handle. Resolved by the read thread with
+                  the final result (after ``callback`` ran), failed with
+                  ``EngineError`` on rejection / KataGo error, and cancelled
+                  when the query is dropped (terminate, new game, shutdown).
 
     Returns:
         True if query was accepted and queued.
         False if query was rejected (engine dead, pending limit).
     """
+    # Coalescing: attach to an equivalent query that is already in flight
+    group: _CoalescedQuery | None = None
+    key = coalesce_key(widget, query, next_move)
+    if key is not None:
+        with widget.thread_lock:
+            group = widget._inflight.get(key)
+            if group is not None:
+                group.add((callback, error_callback, future, node))
+                widget.katrain.log(f"Coalesced query into in-flight {group.key[:12]}", OUTPUT_DEBUG)
+                return True
+            group = _CoalescedQuery(widget, key, (callback, error_callback, future, node))
+            widget._inflight[key] = group
+        callback, error_callback, future = group.callback, group.error_callback, group.future
+
     # Safety 1: Engine alive check
     if not widget.check_alive():
         error_msg = {"error": "Engine not alive", "id": query.get("id", "unknown")}
         invoke_error_callback(widget, error_callback, error_msg)
+        fail_query_future(future, error_msg)
         return False
 
-    # Safety 2: Pending query limit check
+    if future is not None:
+        query[QUERY_FUTURE_KEY] = future
+    query[QUERY_ENQUEUED_KEY] = time.monotonic()
+    payload = (query, callback, error_callback, next_move, node)
+
+    # Safety 2: Pending query limit -> admission queue
     with widget._pending_query_lock:
-        if widget._pending_query_count >= MAX_PENDING_QUERIES:
-            error_msg = {"error": "Too many pending queries", "id": query.get("id", "unknown")}
-            invoke_error_callback(widget, error_callback, error_msg)
-            widget.katrain.log(
-                f"Query rejected: {widget._pending_query_count} pending (limit: {MAX_PENDING_QUERIES})",
-                OUTPUT_ERROR,
-            )
-            return False
-        widget._pending_query_count += 1
+        waiting = len(widget._admission)
+        send_now = not waiting and widget._pending_query_count < _admission_limit(widget, query)
+        if send_now:
+            widget._pending_query_count += 1
+        elif waiting < MAX_ADMISSION_QUEUE:
+            # Decrement on completion releases waiting queries (release_admitted)
+            heapq.heappush(widget._admission, (_admission_rank(widget, query), next(widget._write_queue_seq), payload))
+
+    if send_now:
+        return _enqueue(widget, payload)
+    if waiting >= MAX_ADMISSION_QUEUE:
+        error_msg = {"error": "Too many pending queries", "id": query.get("id", "unknown")}
+        invoke_error_callback(widget, error_callback, error_msg)
+        fail_query_future(query.pop(QUERY_FUTURE_KEY, future), error_msg)
+        widget.katrain.log(
+            f"Query rejected: {widget._pending_query_count} pending and {waiting} waiting for admission "
+            f"(limit: {MAX_ADMISSION_QUEUE})",
+            OUTPUT_ERROR,
+        )
+        return False
+    # A slot may have freed up between the check and the push
+    release_admitted(widget)
+    return True
 
-    # Queue the query (decrement on completion/error in analysis_read_thread)
 
+def _enqueue(widget: "KataGoEngine", payload: tuple[Any, ...]) -> bool:
+    """Hand an admitted query (pending slot already taken) to the writer thread."""
+    query, _, error_callback, _, _ = payload
     try:
         # Phase LV3-1: priority + monotonic seq are queued, the actual
         # payload lives in ``_write_queue_payloads`` so the PriorityQueue
         # only compares (priority, seq) without descending into dicts.
         priority = query.get("priority", 0)
         seq = next(widget._write_queue_seq)
-        widget._write_queue_payloads[seq] = (query, callback, error_callback, next_move, node)
+        widget._write_queue_payloads[seq] = payload
         widget.write_queue.put((priority, seq))
         return True
     except Exception as e:
@@ -247,9 +327,180 @@ def send_query(
         widget.katrain.log(f"Failed to queue query: {e}", OUTPUT_ERROR)
         error_msg = {"error": f"Queue error: {e}", "id": query.get("id", "unknown")}
         invoke_error_callback(widget, error_callback, error_msg)
+        fail_query_future(query.pop(QUERY_FUTURE_KEY, None), error_msg)
         return False
 
 
+# =============================================================================
+# Admission queue
+# =============================================================================
+
+
+def _is_background(widget: "KataGoEngine", query: dict[str, Any]) -> bool:
+    """Background work is queued with a negative priority relative to the current game."""
+    return bool(query.get("priority", 0) - widget.base_priority < 0)
+
+
+def _admission_limit(widget: "KataGoEngine", query: dict[str, Any]) -> int:
+    return MAX_PENDING_QUERIES - FOREGROUND_RESERVE if _is_background(widget, query) else MAX_PENDING_QUERIES
+
+
+def _admission_rank(widget: "KataGoEngine", query: dict[str, Any]) -> tuple[int, int]:
+    """Heap key: foreground before background, then higher KataGo priority first."""
+    return (int(_is_background(widget, query)), -int(query.get("priority", 0)))
+
+
+def release_admitted(widget: "KataGoEngine") -> None:
+    """Move waiting queries into the engine while pending slots are free.
+
+    Called after every pending-count decrement. Foreground queries sort
+    first, so a background head of the queue means none is waiting, and it
+    only gets in below ``MAX_PENDING_QUERIES - FOREGROUND_RESERVE``.
+    """
+    admitted: list[tuple[Any, ...]] = []
+    with widget._pending_query_lock:
+        while widget._admission:
+            payload = widget._admission[0][2]
+            if widget._pending_query_count >= _admission_limit(widget, payload[0]):
+                break
+            heapq.heappop(widget._admission)
+            widget._pending_query_count += 1
+            admitted.append(payload)
+    for payload in admitted:
+        _enqueue(widget, payload)
+
+
+def admission_backlog(widget: "KataGoEngine") -> int:
+    """Number of queries waiting for a pending slot."""
+    with widget._pending_query_lock:
+        return len(widget._admission)
+
+
+# =============================================================================
+# In-flight query coalescing
+# =============================================================================
+
+# Query fields that do not change the result and are ignored when comparing
+# queries for coalescing. The priority only counts as foreground / background
+# (see coalesce_key); the report interval is compared, since a subscriber
+# streaming partial results must not share a query that sends none.
+_COALESCE_IGNORED_FIELDS = frozenset({"id", "priority", QUERY_FUTURE_KEY})
+
+
+def coalesce_key(widget: "KataGoEngine", query: dict[str, Any], next_move: Move | None = None) -> str | None:
+    """Key identifying equivalent queries, or None if ``query`` must not be coalesced.
+
+    Excluded: queries with a caller-chosen id, ponder queries, actions,
+    refine queries (``next_move``) and multi-turn queries. Disabled by the
+    ``coalesce_queries`` engine config flag (default on). Foreground and
+    background queries never share a key, so a GUI request is not parked
+    behind a queued background sweep of the same position.
+    """
+    if "id" in query or "action" in query or query.get(widget.PONDER_KEY) or next_move is not None:
+        return None
+    if len(query.get("analyzeTurns") or []) > 1 or not widget.config.get("coalesce_queries", True):
+        return None
+    fields = {k: v for k, v in query.items() if k not in _COALESCE_IGNORED_FIELDS}
+    fields["_kt_priority_class"] = "background" if _is_background(widget, query) else "foreground"
+    return json.dumps(fields, sort_keys=True, separators=(",", ":"))
+
+
+# (callback, error_callback, completion handle, node the caller asked about)
+_Subscriber = tuple[
+    "Callable[..., None] | None", "Callable[..., None] | None", "Future[dict[str, Any]] | None", "GameNode | None"
+]
+
+
+class _CoalescedQuery:
+    """One KataGo query shared by every caller that asked for the same position.
+
+    Registered in ``widget._inflight`` from the first ``send_query`` until its
+    final result (or failure / cancellation). Results fan out to every
+    subscriber; all but the last receive a deep copy, since callbacks such as
+    ``GameNode.set_analysis`` mutate the result dict.
+    """
+
+    def __init__(self, widget: "KataGoEngine", key: str, first: _Subscriber) -> None:
+        self.widget = widget
+        self.key = key
+        self.subscribers: list[_Subscriber] = []
+        self.future: Future[dict[str, Any]] = Future()
+        self.future.add_done_callback(self._on_done)
+        self.add(first)
+
+    def add(self, subscriber: _Subscriber) -> None:
+        self.subscribers.append(subscriber)
+        sub_future = subscriber[2]
+        if sub_future is not None:
+            sub_future.add_done_callback(self._on_subscriber_done)
+
+    def _on_subscriber_done(self, sub_future: "Future[dict[str, Any]]") -> None:
+        """Drop the shared query once every subscriber has cancelled its handle."""
+        if not sub_future.cancelled() or self.future.done():
+            return
+        with self.widget.thread_lock:
+            # no subscribers left: drop_node removed them, and its caller terminates the query
+            if not self.subscribers or not all(f is not None and f.cancelled() for _, _, f, _ in self.subscribers):
+                return
+        query_id = query_id_for_future(self.widget, self.future)
+        self.future.cancel()  # a still-queued query is skipped by the writer
+        if query_id is not None:
+            self.widget.terminate_query(query_id)
+
+    def drop_node(self, node: "GameNode") -> bool:
+        """Unsubscribe (and cancel the handles of) the callers that asked about ``node``.
+
+        Returns:
+            True if no subscriber is left; the caller then terminates the query.
+        """
+        with self.widget.thread_lock:
+            dropped = [s for s in self.subscribers if s[3] is node]
+            self.subscribers = [s for s in self.subscribers if s[3] is not node]
+            remaining = bool(self.subscribers)
+        for _, _, sub_future, _ in dropped:
+            if sub_future is not None:
+                sub_future.cancel()
+        return bool(dropped) and not remaining
+
+    def _close(self) -> list[_Subscriber]:
+        """Stop accepting subscribers and return the final list."""
+        with self.widget.thread_lock:
+            if self.widget._inflight.get(self.key) is self:
+                del self.widget._inflight[self.key]
+            return list(self.subscribers)
+
+    def callback(self, analysis: dict[str, Any], partial_result: bool) -> None:
+        with self.widget.thread_lock:
+            subscribers = list(self.subscribers)
+        if not partial_result:
+            subscribers = self._close()
+        for i, (callback, _, _, _) in enumerate(subscribers):
+            if callback is None:
+                continue
+            payload = analysis if i == len(subscribers) - 1 else copy.deepcopy(analysis)
+            try:
+                callback(payload, partial_result)
+            except Exception as e:  # noqa: BLE001 - one subscriber must not starve the others
+                self.widget.katrain.log(f"Error in coalesced query callback: {e}", OUTPUT_ERROR)
+
+    def error_callback(self, error_msg: dict[str, Any]) -> None:
+        # Already on the main thread (scheduled by invoke_error_callback)
+        for _, error_callback, _, _ in self._close():
+            if error_callback is not None:
+                error_callback(error_msg)
+
+    def _on_done(self, future: "Future[dict[str, Any]]") -> None:
+        for _, _, sub_future, _ in self._close():
+            if sub_future is None or sub_future.done():
+                continue
+            if future.cancelled():
+                sub_future.cancel()
+            elif future.exception() is not None:
+                sub_future.set_exception(future.exception())
+            else:
+                sub_future.set_result(future.result())
+
+
 def request_analysis(
     widget: "KataGoEngine",
     analysis_node: "GameNode",
@@ -267,8 +518,14 @@ def request_analysis(
     extra_settings: dict[str, Any] | None = None,
     include_policy: bool = True,
     report_every: float | None = None,
-) -> None:
-    """Build an analysis query from a GameNode and send it to the engine."""
+) -> "Future[dict[str, Any]]":
+    """Build an analysis query from a GameNode and send it to the engine.
+
+    Returns:
+        A completion handle resolved with the final analysis once ``callback``
+        has processed it (see ``send_query`` for failure / cancel semantics).
+    """
+    future: Future[dict[str, Any]] = Future()
     # Check for unsupported AE commands (clear_placements is intentionally
     # detected and skipped - we don't send these to KataGo as the engine
     # doesn't have a "clear" placement concept; setup moves are supported
@@ -280,28 +537,15 @@ def request_analysis(
             f"Not analyzing node {analysis_node} as there are AE commands in the path",
             OUTPUT_DEBUG,
         )
-        return
+        future.cancel()
+        return future
 
     # Resolve ownership
     if ownership is None:
         ownership = widget.config["_enable_ownership"] and not next_move
 
     # Resolve visits with analysis_focus and analyze_fast
-    if visits is None:
-        visits = widget.config["max_visits"]
-
-        # analysis_focus に基づいて visits を調整
-        focus = widget.config.get("analysis_focus")
-        if focus:
-            # 優先しない色のターンの場合、fast_visits を使用
-            if (
-                (focus == "black" and analysis_node.next_player == "W")
-                or (focus == "white" and analysis_node.next_player == "B")
-            ) and widget.config.get("fast_visits"):
-                visits = widget.config["fast_visits"]
-        elif analyze_fast and widget.config.get("fast_visits"):
-            # analysis_focus がない場合のデフォルト処理（analyze_fast時）
-            visits = widget.config["fast_visits"]
+    visits = resolve_analysis_visits(widget, analysis_node, visits, analyze_fast)
 
     # Build query using engine_query module (Phase 68)
     query = build_analysis_query(
@@ -325,8 +569,270 @@ def request_analysis(
         ponder_key=widget.PONDER_KEY,
     )
 
-    send_query(widget, query, callback, error_callback, next_move, analysis_node)
+    cache = None if ponder else analysis_cache_for(widget)
+    if cache is not None:
+        key = cache.key_for_query(query, cache_model_name(widget))
+        cached = cache.get(key)
+        if cached is not None:
+            analysis_node.analysis_visits_requested = max(analysis_node.analysis_visits_requested, visits)
+
+            def deliver() -> None:
+                callback(cached, False)
+                future.set_result(cached)
+
+            dispatch_cached(widget, deliver)
+            return future
+        callback = _caching_callback(widget, cache, key, query, callback)
+
+    send_query(widget, query, callback, error_callback, next_move, analysis_node, future)
     analysis_node.analysis_visits_requested = max(analysis_node.analysis_visits_requested, visits)
+    return future
+
+
+def resolve_analysis_visits(
+    widget: "KataGoEngine", analysis_node: "GameNode", visits: int | None, analyze_fast: bool
+) -> int:
+    """Resolve the visit count for a node from the engine config.
+
+    An explicit ``visits`` always wins. Otherwise ``max_visits`` is used,
+    lowered to ``fast_visits`` for the non-focused colour when
+    ``analysis_focus`` is set, or for every node when ``analyze_fast`` is set.
+    """
+    if visits is not None:
+        return visits
+    visits = widget.config["max_visits"]
+
+    # analysis_focus に基づいて visits を調整
+    focus = widget.config.get("analysis_focus")
+    if focus:
+        # 優先しない色のターンの場合、fast_visits を使用
+        if (
+            (focus == "black" and analysis_node.next_player == "W")
+            or (focus == "white" and analysis_node.next_player == "B")
+        ) and widget.config.get("fast_visits"):
+            visits = widget.config["fast_visits"]
+    elif analyze_fast and widget.config.get("fast_visits"):
+        # analysis_focus がない場合のデフォルト処理（analyze_fast時）
+        visits = widget.config["fast_visits"]
+    return visits
+
+
+def branch_turn_numbers(nodes_from_root: list[SGFNode]) -> dict[int, int] | None:
+    """Map each node on a root-to-leaf path to its KataGo turn number.
+
+    Returns ``{id(node): turn}`` or ``None`` when the path cannot be expressed
+    as one KataGo move sequence, i.e. a non-root node carries placements,
+    AE commands, or anything other than exactly one move.
+    """
+    turns: dict[int, int] = {}
+    for turn, node in enumerate(nodes_from_root):
+        if node.clear_placements:
+            return None
+        if turn == 0:
+            if node.moves:
+                return None
+        elif len(node.moves) != 1 or node.placements:
+            return None
+        turns[id(node)] = turn
+    return turns
+
+
+def request_multi_turn_analysis(
+    widget: "KataGoEngine",
+    analysis_nodes: "list[GameNode]",
+    callback: Callable[["GameNode", dict[str, Any], bool], None],
+    error_callback: Callable[..., None] | None = None,
+    visits: int | None = None,
+    analyze_fast: bool = False,
+    time_limit: bool = True,
+    priority: int = 0,
+    ownership: bool | None = None,
+    include_policy: bool = True,
+    report_every: float | None = None,
+) -> "list[Future[dict[str, Any]]]":
+    """Analyze several nodes of one branch with a single multi-turn query.
+
+    All ``analysis_nodes`` must lie on the path from the root to the deepest
+    of them. One query is sent per distinct visit count (``analysis_focus``
+    can give the two colours different visits), listing every requested
+    turn in ``analyzeTurns``. Each per-turn response is routed back to its
+    node as ``callback(node, analysis, partial_result)``.
+
+    Branches that cannot be expressed as one move sequence (setup stones or
+    AE commands below the root) fall back to one ``request_analysis`` per node.
+
+    Returns:
+        One completion handle per query sent (resolved with the result of the
+        last turn to arrive). Empty when every turn was served from cache.
+    """
+    if not analysis_nodes:
+        return []
+    leaf = max(analysis_nodes, key=lambda n: n.depth)
+    path = leaf.nodes_from_root
+    turns = branch_turn_numbers(path)
+    if turns is None:
+        return [
+            request_analysis(
+                widget,
+                node,
+                callback=lambda result, partial, node=node: callback(node, result, partial),
+                error_callback=error_callback,
+                visits=visits,
+                analyze_fast=analyze_fast,
+                time_limit=time_limit,
+                priority=priority,
+                ownership=ownership,
+                include_policy=include_policy,
+                report_every=report_every,
+            )
+            for node in analysis_nodes
+        ]
+    if any(id(node) not in turns for node in analysis_nodes):
+        raise ValueError("request_multi_turn_analysis: all nodes must lie on one branch")
+
+    if ownership is None:
+        ownership = widget.config["_enable_ownership"]
+
+    nodes_by_visits: dict[int, dict[int, GameNode]] = {}
+    for node in analysis_nodes:
+        node_visits = resolve_analysis_visits(widget, node, visits, analyze_fast)
+        nodes_by_visits.setdefault(node_visits, {})[turns[id(node)]] = node
+
+    cache = analysis_cache_for(widget)
+    futures: list[Future[dict[str, Any]]] = []
+    for group_visits, node_by_turn in nodes_by_visits.items():
+        query = build_analysis_query(
+            analysis_node=leaf,
+            visits=group_visits,
+            ponder=False,
+            ownership=ownership,
+            rules=widget.get_rules(leaf.ruleset),
+            base_priority=widget.base_priority,
+            priority=priority,
+            override_settings=widget.override_settings,
+            wide_root_noise=widget.config["wide_root_noise"],
+            max_time=widget.config.get("max_time"),
+            time_limit=time_limit,
+            include_policy=include_policy,
+            report_every=report_every,
+            ponder_key=widget.PONDER_KEY,
+            analyze_turns=sorted(node_by_turn),
+        )
+
+        for node in node_by_turn.values():
+            node.analysis_visits_requested = max(node.analysis_visits_requested, group_visits)
+
+        keys: dict[int, str] = {}
+        if cache is not None:
+            model = cache_model_name(widget)
+            hits: list[tuple[GameNode, dict[str, Any]]] = []
+            for turn in sorted(node_by_turn):
+                key = cache.key_for_query(query, model, turn)
+                cached = cache.get(key)
+                if cached is not None:
+                    hits.append((node_by_turn[turn], cached))
+                else:
+                    keys[turn] = key
+            if hits:
+
+                def deliver(hits: "list[tuple[GameNode, dict[str, Any]]]" = hits) -> None:
+                    for node, result in hits:
+                        callback(node, result, False)
+
+                dispatch_cached(widget, deliver)
+            if not keys:
+                continue
+            query["analyzeTurns"] = sorted(keys)
+
+        def route(
+            result: dict[str, Any],
+            partial: bool,
+            node_by_turn: dict[int, "GameNode"] = node_by_turn,
+            keys: dict[int, str] = keys,
+            query: dict[str, Any] = query,
+        ) -> None:
+            turn = int(result.get("turnNumber", -1))
+            if cache is not None and turn in keys and not partial:
+                _store_in_cache(widget, cache, keys[turn], query, result)
+            node = node_by_turn.get(turn)
+            if node is not None:
+                callback(node, result, partial)
+
+        future: Future[dict[str, Any]] = Future()
+        send_query(widget, query, route, error_callback, None, leaf, future)
+        futures.append(future)
+    return futures
+
+
+# =============================================================================
+# Persistent analysis cache (see katrain.core.analysis_cache)
+# =============================================================================
+
+
+def analysis_cache_for(widget: "KataGoEngine") -> "AnalysisCache | None":
+    """The engine's ``AnalysisCache`` if the ``analysis_cache`` flag is enabled."""
+    if not widget.config.get("analysis_cache"):
+        return None
+    return getattr(widget, "analysis_cache", None)
+
+
+def cache_model_name(widget: "KataGoEngine") -> str:
+    """Model identifier used in cache keys (file name, or the altcommand marker)."""
+    return os.path.basename(str(getattr(widget, "model", "") or ""))
+
+
+def _store_in_cache(
+    widget: "KataGoEngine", cache: "AnalysisCache", key: str, query: dict[str, Any], result: dict[str, Any]
+) -> None:
+    """Store a final result unless ``maxTime`` cut the search short of ``maxVisits``."""
+    if "maxTime" in query.get("overrideSettings", {}) and result.get("rootInfo", {}).get("visits", 0) < query.get(
+        "maxVisits", 0
+    ):
+        return
+    try:
+        cache.put(key, result)
+    except sqlite3.Error as e:
+        widget.katrain.log(f"Analysis cache write failed: {e}", OUTPUT_ERROR)
+
+
+def _caching_callback(
+    widget: "KataGoEngine",
+    cache: "AnalysisCache",
+    key: str,
+    query: dict[str, Any],
+    callback: Callable[..., None],
+) -> Callable[..., None]:
+    # Store before ``callback``: GameNode.set_analysis mutates the result dict.
+    def store_then_callback(result: dict[str, Any], partial_result: bool) -> None:
+        if not partial_result:
+            _store_in_cache(widget, cache, key, query, result)
+        callback(result, partial_result)
+
+    return store_then_callback
+
+
+def dispatch_cached(widget: "KataGoEngine", deliver: Callable[[], None]) -> None:
+    """Hand results served from cache to the analysis read thread, which runs ``deliver``
+    followed by ``update_state`` between KataGo results, as it does for theirs.
+
+    Callbacks thus never run in the requesting thread, nor before the request returns.
+    Without a running read thread (engine not started or dead) a short-lived thread
+    delivers instead.
+    """
+
+    def run() -> None:
+        try:
+            deliver()
+            if getattr(widget.katrain, "update_state", None):  # easier mocking etc
+                widget.katrain.update_state()
+        except Exception as e:  # noqa: BLE001 - callback exception, must log and continue
+            widget.katrain.log(f"Error delivering a cached analysis: {e}\n{traceback.format_exc()}", OUTPUT_ERROR)
+
+    thread = getattr(widget, "analysis_thread", None)
+    if thread is not None and thread.is_alive():
+        widget._stdout_queue.put(run)
+    else:
+        threading.Thread(target=run, daemon=True, name="katago-cached-results").start()
 
 
 def terminate_query(widget: "KataGoEngine", query_id: str, ignore_further_results: bool = True) -> None:
@@ -343,7 +849,17 @@ def terminate_query(widget: "KataGoEngine", query_id: str, ignore_further_result
         widget.send_query({"action": "terminate", "terminateId": query_id}, None, None)
         if ignore_further_results:
             with widget.thread_lock:
-                widget.queries.pop(query_id, None)
+                if widget.queries.pop(query_id, None) is not None:
+                    # KataGo still answers each outstanding turn; the first of those
+                    # results frees the pending slot, the rest are dropped silently
+                    terminated = widget._terminated_queries
+                    terminated[query_id] = (widget._turns_remaining.pop(query_id, 1), False)
+                    while len(terminated) > MAX_TERMINATED_TRACKED:
+                        del terminated[next(iter(terminated))]
+                future = widget._query_futures.pop(query_id, None)
+            if future is not None:
+                future.cancel()
+            notify_waiters(widget)
 
 
 def terminate_queries(widget: "KataGoEngine", only_for_node: "GameNode | None" = None, lock: bool = True) -> None:
@@ -351,8 +867,14 @@ def terminate_queries(widget: "KataGoEngine", only_for_node: "GameNode | None" =
     if lock:
         with widget.thread_lock:
             return terminate_queries(widget, only_for_node=only_for_node, lock=False)
-    for query_id, (_, _, _, _, node) in list(widget.queries.items()):
-        if only_for_node is None or only_for_node is node:
+    for query_id, (callback, _, _, _, node) in list(widget.queries.items()):
+        group = getattr(callback, "__self__", None)
+        if only_for_node is None:
+            terminate_query(widget, query_id)
+        elif isinstance(group, _CoalescedQuery):  # registered with the first subscriber's node only
+            if group.drop_node(only_for_node):
+                terminate_query(widget, query_id)
+        elif only_for_node is node:
             terminate_query(widget, query_id)
 
 
@@ -395,10 +917,121 @@ def invoke_error_callback(
         widget.katrain.log(f"Error in error_callback: {e}", OUTPUT_ERROR)
 
 
+# =============================================================================
+# Completion handles and waiters
+# =============================================================================
+
+
+def fail_query_future(future: "Future[dict[str, Any]] | None", error: dict[str, Any]) -> None:
+    """Fail a completion handle with the KataGo / safety-check error message."""
+    if future is not None and not future.done():
+        future.set_exception(EngineError(str(error.get("error", error)), context=error))
+
+
+def cancel_query_futures(widget: "KataGoEngine") -> None:
+    """Cancel every outstanding completion handle, sent or still queued.
+
+    Called when queries are dropped wholesale (new game, restart, shutdown)
+    so nobody blocks on a result that will never be delivered. Also empties
+    the admission queue.
+    """
+    with widget._pending_query_lock:
+        # Queries waiting for admission belong to the dropped state as well
+        waiting = [payload for _, _, payload in widget._admission]
+        widget._admission = []
+    with widget.thread_lock:
+        futures = list(widget._query_futures.values())
+        widget._query_futures = {}
+        for payload in list(widget._write_queue_payloads.values()) + waiting:
+            future = payload[0].pop(QUERY_FUTURE_KEY, None) if payload and isinstance(payload[0], dict) else None
+            if future is not None:
+                futures.append(future)
+    for future in futures:
+        future.cancel()
+    notify_waiters(widget)
+
+
+def query_id_for_future(widget: "KataGoEngine", future: "Future[dict[str, Any]]") -> str | None:
+    """Id of the sent query that owns ``future`` (None while still queued or once finished)."""
+    with widget.thread_lock:
+        for query_id, query_future in widget._query_futures.items():
+            if query_future is future:
+                return query_id
+    return None
+
+
+def notify_waiters(widget: "KataGoEngine") -> None:
+    """Wake threads blocked in ``wait_until`` after an engine state change.
+
+    Must not be called while holding the condition; holding ``thread_lock``
+    is fine (waiters never take ``thread_lock`` while holding the condition).
+    """
+    condition = getattr(widget, "_state_changed", None)
+    if condition is None:
+        return
+    with condition:
+        widget._state_generation += 1
+        condition.notify_all()
+
+
+def wait_until(
+    widget: "KataGoEngine",
+    predicate: Callable[[], bool],
+    timeout: float | None = None,
+    should_stop: Callable[[], bool] | None = None,
+) -> bool:
+    """Block until ``predicate()`` holds, woken by every processed KataGo result.
+
+    Args:
+        predicate: Condition to wait for; evaluated outside any engine lock.
+        timeout: Maximum wait in seconds (``None`` waits indefinitely).
+        should_stop: Checked at least every ``WAIT_RECHECK_INTERVAL`` seconds;
+            returning True aborts the wait (e.g. a cancel flag).
+
+    Returns:
+        True if the predicate holds, False on timeout or stop.
+    """
+    condition = widget._state_changed
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        with condition:
+            seen = widget._state_generation
+        if predicate():
+            return True
+        if should_stop is not None and should_stop():
+            return False
+        wait_s = WAIT_RECHECK_INTERVAL
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            wait_s = min(wait_s, remaining)
+        with condition:
+            # A notification between reading ``seen`` and here bumps the
+            # generation, so the wakeup cannot be lost.
+            if widget._state_generation == seen:
+                condition.wait(wait_s)
+
+
+def wait_until_idle(
+    widget: "KataGoEngine", timeout: float | None = None, should_stop: Callable[[], bool] | None = None
+) -> bool:
+    """Block until no query is queued, outstanding, or still in its callback.
+
+    ``is_idle`` alone turns True as soon as the last query leaves ``queries``,
+    which happens before its callback has stored the result; the pending
+    counter is only decremented after the callback, so both are required.
+    """
+    return wait_until(
+        widget, lambda: widget.is_idle() and widget.get_pending_count() == 0, timeout=timeout, should_stop=should_stop
+    )
+
+
 def decrement_pending_count(widget: "KataGoEngine") -> None:
     """Decrement pending counter. Called on query completion/error."""
     with widget._pending_query_lock:
         widget._pending_query_count = max(0, widget._pending_query_count - 1)
+    release_admitted(widget)
 
 
 def get_pending_count(widget: "KataGoEngine") -> int:
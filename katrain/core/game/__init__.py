@@ -7,6 +7,10 @@
 - ``navigation`` : 重要局面ナビ (GameNavigator)
 - ``analysis_orchestrator`` : 解析オーケストレーション (Phase 2 で追加)
 - ``insert_mode`` : 挿入モード管理 (Phase 3 で追加)
+- ``position`` : 局面の差分ナビゲーション (PositionTrail)
+- ``board_core`` : 配列 + union-find の盤面 (BoardCore)
+- ``position_cache`` : ノードごとの局面キャッシュ (PositionCache, NODE_POSITIONS, RECORDED_POSITIONS)
+- ``tree_index`` : ノード ID / メイン分岐の索引 (TreeIndex)
 
 後方互換のため ``katrain.core.game`` からすべての公開シンボルを再エクスポートする。
 """
@@ -19,9 +23,13 @@ from katrain.core.game.base import (
     IllegalMoveException,
     KaTrainSGF,
 )
+from katrain.core.game.board_core import BoardCore
 from katrain.core.game.facade import Game
 from katrain.core.game.insert_mode import InsertModeController
 from katrain.core.game.navigation import GameNavigator
+from katrain.core.game.position import PositionTrail
+from katrain.core.game.position_cache import NODE_POSITIONS, RECORDED_POSITIONS, NodePosition, PositionCache
+from katrain.core.game.tree_index import TreeIndex
 from katrain.core.game_node import GameNode
 from katrain.core.reports.karte.models import KarteGenerationError
 from katrain.core.sgf_parser import Move
@@ -29,6 +37,7 @@ from katrain.core.sgf_parser import Move
 __all__ = [
     "AnalysisOrchestrator",
     "BaseGame",
+    "BoardCore",
     "Game",
     "GameNode",
     "GameNavigator",
@@ -37,4 +46,10 @@ __all__ = [
     "KarteGenerationError",
     "KaTrainSGF",
     "Move",
+    "NODE_POSITIONS",
+    "NodePosition",
+    "PositionCache",
+    "PositionTrail",
+    "RECORDED_POSITIONS",
+    "TreeIndex",
 ]
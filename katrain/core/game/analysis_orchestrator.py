@@ -6,7 +6,7 @@ KataGo エンジンとの連携が必要な全メソッドを担当する。
 
 責務:
 - 解析ディスパッチ (``analyze_extra`` + 5 つの mode ハンドラ)
-- 全ノード解析 (``analyze_all_nodes``)
+- 全ノード解析 (``analyze_all_nodes``、分岐単位のマルチターンクエリにも対応)
 - 自身対局 (``selfplay``)
 - 自動 Undo (``analyze_undo``)
 - 解析リセット (``reset_current_analysis``)
@@ -43,7 +43,7 @@ from katrain.core.constants.priorities import (
 from katrain.core.engine import KataGoEngine
 from katrain.core.game_node import GameNode
 from katrain.core.lang import i18n
-from katrain.core.sgf_parser import Move
+from katrain.core.sgf_parser import Move, SGFNode
 from katrain.core.utils import var_to_grid, weighted_selection_without_replacement
 
 if TYPE_CHECKING:
@@ -78,6 +78,7 @@ class AnalysisOrchestrator:
         *,
         throttle_max_attempts: int = 50,
         throttle_poll_interval: float = 0.1,
+        multi_turn: bool | None = None,
     ) -> None:
         """Analyze all nodes with throttling to avoid overwhelming the engine.
 
@@ -85,13 +86,17 @@ class AnalysisOrchestrator:
         - Before each request, check if engine has capacity (headroom=10)
         - If at capacity, wait ``throttle_poll_interval`` seconds and retry
           (up to ``throttle_max_attempts`` times; defaults to 50 * 0.1s = 5s)
-        - If still no capacity after waiting, skip the node to avoid blocking forever
+        - If still no capacity after waiting, send it anyway; the engine's
+          admission queue holds it until a slot frees up
 
         Args:
-            throttle_max_attempts: Max polling iterations per node before skipping.
+            throttle_max_attempts: Max polling iterations per node before sending anyway.
                 Exposed for tests to inject fast-failing values.
             throttle_poll_interval: Sleep duration between capacity checks (seconds).
                 Exposed for tests to inject fast polling.
+            multi_turn: Send one multi-turn query per branch instead of one
+                query per node. ``None`` follows the engine's
+                ``multi_turn_queries`` config flag.
         """
         game = self._game
         # Phase LV2-4: hoist the engine liveness check out of the loop.
@@ -106,6 +111,25 @@ class AnalysisOrchestrator:
                 )
                 return
 
+        if multi_turn is None:
+            multi_turn = self._multi_turn_enabled()
+        if multi_turn:
+            pending = [
+                n
+                for n in game.root.nodes_in_tree
+                if isinstance(n, GameNode) and (even_if_present or not n.analysis_from_sgf or not n.load_analysis())
+            ]
+            for pending_node in pending:
+                pending_node.clear_analysis()
+            self._analyze_nodes_multi_turn(
+                pending,
+                priority=priority,
+                analyze_fast=analyze_fast,
+                throttle_max_attempts=throttle_max_attempts,
+                throttle_poll_interval=throttle_poll_interval,
+            )
+            return
+
         for sgf_node in game.root.nodes_in_tree:
             if not isinstance(sgf_node, GameNode):
                 continue
@@ -134,12 +158,11 @@ class AnalysisOrchestrator:
                     max_attempts=throttle_max_attempts,
                     poll_interval=throttle_poll_interval,
                 ):
-                    # Timeout waiting for capacity - log and skip this node
+                    # Timeout waiting for capacity - the engine's admission queue holds the request
                     game.katrain.log(
-                        f"Skipping analysis for move {node.move_number}: engine at capacity",
+                        f"Queueing analysis for move {node.move_number}: engine at capacity",
                         OUTPUT_DEBUG,
                     )
-                    continue
 
                 node.clear_analysis()
                 node.analyze(
@@ -148,6 +171,88 @@ class AnalysisOrchestrator:
                     analyze_fast=analyze_fast,
                 )
 
+    # ------------------------------------------------------------------
+    # 分岐単位のマルチターン解析
+    # ------------------------------------------------------------------
+
+    def _multi_turn_enabled(self) -> bool:
+        """``multi_turn_queries`` が有効なエンジンが 1 つでもあれば True。"""
+        return any(bool(e.config.get("multi_turn_queries", False)) for e in self._game.engines.values() if e)
+
+    def _branch_groups(self, nodes: list[GameNode]) -> list[list[GameNode]]:
+        """``nodes`` を分岐ごとにまとめる。
+
+        葉ノードごとに根からの経路をたどり、まだどのグループにも属して
+        いないノードをその分岐のグループに入れる。葉はメイン分岐から
+        深さ優先で訪れるため、共有される序盤のノードはメイン分岐の
+        クエリで 1 回だけ解析される。
+        """
+        pending = {id(n): n for n in nodes}
+        groups: list[list[GameNode]] = []
+        leaves: list[SGFNode] = []
+        stack: list[SGFNode] = [self._game.root]
+        while stack:
+            current = stack.pop()
+            if current.children:
+                stack.extend(reversed(current.children))
+            else:
+                leaves.append(current)
+        for leaf in leaves:
+            group = []
+            for path_node in leaf.nodes_from_root:
+                node = pending.pop(id(path_node), None)
+                if node is not None:
+                    group.append(node)
+            if group:
+                groups.append(group)
+        return groups
+
+    def _analyze_nodes_multi_turn(
+        self,
+        nodes: list[GameNode],
+        *,
+        priority: int,
+        analyze_fast: bool = False,
+        visits: int | None = None,
+        time_limit: bool = True,
+        throttle_max_attempts: int = 100,
+        throttle_poll_interval: float = 0.1,
+    ) -> None:
+        """Send one multi-turn query per (branch, engine) for ``nodes``.
+
+        Each per-turn response is routed to its node's ``set_analysis``.
+        Partial results are not requested: with hundreds of turns in one
+        query they would only flood the callback path.
+        """
+        game = self._game
+        for group in self._branch_groups(nodes):
+            by_engine: dict[int, tuple[KataGoEngine, list[GameNode]]] = {}
+            for node in group:
+                engine = game.engines[node.next_player]
+                if not engine:
+                    continue
+                by_engine.setdefault(id(engine), (engine, []))[1].append(node)
+            for engine, engine_nodes in by_engine.values():
+                if not engine.check_alive():
+                    game.katrain.log("multi-turn analysis: engine died mid-sweep, stopping", OUTPUT_DEBUG)
+                    return
+                if not self._wait_for_engine_capacity(
+                    engine, headroom=10, max_attempts=throttle_max_attempts, poll_interval=throttle_poll_interval
+                ):
+                    game.katrain.log(
+                        f"Queueing analysis for {len(engine_nodes)} moves up to move "
+                        f"{engine_nodes[-1].move_number}: engine at capacity",
+                        OUTPUT_DEBUG,
+                    )
+                engine.request_multi_turn_analysis(
+                    engine_nodes,
+                    callback=lambda node, result, partial: node.set_analysis(result, partial_result=partial),
+                    visits=visits,
+                    analyze_fast=analyze_fast,
+                    time_limit=time_limit,
+                    priority=priority,
+                )
+
     # ------------------------------------------------------------------
     # 解析リセット
     # ------------------------------------------------------------------
@@ -227,6 +332,11 @@ class AnalysisOrchestrator:
     ) -> bool:
         """Wait for engine capacity before sending requests.
 
+        Pacing only: a query sent without capacity waits in the engine's
+        admission queue rather than being rejected, so callers send it
+        after a timeout as well. Engines with ``wait_until`` are waited on
+        (woken when results arrive) instead of polled.
+
         Args:
             engine: Engine to check capacity for.
             headroom: Minimum free slots required.
@@ -238,6 +348,12 @@ class AnalysisOrchestrator:
         Returns:
             True if capacity is available, False if timed out.
         """
+        if callable(getattr(engine, "wait_until", None)):
+            return bool(
+                engine.wait_until(
+                    lambda: engine.has_query_capacity(headroom=headroom), timeout=max_attempts * poll_interval
+                )
+            )
         for _ in range(max_attempts):
             if engine.has_query_capacity(headroom=headroom):
                 return True
@@ -258,6 +374,10 @@ class AnalysisOrchestrator:
         else:
             min_visits = min(node.analysis_visits_requested for node in nodes)
             visits = min_visits + engine.config["max_visits"]
+        multi_turn = kwargs.get("multi_turn")
+        if multi_turn is None:
+            multi_turn = bool(engine.config.get("multi_turn_queries", False))
+        selected: list[GameNode] = []
         for node in nodes:
             max_point_loss = max(
                 c.points_lost or 0 for c in [node] + [ch for ch in node.children if isinstance(ch, GameNode)]
@@ -266,16 +386,33 @@ class AnalysisOrchestrator:
                 continue
             if move_range and (node.depth - 1 not in range(move_range[0], move_range[1] + 1)):
                 continue
+            if multi_turn:
+                selected.append(node)
+                continue
 
             # Throttle: wait for engine capacity before sending request
             if not self._wait_for_engine_capacity(engine, headroom=10):
                 game.katrain.log(
-                    f"Skipping extra analysis for move {node.move_number}: engine at capacity",
+                    f"Queueing extra analysis for move {node.move_number}: engine at capacity",
                     OUTPUT_DEBUG,
                 )
-                continue
 
             node.analyze(engine, visits=visits, priority=-1_000_000, time_limit=False)
+        if selected:
+            # The game-mode re-analysis always uses the passed-in engine, like the per-node path.
+            for group in self._branch_groups(selected):
+                if not self._wait_for_engine_capacity(engine, headroom=10):
+                    game.katrain.log(
+                        f"Queueing extra analysis for {len(group)} moves: engine at capacity",
+                        OUTPUT_DEBUG,
+                    )
+                engine.request_multi_turn_analysis(
+                    group,
+                    callback=lambda node, result, partial: node.set_analysis(result, partial_result=partial),
+                    visits=visits,
+                    time_limit=False,
+                    priority=-1_000_000,
+                )
         if not move_range:
             game.katrain.controls.set_status(i18n._("game re-analysis").format(visits=visits), STATUS_ANALYSIS)
         else:
@@ -12,17 +12,23 @@ import math
 import os
 import re
 import threading
+from collections.abc import Iterator
 from datetime import datetime
 from typing import Any
 
+from katrain.core.analysis_block import sidecar_path
 from katrain.core.constants.metadata import PROGRAM_NAME, SGF_INTERNAL_COMMENTS_MARKER
 from katrain.core.constants.modes import PLAYER_AI, PLAYER_HUMAN
 from katrain.core.constants.output import OUTPUT_DEBUG
 from katrain.core.engine import KataGoEngine
+from katrain.core.game.board_core import BoardCore
+from katrain.core.game.position import PositionTrail
+from katrain.core.game.position_cache import NODE_POSITIONS, RECORDED_POSITIONS, NodePosition
+from katrain.core.game.tree_index import TreeIndex
 from katrain.core.game_node import GameNode
 from katrain.core.lang import i18n, rank_label
-from katrain.core.sgf_parser import SGF, Move
-from katrain.core.utils import var_to_grid
+from katrain.core.sgf_parser import SGF, Move, SGFNode
+from katrain.core.utils import replacing_file, var_to_grid
 
 
 class IllegalMoveException(Exception):
@@ -32,6 +38,20 @@ class IllegalMoveException(Exception):
 class KaTrainSGF(SGF):
     _NODE_CLASS = GameNode  # type: ignore[assignment]
 
+    @classmethod
+    def parse_file(cls, filename: str, encoding: str | None = None) -> SGFNode:
+        root = super().parse_file(filename, encoding)
+        if isinstance(root, GameNode):
+            root.source_filename = filename  # locates an analysis sidecar (KTS)
+        return root
+
+    @classmethod
+    def iter_file(cls, filename: str, encoding: str | None = None) -> Iterator[SGFNode]:
+        for root in super().iter_file(filename, encoding):
+            if isinstance(root, GameNode):
+                root.source_filename = filename
+            yield root
+
 
 class BaseGame:
     """Represents a game of go, including an implementation of capture rules."""
@@ -47,10 +67,10 @@ class BaseGame:
     insert_mode: bool
     external_game: bool
     main_time_used: int
-    board: list[list[int]]
-    chains: list[list[Move]]
     prisoners: list[Move]
     last_capture: list[Move]
+    _core: BoardCore
+    _trail: PositionTrail
 
     def __init__(
         self,
@@ -61,7 +81,7 @@ class BaseGame:
         bypass_config: bool = False,  # if True, skip config-driven defaults (e.g. auto-undo)
     ) -> None:
         self.katrain = katrain
-        self._lock = threading.RLock()  # RLock for set_current_node → _calculate_groups reentry
+        self._lock = threading.RLock()  # RLock for undo/redo → set_current_node reentry
         self.sgf_filename = sgf_filename
         if self.sgf_filename:
             # Phase H-3: switch from MD5 to blake2b for non-cryptographic
@@ -119,11 +139,12 @@ class BaseGame:
         if not self.root.get_property("RU"):  # if rules missing in sgf, inherit current
             self.root.set_property("RU", katrain.config("game/rules"))
 
-        self.set_current_node(self.root)
+        self.current_node = self.root
+        self._calculate_groups()
         self.main_time_used = 0
 
         # restore shortcuts
-        all_nodes = [n for n in self.root.nodes_in_tree if isinstance(n, GameNode)]
+        all_nodes = [n for n in self.tree_index.nodes() if isinstance(n, GameNode)]
         shortcut_id_to_node: dict[Any, GameNode] = {node.get_property("KTSID", None): node for node in all_nodes}
         for node in all_nodes:
             shortcut_id = node.get_property("KTSF", None)
@@ -131,94 +152,114 @@ class BaseGame:
                 shortcut_id_to_node[shortcut_id].add_shortcut(node)
 
     # -- move tree functions --
-    def _init_state(self) -> None:
+    def _empty_state(self) -> dict[str, Any]:
         board_size_x, board_size_y = self.board_size
-        self.board = [[-1 for _x in range(board_size_x)] for _y in range(board_size_y)]  # type: list[list[int]]  #  board pos -> chain id
-        self.chains = []  # type: list[list[Move]]  #   chain id -> chain
-        self.prisoners = []  # type: list[Move]
-        self.last_capture = []  # type: list[Move]
+        return {
+            "_core": BoardCore(board_size_x, board_size_y),
+            "prisoners": [],
+            "last_capture": [],
+        }
+
+    def _init_state(self) -> None:
+        for name, value in self._empty_state().items():
+            setattr(self, name, value)
 
     def _calculate_groups(self) -> None:
+        """Rebuild the position of current_node from an empty board.
+
+        Drops the recorded changes and snapshots of the position trail, and the
+        position hashes and cached positions (``NODE_POSITIONS``, ``RECORDED_POSITIONS``) of the tree, and
+        indexes the tree again (``tree_index``); call this after changing the moves of nodes
+        that may have been visited already.
+        """
         with self._lock:
+            self.tree_index = TreeIndex(self.root)
+            # moves may have changed anywhere above the nodes whose positions are known
+            for node in self.tree_index.nodes():
+                node._position_hash = None
+                NODE_POSITIONS.forget(node)
+                RECORDED_POSITIONS.forget(node)
+            self._trail = PositionTrail()
             self._init_state()
-            try:
-                for node in self.current_node.nodes_from_root:
-                    for m in node.move_with_placements:
-                        self._validate_move_and_update_chains(
-                            m, True
-                        )  # ignore ko since we didn't know if it was forced
-                    if node.clear_placements:  # handle AE by playing all moves left from empty board
-                        clear_coords = {c.coords for c in node.clear_placements}
-                        stones = [m for c in self.chains for m in c if m.coords not in clear_coords]
-                        self._init_state()
-                        for m in stones:
-                            self._validate_move_and_update_chains(m, True)
-            except IllegalMoveException as e:
-                raise RuntimeError(f"Unexpected illegal move ({e})") from e
-
-    def _validate_move_and_update_chains(self, move: Move, ignore_ko: bool) -> None:
-        board_size_x, board_size_y = self.board_size
+            self._move_position_to(self.current_node)
+
+    def _move_position_to(self, node: GameNode) -> None:
+        """Bring the board, prisoners and last_capture to the position of ``node``, see ``PositionTrail``."""
+        trail = self._trail
+        keep, snapshot, down = trail.route(node)
+        if keep is not None:
+            while len(trail.path) > keep + 1:
+                trail.pop()
+        elif snapshot is not None:
+            snapshot_node, depth, position = snapshot
+            self._restore_position(position)
+            trail.restart_at(snapshot_node, depth)
+        elif trail.path:  # unrelated to the current position (e.g. a node of another tree)
+            self._trail = trail = PositionTrail()
+            self._init_state()
+        for next_node in down:
+            self._apply_node(next_node)
 
-        def neighbours(moves: list[Move]) -> set[int]:
-            return {
-                self.board[m.coords[1] + dy][m.coords[0] + dx]
-                for m in moves
-                if m.coords is not None
-                for dy, dx in [(-1, 0), (1, 0), (0, -1), (0, 1)]
-                if 0 <= m.coords[0] + dx < board_size_x and 0 <= m.coords[1] + dy < board_size_y
-            }
+    def _apply_node(self, node: GameNode) -> None:
+        trail = self._trail
+        mark = len(trail.log)
+        try:
+            for m in node.move_with_placements:
+                self._validate_move_and_update_chains(m, True)  # ignore ko since we didn't know if it was forced
+            if node.clear_placements:  # handle AE by playing all moves left from empty board
+                clear_coords = {c.coords for c in node.clear_placements}
+                stones = [m for m in self._core.stones() if m.coords not in clear_coords]
+                for name, value in self._empty_state().items():
+                    trail.set_attr(self, name, value)
+                for m in stones:
+                    self._validate_move_and_update_chains(m, True)
+        except IllegalMoveException as e:
+            trail.revert(mark)
+            raise RuntimeError(f"Unexpected illegal move ({e})") from e
+        node._position_hash = self._core.position_hash(node.next_player)
+        if trail.push(node, mark):
+            trail.add_snapshot(node, self._position_snapshot())
+
+    def _position_snapshot(self) -> tuple[BoardCore, list[Move], list[Move]]:
+        # last_capture is never changed in place, so sharing it is safe
+        return self._core.copy(), self.prisoners[:], self.last_capture
+
+    def _restore_position(self, position: tuple[BoardCore, list[Move], list[Move]]) -> None:
+        core, prisoners, last_capture = position
+        self._core = core.copy()
+        self.prisoners = prisoners[:]
+        self.last_capture = last_capture
 
+    def _validate_move_and_update_chains(self, move: Move, ignore_ko: bool) -> None:
+        trail = self._trail
         ko_or_snapback = len(self.last_capture) == 1 and self.last_capture[0] == move
-        self.last_capture = []
+        trail.set_attr(self, "last_capture", [])
 
         if move.is_pass:
             return
 
         assert move.coords is not None
-        if self.board[move.coords[1]][move.coords[0]] != -1:
+        core = self._core
+        p = core.point(move.coords)
+        if core.color[p]:
             raise IllegalMoveException("Space occupied")
 
-        # merge chains connected by this move, or create a new one
-        nb_chains = list({c for c in neighbours([move]) if c >= 0 and self.chains[c][0].player == move.player})
-        if nb_chains:
-            this_chain = nb_chains[0]
-            self.board = [[nb_chains[0] if sq in nb_chains else sq for sq in line] for line in self.board]
-            for oc in nb_chains[1:]:
-                self.chains[nb_chains[0]] += self.chains[oc]
-                self.chains[oc] = []
-            self.chains[nb_chains[0]].append(move)
-        else:
-            this_chain = len(self.chains)
-            self.chains.append([move])
-        self.board[move.coords[1]][move.coords[0]] = this_chain
-
-        # check captures
-        opp_nb_chains = {c for c in neighbours([move]) if c >= 0 and self.chains[c][0].player != move.player}
-        for c in opp_nb_chains:
-            if -1 not in neighbours(self.chains[c]):  # no liberties
-                self.last_capture += self.chains[c]
-                for om in self.chains[c]:
-                    assert om.coords is not None  # stones on board always have coords
-                    self.board[om.coords[1]][om.coords[0]] = -1
-                self.chains[c] = []
+        # merge chains connected by this move and take opponent chains without liberties
+        trail.set_attr(self, "last_capture", core.place(p, move, trail))
         if ko_or_snapback and len(self.last_capture) == 1 and not ignore_ko:
             raise IllegalMoveException("Ko")
-        self.prisoners += self.last_capture
+        trail.extend(self.prisoners, self.last_capture)
 
         # suicide: check rules and throw exception if needed
-        if -1 not in neighbours(self.chains[this_chain]):
+        if core.chain_liberties(p) == 0:
             rules = self.rules
-            if len(self.chains[this_chain]) == 1:  # even in new zealand rules, single stone suicide is not allowed
+            if core.chain_size[core.find(p)] == 1:  # even in new zealand rules, single stone suicide is not allowed
                 raise IllegalMoveException("Single stone suicide")
             elif (isinstance(rules, str) and rules in ["tromp-taylor", "new zealand"]) or (
                 isinstance(rules, dict) and rules.get("suicide", False)
             ):
-                self.last_capture += self.chains[this_chain]
-                for om in self.chains[this_chain]:
-                    assert om.coords is not None  # stones on board always have coords
-                    self.board[om.coords[1]][om.coords[0]] = -1
-                self.chains[this_chain] = []
-                self.prisoners += self.last_capture
+                trail.set_attr(self, "last_capture", self.last_capture + core.remove_chain(p, trail))
+                trail.extend(self.prisoners, self.last_capture)
             else:  # suicide not allowed by rules
                 raise IllegalMoveException("Suicide")
 
@@ -229,15 +270,24 @@ class BaseGame:
             assert move.coords is not None
             if not (0 <= move.coords[0] < board_size_x and 0 <= move.coords[1] < board_size_y):
                 raise IllegalMoveException(f"Move {move} outside of board coordinates")
-        try:
-            self._validate_move_and_update_chains(move, ignore_ko)
-        except IllegalMoveException:
-            self._calculate_groups()
-            raise
         with self._lock:
+            if not self._trail.path or self._trail.path[-1] is not self.current_node:
+                self._move_position_to(self.current_node)
+            trail = self._trail
+            mark = len(trail.log)
+            try:
+                self._validate_move_and_update_chains(move, ignore_ko)
+            except IllegalMoveException:
+                trail.revert(mark)
+                raise
             played_node = self.current_node.play(move)
             assert isinstance(played_node, GameNode)
+            if self.tree_index.node(id(played_node)) is not played_node:
+                self.tree_index.add(played_node)
             self.current_node = played_node
+            played_node._position_hash = self._core.position_hash(played_node.next_player)
+            if trail.push(played_node, mark):
+                trail.add_snapshot(played_node, self._position_snapshot())
         return played_node
 
     # Insert a list of moves from root, often just adding one.
@@ -247,17 +297,37 @@ class BaseGame:
             for move in moves:
                 next_node = node.play(move)
                 assert isinstance(next_node, GameNode)
+                if self.tree_index.node(id(next_node)) is not next_node:
+                    self.tree_index.add(next_node)
                 node = next_node
         return node
 
+    def delete_node(self, node: GameNode) -> None:
+        """Remove ``node`` and its descendants from the tree."""
+        with self._lock:
+            assert node.parent is not None, "the root cannot be deleted"
+            node.parent.children.remove(node)
+            self.tree_index.remove(node)
+
+    def make_main_branch(self, node: GameNode) -> None:
+        """Make the branch of ``node`` the first child at every node above it."""
+        with self._lock:
+            n: SGFNode = node
+            while n.parent is not None:
+                n.parent.children.remove(n)
+                n.parent.children.insert(0, n)
+                n = n.parent
+            self.tree_index.promote(node)
+
     def set_current_node(self, node: GameNode) -> None:
-        self.current_node = node
-        self._calculate_groups()
+        with self._lock:
+            self.current_node = node
+            self._move_position_to(node)
 
     def undo(self, n_times: int | str = 1, stop_on_mistake: Any = None) -> None:
         """Undo moves with thread-safe state update.
 
-        Lock scope: state mutation only (current_node, _calculate_groups).
+        Lock scope: state mutation only (current_node and its position).
         UI updates are triggered separately by caller via update_state().
 
         Args:
@@ -323,7 +393,7 @@ class BaseGame:
     def redo(self, n_times: int = 1, stop_on_mistake: float | None = None) -> None:
         """Redo moves with thread-safe state update.
 
-        Lock scope: state mutation only (current_node, _calculate_groups).
+        Lock scope: state mutation only (current_node and its position).
         UI updates are triggered separately by caller via update_state().
         """
         with self._lock:
@@ -360,10 +430,27 @@ class BaseGame:
     def board_size(self) -> tuple[int, int]:
         return self.root.board_size
 
+    @property
+    def position(self) -> NodePosition:
+        """Cached position of current_node (stones, chains, liberties), shared with other consumers."""
+        return NODE_POSITIONS.get(self.current_node)
+
+    @property
+    def board(self) -> list[list[int]]:
+        """``board[y][x]``: chain id of each point, -1 for empty points."""
+        with self._lock:
+            return self._core.chain_ids()
+
+    @property
+    def chains(self) -> list[list[Move]]:
+        """``chains[chain id]``: stones of each chain; ids without a chain have empty lists."""
+        with self._lock:
+            return self._core.chains()
+
     @property
     def stones(self) -> list[Move]:
         with self._lock:
-            return sum(self.chains, [])
+            return self._core.stones()
 
     @property
     def end_result(self) -> str | None:
@@ -447,8 +534,10 @@ class BaseGame:
         return self.current_node.format_score(score)
 
     def __repr__(self) -> str:
+        board_size_x, board_size_y = self.board_size
+        stones = {m.coords: m.player for m in self.stones}
         return (
-            "\n".join("".join(self.chains[c][0].player if c >= 0 else "-" for c in line) for line in self.board)
+            "\n".join("".join(stones.get((x, y), "-") for x in range(board_size_x)) for y in range(board_size_y))
             + f"\ncaptures: {self.prisoner_count}"
         )
 
@@ -479,7 +568,10 @@ class BaseGame:
         base_game_name = f"{PROGRAM_NAME}_{player_names['B']} vs {player_names['W']}"
         return f"{base_game_name} {self.game_id}.sgf"
 
-    def write_sgf(self, filename: str, trainer_config: dict[str, Any | None] | None = None) -> str:
+    def write_sgf(
+        self, filename: str, trainer_config: dict[str, Any | None] | None = None, analysis_sidecar: bool = False
+    ) -> str:
+        """Saves the game; with ``analysis_sidecar``, saved analysis goes to a ``.kta`` file next to it."""
         if trainer_config is None:
             trainer_config = self.katrain.config("trainer", {})
         save_feedback = trainer_config.get("save_feedback", False)
@@ -490,15 +582,18 @@ class BaseGame:
         show_dots_for = {
             bw: trainer_config.get("eval_show_ai", True) or self.katrain.players_info[bw].human for bw in "BW"
         }
-        sgf = self.root.sgf(
-            save_comments_player=show_dots_for,
-            save_comments_class=save_feedback,
-            eval_thresholds=eval_thresholds,
-            save_analysis=save_analysis,
-            save_marks=save_marks,
-        )
         self.sgf_filename = filename
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(sgf)
+        save_dir = os.path.dirname(filename)
+        os.makedirs(save_dir, exist_ok=True)
+        # Stream into a temp file and swap it in, so a failed save leaves the old file intact
+        with replacing_file(filename, "w", encoding="utf-8") as f:
+            self.root.write_sgf(
+                f,
+                analysis_sidecar_path=sidecar_path(filename) if analysis_sidecar and save_analysis else None,
+                save_comments_player=show_dots_for,
+                save_comments_class=save_feedback,
+                eval_thresholds=eval_thresholds,
+                save_analysis=save_analysis,
+                save_marks=save_marks,
+            )
         return i18n._("sgf written").format(file_name=filename)
@@ -0,0 +1,284 @@
+"""BoardCore クラス (配列ベースの盤面)
+
+``BaseGame`` の局面を平坦な配列で保持する。点 ``p = y * size_x + x`` ごとに:
+
+- ``color`` : 0 = 空点, 1 = 黒, 2 = 白 (``array('b')``)
+- ``parent`` : 連の union-find (サイズ併合、経路圧縮なし)。根の点番号が連 ID
+- ``next_stone`` : 連の石をたどる循環リスト (併合は O(1))
+- ``chain_size`` / ``liberties`` : 根での石数と擬似呼吸点数
+  (隣接する (石, 空点) の組の数。0 なら呼吸点なし)
+- ``moves`` : その点に置かれた ``Move``
+
+``hash`` は盤上の石の Zobrist ハッシュ (64 bit) で、石の配置・取り上げのたびに
+差分更新される。乱数表は盤サイズごとに固定シードで作るため、プロセスをまたいでも同じ値になる。
+
+着手・取り上げの書き込みはすべて ``PositionTrail`` に記録され、巻き戻せる。
+取り上げた石の ``parent`` 等はそのまま残す (空点では読まれない)。
+
+``game.board`` / ``game.chains`` / ``game.stones`` はここから作られるビュー。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+from array import array
+from functools import lru_cache
+from typing import Any
+
+from katrain.core.game.position import PositionTrail
+from katrain.core.sgf_parser import Move
+
+EMPTY = 0
+COLORS = {"B": 1, "W": 2}
+
+# Zobrist key of the player to move, xor-ed into position hashes when white is to move
+WHITE_TO_MOVE = random.Random("katrain zobrist: white to move").getrandbits(64)
+
+
+@lru_cache(maxsize=16)
+def _neighbour_table(size_x: int, size_y: int) -> tuple[tuple[int, ...], ...]:
+    """Neighbouring points of each point, shared by all boards of a size."""
+    return tuple(
+        tuple(
+            (y + dy) * size_x + x + dx
+            for dy, dx in ((-1, 0), (1, 0), (0, -1), (0, 1))
+            if 0 <= x + dx < size_x and 0 <= y + dy < size_y
+        )
+        for y in range(size_y)
+        for x in range(size_x)
+    )
+
+
+@lru_cache(maxsize=16)
+def _zobrist_table(size_x: int, size_y: int) -> tuple[int, tuple[tuple[int, int, int], ...]]:
+    """Hash of the empty board and the keys of each (point, colour), indexed like ``color`` values."""
+    rng = random.Random(f"katrain zobrist: {size_x}x{size_y}")
+    return rng.getrandbits(64), tuple((0, rng.getrandbits(64), rng.getrandbits(64)) for _ in range(size_x * size_y))
+
+
+class BoardCore:
+    """平坦配列 + union-find の盤面
+
+    責務:
+    - 石の配置、同色連の併合、呼吸点のない敵連の取り上げ (``place``)
+    - 連の取り上げ (``remove_chain``、自殺手ルール用)
+    - 置き石 (AB/AW、取り上げなし) と AE (``set_up`` / ``without``)
+    - ``board`` / ``chains`` / ``stones`` 形式のビュー
+    - 局面の Zobrist ハッシュ (``hash`` / ``position_hash``)
+
+    着手の合法性 (コウ・自殺手・ルール) は ``BaseGame`` が判定する。
+    """
+
+    __slots__ = (
+        "size_x",
+        "size_y",
+        "neighbours",
+        "color",
+        "parent",
+        "next_stone",
+        "chain_size",
+        "liberties",
+        "moves",
+        "zobrist",
+        "hash",
+    )
+
+    def __init__(self, size_x: int, size_y: int) -> None:
+        n = size_x * size_y
+        self.size_x = size_x
+        self.size_y = size_y
+        self.neighbours = _neighbour_table(size_x, size_y)
+        self.color = array("b", bytes(n))
+        self.parent = array("h", range(n))
+        self.next_stone = array("h", range(n))
+        self.chain_size = array("h", bytes(2 * n))
+        self.liberties = array("h", bytes(2 * n))
+        self.moves: list[Move | None] = [None] * n
+        self.hash, self.zobrist = _zobrist_table(size_x, size_y)
+
+    def copy(self) -> BoardCore:
+        other = BoardCore.__new__(BoardCore)
+        other.size_x = self.size_x
+        other.size_y = self.size_y
+        other.neighbours = self.neighbours
+        other.color = self.color[:]
+        other.parent = self.parent[:]
+        other.next_stone = self.next_stone[:]
+        other.chain_size = self.chain_size[:]
+        other.liberties = self.liberties[:]
+        other.moves = self.moves[:]
+        other.zobrist = self.zobrist
+        other.hash = self.hash
+        return other
+
+    def point(self, coords: tuple[int, int]) -> int:
+        return coords[1] * self.size_x + coords[0]
+
+    def find(self, p: int) -> int:
+        """Chain id (root point) of the stone on ``p``."""
+        parent = self.parent
+        while parent[p] != p:
+            p = parent[p]
+        return p
+
+    def chain_points(self, p: int) -> list[int]:
+        points = [p]
+        next_stone = self.next_stone
+        q = next_stone[p]
+        while q != p:
+            points.append(q)
+            q = next_stone[q]
+        return points
+
+    # ------------------------------------------------------------------
+    # Changes (recorded in the trail)
+    # ------------------------------------------------------------------
+
+    def place(self, p: int, move: Move, trail: PositionTrail) -> list[Move]:
+        """Put ``move`` on the empty point ``p``, merge it with its chains and remove opponent chains left without liberties.
+
+        Returns:
+            The removed opponent stones
+        """
+        self.add_stone(p, move, trail)
+        return self.capture_around(p, trail)
+
+    def add_stone(self, p: int, move: Move, trail: PositionTrail) -> None:
+        """Put ``move`` on the empty point ``p`` and merge it with its chains, without captures."""
+        color, liberties = self.color, self.liberties
+        own = COLORS[move.player]
+        trail.set_item(color, p, own)
+        trail.set_attr(self, "hash", self.hash ^ self.zobrist[p][own])
+        # a point keeps the fields of a stone taken from it, which an undo of the capture needs back
+        trail.set_item(self.parent, p, p)
+        trail.set_item(self.next_stone, p, p)
+        trail.set_item(self.chain_size, p, 1)
+        trail.set_item(self.moves, p, move)
+        free = 0
+        for q in self.neighbours[p]:
+            if color[q] == EMPTY:
+                free += 1
+            else:
+                r = self.find(q)
+                trail.set_item(liberties, r, liberties[r] - 1)
+        trail.set_item(liberties, p, free)
+
+        root = p
+        for q in self.neighbours[p]:
+            if color[q] == own:
+                r = self.find(q)
+                if r != root:
+                    root = self._union(root, r, trail)
+
+    def capture_around(self, p: int, trail: PositionTrail) -> list[Move]:
+        """Remove the opponent chains next to the stone on ``p`` that have no liberties, returning their stones."""
+        color, liberties = self.color, self.liberties
+        own = color[p]
+        captured: list[Move] = []
+        for q in self.neighbours[p]:
+            if color[q] not in (EMPTY, own):
+                r = self.find(q)
+                if liberties[r] == 0:
+                    captured += self.remove_chain(r, trail)
+        return captured
+
+    def _union(self, a: int, b: int, trail: PositionTrail) -> int:
+        chain_size = self.chain_size
+        if chain_size[a] < chain_size[b]:
+            a, b = b, a
+        trail.set_item(self.parent, b, a)
+        trail.set_item(chain_size, a, chain_size[a] + chain_size[b])
+        trail.set_item(self.liberties, a, self.liberties[a] + self.liberties[b])
+        next_stone = self.next_stone
+        next_a, next_b = next_stone[a], next_stone[b]  # splice the two stone cycles
+        trail.set_item(next_stone, a, next_b)
+        trail.set_item(next_stone, b, next_a)
+        return a
+
+    def remove_chain(self, p: int, trail: PositionTrail) -> list[Move]:
+        """Take the chain of the stone on ``p`` off the board, returning its stones."""
+        color, liberties = self.color, self.liberties
+        points = self.chain_points(p)
+        position_hash, zobrist = self.hash, self.zobrist
+        for s in points:
+            position_hash ^= zobrist[s][color[s]]
+            trail.set_item(color, s, EMPTY)
+        trail.set_attr(self, "hash", position_hash)
+        for s in points:
+            for t in self.neighbours[s]:
+                if color[t] != EMPTY:
+                    r = self.find(t)
+                    trail.set_item(liberties, r, liberties[r] + 1)
+        return [self.moves[s] for s in points]  # type: ignore[misc]  # stones always have their move
+
+    def set_up(self, stones: list[Move], trail: PositionTrail) -> BoardCore:
+        """Add setup stones (AB/AW): nothing is captured, and a stone on an occupied point replaces it.
+
+        Returns:
+            This board, or a new one (built without recording) if a stone replaced one of the other colour
+        """
+        replaced = False
+        for m in stones:
+            assert m.coords is not None  # setup stones always have coords
+            p = self.point(m.coords)
+            if not self.color[p]:
+                self.add_stone(p, m, trail)
+            elif self.color[p] != COLORS[m.player]:
+                replaced = True
+        if not replaced:
+            return self
+        position = {m.coords: m for m in self.stones()}
+        position.update((m.coords, m) for m in stones)
+        return self.from_stones(self.size_x, self.size_y, list(position.values()))
+
+    def without(self, coords: set[tuple[int, int]]) -> BoardCore:
+        """A new board without the stones on ``coords`` (AE)."""
+        return self.from_stones(self.size_x, self.size_y, [m for m in self.stones() if m.coords not in coords])
+
+    @classmethod
+    def from_stones(cls, size_x: int, size_y: int, stones: list[Move]) -> BoardCore:
+        """A board with ``stones`` as setup stones on distinct points."""
+        core = cls(size_x, size_y)
+        trail = PositionTrail()  # nothing is reverted: the board is new
+        for m in stones:
+            core.add_stone(core.point(m.coords), m, trail)  # type: ignore[arg-type]  # stones have coords
+        return core
+
+    # ------------------------------------------------------------------
+    # Views
+    # ------------------------------------------------------------------
+
+    def position_hash(self, next_player: str) -> int:
+        """Zobrist hash of the stones and the player to move."""
+        return self.hash ^ WHITE_TO_MOVE if next_player == "W" else self.hash
+
+    def chain_liberties(self, p: int) -> int:
+        """Pseudo-liberties of the chain of the stone on ``p`` (0 if and only if it has no liberties)."""
+        return self.liberties[self.find(p)]
+
+    def chain_ids(self) -> list[list[int]]:
+        """``board[y][x]``: chain id of each point, -1 for empty points."""
+        color, find, size_x = self.color, self.find, self.size_x
+        return [[find(p) if color[p] else -1 for p in range(y * size_x, (y + 1) * size_x)] for y in range(self.size_y)]
+
+    def chains(self) -> list[list[Move]]:
+        """``chains[chain id]``: stones of each chain, empty lists for ids without a chain."""
+        chains: list[list[Move]] = [[] for _ in range(len(self.color))]
+        color, parent, moves = self.color, self.parent, self.moves
+        for p in range(len(color)):
+            if color[p] and parent[p] == p:
+                chains[p] = [moves[q] for q in self.chain_points(p)]  # type: ignore[misc]
+        return chains
+
+    def stones(self) -> list[Move]:
+        color, moves = self.color, self.moves
+        return [moves[p] for p in range(len(color)) if color[p]]  # type: ignore[misc]
+
+
+def analysis_hash(position_hash: int, komi: float, rules: str | dict[str, Any]) -> int:
+    """64-bit hash of a position together with the komi and rules it is analyzed under."""
+    rules_key = json.dumps(rules, sort_keys=True) if isinstance(rules, dict) else rules
+    digest = hashlib.blake2b(f"{position_hash:016x}|{float(komi)!r}|{rules_key}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
@@ -115,6 +115,7 @@ class Game(BaseGame):
         *,
         throttle_max_attempts: int = 50,
         throttle_poll_interval: float = 0.1,
+        multi_turn: bool | None = None,
     ) -> None:
         from katrain.core.constants.priorities import PRIORITY_GAME_ANALYSIS
 
@@ -126,6 +127,7 @@ class Game(BaseGame):
             even_if_present=even_if_present,
             throttle_max_attempts=throttle_max_attempts,
             throttle_poll_interval=throttle_poll_interval,
+            multi_turn=multi_turn,
         )
 
     def analyze_extra(self, mode: str | AnalysisMode, **kwargs: Any) -> None:
@@ -221,11 +223,8 @@ class Game(BaseGame):
         Returns:
             GameNode | None: 見つかったノード、または None
         """
-        for node in analysis_pkg.iter_main_branch_nodes(self):
-            node_move_no = len(node.nodes_from_root) - 1
-            if node_move_no == move_number:
-                return node
-        return None
+        node = self.tree_index.main_node(move_number) if move_number >= 0 else None
+        return node if node is not None and node.move is not None else None
 
     def get_important_move_evals(
         self,
@@ -12,6 +12,7 @@ import heapq
 from collections.abc import Iterator
 from typing import TYPE_CHECKING
 
+from katrain.core.game.tree_index import TreeIndex
 from katrain.core.game_node import GameNode
 
 if TYPE_CHECKING:
@@ -22,7 +23,7 @@ class GameNavigator:
     """重要局面ナビゲーション
 
     責務:
-    - メイン分岐ノードの列挙 (``_iter_main_branch_nodes``)
+    - メイン分岐ノードの列挙 (``_iter_main_branch_nodes``) と手数 (``_move_number``)
     - 重要局面の重要度スコア計算 (``_compute_important_moves``)
     - 重要局面リストと現在のカーソルに基づく前後ナビ
 
@@ -50,6 +51,13 @@ class GameNavigator:
             node = child
             yield node
 
+    def _move_number(self, node: GameNode) -> int:
+        """``len(node.nodes_from_root) - 1``, from the game's ``tree_index`` when it has one."""
+        tree_index = getattr(self._game, "tree_index", None)
+        if isinstance(tree_index, TreeIndex):
+            return tree_index.depth(node)
+        return len(node.nodes_from_root) - 1
+
     def _compute_important_moves(
         self,
         max_moves: int = 20,
@@ -82,7 +90,7 @@ class GameNavigator:
             if color_filter is not None and node.player != color_filter:
                 continue
 
-            move_no = len(node.nodes_from_root) - 1
+            move_no = self._move_number(node)
             points_lost = node.points_lost or 0.0
             delta_score = 0.0 if prev_score is None else abs(node.score - prev_score)
 
@@ -118,7 +126,7 @@ class GameNavigator:
 
         target = move_number - 1
         for node in self._iter_main_branch_nodes():
-            current_move_no = len(node.nodes_from_root) - 1
+            current_move_no = self._move_number(node)
             if current_move_no == target:
                 return node
             if current_move_no > target:
@@ -153,7 +161,7 @@ class GameNavigator:
         if not important:
             return None
 
-        current_move_no = len(game.current_node.nodes_from_root) - 1
+        current_move_no = self._move_number(game.current_node)
 
         for move_no, _importance, node in important:
             if move_no > current_move_no:
@@ -177,7 +185,7 @@ class GameNavigator:
         if not important:
             return None
 
-        current_move_no = len(game.current_node.nodes_from_root) - 1
+        current_move_no = self._move_number(game.current_node)
 
         prev_node: GameNode | None = None
         for move_no, _importance, node in important:
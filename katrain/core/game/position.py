@@ -0,0 +1,154 @@
+"""PositionTrail クラス (局面の差分ナビゲーション)
+
+``BaseGame`` は ``current_node`` の局面 (``board`` / ``chains`` /
+``prisoners`` / ``last_capture``) を保持する。ノード移動のたびにルートから
+全手を再生する代わりに、各ノードの着手で行った変更を元の値とともに記録する。
+
+- 祖先へ戻るときは間のノードの変更を巻き戻し、子孫へ進むときは新しいノードだけを適用する。
+  それ以外のノードへは共通祖先を経由して移動する。
+- ``SNAPSHOT_INTERVAL`` ノードごとに局面の完全なコピーを保持し、訪問済みの
+  離れた局面へのジャンプは最寄りのスナップショットから復元する。
+
+マウスホイールでの 1 手送り/戻しは手数に関係なく一定コストになる。
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from katrain.core.game_node import GameNode
+
+# Kinds of recorded change: container[key] = old / setattr(obj, name, old) / del container[old:]
+_ITEM = 0
+_ATTR = 1
+_LENGTH = 2
+
+
+class PositionTrail:
+    """局面の変更履歴とスナップショット
+
+    責務:
+    - 局面への変更を元の値とともに記録し、巻き戻す (``set_item`` / ``set_attr`` /
+      ``append`` / ``extend`` / ``revert``)
+    - 適用済みノード列 ``path`` の管理 (``push`` / ``pop``)。各ノードは次のノードの親で、
+      先頭は局面を構築 (または復元) したノード
+    - 目標ノードへの最短経路の計算 (``route``)
+    """
+
+    SNAPSHOT_INTERVAL = 16
+    # Restoring a snapshot costs about as much as applying this many nodes
+    SNAPSHOT_COST = 4
+
+    def __init__(self) -> None:
+        self.log: list[tuple[int, Any, Any, Any]] = []
+        self.path: list[GameNode] = []
+        self._marks: list[int] = []  # log length before path[i] was applied
+        self._index: dict[int, int] = {}  # id(node) -> position in path
+        self._base_depth = 0  # node depth (counting nodes) of path[0]
+        self._snapshots: dict[int, tuple[GameNode, int, Any]] = {}  # id(node) -> (node, depth, position)
+
+    # ------------------------------------------------------------------
+    # Recording changes
+    # ------------------------------------------------------------------
+
+    def set_item(self, container: Any, key: Any, value: Any) -> None:
+        self.log.append((_ITEM, container, key, container[key]))
+        container[key] = value
+
+    def set_attr(self, obj: Any, name: str, value: Any) -> None:
+        self.log.append((_ATTR, obj, name, getattr(obj, name)))
+        setattr(obj, name, value)
+
+    def append(self, container: list[Any], value: Any) -> None:
+        self.log.append((_LENGTH, container, None, len(container)))
+        container.append(value)
+
+    def extend(self, container: list[Any], values: list[Any]) -> None:
+        self.log.append((_LENGTH, container, None, len(container)))
+        container.extend(values)
+
+    def revert(self, mark: int) -> None:
+        """Undo the changes recorded after the log had ``mark`` entries."""
+        log = self.log
+        while len(log) > mark:
+            kind, target, key, old = log.pop()
+            if kind == _ITEM:
+                target[key] = old
+            elif kind == _ATTR:
+                setattr(target, key, old)
+            else:
+                del target[old:]
+
+    # ------------------------------------------------------------------
+    # Path
+    # ------------------------------------------------------------------
+
+    def push(self, node: GameNode, mark: int) -> bool:
+        """Record that ``node`` was applied, its changes starting at log entry ``mark``.
+
+        Returns:
+            True if a snapshot of the position is due at this node
+        """
+        self._index[id(node)] = len(self.path)
+        self.path.append(node)
+        self._marks.append(mark)
+        depth = self._base_depth + len(self.path) - 1
+        return depth % self.SNAPSHOT_INTERVAL == 0 and id(node) not in self._snapshots
+
+    def pop(self) -> None:
+        """Revert the last applied node."""
+        node = self.path.pop()
+        del self._index[id(node)]
+        self.revert(self._marks.pop())
+
+    def add_snapshot(self, node: GameNode, position: Any) -> None:
+        """Keep ``position`` as the position of ``node``, the last applied node."""
+        self._snapshots[id(node)] = (node, self._base_depth + len(self.path) - 1, position)
+
+    def restart_at(self, node: GameNode, depth: int) -> None:
+        """Start a new path at ``node``, whose position was just set without recording."""
+        self.log.clear()
+        self.path = [node]
+        self._marks = [0]
+        self._index = {id(node): 0}
+        self._base_depth = depth
+
+    def route(self, target: GameNode) -> tuple[int | None, tuple[GameNode, int, Any] | None, list[GameNode]]:
+        """The cheapest way from the current position to that of ``target``.
+
+        Returns:
+            Tuple of (keep, snapshot, down): keep the first ``keep + 1`` nodes of
+            the path, or else restore ``snapshot`` (node, depth, position); then
+            apply ``down`` in order. ``keep`` and ``snapshot`` are both None if
+            ``target`` shares no node with the path and has no snapshot above it:
+            the position then has to be built from an empty board.
+        """
+        down: list[GameNode] = []
+        snapshot: tuple[GameNode, int, Any] | None = None
+        snapshot_cost = 0
+        n_below = 0  # nodes in down below the snapshot node
+        node: GameNode | None = target
+        while node is not None:
+            if snapshot is None:
+                entry = self._snapshots.get(id(node))
+                if entry is not None and entry[0] is node:
+                    snapshot = entry
+                    n_below = len(down)
+                    snapshot_cost = self.SNAPSHOT_COST + n_below
+            i = self._index.get(id(node))
+            if i is not None:
+                if snapshot is not None and snapshot_cost < len(self.path) - 1 - i + len(down):
+                    break
+                down.reverse()
+                return i, None, down
+            if snapshot is not None and len(down) >= snapshot_cost:
+                break  # walking further cannot be cheaper than the snapshot
+            down.append(node)
+            node = node.parent  # type: ignore[assignment]  # parents of game nodes are game nodes
+        if snapshot is None:
+            down.reverse()
+            return None, None, down
+        below = down[:n_below]
+        below.reverse()
+        return None, snapshot, below
@@ -0,0 +1,195 @@
+"""PositionCache クラス (ノードごとの局面キャッシュ)
+
+ゲームの ``current_node`` を動かさずに任意のノードの局面 (石・連・呼吸点) を
+求める共有サービス。Karte の石の復元 (``compute_stones_at_node``)、盤面の
+戦術分析 (``board_analysis``)、初心者向けヒント、未訪問ノードの
+``position_hash`` がすべてここを使う。
+
+- 局面はノードの同一性 (``id`` + 弱参照) をキーに LRU で保持し、最大
+  ``max_entries`` 局面まで残す。
+- 求めるノードからルート方向にたどって最も近いキャッシュ済みの祖先の
+  ``BoardCore`` をコピーし、間のノードだけを適用する。途中のノードも
+  ``CHECKPOINT_INTERVAL`` ごとにキャッシュする。
+- 置き石 (AB/AW) と着手 (B/W) は ``BaseGame`` と同じく取り上げと自殺手の
+  石の除去を行い、AE は最後に適用する。不正な棋譜でも例外を出さない。
+  ``setup_captures=False`` のキャッシュ (``RECORDED_POSITIONS``) では置き石は
+  棋譜に書かれたとおりに置き、取り上げを起こさない。
+
+ノードの着手を書き換えたら ``forget`` で古い局面を捨てる
+(``BaseGame._calculate_groups`` が木全体・両方のキャッシュに対して行う)。
+"""
+
+from __future__ import annotations
+
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any
+
+from katrain.core.game.board_core import BoardCore
+from katrain.core.game.position import PositionTrail
+from katrain.core.sgf_parser import Move
+
+StonePosition = tuple[int, int, str]  # (col, row, player)
+
+
+class NodePosition:
+    """1 ノードの局面 (読み取り専用)
+
+    責務:
+    - 石の集合 (``stones``)、連 ID の盤面 (``board``)、連 (``chains``)、
+      連の呼吸点 (``liberties``) を初回アクセス時に作って保持する
+    - ``position_hash`` (``BoardCore.position_hash`` と同じ値)
+    """
+
+    __slots__ = ("board_size", "_core", "_stones", "_board", "_chains", "_liberties")
+
+    def __init__(self, core: BoardCore) -> None:
+        self.board_size = (core.size_x, core.size_y)
+        self._core = core
+        self._stones: frozenset[StonePosition] | None = None
+        self._board: list[list[int]] | None = None
+        self._chains: list[list[Move]] | None = None
+        self._liberties: dict[int, frozenset[tuple[int, int]]] = {}
+
+    @property
+    def stones(self) -> frozenset[StonePosition]:
+        """(col, row, player) of every stone."""
+        if self._stones is None:
+            self._stones = frozenset((m.coords[0], m.coords[1], m.player) for m in self._core.stones())  # type: ignore[index]
+        return self._stones
+
+    @property
+    def board(self) -> list[list[int]]:
+        """``board[y][x]``: chain id of each point, -1 for empty points (like ``game.board``)."""
+        if self._board is None:
+            self._board = self._core.chain_ids()
+        return self._board
+
+    @property
+    def chains(self) -> list[list[Move]]:
+        """``chains[chain id]``: stones of each chain, empty lists for ids without a chain (like ``game.chains``)."""
+        if self._chains is None:
+            self._chains = self._core.chains()
+        return self._chains
+
+    def liberties(self, chain_id: int) -> frozenset[tuple[int, int]]:
+        """Empty points next to the chain ``chain_id``."""
+        liberties = self._liberties.get(chain_id)
+        if liberties is None:
+            core = self._core
+            size_x = core.size_x
+            liberties = frozenset(
+                (q % size_x, q // size_x)
+                for p in core.chain_points(chain_id)
+                for q in core.neighbours[p]
+                if not core.color[q]
+            )
+            self._liberties[chain_id] = liberties
+        return liberties
+
+    def position_hash(self, next_player: str) -> int:
+        return self._core.position_hash(next_player)
+
+
+class PositionCache:
+    """ノード → 局面の LRU キャッシュ
+
+    責務:
+    - ノードの局面の取得 (``get``)。キャッシュ済みの祖先から差分で求める
+    - 書き換えられたノードの局面の破棄 (``forget`` / ``clear``)
+
+    スレッドセーフ (Karte 生成スレッドと GUI が同時に使う)。
+    """
+
+    MAX_ENTRIES = 1024
+    CHECKPOINT_INTERVAL = 16  # also keep every this many nodes on the way to a requested node
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, setup_captures: bool = True) -> None:
+        self.max_entries = max_entries
+        self.setup_captures = setup_captures  # AB/AW capture like moves, as in BaseGame
+        self._entries: OrderedDict[int, tuple[weakref.ref[Any], BoardCore, NodePosition]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, node: Any, board_size: tuple[int, int] | None = None) -> NodePosition:
+        """Position after ``node`` (a ``GameNode``, or any node with ``nodes_from_root`` / ``placements`` /
+        ``moves`` / ``clear_placements``).
+
+        ``board_size`` defaults to ``node.board_size``.
+        """
+        size = board_size or node.board_size
+        with self._lock:
+            path = node.nodes_from_root
+            core: BoardCore | None = None
+            start = 0
+            for i in range(len(path) - 1, -1, -1):
+                entry = self._lookup(path[i], size)
+                if entry is not None:
+                    if i == len(path) - 1:
+                        return entry[2]
+                    core, start = entry[1].copy(), i + 1
+                    break
+            if core is None:
+                core = BoardCore(*size)
+            trail = PositionTrail()  # the writes of BoardCore; nothing is reverted
+            for i in range(start, len(path)):
+                core = self._apply(core, path[i], trail)
+                trail.log.clear()
+                if i % self.CHECKPOINT_INTERVAL == 0 and i < len(path) - 1:
+                    self._store(path[i], core.copy())
+            return self._store(node, core)
+
+    def forget(self, node: Any) -> None:
+        with self._lock:
+            entry = self._entries.get(id(node))
+            if entry is not None and entry[0]() is node:
+                del self._entries[id(node)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _lookup(self, node: Any, size: tuple[int, int]) -> tuple[weakref.ref[Any], BoardCore, NodePosition] | None:
+        entry = self._entries.get(id(node))
+        if entry is None or entry[0]() is not node or entry[2].board_size != size:
+            return None  # id reused by another node, or asked for another board size
+        self._entries.move_to_end(id(node))
+        return entry
+
+    def _store(self, node: Any, core: BoardCore) -> NodePosition:
+        position = NodePosition(core)
+        self._entries[id(node)] = (weakref.ref(node), core, position)
+        self._entries.move_to_end(id(node))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return position
+
+    def _apply(self, core: BoardCore, node: Any, trail: PositionTrail) -> BoardCore:
+        if self.setup_captures:
+            moves = node.move_with_placements
+        else:
+            core = core.set_up(node.placements, trail)
+            moves = node.moves
+        for m in moves:
+            if m.is_pass or m.coords is None:
+                continue
+            p = core.point(m.coords)
+            if core.color[p]:  # replaces the stone (invalid record), then captures like a move
+                core = core.set_up([m], trail)
+                core.capture_around(p, trail)
+            else:
+                core.place(p, m, trail)
+            if core.chain_liberties(p) == 0:  # suicide, only legal under some rules
+                core.remove_chain(p, trail)
+        if node.clear_placements:
+            core = core.without({m.coords for m in node.clear_placements})
+        return core
+
+
+# The cache shared by every consumer, so a node reconstructed once is found by all of them
+NODE_POSITIONS = PositionCache()
+# Setup stones exactly as recorded, for the stones of a karte (``compute_stones_at_node``)
+RECORDED_POSITIONS = PositionCache(setup_captures=False)
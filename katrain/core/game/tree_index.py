@@ -0,0 +1,178 @@
+"""TreeIndex クラス (ゲーム木の索引)
+
+手数やノード ID からノードを探すたびに木をルートからたどる代わりに、
+``BaseGame`` が木の変更に合わせて差分更新する索引を持つ。
+
+- ノード ID (``id(node)``) → ノードとルートからのノード数
+- メイン分岐 (``children[0]`` をたどった線。``iter_main_branch_nodes`` と同じ) の
+  ノード列と、各ノードまでの着手数
+- 枝の着手列 (``branch_moves``): メイン分岐の着手列の先頭部分 + 分岐後の着手
+
+``play`` / ``sync_branch`` / ``delete_node`` / ``make_main_branch`` は索引を
+更新する。それ以外の方法で木の構造を変えたら ``rebuild`` を呼ぶ
+(``_calculate_groups`` は呼ぶ)。メイン分岐の末尾の下に直接追加された
+ノードは、メイン分岐を参照したときに取り込まれる。
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from katrain.core.game_node import GameNode
+    from katrain.core.sgf_parser import Move
+
+
+class TreeIndex:
+    """ノード ID / メイン分岐の索引
+
+    責務:
+    - ノード ID からノード、ルートからのノード数の取得 (``node`` / ``depth``)
+    - メイン分岐の k 番目のノード、手数からのノードの取得 (``main_node`` / ``main_move_node``)
+    - ノードまでの着手列 (``branch_moves``)
+    - 木の変更の反映 (``add`` / ``remove`` / ``promote`` / ``rebuild``)
+    """
+
+    def __init__(self, root: GameNode) -> None:
+        self.root = root
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """Index the whole tree again."""
+        self._nodes: dict[int, tuple[GameNode, int]] = {}  # id(node) -> (node, nodes from the root)
+        self._register(self.root, 0)
+        self._mainline: list[GameNode] = [self.root]
+        self._main_moves: list[Move] = list(self.root.moves)  # moves of the main branch, in order
+        self._main_move_counts: list[int] = [len(self._main_moves)]  # moves up to and including mainline[k]
+        self._by_move_number: dict[int, GameNode] | None = None
+        self._extend_mainline()
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def node(self, node_id: int) -> GameNode | None:
+        """The node with ``id(node) == node_id``, or None if it is not in the tree."""
+        entry = self._nodes.get(node_id)
+        return entry[0] if entry is not None else None
+
+    def nodes(self) -> list[GameNode]:
+        """All nodes of the tree (no particular order)."""
+        return [node for node, _depth in self._nodes.values()]
+
+    def depth(self, node: GameNode) -> int:
+        """Nodes between the root and ``node`` (``len(node.nodes_from_root) - 1``)."""
+        unindexed: list[GameNode] = []  # added without going through the game, nearest first
+        n: GameNode | None = node
+        depth = -1
+        while n is not None:
+            entry = self._nodes.get(id(n))
+            if entry is not None and entry[0] is n:
+                depth = entry[1]
+                break
+            unindexed.append(n)
+            n = n.parent  # type: ignore[assignment]  # parents of game nodes are game nodes
+        for n in reversed(unindexed):
+            depth += 1
+            self._nodes[id(n)] = (n, depth)
+        return depth
+
+    def main_node(self, index: int) -> GameNode | None:
+        """The main branch node ``index`` nodes below the root, or None if the main branch is shorter."""
+        if index >= len(self._mainline):
+            self._extend_mainline()
+        return self._mainline[index] if 0 <= index < len(self._mainline) else None
+
+    def main_move_node(self, move_number: int) -> GameNode | None:
+        """The last main branch node with a single move and ``node.depth == move_number``."""
+        return self.main_move_nodes().get(move_number)
+
+    def main_move_nodes(self) -> dict[int, GameNode]:
+        """``{node.depth: node}`` for the main branch nodes with a single move (the map of ``build_node_map``)."""
+        self._extend_mainline()
+        if self._by_move_number is None:
+            self._by_move_number = {}
+            for node in self._mainline:
+                if node.move is not None:
+                    self._by_move_number[node.depth] = node
+        return self._by_move_number
+
+    def is_main(self, node: GameNode) -> bool:
+        depth = self.depth(node)
+        return self.main_node(depth) is node
+
+    def branch_moves(self, node: GameNode) -> list[Move]:
+        """Moves from the root up to and including ``node``."""
+        off_main: list[GameNode] = []
+        n: GameNode | None = node
+        while n is not None and not self.is_main(n):
+            off_main.append(n)
+            n = n.parent  # type: ignore[assignment]  # parents of game nodes are game nodes
+        moves = self._main_moves[: self._main_move_counts[self.depth(n)]] if n is not None else []
+        for off in reversed(off_main):
+            moves.extend(off.moves)
+        return moves
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def add(self, node: GameNode) -> None:
+        """Index ``node`` (and any nodes below it), a new child of an indexed node."""
+        self._register(node, self.depth(node.parent) + 1)  # type: ignore[arg-type]  # added nodes have parents
+        self._extend_mainline()
+
+    def remove(self, node: GameNode) -> None:
+        """Forget ``node`` and the nodes below it, which were just taken out of the tree."""
+        on_main = self.is_main(node)
+        depth = self.depth(node)
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            self._nodes.pop(id(n), None)
+            stack.extend(n.children)  # type: ignore[arg-type]  # children of game nodes are game nodes
+        if on_main:
+            self._truncate_mainline(depth)
+            self._extend_mainline()
+
+    def promote(self, node: GameNode) -> None:
+        """Update the main branch after the branch of ``node`` became the first child everywhere above it."""
+        path = node.nodes_from_root
+        k = 0
+        while k < len(path) and k < len(self._mainline) and self._mainline[k] is path[k]:
+            k += 1
+        self._truncate_mainline(k)
+        for n in path[k:]:
+            self._append_main(n)  # type: ignore[arg-type]  # nodes_from_root of a game node
+        self._extend_mainline()
+
+    def _register(self, node: GameNode, depth: int) -> None:
+        stack = [(node, depth)]
+        while stack:
+            n, d = stack.pop()
+            self._nodes[id(n)] = (n, d)
+            stack.extend((c, d + 1) for c in n.children)  # type: ignore[misc]  # children of game nodes
+
+    def _append_main(self, node: GameNode) -> None:
+        self._mainline.append(node)
+        self._main_moves.extend(node.moves)
+        self._main_move_counts.append(len(self._main_moves))
+        if self._by_move_number is not None and node.move is not None:
+            self._by_move_number[node.depth] = node
+
+    def _truncate_mainline(self, length: int) -> None:
+        del self._mainline[length:]
+        del self._main_move_counts[length:]
+        del self._main_moves[self._main_move_counts[-1] :]
+        self._by_move_number = None
+
+    def _extend_mainline(self) -> None:
+        tail = self._mainline[-1]
+        while tail.children:
+            tail = tail.children[0]  # type: ignore[assignment]  # children of game nodes are game nodes
+            if id(tail) not in self._nodes:  # added below the main branch without going through the game
+                self._register(tail, len(self._mainline))
+            self._append_main(tail)
@@ -1,13 +1,25 @@
 import base64
 import binascii
 import copy
+import functools
 import gzip
 import json
 import logging
+import os
 import random
-from typing import Any
+import threading
+import zlib
+from collections.abc import Callable
+from typing import Any, TextIO
 
 from katrain.common import INFO_PV_COLOR
+from katrain.core.analysis_block import (
+    BLOCK_REF_PREFIX,
+    FLOAT_KEYS,
+    AnalysisBlock,
+    AnalysisBlockWriter,
+    AnalysisSidecar,
+)
 from katrain.core.constants.metadata import (
     ANALYSIS_FORMAT_VERSION,
     PROGRAM_NAME,
@@ -23,19 +35,171 @@ from katrain.core.utils import evaluation_class, pack_floats, unpack_floats, var
 
 logger = logging.getLogger(__name__)
 
+_DECODE_LOCK = threading.Lock()  # KT analysis is decoded on first access from any thread
+KT_GZIP_PREFIX = "H4sI"  # base64 of the gzip magic bytes every KT value starts with
+
+
+def _decode_kt(data: str) -> bytes:
+    return gzip.decompress(base64.standard_b64decode(data))
+
+
+def _encode_kt(data: bytes) -> str:
+    return base64.standard_b64encode(gzip.compress(data)).decode("utf-8")
+
+
+class LazyAnalysis(dict[str, Any]):
+    """Analysis dict decoded from KT data whose ownership / policy are unpacked on first access.
+
+    The two float arrays are by far the largest part of the saved analysis, and most nodes of
+    a loaded game never need them. Until read (``d["ownership"]``, ``get``, iteration, copies)
+    they stay as their encoded KT strings (format 1.0) or packed float16 bytes (format 2.0,
+    possibly a view into a memory-mapped sidecar); assigning a key replaces the pending value.
+    """
+
+    LAZY_KEYS = FLOAT_KEYS
+
+    def __init__(self, main: dict[str, Any], encoded: dict[str, tuple[str | bytes | memoryview, int]]) -> None:
+        super().__init__((k, v) for k, v in main.items() if k not in encoded)
+        self._encoded = encoded  # key -> (KT string or float16 bytes, number of floats)
+
+    def __missing__(self, key: str) -> Any:
+        encoded = self._encoded.pop(key, None)
+        if encoded is None:
+            raise KeyError(key)
+        try:
+            data = encoded[0]
+            value = unpack_floats(_decode_kt(data) if isinstance(data, str) else data, encoded[1])
+        except (gzip.BadGzipFile, binascii.Error, EOFError, zlib.error, ValueError) as e:
+            logger.warning("Error in loading analysis %s: %s", key, e, exc_info=True)
+            value = None
+        super().__setitem__(key, value)
+        return value
+
+    def encoded(self, key: str) -> str | None:
+        """The KT string of a value that has not been decoded yet."""
+        entry = self._encoded.get(key)
+        return entry[0] if entry and isinstance(entry[0], str) else None
+
+    def packed(self, key: str) -> bytes | memoryview | None:
+        """The float16 bytes of a value that has not been unpacked yet."""
+        entry = self._encoded.get(key)
+        if entry is None:
+            return None
+        return _decode_kt(entry[0]) if isinstance(entry[0], str) else entry[0]
+
+    def detach(self) -> None:
+        """Copies pending values that are views into a memory-mapped sidecar, so it can be closed."""
+        for key, (data, count) in self._encoded.items():
+            if isinstance(data, memoryview):
+                self._encoded[key] = (bytes(data), count)
+
+    def materialize(self) -> "LazyAnalysis":
+        for key in list(self._encoded):
+            self[key]
+        return self
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._encoded:
+            return self[key]
+        return super().get(key, default)
+
+    def __contains__(self, key: object) -> bool:
+        return super().__contains__(key) or key in self._encoded
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._encoded.pop(key, None)
+        super().__setitem__(key, value)
+
+    def pop(self, key: str, *default: Any) -> Any:
+        if key in self._encoded:
+            self[key]
+        return super().pop(key, *default)
+
+    def __iter__(self) -> Any:
+        return super(LazyAnalysis, self.materialize()).__iter__()
+
+    def __len__(self) -> int:
+        return super().__len__() + len(self._encoded)
+
+    def keys(self) -> Any:
+        return super(LazyAnalysis, self.materialize()).keys()
+
+    def items(self) -> Any:
+        return super(LazyAnalysis, self.materialize()).items()
+
+    def values(self) -> Any:
+        return super(LazyAnalysis, self.materialize()).values()
+
+    def __eq__(self, other: object) -> bool:
+        return dict.__eq__(self.materialize(), other)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return dict.__repr__(self.materialize())
+
+    def __copy__(self) -> dict[str, Any]:
+        return dict(self.items())
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> dict[str, Any]:
+        return copy.deepcopy(dict(self.items()), memo)
+
+
+def _kt_analysis(ownership_data: str, policy_data: str, main_data: str, board_squares: int) -> LazyAnalysis:
+    """Analysis of one node in format 1.0 (three KT values: ownership, policy and the main JSON)."""
+    main = json.loads(_decode_kt(main_data))
+    return LazyAnalysis(
+        main, {"ownership": (ownership_data, board_squares), "policy": (policy_data, board_squares + 1)}
+    )
+
 
 def analysis_dumps(analysis: dict[str, Any]) -> list[str]:
-    analysis = copy.deepcopy(analysis)
-    for movedict in analysis["moves"].values():
+    # values never decoded from a loaded SGF are written back as they were
+    pending = analysis if isinstance(analysis, LazyAnalysis) else None
+    main = {k: copy.deepcopy(v) for k, v in dict.items(analysis) if k not in LazyAnalysis.LAZY_KEYS}
+    for movedict in main["moves"].values():
         if "ownership" in movedict:  # per-move ownership rarely used
             del movedict["ownership"]
-    ownership_data = pack_floats(analysis.pop("ownership"))
-    policy_data = pack_floats(analysis.pop("policy"))
-    main_data = json.dumps(analysis).encode("utf-8")
-    return [
-        base64.standard_b64encode(gzip.compress(data)).decode("utf-8")
-        for data in [ownership_data, policy_data, main_data]
-    ]
+
+    def encode_floats(key: str) -> str:
+        encoded = pending.encoded(key) if pending is not None else None
+        return encoded if encoded is not None else _encode_kt(pack_floats(analysis[key]))
+
+    ownership_data = encode_floats("ownership")
+    policy_data = encode_floats("policy")
+    return [ownership_data, policy_data, _encode_kt(json.dumps(main).encode("utf-8"))]
+
+
+def analysis_block_writer(root: "GameNode") -> tuple[AnalysisBlockWriter, dict[int, int]]:
+    """Adds the complete analyses in the tree below ``root`` to a writer for format 2.0.
+
+    Returns the writer and ``{id(node): entry}`` for the nodes added.
+    """
+
+    def packed_floats(analysis: dict[str, Any], key: str) -> bytes | memoryview | None:
+        return analysis.packed(key) if isinstance(analysis, LazyAnalysis) else None
+
+    szx, szy = root.board_size
+    writer = AnalysisBlockWriter(szx * szy, packed_floats)
+    refs: dict[int, int] = {}
+    stack: list[SGFNode] = [root]
+    while stack:
+        node = stack.pop()
+        stack.extend(reversed(node.children))
+        if isinstance(node, GameNode) and node.analysis_complete:
+            entry = writer.add(node.analysis)
+            if entry is not None:
+                refs[id(node)] = entry
+    return writer, refs
+
+
+def analysis_block_dumps(root: "GameNode") -> tuple[str | None, dict[int, int]]:
+    """Encodes the complete analyses in the tree below ``root`` as one ``KTB`` block.
+
+    Returns the block (None if nothing was added) and ``{id(node): entry}`` for the nodes in it.
+    """
+    writer, refs = analysis_block_writer(root)
+    return (writer.dumps() if refs else None), refs
 
 
 class GameNode(SGFNode):
@@ -53,8 +217,14 @@ class GameNode(SGFNode):
     shortcuts_to: list[tuple["GameNode", "GameNode"]]
     shortcut_from: "GameNode | None"
     analysis_from_sgf: list[str | None] | None
-    analysis: dict[str, Any]
+    analysis_block_from_sgf: str | None
+    analysis_sidecar_from_sgf: str | None
+    source_filename: str | None
+    _analysis_block: AnalysisBlock | AnalysisSidecar | None
+    _analysis: dict[str, Any]
+    _pending_analysis: Callable[[], dict[str, Any]] | None  # decodes the analysis loaded from the SGF
     analysis_visits_requested: int
+    _position_hash: int | None  # set by BaseGame when it reaches the node, see position_hash
 
     def __init__(
         self,
@@ -74,8 +244,37 @@ class GameNode(SGFNode):
         self.shortcuts_to = []
         self.shortcut_from = None
         self.analysis_from_sgf = None
+        self.analysis_block_from_sgf = None  # root only: KTB block of analysis format 2.0
+        self.analysis_sidecar_from_sgf = None  # root only: KTS, sidecar file name relative to the SGF
+        self.source_filename = None  # root only: file the tree was parsed from
+        self._analysis_block = None
         self.clear_analysis()
 
+    def _clear_cache(self) -> None:
+        super()._clear_cache()
+        self._position_hash = None
+
+    @property
+    def position_hash(self) -> int:
+        """64-bit Zobrist hash of the position after this node, including the player to move.
+
+        Equal for transpositions: nodes reached by different move orders or variations with
+        the same stones and player to move. Set by the game as it plays or navigates to the
+        node; otherwise taken from the shared position cache.
+        """
+        if self._position_hash is None:
+            from katrain.core.game.position_cache import NODE_POSITIONS
+
+            self._position_hash = NODE_POSITIONS.get(self).position_hash(self.next_player)
+        return self._position_hash
+
+    @property
+    def analysis_hash(self) -> int:
+        """64-bit hash of (position_hash, komi, rules) for keying analysis by position."""
+        from katrain.core.game.board_core import analysis_hash
+
+        return analysis_hash(self.position_hash, self.komi, self.ruleset)
+
     def add_shortcut(self, to_node: "GameNode") -> None:  # collapses the branch between them
         nodes: list[GameNode] = [to_node]
         while nodes[-1].parent and nodes[-1] != self:  # ensure on path
@@ -94,6 +293,12 @@ class GameNode(SGFNode):
             self.shortcut_from = None
 
     def load_analysis(self) -> bool:
+        """Checks the KT analysis from the SGF and schedules it to be decoded when first accessed.
+
+        Only the shape of the KT values (or the range of the block entry they refer to) is checked
+        here; the main JSON is decoded on first access of ``analysis``, ownership and policy only
+        when read. Data that fails to decode then is dropped, so the node gets analyzed again.
+        """
         if self.analysis_from_sgf is None or not self.analysis_from_sgf:
             return False
         try:
@@ -108,23 +313,116 @@ class GameNode(SGFNode):
 
             if parse_version(version) > parse_version(ANALYSIS_FORMAT_VERSION):
                 raise ValueError(f"Can not decode analysis data with version {version}, please update {PROGRAM_NAME}")
-            ownership_data, policy_data, main_data, *_ = [
-                gzip.decompress(base64.standard_b64decode(data)) for data in self.analysis_from_sgf if data is not None
-            ]
-            self.analysis = {
-                **json.loads(main_data),
-                "policy": unpack_floats(policy_data, board_squares + 1),
-                "ownership": unpack_floats(ownership_data, board_squares),
-            }
-            return True
-        except (gzip.BadGzipFile, binascii.Error, json.JSONDecodeError, KeyError, ValueError) as e:
-            # Specific exceptions for SGF analysis deserialization failures
+            values = [data for data in self.analysis_from_sgf if data is not None]
+            if values and values[0].startswith(BLOCK_REF_PREFIX):  # format 2.0: entry of the root's KTB block
+                root = self.root
+                if not isinstance(root, GameNode):
+                    raise ValueError("Analysis reference without an analysis block or sidecar")
+                entry = int(values[0][1:])
+                if not 0 <= entry < len(root._open_analysis_block()):
+                    raise ValueError(f"Analysis reference {values[0]} out of range")
+                self._pending_analysis = functools.partial(root._block_analysis, entry)
+                return True
+            ownership_data, policy_data, main_data, *_ = values
+            if not all(data.startswith(KT_GZIP_PREFIX) for data in (ownership_data, policy_data, main_data)):
+                raise ValueError("Analysis data is not gzip + base64 encoded")
+        except (KeyError, OSError, ValueError) as e:
             logger.warning("Error in loading analysis: %s", e, exc_info=True)
             return False
+        self._pending_analysis = functools.partial(_kt_analysis, ownership_data, policy_data, main_data, board_squares)
+        return True
+
+    def analysis_sidecar_path(self) -> str | None:
+        """Path of the analysis sidecar named by this root's KTS property, if any."""
+        if not self.analysis_sidecar_from_sgf:
+            return None
+        return os.path.join(os.path.dirname(self.source_filename or ""), self.analysis_sidecar_from_sgf)
+
+    def _open_analysis_block(self) -> AnalysisBlock | AnalysisSidecar:
+        """This root's KTB block or sidecar, opened on first use."""
+        if self._analysis_block is None:
+            if self.analysis_block_from_sgf is not None:
+                self._analysis_block = AnalysisBlock(self.analysis_block_from_sgf)
+            else:
+                path = self.analysis_sidecar_path()
+                if path is None:
+                    raise ValueError("Analysis reference without an analysis block or sidecar")
+                self._analysis_block = AnalysisSidecar(path)
+        return self._analysis_block
+
+    def _block_analysis(self, entry: int) -> dict[str, Any]:
+        """Entry ``entry`` of this root's KTB block or sidecar."""
+        main, packed = self._open_analysis_block().entry(entry)
+        return LazyAnalysis(main, dict(packed))
+
+    def _release_analysis_sidecar(self, path: str, refs: dict[int, int]) -> None:
+        """Closes this root's memory-mapped sidecar if it is ``path``, keeping the analyses read from it.
+
+        References into the old file are renumbered to the ``refs`` of the one replacing it.
+        """
+        sidecar = self._analysis_block
+        if not isinstance(sidecar, AnalysisSidecar):
+            return
+        if os.path.normcase(os.path.abspath(sidecar.path)) != os.path.normcase(os.path.abspath(path)):
+            return
+        for node in self.nodes_in_tree:
+            if not isinstance(node, GameNode):
+                continue
+            if node._pending_analysis is not None:  # entries of the old file; the new one is numbered differently
+                node._decode_pending_analysis()
+            if isinstance(node._analysis, LazyAnalysis):
+                node._analysis.detach()
+            values = [data for data in node.analysis_from_sgf or [] if data is not None]
+            if values and values[0].startswith(BLOCK_REF_PREFIX):
+                entry = refs.get(id(node))
+                node.analysis_from_sgf = None if entry is None else [f"{BLOCK_REF_PREFIX}{entry}"]
+        self._analysis_block = None
+        try:
+            sidecar.close()
+        except BufferError as e:
+            logger.warning("Analysis sidecar %s is still in use: %s", path, e)
+
+    def _decode_pending_analysis(self) -> None:
+        with _DECODE_LOCK:
+            pending = self._pending_analysis
+            if pending is None:  # decoded by another thread meanwhile
+                return
+            try:
+                self._analysis = pending()
+            except (
+                gzip.BadGzipFile,
+                binascii.Error,
+                EOFError,
+                zlib.error,
+                json.JSONDecodeError,
+                IndexError,
+                KeyError,
+                OSError,
+                ValueError,
+            ) as e:
+                # Specific exceptions for SGF analysis deserialization failures
+                logger.warning("Error in loading analysis: %s", e, exc_info=True)
+                self.analysis_from_sgf = None  # analyze the node again instead of trusting the SGF
+            self._pending_analysis = None
+
+    @property
+    def analysis(self) -> dict[str, Any]:
+        if self._pending_analysis is not None:
+            self._decode_pending_analysis()
+        return self._analysis
+
+    @analysis.setter
+    def analysis(self, value: dict[str, Any]) -> None:
+        self._pending_analysis = None
+        self._analysis = value
 
     def add_list_property(self, property: str, values: list[Any]) -> None:
         if property == "KT":
             self.analysis_from_sgf = values
+        elif property == "KTB":
+            self.analysis_block_from_sgf = values[0] if values else None
+        elif property == "KTS":
+            self.analysis_sidecar_from_sgf = os.path.basename(values[0]) if values else None
         elif property == "C":
             comments = [  # strip out all previously auto generated comments
                 c
@@ -147,12 +445,24 @@ class GameNode(SGFNode):
         eval_thresholds: list[float | None] | None = None,
         save_analysis: bool = False,
         save_marks: bool = False,
+        analysis_block: str | None = None,
+        analysis_sidecar: str | None = None,
+        analysis_refs: dict[int, int] | None = None,
     ) -> dict[str, list[Any]]:
-        properties = copy.copy(super().sgf_properties())
+        properties = super().sgf_properties()
         note = self.note.strip()
+        if save_analysis and self.is_root:
+            if analysis_block:
+                properties["KTB"] = [analysis_block]
+            elif analysis_sidecar:
+                properties["KTS"] = [analysis_sidecar]
         if save_analysis and self.analysis_complete:
             try:
-                properties["KT"] = analysis_dumps(self.analysis)
+                entry = (analysis_refs or {}).get(id(self))
+                if entry is not None:
+                    properties["KT"] = [f"{BLOCK_REF_PREFIX}{entry}"]
+                else:
+                    properties["KT"] = analysis_dumps(self.analysis)
             except (gzip.BadGzipFile, binascii.Error, json.JSONDecodeError, KeyError, ValueError) as e:
                 # Specific exceptions for SGF analysis serialization failures
                 logger.warning("Error in saving analysis: %s", e, exc_info=True)
@@ -160,7 +470,7 @@ class GameNode(SGFNode):
             show_class = save_comments_class[evaluation_class(self.points_lost, eval_thresholds)]
         else:
             show_class = False
-        comments = properties.get("C", [])
+        comments = list(properties.get("C", []))  # value lists are shared with the node
         parent = self.parent
         if (
             parent
@@ -208,6 +518,25 @@ class GameNode(SGFNode):
             del properties["C"]
         return properties
 
+    def write_sgf(self, out: TextIO, analysis_sidecar_path: str | None = None, **xargs: Any) -> None:
+        """Streams the SGF; with ``save_analysis`` from the root, analysis goes into one KTB block,
+        or into a sidecar file written to ``analysis_sidecar_path`` and named in the root's KTS."""
+        if xargs.get("save_analysis") and self.is_root:
+            try:
+                writer, refs = analysis_block_writer(self)
+                if refs and analysis_sidecar_path:
+                    writer.write_sidecar(
+                        analysis_sidecar_path,
+                        before_replace=functools.partial(self._release_analysis_sidecar, analysis_sidecar_path, refs),
+                    )
+                    xargs["analysis_sidecar"] = os.path.basename(analysis_sidecar_path)
+                elif refs:
+                    xargs["analysis_block"] = writer.dumps()
+                xargs["analysis_refs"] = refs
+            except (gzip.BadGzipFile, binascii.Error, EOFError, zlib.error, TypeError, ValueError) as e:
+                logger.warning("Error in saving analysis block, saving per node: %s", e, exc_info=True)
+        super().write_sgf(out, **xargs)
+
     @staticmethod
     def order_children(children: list["GameNode"]) -> list["GameNode"]:  # type: ignore[override]
         return sorted(
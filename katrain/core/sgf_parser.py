@@ -1,9 +1,11 @@
-import copy
+import codecs
+import io
 import logging
 import math
 import re
 from collections import defaultdict
-from typing import Any, Optional
+from collections.abc import Generator, Iterable, Iterator
+from typing import Any, Optional, TextIO
 
 import chardet
 
@@ -154,8 +156,11 @@ class SGFNode:
         return f"SGFNode({dict(self.properties)})"
 
     def sgf_properties(self, **xargs: Any) -> dict[str, list[Any]]:
-        """For hooking into in a subclass and overriding/formatting any additional properties to be output."""
-        return copy.deepcopy(self.properties)
+        """For hooking into in a subclass and overriding/formatting any additional properties to be output.
+
+        Returns a new dict, but the value lists are the node's own: replace them rather than mutating in place.
+        """
+        return dict(self.properties)
 
     @staticmethod
     def order_children(children: list["SGFNode"]) -> list["SGFNode"]:
@@ -166,9 +171,11 @@ class SGFNode:
     def ordered_children(self) -> list["SGFNode"]:
         return self.order_children(self.children)
 
+    _ESCAPE_PAT = re.compile(r"([\]\\])")
+
     @staticmethod
     def _escape_value(value: Any) -> Any:
-        return re.sub(r"([\]\\])", r"\\\1", value) if isinstance(value, str) else value  # escape \ and ]
+        return SGFNode._ESCAPE_PAT.sub(r"\\\1", value) if isinstance(value, str) else value  # escape \ and ]
 
     @staticmethod
     def _unescape_value(value: Any) -> Any:
@@ -176,30 +183,33 @@ class SGFNode:
 
     def sgf(self, **xargs: Any) -> str:
         """Generates an SGF, calling sgf_properties on each node with the given xargs, so it can filter relevant properties if needed."""
-
-        def node_sgf_str(node: "SGFNode") -> str:
-            return ";" + "".join(
-                [
-                    prop + "".join(f"[{self._escape_value(v)}]" for v in values)
-                    for prop, values in node.sgf_properties(**xargs).items()
-                    if values
-                ]
-            )
-
+        out = io.StringIO()
+        self.write_sgf(out, **xargs)
+        return out.getvalue()
+
+    def write_sgf(self, out: TextIO, **xargs: Any) -> None:
+        """Streams the SGF of ``sgf()`` to a text file object, one property value at a time."""
+        write = out.write
+        escape = self._escape_value
         stack: list[str | SGFNode] = [")", self, "("]
-        sgf_str = ""
         while stack:
             item = stack.pop()
             if isinstance(item, str):
-                sgf_str += item
-            else:
-                sgf_str += node_sgf_str(item)
-                if len(item.children) == 1:
-                    stack.append(item.children[0])
-                elif item.children:
-                    for c in item.ordered_children[::-1]:
-                        stack.extend([")", c, "("])
-        return sgf_str
+                write(item)
+                continue
+            write(";")
+            for prop, values in item.sgf_properties(**xargs).items():
+                if values:
+                    write(prop)
+                    for v in values:
+                        write("[")
+                        write(escape(v) if isinstance(v, str) else str(v))
+                        write("]")
+            if len(item.children) == 1:
+                stack.append(item.children[0])
+            elif item.children:
+                for c in item.ordered_children[::-1]:
+                    stack.extend([")", c, "("])
 
     def add_list_property(self, property: str, values: list[Any]) -> None:
         """Add some values to the property list."""
@@ -367,12 +377,11 @@ class SGFNode:
     @property
     def nodes_in_tree(self) -> list["SGFNode"]:
         """Returns all nodes in the tree rooted at this node"""
-        stack: list[SGFNode] = [self]
-        nodes: list[SGFNode] = []
-        while stack:
-            item = stack.pop(0)
-            nodes.append(item)
-            stack += item.children
+        nodes: list[SGFNode] = [self]
+        i = 0
+        while i < len(nodes):  # breadth first, the list doubles as the queue
+            nodes.extend(nodes[i].children)
+            i += 1
         return nodes
 
     @property
@@ -471,6 +480,17 @@ class SGF:
     # https://xkcd.com/1171/
     SGFPROP_PAT = re.compile(r"\s*(?:\(|\)|;|(\w+)((\s*\[([^\]\\]|\\.)*\])+))", flags=re.DOTALL)
     SGF_PAT = re.compile(r"\(;.*\)", flags=re.DOTALL)
+    _ONLY_CLOSE_PAT = re.compile(r"\s*\)\s*\Z")  # rest of the input is a lone ")"
+    _VALUE_SPLIT_PAT = re.compile(r"\]\s*\[")
+    # Collection splitting: structure outside property values, and the end of a value
+    _COLLECTION_TOKEN_PAT = re.compile(r"[()\[]")
+    _VALUE_END_PAT = re.compile(r"\\.|\]", flags=re.DOTALL)
+    COLLECTION_CHUNK_SIZE = 64 * 1024
+    # Bytes looked at to choose an encoding (CA is a root property, so it comes first)
+    ENCODING_PREFIX_SIZE = 8 * 1024
+    # Tried in order when a guessed encoding cannot decode the whole file
+    # (Fox/Tygem often use GB18030, Nihon-Kiin uses CP932)
+    FALLBACK_ENCODINGS: tuple[str, ...] = ("utf-8", "utf-8-sig", "gb18030", "cp932", "euc-kr", "latin-1")
 
     @classmethod
     def parse_sgf(cls, input_str: str) -> SGFNode:
@@ -492,42 +512,169 @@ class SGF:
     @classmethod
     def parse_file(cls, filename: str, encoding: str | None = None) -> SGFNode:
         """Parse a file as SGF, encoding will be detected if not given."""
-        is_gib = filename.lower().endswith(".gib")
-        is_ngf = filename.lower().endswith(".ngf")
         with open(filename, "rb") as f:
             bin_contents = f.read()
+        decoded, _ = cls.decode_contents(bin_contents, filename, encoding)
+        if filename.lower().endswith(".ngf"):
+            return cls.parse_ngf(decoded)
+        if filename.lower().endswith(".gib"):
+            return cls.parse_gib(decoded)
+        else:  # sgf
+            return cls.parse_sgf(decoded)
+
+    @classmethod
+    def decode_contents(cls, bin_contents: bytes, filename: str = "", encoding: str | None = None) -> tuple[str, str]:
+        """Decode the contents of an SGF/GIB/NGF file, returning (text, encoding used).
+
+        The encoding is chosen from the first ``ENCODING_PREFIX_SIZE`` bytes
+        (see ``detect_encoding``) unless given, and the contents are decoded
+        once with it. Only if a guessed encoding cannot decode the whole file
+        are ``FALLBACK_ENCODINGS`` tried; an encoding the file declares itself
+        is decoded leniently instead, dropping invalid bytes.
+        """
+        prefix = bin_contents[: cls.ENCODING_PREFIX_SIZE]
+        declared = cls._declared_encoding(prefix, filename)
+        encoding = encoding or declared or cls._guess_encoding(prefix)
+        try:
+            return bin_contents.decode(encoding), encoding
+        except UnicodeDecodeError:
+            if encoding == declared:
+                return bin_contents.decode(encoding, errors="ignore"), encoding
+        except LookupError:
+            pass
+        for fallback in cls.FALLBACK_ENCODINGS:
+            try:
+                return bin_contents.decode(fallback), fallback
+            except UnicodeDecodeError:
+                continue
+        return bin_contents.decode(cls.DEFAULT_ENCODING, errors="ignore"), cls.DEFAULT_ENCODING
+
+    @classmethod
+    def detect_encoding(cls, bin_contents: bytes, filename: str = "") -> str:
+        """Encoding of a file starting with ``bin_contents``; only the first ``ENCODING_PREFIX_SIZE`` bytes are used."""
+        prefix = bin_contents[: cls.ENCODING_PREFIX_SIZE]
+        return cls._declared_encoding(prefix, filename) or cls._guess_encoding(prefix)
+
+    @classmethod
+    def _declared_encoding(cls, prefix: bytes, filename: str = "") -> str | None:
+        """Encoding implied by the file type or the CA property, None if unknown."""
+        if filename.lower().endswith((".gib", ".ngf")) or b"AP[foxwq]" in prefix:
+            return "utf-8"
+        match = re.search(rb"CA\[(.*?)\]", prefix)
+        if match:
+            try:
+                return codecs.lookup(match[1].decode("ascii", errors="ignore").strip()).name
+            except LookupError:
+                return None
+        return None
+
+    @classmethod
+    def _guess_encoding(cls, prefix: bytes) -> str:
+        """Encoding guessed from the first bytes of a file: UTF-8 if they are valid UTF-8, else chardet."""
+        if prefix.startswith(codecs.BOM_UTF8):
+            return "utf-8-sig"
+        try:
+            codecs.getincrementaldecoder("utf-8")().decode(prefix)  # not final: the prefix may end mid-character
+            return "utf-8"
+        except UnicodeDecodeError:
+            pass
+        detected = chardet.detect(prefix[:300])["encoding"]
+        # chardet 5 -> 7: chardet 5 reported "GB2312" for short
+        # Chinese bodies and sometimes mis-detected CJK text as
+        # "Windows-1252". chardet 7 returns "GB18030" (a GBK
+        # superset) or other Windows-125x variants. Falling
+        # back to GB18030 keeps the legacy GBK behaviour for
+        # both branches.
+        if detected in ("Windows-1252", "Windows-1253", "GB2312", "GB18030"):
+            return "gb18030"
+        try:
+            return codecs.lookup(detected).name if detected else cls.DEFAULT_ENCODING
+        except LookupError:
+            return cls.DEFAULT_ENCODING
+
+    @classmethod
+    def iter_file(cls, filename: str, encoding: str | None = None) -> Iterator[SGFNode]:
+        """Parse a file as SGF, yielding the root of each game in it.
+
+        A collection file ``(;...)(;...)`` yields one root per game tree, reading
+        the file in chunks, so only one game is held in memory at a time.
+        GIB and NGF files hold a single game.
+        """
+        if filename.lower().endswith((".gib", ".ngf")):
+            yield cls.parse_file(filename, encoding)
+            return
+        for game in cls.iter_file_strings(filename, encoding):
+            yield cls.parse_sgf(game)
+
+    @classmethod
+    def iter_file_strings(cls, filename: str, encoding: str | None = None) -> Generator[str, None, None]:
+        """Text of each game tree in an SGF (collection) file, read in chunks."""
+        with open(filename, "rb") as f:
+            head = f.read(cls.COLLECTION_CHUNK_SIZE)
             if not encoding:
-                if is_gib or is_ngf or b"AP[foxwq]" in bin_contents:
-                    encoding = "utf8"
-                else:  # sgf
-                    match = re.search(rb"CA\[(.*?)\]", bin_contents)
-                    if match:
-                        encoding = match[1].decode("ascii", errors="ignore")
-                    else:
-                        detected = chardet.detect(bin_contents[:300])["encoding"]
-                        # chardet 5 -> 7: chardet 5 reported "GB2312" for short
-                        # Chinese bodies and sometimes mis-detected CJK text as
-                        # "Windows-1252". chardet 7 returns "GB18030" (a GBK
-                        # superset) or other Windows-125x variants. Falling
-                        # back to GBK keeps the legacy behaviour for both
-                        # branches: GB18030 / Windows-125x / Windows-1252 ->
-                        # GBK covers the original compatibility quirks.
-                        if detected in ("Windows-1252", "Windows-1253", "GB2312", "GB18030"):
-                            encoding = "GBK"
-                        elif detected is not None:
-                            encoding = detected
-                        else:
-                            encoding = cls.DEFAULT_ENCODING
+                encoding = cls.detect_encoding(head, filename)
             try:
-                decoded = bin_contents.decode(encoding=encoding, errors="ignore")
+                decoder = codecs.getincrementaldecoder(encoding)(errors="ignore")
             except LookupError:
-                decoded = bin_contents.decode(encoding=cls.DEFAULT_ENCODING, errors="ignore")
-            if is_ngf:
-                return cls.parse_ngf(decoded)
-            if is_gib:
-                return cls.parse_gib(decoded)
-            else:  # sgf
-                return cls.parse_sgf(decoded)
+                decoder = codecs.getincrementaldecoder(cls.DEFAULT_ENCODING)(errors="ignore")
+
+            def text_chunks() -> Iterator[str]:
+                data = head
+                while data:
+                    yield decoder.decode(data)
+                    data = f.read(cls.COLLECTION_CHUNK_SIZE)
+                yield decoder.decode(b"", final=True)
+
+            yield from cls.split_game_strings(text_chunks())
+
+    @classmethod
+    def split_game_strings(cls, text_chunks: Iterable[str]) -> Iterator[str]:
+        """Split SGF collection text, arriving in chunks, into the text of each top-level game tree.
+
+        Only ``(``, ``)`` and property values are tracked, so this is far cheaper than
+        parsing. Text between game trees is dropped; an unterminated last game is
+        yielded as is, for the parser to report.
+        """
+        buffer = ""  # from the "(" opening the current game, or unscanned text between games
+        pos = 0
+        depth = 0
+        in_value = False
+        for chunk in text_chunks:
+            buffer += chunk
+            while True:
+                if in_value:
+                    match = cls._VALUE_END_PAT.search(buffer, pos)
+                    if match is None:  # a trailing "\\" escapes the first character of the next chunk
+                        pos = len(buffer) - 1 if buffer.endswith("\\") else len(buffer)
+                        break
+                    pos = match.end()
+                    in_value = match[0] != "]"
+                    continue
+                match = cls._COLLECTION_TOKEN_PAT.search(buffer, pos)
+                if match is None:
+                    if depth == 0:
+                        buffer = ""
+                    pos = len(buffer)
+                    break
+                pos = match.end()
+                token = match[0]
+                if token == "(":
+                    if depth == 0:
+                        buffer = buffer[match.start() :]
+                        pos = 1
+                    depth += 1
+                elif depth == 0:  # "[" or ")" outside of a game
+                    continue
+                elif token == "[":
+                    in_value = True
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        yield buffer[:pos]
+                        buffer = buffer[pos:]
+                        pos = 0
+        if depth > 0:
+            yield buffer
 
     def __init__(self, contents: str) -> None:
         self.contents = contents
@@ -539,28 +686,42 @@ class SGF:
         self._parse_branch(self.root)
 
     def _parse_branch(self, current_move: SGFNode) -> None:
-        while self.ix < len(self.contents):
-            match = re.match(self.SGFPROP_PAT, self.contents[self.ix :])
+        """Parse from ``self.ix`` until the ``)`` closing the branch of ``current_move``.
+
+        Tokens are matched in place (``pattern.match(contents, pos)``) so the
+        scan is linear in the input size, and nested variations are tracked
+        on an explicit stack instead of recursing, so arbitrarily deep
+        variation trees parse without hitting the recursion limit.
+        """
+        contents = self.contents
+        end = len(contents)
+        match_token = self.SGFPROP_PAT.match
+        parents: list[SGFNode] = []  # current_move of each enclosing branch
+        while self.ix < end:
+            match = match_token(contents, self.ix)
             if not match:
                 break
-            self.ix += len(match[0])
+            self.ix = match.end()
             matched_item = match[0].strip()
             if matched_item == ")":
-                return
-            if matched_item == "(":
-                self._parse_branch(self._NODE_CLASS(parent=current_move))
+                if not parents:
+                    return
+                current_move = parents.pop()
+            elif matched_item == "(":
+                parents.append(current_move)
+                current_move = self._NODE_CLASS(parent=current_move)
             elif matched_item == ";":
                 # ignore ;) for old SGF
-                useless = self.ix < len(self.contents) and self.contents[self.ix :].strip() == ")"
+                useless = self._ONLY_CLOSE_PAT.match(contents, self.ix) is not None
                 # ignore ; that generate empty nodes
                 if not (current_move.empty or useless):
                     current_move = self._NODE_CLASS(parent=current_move)
             else:
                 property, value = match[1], match[2].strip()[1:-1]
-                values = re.split(r"\]\s*\[", value)
+                values = self._VALUE_SPLIT_PAT.split(value)
                 current_move.add_list_property(property, [SGFNode._unescape_value(v) for v in values])
-        if self.ix < len(self.contents):
-            raise ParseError(f"Parse Error: unexpected character at {self.contents[self.ix : self.ix + 25]}")
+        if self.ix < end:
+            raise ParseError(f"Parse Error: unexpected character at {contents[self.ix : self.ix + 25]}")
         raise ParseError("Parse Error: expected ')' at end of input.")
 
     # NGF parser adapted from https://github.com/fohristiwhirl/gofish/
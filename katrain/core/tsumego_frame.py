@@ -28,7 +28,13 @@ def tsumego_frame_from_katrain_game(
     game: Game, komi: float, black_to_play_p: bool, ko_p: bool, margin: int
 ) -> tuple[GameNode, RegionTuple | None]:
     current_node = game.current_node
-    bw_board = [[game.chains[c][0].player if c >= 0 else "-" for c in line] for line in game.board]
+    szx, szy = game.board_size
+    bw_board = [["-"] * szx for _ in range(szy)]
+    for stone in game.stones:  # one snapshot of the position, instead of rebuilding the chains per point
+        if stone.coords is None:
+            continue
+        x, y = stone.coords
+        bw_board[y][x] = stone.player
     isize, jsize = ij_sizes(bw_board)
     blacks, whites, analysis_region = tsumego_frame(bw_board, komi, black_to_play_p, ko_p, margin)
     sgf_blacks = katrain_sgf_from_ijs(blacks, isize, jsize, "B")
@@ -1,9 +1,12 @@
+import contextlib
 import heapq
 import math
+import os
 import random
+import stat
 import struct
-from collections.abc import Sequence
-from typing import Any, TypeVar
+from collections.abc import Iterator, Sequence
+from typing import IO, Any, BinaryIO, Literal, TextIO, TypeVar, overload
 
 T = TypeVar("T")
 
@@ -51,12 +54,59 @@ def pack_floats(float_list: list[float] | None) -> bytes:
     return struct.pack(f"{len(float_list)}e", *float_list)
 
 
-def unpack_floats(data: bytes, num: int) -> tuple[float, ...] | None:
+def unpack_floats(data: bytes | memoryview, num: int) -> tuple[float, ...] | None:
     if not data:
         return None
     return struct.unpack(f"{num}e", data)
 
 
+_NEW_FILE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0) | getattr(os, "O_NOINHERIT", 0)
+
+
+def _create_temp_file(directory: str, name: str) -> tuple[int, str]:
+    """Creates an empty file next to ``name`` in ``directory`` with the mode a new file gets (0666 less the umask)."""
+    while True:
+        temp_path = os.path.join(directory, f".{name}.{os.urandom(4).hex()}.tmp")
+        try:
+            return os.open(temp_path, _NEW_FILE_FLAGS, 0o666), temp_path
+        except FileExistsError:
+            continue
+
+
+@overload
+def replacing_file(path: str, mode: Literal["w"] = "w", **kwargs: Any) -> contextlib.AbstractContextManager[TextIO]: ...
+
+
+@overload
+def replacing_file(path: str, mode: Literal["wb"], **kwargs: Any) -> contextlib.AbstractContextManager[BinaryIO]: ...
+
+
+def replacing_file(path: str, mode: str = "w", **kwargs: Any) -> contextlib.AbstractContextManager[IO[Any]]:
+    """Opens a temp file next to ``path`` that replaces it when the block exits without an error.
+
+    The temp file keeps the permissions ``path`` has, or gets those of any new file;
+    a symlinked ``path`` stays a symlink, and its target is replaced. On an error the
+    temp file is removed and ``path`` is left intact.
+    """
+    return _replacing_file(path, mode, **kwargs)
+
+
+@contextlib.contextmanager
+def _replacing_file(path: str, mode: str, **kwargs: Any) -> Iterator[IO[Any]]:
+    target = os.path.realpath(path)
+    fd, temp_path = _create_temp_file(os.path.dirname(target), os.path.basename(target))
+    try:
+        with os.fdopen(fd, mode, **kwargs) as f:
+            yield f
+        with contextlib.suppress(FileNotFoundError):
+            os.chmod(temp_path, stat.S_IMODE(os.stat(target).st_mode))
+        os.replace(temp_path, target)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
+        raise
+
+
 def format_visits(n: int) -> str:
     if n < 1000:
         return str(n)
@@ -29,6 +29,7 @@ from katrain.core.constants.output import OUTPUT_ERROR, OUTPUT_INFO
 from katrain.core.diagnostics import (
     DiagnosticsBundle,
     collect_app_info,
+    collect_engine_latency,
     collect_katago_info,
     collect_settings_snapshot,
     collect_system_info,
@@ -116,6 +117,7 @@ def _collect_diagnostics(ctx: FeatureContext) -> DiagnosticsBundle:
         app_info=app_info,
         settings=settings,
         logs=logs,
+        engine_latency=collect_engine_latency(engine),
     )
 
 
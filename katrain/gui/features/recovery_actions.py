@@ -27,6 +27,7 @@ from katrain.core.constants.metadata import DATA_FOLDER
 from katrain.core.constants.output import OUTPUT_ERROR, OUTPUT_INFO
 from katrain.core.diagnostics import (
     collect_diagnostics_bundle,  # PUBLIC API
+    collect_engine_latency,
     create_diagnostics_zip,
     format_llm_diagnostics_text,  # PUBLIC API
     generate_diagnostics_filename,
@@ -87,6 +88,7 @@ def _build_bundle(ctx: FeatureContext) -> DiagnosticsBundle:
         data_folder=DATA_FOLDER,
         config_data=config_data,
         logs=logs,
+        engine_latency=collect_engine_latency(engine),
     )
 
 
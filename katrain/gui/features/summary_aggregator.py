@@ -9,6 +9,8 @@
 
 from __future__ import annotations
 
+import os
+import sqlite3
 from collections import Counter
 from typing import TYPE_CHECKING, Any
 
@@ -18,18 +20,20 @@ from katrain.core.game import KaTrainSGF
 from katrain.gui.features.types import LogFunction
 
 if TYPE_CHECKING:
-    pass
+    from katrain.core.batch.library_index import LibraryIndex
 
 
 def scan_player_names(
     sgf_files: list[str],
     log_fn: LogFunction,
+    index: LibraryIndex | None = None,
 ) -> dict[str, int]:
     """SGFファイルから全プレイヤー名をスキャン（出現回数付き）
 
     Args:
         sgf_files: SGFファイルパスのリスト
         log_fn: ログ出力関数（message, level）
+        index: ライブラリインデックス（指定時は未変更ファイルをパースしない）
 
     Returns:
         {player_name: count} の辞書
@@ -37,9 +41,27 @@ def scan_player_names(
 
     player_counts: dict[str, int] = {}
 
+    # インデックスのヘッダで分かるファイルはパース不要
+    headers = {}
+    encodings = {}
+    if index is not None:
+        try:
+            entries = index.refresh(sgf_files)
+        except sqlite3.Error as e:
+            log_fn(f"Library index unavailable, scanning all files: {e}", OUTPUT_ERROR)
+            entries = {}
+        headers = {path: entries[path].header for path in entries if entries[path].header is not None}
+        encodings = {path: entries[path].encoding for path in entries}
+
     for path in sgf_files:
+        header = headers.get(os.path.abspath(path))
+        if header is not None:
+            for name in (header.player_black, header.player_white):
+                if name:
+                    player_counts[name] = player_counts.get(name, 0) + 1
+            continue
         try:
-            move_tree = KaTrainSGF.parse_file(path)
+            move_tree = KaTrainSGF.parse_file(path, encodings.get(os.path.abspath(path)))
             player_black = move_tree.get_property("PB", "").strip()
             player_white = move_tree.get_property("PW", "").strip()
 
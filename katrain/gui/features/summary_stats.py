@@ -17,6 +17,7 @@ import os
 from typing import TYPE_CHECKING, Any
 
 from katrain.core import analysis
+from katrain.core.analysis_block import BLOCK_REF_PREFIX
 from katrain.core.game import KaTrainSGF
 from katrain.gui.features.types import LogFunction
 
@@ -48,6 +49,12 @@ def extract_analysis_from_sgf_node(node: Any) -> dict[str, Any] | None:
         if not isinstance(kt_data, list):
             return None
 
+        # 解析フォーマット 2.0: KT は ルートの KTB ブロックへの参照（"@<entry>"）
+        if isinstance(kt_data[0], str) and kt_data[0].startswith(BLOCK_REF_PREFIX):
+            if hasattr(node, "load_analysis") and node.load_analysis():
+                return node.analysis  # type: ignore[no-any-return]
+            return None
+
         if len(kt_data) < 3:
             return None
 
@@ -22,6 +22,7 @@ Kivy依存性:
 
 from __future__ import annotations
 
+import os
 from collections.abc import Callable
 from typing import TYPE_CHECKING, Any
 
@@ -106,9 +107,20 @@ class SummaryManager:
 
     def scan_player_names(self, sgf_files: list[str]) -> dict[str, Any]:
         """SGFファイル群からプレイヤー名をスキャン。"""
+        from katrain.core.batch.library_index import open_library_index
         from katrain.gui.features.summary_aggregator import scan_player_names as _scan
 
-        return _scan(sgf_files, self._logger)
+        # 未変更ファイルはライブラリ（共通の親フォルダ）のインデックスから読む
+        try:
+            library_dir = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in sgf_files])
+        except ValueError:  # 空リスト、または別ドライブ
+            return _scan(sgf_files, self._logger)
+        index = open_library_index(library_dir)
+        try:
+            return _scan(sgf_files, self._logger, index=index)
+        finally:
+            if index is not None:
+                index.close()
 
     def categorize_games_by_stats(
         self, game_stats_list: list[dict[str, Any]], focus_player: str | None
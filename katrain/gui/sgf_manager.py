@@ -27,6 +27,7 @@ from kivy.core.clipboard import Clipboard
 from kivy.metrics import dp, sp
 from kivy.uix.dropdown import DropDown
 
+from katrain.core.batch.library_index import lookup_cached_encoding
 from katrain.core.constants.output import OUTPUT_DEBUG, OUTPUT_ERROR, OUTPUT_INFO, STATUS_ERROR, STATUS_INFO
 from katrain.core.game import KaTrainSGF
 from katrain.core.lang import i18n
@@ -157,7 +158,7 @@ class SGFManager:
             file = os.path.abspath(file)
             if not os.path.isfile(file):
                 raise FileNotFoundError(f"Not a file: {file}")
-            move_tree = KaTrainSGF.parse_file(file)
+            move_tree = KaTrainSGF.parse_file(file, lookup_cached_encoding(file))
         except (ParseError, OSError) as e:
             self._log(i18n._("Failed to load SGF").format(error=e), OUTPUT_ERROR)
             return
@@ -79,6 +79,7 @@ class MoveTreeCanvas(Widget):
         self.menu_selected_node = selected_node
 
     def delete_selected_node(self) -> None:
+        katrain = MDApp.get_running_app().gui
         selected_node = self.menu_selected_node or self.scroll_view_widget.current_node
         if selected_node and selected_node.parent:
             if selected_node.shortcut_from:
@@ -86,10 +87,10 @@ class MoveTreeCanvas(Widget):
                 via = [v for m, v in parent.shortcuts_to if m == selected_node]
                 selected_node.remove_shortcut()
                 if via:  # should always be
-                    parent.children.remove(via[0])
+                    katrain.game.delete_node(via[0])
             else:
                 parent = selected_node.parent
-                parent.children.remove(selected_node)
+                katrain.game.delete_node(selected_node)
             self.set_game_node(parent)
         self.is_open = False
 
@@ -100,17 +101,14 @@ class MoveTreeCanvas(Widget):
             while node.parent is not None:
                 node.parent.children = [node]
                 node = node.parent
+            MDApp.get_running_app().gui.game.tree_index.rebuild()
             self.set_game_node(selected_node)
         self.is_open = False
 
     def make_selected_node_main_branch(self) -> None:
         selected_node = self.menu_selected_node or self.scroll_view_widget.current_node
         if selected_node and selected_node.parent:
-            node = selected_node
-            while node.parent is not None:
-                node.parent.children.remove(node)
-                node.parent.children.insert(0, node)
-                node = node.parent
+            MDApp.get_running_app().gui.game.make_main_branch(selected_node)
             self.set_game_node(selected_node)
         self.is_open = False
 
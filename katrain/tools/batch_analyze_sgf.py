@@ -8,6 +8,7 @@ This tool processes a folder of SGF files and saves them in the same
 Usage:
     python -m katrain.tools.batch_analyze_sgf --input-dir ./sgf --output-dir ./analyzed
     python -m katrain.tools.batch_analyze_sgf --input-dir ./sgf --visits 500 --skip-if-already-analyzed
+    python -m katrain.tools.batch_analyze_sgf --input-dir ./analyzed --summary-only --workers 0
 
 Requirements:
     - KataGo engine must be configured in KaTrain settings
@@ -74,6 +75,7 @@ from katrain.core.batch import (
 # Stats function private aliases
 from katrain.core.constants.output import OUTPUT_DEBUG, OUTPUT_INFO
 from katrain.core.engine import KataGoEngine
+from katrain.core.engine_pool import KataGoEnginePool
 from katrain.core.errors import AnalysisTimeoutError, EngineError
 
 # Private aliases for backward compatibility (used by tests/external scripts)
@@ -168,8 +170,14 @@ Examples:
     # Skip files that already have analysis
     python -m katrain.tools.batch_analyze_sgf --input-dir ./games --skip-if-already-analyzed
 
+    # Spread queries over 4 KataGo processes (many-core CPU servers)
+    python -m katrain.tools.batch_analyze_sgf --input-dir ./games --engines 4
+
     # In-place analysis (overwrites original files)
     python -m katrain.tools.batch_analyze_sgf --input-dir ./games
+
+    # Per-player summaries of already analyzed files, one worker per CPU core
+    python -m katrain.tools.batch_analyze_sgf --input-dir ./analyzed --summary-only --workers 0
 """,
     )
 
@@ -200,6 +208,23 @@ Examples:
         default=600.0,
         help="Timeout per file in seconds (default: 600)",
     )
+    parser.add_argument(
+        "--engines",
+        type=int,
+        default=1,
+        help="Number of KataGo processes to run in parallel (default: 1)",
+    )
+    parser.add_argument(
+        "--summary-only",
+        action="store_true",
+        help="Do not analyze; write per-player summaries of the already analyzed files",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes extracting game stats for --summary-only (0 = one per CPU core, default: 1)",
+    )
     parser.add_argument(
         "--debug",
         action="store_true",
@@ -217,6 +242,16 @@ Examples:
     output_dir = args.output_dir if args.output_dir else args.input_dir
     os.makedirs(output_dir, exist_ok=True)
 
+    if args.summary_only:
+        from katrain.core.batch import run_summary_batch
+
+        summary_result = run_summary_batch(args.input_dir, output_dir, workers=args.workers, log_cb=print)
+        print()
+        print("Summary generation complete!" if summary_result.summary_written else "No summary written.")
+        print(f"  Games: {summary_result.success_count}")
+        print(f"  Failed: {summary_result.fail_count}")
+        sys.exit(0 if summary_result.summary_written else 1)
+
     # Collect SGF files (non-recursive for CLI compatibility)
     sgf_files = collect_sgf_files(args.input_dir, skip_analyzed=args.skip_if_already_analyzed)
 
@@ -233,7 +268,11 @@ Examples:
     # Initialize KataGo engine
     engine_config = katrain.config("engine")
     try:
-        engine = KataGoEngine(katrain, engine_config)
+        engine: KataGoEngine | KataGoEnginePool
+        if args.engines > 1:
+            engine = KataGoEnginePool(katrain, engine_config, size=args.engines)
+        else:
+            engine = KataGoEngine(katrain, engine_config)
     except (OSError, RuntimeError, EngineError) as e:
         # Engine startup failure: executable not found, process crash, or engine error
         # All three are expected failure modes for engine initialization
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+"""
+Benchmark script for SGF parsing of large analyzed games.
+
+Measures KaTrainSGF.parse_sgf() on multi-MB SGFs carrying KT analysis
+properties. Without --sgf a synthetic analyzed game is generated
+(main line plus side variations, every node with KT data).
+
+Usage:
+    python scripts/benchmark_sgf_parse.py --moves 300 --kt-bytes 8000 --threshold 2.0 --strict
+    python scripts/benchmark_sgf_parse.py --sgf my_analyzed_game.sgf
+    python scripts/benchmark_sgf_parse.py --help
+
+Options:
+    --sgf FILE          SGF file(s) to parse (default: synthetic game)
+    --moves N           Main-line moves of the synthetic game (default: 300)
+    --kt-bytes N        KT payload bytes per node of the synthetic game (default: 8000)
+    --repeat N          Parse each input N times and report the best run (default: 3)
+    --threshold SEC     Time threshold in seconds for the slowest input (default: 2.0)
+    --strict            Exit with code 1 if threshold exceeded (default: warning only)
+"""
+
+import argparse
+import base64
+import json
+import platform
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+# Add project root to path for imports
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+COORDS = "abcdefghijklmnopqrs"
+
+
+def generate_analyzed_sgf(moves: int, kt_bytes: int, seed: int = 0) -> str:
+    """Build a 19x19 SGF where every node carries ``kt_bytes`` of KT data.
+
+    Every 20th main-line move gets a 10-move side variation.
+    """
+    rng = random.Random(seed)
+
+    def kt() -> str:
+        payload = base64.b64encode(rng.randbytes(kt_bytes * 3 // 4)).decode()
+        chunks = [payload[i : i + 4096] for i in range(0, len(payload), 4096)]
+        return "KT" + "".join(f"[{c}]" for c in chunks)
+
+    def node(i: int) -> str:
+        player = "BW"[i % 2]
+        return f";{player}[{rng.choice(COORDS)}{rng.choice(COORDS)}]{kt()}C[move {i}]"
+
+    parts = [f"(;GM[1]FF[4]SZ[19]KM[6.5]RU[japanese]{kt()}"]
+    closes = 0
+    for i in range(moves):
+        if i and i % 20 == 0:
+            side = "".join(node(i + j) for j in range(10))
+            parts.append(f"({side})(")
+            closes += 1
+        parts.append(node(i))
+    parts.append(")" * closes + ")")
+    return "".join(parts)
+
+
+def get_machine_spec() -> dict[str, Any]:
+    """Get machine specification for benchmark context."""
+    return {"platform": platform.platform(), "processor": platform.processor(), "python": platform.python_version()}
+
+
+def count_nodes(root: Any) -> int:
+    count, stack = 0, [root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.children)
+    return count
+
+
+def run_benchmark(inputs: list[tuple[str, str]], repeat: int, threshold: float) -> dict[str, Any]:
+    """Parse every (name, sgf) input ``repeat`` times; report the best run of each.
+
+    Returns:
+        Benchmark result dictionary
+    """
+    # Import here to avoid slow startup
+    from katrain.core.game.base import KaTrainSGF
+
+    results = []
+    for name, sgf in inputs:
+        best = float("inf")
+        nodes = 0
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            root = KaTrainSGF.parse_sgf(sgf)
+            best = min(best, time.perf_counter() - start_time)
+            nodes = count_nodes(root)
+        size_mb = len(sgf.encode("utf-8")) / (1024**2)
+        results.append(
+            {
+                "input": name,
+                "size_mb": round(size_mb, 2),
+                "nodes": nodes,
+                "elapsed_sec": round(best, 3),
+                "mb_per_sec": round(size_mb / best, 1) if best > 0 else None,
+            }
+        )
+
+    slowest = max(r["elapsed_sec"] for r in results)
+    return {
+        "results": results,
+        "slowest_sec": slowest,
+        "threshold_sec": threshold,
+        "passed": slowest <= threshold,
+        "machine": get_machine_spec(),
+    }
+
+
+def main() -> None:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark SGF parsing of large analyzed games",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("--sgf", type=Path, action="append", help="SGF file(s) to parse (default: synthetic game)")
+    parser.add_argument("--moves", type=int, default=300, help="Main-line moves of the synthetic game (default: 300)")
+    parser.add_argument(
+        "--kt-bytes", type=int, default=8000, help="KT payload bytes per node of the synthetic game (default: 8000)"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per input, best is reported (default: 3)")
+    parser.add_argument("--threshold", type=float, default=2.0, help="Time threshold in seconds (default: 2.0)")
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="Exit with code 1 if threshold exceeded (default: warning only)",
+    )
+
+    args = parser.parse_args()
+
+    if args.sgf:
+        inputs = []
+        for path in args.sgf:
+            if not path.exists():
+                print(f"ERROR: SGF file not found: {path}", file=sys.stderr)
+                sys.exit(1)
+            inputs.append((str(path), path.read_text(encoding="utf-8", errors="ignore")))
+    else:
+        inputs = [
+            (f"synthetic({args.moves} moves, {args.kt_bytes} B/node)", generate_analyzed_sgf(args.moves, args.kt_bytes))
+        ]
+
+    result = run_benchmark(inputs, max(1, args.repeat), args.threshold)
+
+    # Output JSON result
+    print(json.dumps(result, indent=2))
+
+    if not result["passed"]:
+        msg = f"{'FAILED' if args.strict else 'WARNING'}: {result['slowest_sec']:.2f}s > {args.threshold}s"
+        if args.strict:
+            print(msg, file=sys.stderr)
+            sys.exit(1)
+        else:
+            print(f"{msg} (non-strict)", file=sys.stderr)
+            sys.exit(0)
+    else:
+        print(f"PASSED: {result['slowest_sec']:.2f}s <= {args.threshold}s")
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,10 +16,13 @@ Exports:
   :func:`partial_analysis_suffix_missing` / :func:`partial_analysis_scattered`
   — pre-built edge-case MoveEval lists for confidence gating tests.
 - :func:`real_shape_summary` — canonical Shape-B Summary JSON.
+- :func:`library_index_folder` — autouse; library indexes go to a temp folder.
 """
 
 from __future__ import annotations
 
+import itertools
+
 import pytest
 
 from katrain.core.game import Game
@@ -220,3 +223,21 @@ def real_shape_summary() -> dict:
         },
         "loss_progression": {"all": [{"mistake_count": 5}] * 3},
     }
+
+
+# ---------------------------------------------------------------------------
+# Isolation fixtures
+# ---------------------------------------------------------------------------
+
+
+_library_index_folders = itertools.count()
+
+
+@pytest.fixture(autouse=True)
+def library_index_folder(tmp_path_factory, monkeypatch):
+    """Keep library index databases out of the user's data folder (created on first use)."""
+    from katrain.core.batch import library_index
+
+    folder = tmp_path_factory.getbasetemp() / f"library_index{next(_library_index_folders)}"
+    monkeypatch.setattr(library_index, "INDEX_FOLDER", str(folder))
+    return folder
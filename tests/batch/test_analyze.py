@@ -206,6 +206,9 @@ class TestRunBatchExtended:
         # karte_player_filter defaults to None (both players)
         assert sig.parameters["karte_player_filter"].default is None
 
+        # analysis stays embedded in the SGF unless a sidecar is requested
+        assert sig.parameters["analysis_sidecar"].default is False
+
 
 class TestBatchOutputDirectoryStructure:
     """Tests for batch output directory structure."""
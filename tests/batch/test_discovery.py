@@ -1,7 +1,7 @@
 """Batch SGF file discovery and parsing tests (Phase E-2).
 
 Extracted from tests/test_batch_analyzer.py. Covers
-:func:`has_analysis`, :func:`collect_sgf_files`,
+:func:`has_analysis`, :func:`scan_sgf_header`, :func:`collect_sgf_files`,
 :func:`collect_sgf_files_recursive`, encoding fallback paths, and
 :func:`KaTrainSGF` basic parsing.
 """
@@ -10,13 +10,20 @@ from __future__ import annotations
 
 import os
 
+import pytest
+
 from katrain.core.batch import (
     collect_sgf_files,
     collect_sgf_files_recursive,
+    expand_sgf_collections,
     has_analysis,
     parse_sgf_with_fallback,
     read_sgf_with_fallback,
+    scan_sgf_header,
+    sgf_io,
 )
+from katrain.core.batch.sgf_io import SGFCollectionReader, count_sgf_games
+from katrain.core.errors import SGFError
 from katrain.core.game import KaTrainSGF
 
 
@@ -54,6 +61,99 @@ class TestHasAnalysis:
 
         assert has_analysis(str(sgf_file)) is False
 
+    def test_kt_in_comment_is_not_analysis(self, tmp_path):
+        """A KT[...] inside a comment value is not a property."""
+        sgf_file = tmp_path / "comment.sgf"
+        sgf_file.write_text("(;GM[1]SZ[19]C[see KT[x\\] here];B[pd])", encoding="utf-8")
+
+        assert has_analysis(str(sgf_file)) is False
+
+    def test_kt_on_later_node(self, tmp_path):
+        """KT on a variation node is found."""
+        sgf_file = tmp_path / "later.sgf"
+        sgf_file.write_text("(;GM[1]SZ[19];B[pd](;W[dd])(;W[dp]KT[H4sI][H4sI][H4sI]))", encoding="utf-8")
+
+        assert has_analysis(str(sgf_file)) is True
+
+    def test_gib_never_analyzed(self, tmp_path):
+        gib_file = tmp_path / "game.gib"
+        gib_file.write_text("(;KT[H4sI])", encoding="utf-8")
+
+        assert has_analysis(str(gib_file)) is False
+
+
+class TestScanSgfHeader:
+    """Tests for scan_sgf_header() (header scan without building a tree)."""
+
+    SGF = "(;GM[1]FF[4]SZ[13]PB[Black \\] one]PW[白];B[aa]C[x\\]y];W[bb](;B[cc];W[dd])(;B[ee]))"
+
+    def test_root_values_and_main_line(self, tmp_path):
+        sgf_file = tmp_path / "game.sgf"
+        sgf_file.write_text(self.SGF, encoding="utf-8")
+
+        header = scan_sgf_header(str(sgf_file))
+        assert header is not None
+        assert header.board_size == (13, 13)
+        assert (header.player_black, header.player_white) == ("Black ] one", "白")
+        assert header.move_count == 4  # the second variation is not on the main line
+        assert header.has_kt is False
+        assert header.complete is True
+
+    def test_matches_parser_on_test_data(self):
+        data_dir = os.path.join(os.path.dirname(__file__), "..", "data")
+        for name in sorted(os.listdir(data_dir)):
+            if not name.endswith(".sgf"):
+                continue
+            path = os.path.join(data_dir, name)
+            header = scan_sgf_header(path)
+            root = KaTrainSGF.parse_file(path)
+            node, main_line_moves = root, 1 if root.move else 0
+            while node.children:
+                node = node.children[0]
+                main_line_moves += 1 if node.move else 0
+            assert header is not None, name
+            assert header.board_size == root.board_size, name
+            assert header.player_black == (root.get_property("PB") or ""), name
+            assert header.move_count == main_line_moves, name
+
+    def test_stops_after_root_with_analysis(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(sgf_io, "SCAN_CHUNK_SIZE", 16)
+        sgf_file = tmp_path / "analyzed.sgf"
+        sgf_file.write_text("(;GM[1]SZ[9]KTV[2.0]PB[b]KT[@0]" + ";B[aa]" * 500 + ")", encoding="utf-8")
+
+        header = scan_sgf_header(str(sgf_file), count_moves=False)
+        assert header is not None
+        assert header.has_kt is True
+        assert header.analysis_version == "2.0"
+        assert header.player_black == "b"
+        assert header.move_count is None
+        assert header.complete is False
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 7])
+    def test_chunk_boundaries(self, tmp_path, monkeypatch, chunk_size):
+        sgf_file = tmp_path / "game.sgf"
+        sgf_file.write_text(self.SGF, encoding="utf-8")
+        expected = scan_sgf_header(str(sgf_file))
+
+        monkeypatch.setattr(sgf_io, "SCAN_CHUNK_SIZE", chunk_size)
+        assert scan_sgf_header(str(sgf_file)) == expected
+
+    def test_legacy_encoding_trail_bytes(self, tmp_path):
+        """GB18030 names whose second byte is "\\" or "]" do not confuse the scan."""
+        sgf_file = tmp_path / "gbk.sgf"
+        sgf_file.write_bytes("(;GM[1]SZ[19]PB[俓僝]PW[十];B[pd];W[dp])".encode("gb18030"))
+
+        header = scan_sgf_header(str(sgf_file))
+        assert header is not None
+        assert (header.player_black, header.player_white, header.move_count) == ("俓僝", "十", 2)
+
+    def test_not_sgf(self, tmp_path):
+        sgf_file = tmp_path / "invalid.sgf"
+        sgf_file.write_text("(;GM[1]PB[unterminated", encoding="utf-8")
+
+        assert scan_sgf_header(str(sgf_file)) is None
+        assert scan_sgf_header(str(tmp_path / "missing.sgf")) is None
+
 
 class TestCollectSgfFiles:
     """Tests for collect_sgf_files() function (non-recursive, CLI)."""
@@ -161,6 +261,73 @@ class TestCollectSgfFilesRecursive:
         assert "unanalyzed.sgf" in files_skip[0][1]
 
 
+class TestCollections:
+    """Tests for SGF files holding several games."""
+
+    GAMES = "(;GM[1]PB[A];B[aa])\n(;GM[1]PB[B];B[bb])\n(;GM[1]PB[C];B[cc])"
+
+    def test_count_and_expand(self, tmp_path):
+        (tmp_path / "single.sgf").write_text("(;GM[1];B[aa](;W[bb])(;W[cc]))", encoding="utf-8")
+        (tmp_path / "db.sgf").write_text(self.GAMES, encoding="utf-8")
+        files = collect_sgf_files_recursive(str(tmp_path))
+
+        assert [count_sgf_games(abs_path) for abs_path, _ in files] == [3, 1]
+        assert [(rel, k) for _, rel, k in expand_sgf_collections(files)] == [
+            ("db#1.sgf", 0),
+            ("db#2.sgf", 1),
+            ("db#3.sgf", 2),
+            ("single.sgf", None),
+        ]
+
+    def test_single_game_counted_without_splitting(self, tmp_path, monkeypatch):
+        path = tmp_path / "game.sgf"
+        path.write_text("(;GM[1]PB[A];B[aa];W[bb])", encoding="utf-8")
+        monkeypatch.setattr(KaTrainSGF, "iter_file_strings", lambda *args: pytest.fail("split a single game"))
+        assert count_sgf_games(str(path)) == 1
+
+    @pytest.mark.parametrize(
+        "chunks, single",
+        [
+            ([b"(;GM[1];B[aa])"], True),
+            ([b"(;GM[1]", b";B[aa](;W[bb])"], False),
+            ([b"(;A[]) (", b" \n", b";B[])"], False),  # "(" and ";" in different chunks
+            ([b"(", b";B[aa])"], True),
+            ([b"( x ;"], False),
+            ([b""], False),
+        ],
+    )
+    def test_has_single_game_start(self, chunks, single):
+        assert sgf_io.has_single_game_start(chunks) is single
+
+    def test_collection_analyzed_only_if_every_game_is(self, tmp_path):
+        kt = "KT[H4sIAAAAAAAA][H4sIAAAAAAAA][eyJtb3ZlcyI6e319]"
+        path = tmp_path / "db.sgf"
+        path.write_text(f"(;GM[1]{kt};B[aa])(;GM[1];B[bb])", encoding="utf-8")
+        assert has_analysis(str(path)) is False
+        path.write_text(f"(;GM[1]{kt};B[aa])(;GM[1]{kt};B[bb])", encoding="utf-8")
+        assert has_analysis(str(path)) is True
+
+    def test_reader_reads_forward(self, tmp_path, monkeypatch):
+        path = tmp_path / "db.sgf"
+        path.write_text(self.GAMES, encoding="utf-8")
+        opened = []
+        iter_file_strings = KaTrainSGF.iter_file_strings
+        monkeypatch.setattr(
+            KaTrainSGF,
+            "iter_file_strings",
+            lambda filename, encoding=None: opened.append(filename) or iter_file_strings(filename, encoding),
+        )
+        reader = SGFCollectionReader()
+
+        assert [reader.game(str(path), k).get_property("PB") for k in (0, 1, 2)] == ["A", "B", "C"]
+        assert len(opened) == 1
+        assert reader.game(str(path), 0).get_property("PB") == "A"  # going back starts over
+        assert len(opened) == 2
+        with pytest.raises(SGFError):
+            reader.game(str(path), 5)
+        reader.close()
+
+
 class TestEncodingFallback:
     """Tests for encoding fallback functionality."""
 
@@ -230,6 +397,23 @@ class TestEncodingFallback:
         root = parse_sgf_with_fallback(str(sgf_file))
         assert root is not None
 
+    def test_parse_keeps_declared_encoding(self, tmp_path):
+        """The CA property decides the encoding; the text is parsed without a round trip through a file."""
+        sgf_file = tmp_path / "declared.sgf"
+        sgf_file.write_bytes("(;GM[1]FF[4]CA[cp932]SZ[19]PB[鈴木一郎];B[pd])".encode("cp932"))
+
+        root = parse_sgf_with_fallback(str(sgf_file))
+        assert root is not None
+        assert root.get_property("PB") == "鈴木一郎"
+
+    def test_parse_gib(self):
+        """GIB files are decoded and parsed as GIB."""
+        gib_path = os.path.join(os.path.dirname(__file__), "..", "data", "test.gib")
+
+        root = parse_sgf_with_fallback(gib_path)
+        assert root is not None
+        assert root.get_property("PB") == "kim"
+
 
 class TestKaTrainSGFParsing:
     """Tests for SGF parsing used by batch analyzer."""
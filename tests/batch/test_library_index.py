@@ -0,0 +1,192 @@
+"""Tests for katrain.core.batch.library_index.
+
+Covers:
+- LibraryIndex: metadata and encoding rows, stat-based reuse, rehash of touched files, rescan of changed files
+- Missing files and the schema version
+- collect_sgf_files_recursive / _setup_batch / scan_player_names answering from the index
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+from unittest.mock import MagicMock
+
+import pytest
+
+from katrain.core.batch import LibraryIndex, collect_sgf_files_recursive, open_library_index
+from katrain.core.batch.library_index import library_index_path, lookup_cached_encoding
+from katrain.core.batch.orchestration._setup import _setup_batch
+from katrain.core.batch.sgf_io import read_sgf_with_fallback
+from katrain.core.sgf_parser import SGF
+from katrain.gui.features.summary_aggregator import scan_player_names
+
+PLAIN = "(;GM[1]FF[4]SZ[13]KM[6.5]PB[Black]PW[White]BR[3d]WR[2k]DT[2024-01-02]RE[B+R];B[aa];W[bb];B[cc])"
+ANALYZED = "(;GM[1]FF[4]SZ[19]PB[Ana]PW[Lysed]KTV[1.0]KT[H4sI][H4sI][H4sI];B[pd])"
+
+
+def _write(path, content: str, mtime_ns: int | None = None) -> str:
+    path.write_text(content, encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+
+class TestLibraryIndex:
+    def test_entry_metadata(self, tmp_path):
+        index = LibraryIndex(":memory:")
+        entry = index.entry(_write(tmp_path / "game.sgf", PLAIN))
+
+        assert entry is not None
+        assert entry.has_analysis is False
+        header = entry.header
+        assert header is not None
+        assert (header.player_black, header.player_white) == ("Black", "White")
+        assert (header.rank_black, header.rank_white) == ("3d", "2k")
+        assert (header.date, header.result, header.komi) == ("2024-01-02", "B+R", 6.5)
+        assert header.board_size == (13, 13)
+        assert header.move_count == 3
+
+    def test_entry_encoding(self, tmp_path):
+        index = LibraryIndex(":memory:")
+        path = tmp_path / "gbk.sgf"
+        path.write_bytes("(;GM[1]PB[张三]PW[李四])".encode("gb18030"))
+
+        entry = index.entry(str(path))
+        assert entry is not None and entry.encoding == "gb18030"
+        assert index.entry(_write(tmp_path / "game.sgf", PLAIN)).encoding == "utf-8"
+
+    def test_unchanged_file_is_not_read(self, tmp_path):
+        path = _write(tmp_path / "game.sgf", ANALYZED)
+        db = str(tmp_path / "index.sqlite")
+        LibraryIndex(db).refresh([path])
+
+        index = LibraryIndex(db)  # reopened: rows persist
+        entry = index.entry(path)
+        assert entry is not None and entry.has_analysis is True
+        assert entry.header is not None and entry.header.player_black == "Ana"
+        assert (index.reused, index.rehashed, index.scanned) == (1, 0, 0)
+
+    def test_touched_file_is_rehashed_only(self, tmp_path):
+        index = LibraryIndex(":memory:")
+        path = _write(tmp_path / "game.sgf", PLAIN, mtime_ns=1_000_000_000)
+        index.entry(path)
+        _write(tmp_path / "game.sgf", PLAIN, mtime_ns=2_000_000_000)
+
+        entry = index.entry(path)
+        assert entry is not None and entry.mtime_ns == 2_000_000_000
+        assert (index.scanned, index.rehashed) == (1, 1)
+        assert index.entry(path) is not None
+        assert index.reused == 1  # the new stat was stored
+
+    def test_changed_file_is_rescanned(self, tmp_path):
+        index = LibraryIndex(":memory:")
+        path = _write(tmp_path / "game.sgf", PLAIN, mtime_ns=1_000_000_000)
+        assert not index.has_analysis(path)
+        _write(tmp_path / "game.sgf", ANALYZED, mtime_ns=2_000_000_000)
+
+        assert index.has_analysis(path)
+        assert index.scanned == 2
+
+    def test_missing_file_row_deleted(self, tmp_path):
+        index = LibraryIndex(":memory:")
+        path = _write(tmp_path / "game.sgf", PLAIN)
+        index.entry(path)
+        os.remove(path)
+
+        assert index.entry(path) is None
+        assert index.stats()["entries"] == 0
+
+    def test_invalid_sgf_indexed_without_header(self, tmp_path):
+        index = LibraryIndex(":memory:")
+        entry = index.entry(_write(tmp_path / "bad.sgf", "not valid sgf content"))
+
+        assert entry is not None
+        assert entry.header is None and entry.has_analysis is False
+
+    def test_old_schema_rebuilt(self, tmp_path):
+        db = str(tmp_path / "index.sqlite")
+        conn = sqlite3.connect(db)
+        conn.execute("CREATE TABLE files (path TEXT PRIMARY KEY)")
+        conn.commit()
+        conn.close()
+
+        index = LibraryIndex(db)
+        assert index.entry(_write(tmp_path / "game.sgf", PLAIN)) is not None
+
+
+class TestIndexUsers:
+    def test_collect_recursive_with_index(self, tmp_path):
+        games = tmp_path / "games"
+        games.mkdir()
+        _write(games / "plain.sgf", PLAIN)
+        _write(games / "analyzed.sgf", ANALYZED)
+        index = LibraryIndex(":memory:")
+
+        files = collect_sgf_files_recursive(str(tmp_path), skip_analyzed=True, index=index)
+        assert [rel for _, rel in files] == [os.path.join("games", "plain.sgf")]
+        collect_sgf_files_recursive(str(tmp_path), skip_analyzed=True, index=index)
+        assert (index.scanned, index.reused) == (2, 2)
+
+    def test_setup_batch_keeps_index_per_library(self, tmp_path, library_index_folder):
+        input_dir = tmp_path / "in"
+        input_dir.mkdir()
+        _write(input_dir / "plain.sgf", PLAIN)
+        _write(input_dir / "analyzed.sgf", ANALYZED)
+        output_dir = tmp_path / "out"
+        logs: list[str] = []
+
+        def setup(skip_analyzed: bool = True) -> list[str]:
+            setup = _setup_batch(
+                result=MagicMock(),
+                katrain=None,
+                input_dir=str(input_dir),
+                output_dir=str(output_dir),
+                save_analyzed_sgf=False,
+                generate_karte=False,
+                generate_summary=False,
+                generate_curator=False,
+                skip_analyzed=skip_analyzed,
+                log_cb=logs.append,
+            )
+            setup[-1].close()
+            return [rel for _, rel in setup[1]]
+
+        assert setup(skip_analyzed=False) == ["analyzed.sgf", "plain.sgf"]  # the index is kept either way
+        assert not output_dir.exists() or not any(output_dir.iterdir())
+        assert os.listdir(library_index_folder) == [os.path.basename(library_index_path(str(input_dir)))]
+        logs.clear()
+        assert setup() == ["plain.sgf"]
+        assert "Library index: 2 unchanged, 0 scanned" in logs
+
+    def test_cached_encoding_used_for_unchanged_files(self, tmp_path, monkeypatch):
+        path = tmp_path / "games" / "gbk.sgf"
+        path.parent.mkdir()
+        path.write_bytes("(;GM[1]PB[张三]PW[李四])".encode("gb18030"))
+        index = open_library_index(str(tmp_path))
+        index.refresh([str(path)])
+        monkeypatch.setattr(SGF, "_guess_encoding", classmethod(lambda cls, prefix: pytest.fail("detected again")))
+
+        assert index.cached_encoding(str(path)) == "gb18030"
+        assert read_sgf_with_fallback(str(path), index=index) == ("(;GM[1]PB[张三]PW[李四])", "gb18030")
+        assert lookup_cached_encoding(str(path)) == "gb18030"  # found from the library's subfolder
+        index.close()
+
+        os.utime(path, ns=(1, 1))
+        assert lookup_cached_encoding(str(path)) is None
+        assert lookup_cached_encoding(str(tmp_path.parent / "elsewhere.sgf")) is None
+
+    def test_index_path_keyed_by_library(self, tmp_path, library_index_folder):
+        path = library_index_path(str(tmp_path / "a"))
+        assert os.path.dirname(path) == str(library_index_folder)
+        assert path == library_index_path(str(tmp_path / "a" / ".." / "a"))
+        assert path != library_index_path(str(tmp_path / "b"))
+
+    def test_scan_player_names_from_index(self, tmp_path):
+        paths = [_write(tmp_path / "a.sgf", PLAIN), _write(tmp_path / "b.sgf", ANALYZED)]
+        index = open_library_index(str(tmp_path))
+        assert index is not None
+
+        assert scan_player_names(paths, MagicMock(), index=index) == {"Black": 1, "White": 1, "Ana": 1, "Lysed": 1}
+        assert scan_player_names(paths, MagicMock(), index=index) == scan_player_names(paths, MagicMock())
+        assert index.reused == 2
@@ -7,6 +7,8 @@ result strings, and filename sanitisation.
 
 from __future__ import annotations
 
+import os
+
 
 class TestHelperFunctions:
     """Tests for batch analyzer helper functions."""
@@ -176,6 +178,70 @@ class TestBatchOutputBehavior:
         if analyzed_dir.exists():
             assert list(analyzed_dir.glob("*.sgf")) == []
 
+    def test_collection_games_are_work_items(self, tmp_path, monkeypatch):
+        """Each game of a collection file is analyzed and saved on its own."""
+        from unittest.mock import MagicMock
+
+        from katrain.core.batch import analysis, run_batch
+
+        input_dir = tmp_path / "input"
+        input_dir.mkdir()
+        (input_dir / "db.sgf").write_text("(;GM[1]PB[A];B[aa])(;GM[1]PB[B];B[bb])")
+        (input_dir / "single.sgf").write_text("(;GM[1]PB[C];B[cc])")
+        calls = []
+
+        def fake_analyze(**kwargs):
+            calls.append((os.path.basename(kwargs["sgf_path"]), kwargs["game_index"], kwargs["output_path"]))
+            return True
+
+        monkeypatch.setattr(analysis, "analyze_single_file", fake_analyze)
+        progress = []
+        result = run_batch(
+            katrain=MagicMock(),
+            engine=MagicMock(),
+            input_dir=str(input_dir),
+            output_dir=str(tmp_path / "output"),
+            progress_cb=lambda i, total, rel: progress.append((i, total, rel)),
+        )
+
+        analyzed = str(tmp_path / "output" / "analyzed")
+        assert calls == [
+            ("db.sgf", 0, os.path.join(analyzed, "db#1.sgf")),
+            ("db.sgf", 1, os.path.join(analyzed, "db#2.sgf")),
+            ("single.sgf", None, os.path.join(analyzed, "single.sgf")),
+        ]
+        assert [p[:2] for p in progress] == [(1, 3), (2, 3), (3, 3)]
+        assert result.success_count == 3
+
+    def test_library_index_closed_when_a_file_fails(self, tmp_path, monkeypatch):
+        """An exception inside the batch loop still closes the library index."""
+        from unittest.mock import MagicMock
+
+        import pytest
+
+        from katrain.core.batch import orchestration
+        from katrain.core.batch.library_index import LibraryIndex
+
+        input_dir = tmp_path / "input"
+        input_dir.mkdir()
+        (input_dir / "game.sgf").write_text("(;GM[1];B[aa])")
+        closed = []
+        close = LibraryIndex.close
+        monkeypatch.setattr(LibraryIndex, "close", lambda self: closed.append(self) or close(self))
+
+        def fail(**kwargs):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(orchestration, "_process_single_file", fail)
+        with pytest.raises(RuntimeError, match="boom"):
+            orchestration.run_batch(
+                katrain=MagicMock(),
+                engine=MagicMock(),
+                input_dir=str(input_dir),
+                output_dir=str(tmp_path / "output"),
+            )
+        assert len(closed) == 1
+
 
 class TestBatchErrorHandling:
     """Tests for P1 hardening: error counting and reporting."""
@@ -0,0 +1,112 @@
+"""Tests for katrain.core.batch.stats.parallel.
+
+Covers:
+- extract_stats_from_sgf: stats of an analyzed file, log lines for unparsable files
+- extract_stats_parallel: worker processes give the same stats, in input order; collection games
+- run_summary_batch: summaries for a folder of analyzed files
+"""
+
+from __future__ import annotations
+
+import pickle
+import shutil
+from pathlib import Path
+
+from katrain.core.batch import expand_sgf_collections, run_summary_batch
+from katrain.core.batch.stats import extract_stats_from_sgf, extract_stats_parallel
+from katrain.core.batch.stats.parallel import resolve_worker_count
+
+ANALYZED_DIR = Path(__file__).parent.parent / "data" / "analyzed"
+GAMES = ["fully_analyzed.sgf", "with_branches.sgf", "with_pass.sgf"]
+
+
+def _files() -> list[tuple[str, str]]:
+    return [(str(ANALYZED_DIR / name), name) for name in GAMES]
+
+
+def _without_summary_data(stats: dict) -> dict:
+    return {k: v for k, v in stats.items() if k != "summary_data"}
+
+
+class TestExtractStatsFromSgf:
+    def test_analyzed_file(self):
+        stats, _messages = extract_stats_from_sgf(str(ANALYZED_DIR / "fully_analyzed.sgf"), "fully.sgf", 7)
+
+        assert stats is not None
+        assert stats["game_name"] == "fully.sgf"
+        assert stats["source_index"] == 7
+        assert stats["total_moves"] > 0
+        assert stats["summary_data"].snapshot.moves
+        pickle.dumps(stats)  # must be able to come back from a worker
+
+    def test_unparsable_file(self, tmp_path):
+        path = tmp_path / "broken.sgf"
+        path.write_bytes(b"not an sgf")
+
+        stats, messages = extract_stats_from_sgf(str(path), "broken.sgf")
+
+        assert stats is None
+        assert any("broken.sgf" in msg for msg in messages)
+
+
+class TestExtractStatsParallel:
+    def test_workers_match_serial_in_input_order(self):
+        files = _files() * 2
+        serial = extract_stats_parallel(files, workers=1)
+        parallel = extract_stats_parallel(files, workers=2)
+
+        assert [s["source_index"] for s in parallel] == list(range(len(files)))
+        assert [_without_summary_data(s) for s in parallel] == [_without_summary_data(s) for s in serial]
+
+    def test_failed_games_are_dropped(self, tmp_path):
+        broken = tmp_path / "broken.sgf"
+        broken.write_bytes(b"not an sgf")
+        logs: list[str] = []
+
+        stats = extract_stats_parallel([(str(broken), "broken.sgf"), *_files()], log_cb=logs.append)
+
+        assert [s["source_index"] for s in stats] == [1, 2, 3]
+        assert any("broken.sgf" in msg for msg in logs)
+
+    def test_collection_games(self, tmp_path):
+        sgf = (ANALYZED_DIR / "fully_analyzed.sgf").read_text(encoding="utf-8").strip()
+        (tmp_path / "db.sgf").write_text(f"{sgf}\n{sgf}", encoding="utf-8")
+        items = expand_sgf_collections([(str(tmp_path / "db.sgf"), "db.sgf")])
+
+        stats = extract_stats_parallel(items, workers=2)
+
+        assert [s["game_name"] for s in stats] == ["db#1.sgf", "db#2.sgf"]
+        assert _without_summary_data(stats[0]) == {
+            **_without_summary_data(stats[1]),
+            "game_name": "db#1.sgf",
+            "source_index": 0,
+        }
+
+    def test_resolve_worker_count(self):
+        assert resolve_worker_count(3) == 3
+        assert resolve_worker_count(-1) == 1
+        assert resolve_worker_count(0) >= 1
+        assert resolve_worker_count(None) == resolve_worker_count(0)
+
+
+class TestRunSummaryBatch:
+    def test_writes_player_summaries(self, tmp_path):
+        for name in GAMES:  # generic player names are left out of summaries
+            sgf = (ANALYZED_DIR / name).read_text(encoding="utf-8")
+            (tmp_path / name).write_text(sgf.replace("PB[Black]", "PB[Alice]", 1), encoding="utf-8")
+        shutil.copy(ANALYZED_DIR / "not_analyzed.sgf", tmp_path / "not_analyzed.sgf")
+
+        result = run_summary_batch(str(tmp_path), workers=1, min_games_per_player=1)
+
+        assert result.success_count == len(GAMES)
+        assert result.fail_count == 0
+        assert result.summary_written
+        assert list((tmp_path / "reports" / "summary").glob("summary_Alice_*.json"))
+
+    def test_no_analyzed_files(self, tmp_path):
+        shutil.copy(ANALYZED_DIR / "not_analyzed.sgf", tmp_path / "game.sgf")
+
+        result = run_summary_batch(str(tmp_path))
+
+        assert result.summary_error == "No analyzed SGF files found"
+        assert not result.summary_written
@@ -65,6 +65,7 @@ from tests._fixtures import (  # noqa: E402,F401  (re-export)
     game,
     game_9x9,
     game_with_separate_engines,
+    library_index_folder,
     make_moves,
     mock_engine,
     mock_engines,
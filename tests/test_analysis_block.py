@@ -0,0 +1,266 @@
+"""Tests for katrain.core.analysis_block (analysis format 2.0) and its use by GameNode.
+
+Covers:
+- AnalysisBlockWriter / AnalysisBlock round trip (move tables, float16 columns, missing arrays)
+- Malformed blocks raise ValueError
+- Saving a game writes one KTB block plus KT[@entry] references; loading reads them lazily
+- Format 1.0 per-node KT values still load; the block is smaller than per-node values
+- Sidecar (.kta): written next to the SGF, named by KTS, arrays served as views of the mapping
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import re
+import struct
+from typing import Any
+
+import pytest
+
+from katrain.core.analysis_block import AnalysisBlock, AnalysisBlockWriter, AnalysisSidecar, sidecar_path
+from katrain.core.constants.metadata import ANALYSIS_FORMAT_VERSION
+from katrain.core.game.base import KaTrainSGF
+from katrain.core.game_node import GameNode, LazyAnalysis, _encode_kt, analysis_dumps
+from katrain.core.sgf_parser import Move
+
+SQUARES = 9 * 9
+
+
+def _half(values: list[float]) -> list[float]:
+    """Values as they come back from float16 storage."""
+    return list(struct.unpack(f"{len(values)}e", struct.pack(f"{len(values)}e", *values)))
+
+
+def _analysis(rng: random.Random, squares: int = SQUARES, with_floats: bool = True) -> dict[str, Any]:
+    return {
+        "moves": {
+            move: {"move": move, "visits": rng.randint(1, 500), "winrate": rng.random(), "order": i, "pv": [move]}
+            for i, move in enumerate(["D4", "E5", "pass"])
+        },
+        "root": {"visits": 500, "winrate": rng.random(), "scoreLead": rng.uniform(-5, 5)},
+        "ownership": [round(rng.uniform(-1, 1), 2) for _ in range(squares)] if with_floats else None,
+        "policy": [round(rng.random(), 3) for _ in range(squares + 1)] if with_floats else None,
+        "completed": True,
+    }
+
+
+class TestBlockRoundTrip:
+    def test_entries_round_trip(self):
+        rng = random.Random(0)
+        analyses = [_analysis(rng), _analysis(rng, with_floats=False), _analysis(rng)]
+        analyses[2]["moves"]["D4"]["scoreLead"] = 1.5  # different move info keys -> second schema
+        writer = AnalysisBlockWriter(SQUARES)
+        assert [writer.add(a) for a in analyses] == [0, 1, 2]
+        block = AnalysisBlock(writer.dumps())
+
+        assert len(block) == 3
+        for index, expected in enumerate(analyses):
+            main, packed = block.entry(index)
+            assert list(main) == ["moves", "root", "completed"]
+            assert main["moves"] == expected["moves"]
+            assert main["root"] == expected["root"]
+            for key in ("ownership", "policy"):
+                data, count = packed[key]
+                if expected[key] is None:
+                    assert data == b""
+                else:
+                    assert list(struct.unpack(f"{count}e", data)) == _half(expected[key])
+
+    def test_per_move_ownership_dropped(self):
+        analysis = _analysis(random.Random(1))
+        analysis["moves"]["D4"]["ownership"] = [0.0] * SQUARES
+        writer = AnalysisBlockWriter(SQUARES)
+        writer.add(analysis)
+        main, _ = AnalysisBlock(writer.dumps()).entry(0)
+        assert "ownership" not in main["moves"]["D4"]
+
+    def test_wrong_sized_floats_rejected(self):
+        writer = AnalysisBlockWriter(SQUARES)
+        assert writer.add(_analysis(random.Random(2), squares=19 * 19)) is None
+        assert len(writer) == 0
+
+    def test_packed_floats_hook_used(self):
+        packed = struct.pack(f"{SQUARES}e", *([0.5] * SQUARES))
+        writer = AnalysisBlockWriter(SQUARES, lambda analysis, key: packed if key == "ownership" else None)
+        writer.add(_analysis(random.Random(3)))
+        _, floats = AnalysisBlock(writer.dumps()).entry(0)
+        assert floats["ownership"][0] == packed
+
+    @pytest.mark.parametrize("data", ["not base64!", "eJwDAAAAAAE=", "eJzzDnQyAgACpQEB"])
+    def test_malformed_block(self, data):
+        with pytest.raises(ValueError):
+            AnalysisBlock(data)
+
+
+def _analyzed_game(moves: int = 12) -> GameNode:
+    rng = random.Random(4)
+    root = GameNode(properties={"SZ": 9})
+    node = root
+    for i in range(moves):
+        node = GameNode(parent=node, move=Move((i % 9, i // 9), player="BW"[i % 2]))
+    side = GameNode(parent=root, move=Move((8, 8), player="B"))  # a variation
+    for n in [*root.nodes_in_tree]:
+        n.analysis = _analysis(rng)
+    side.analysis["completed"] = False  # incomplete analysis is not saved
+    return root
+
+
+class TestGameFormat:
+    def test_save_writes_block_and_references(self):
+        sgf = _analyzed_game().sgf(save_analysis=True)
+        assert f"KTV[{ANALYSIS_FORMAT_VERSION}]" in sgf
+        assert sgf.count("KTB[") == 1
+        assert re.findall(r"KT\[(@\d+)\]", sgf) == [f"@{i}" for i in range(13)]
+
+    def test_load_round_trip(self):
+        original = _analyzed_game()
+        loaded = KaTrainSGF.parse_sgf(original.sgf(save_analysis=True))
+        for saved, node in zip(original.nodes_in_tree, loaded.nodes_in_tree, strict=True):
+            if not saved.analysis_complete:
+                assert not node.load_analysis()
+                continue
+            assert node.load_analysis()
+            assert isinstance(node.analysis, LazyAnalysis)
+            assert node.analysis["moves"] == saved.analysis["moves"]
+            assert node.analysis.packed("policy") is not None  # not unpacked yet
+            assert list(node.ownership) == _half(saved.ownership)
+
+    def test_resave_keeps_block(self):
+        first = _analyzed_game().sgf(save_analysis=True)
+        loaded = KaTrainSGF.parse_sgf(first)
+        for node in loaded.nodes_in_tree:
+            node.load_analysis()
+        block = re.search(r"KTB\[([^\]]*)\]", first)[1]
+        assert f"KTB[{block}]" in loaded.sgf(save_analysis=True)
+
+    def test_format_1_still_loads(self):
+        root = GameNode(properties={"SZ": 9, "KTV": "1.0"})
+        child = GameNode(parent=root, move=Move((2, 2), player="B"))
+        analysis = _analysis(random.Random(5))
+        child.analysis_from_sgf = analysis_dumps(analysis)
+        assert child.load_analysis()
+        assert child.analysis["root"] == analysis["root"]
+        assert list(child.policy) == _half(analysis["policy"])
+
+    def test_reference_without_block_not_loaded(self):
+        loaded = KaTrainSGF.parse_sgf("(;SZ[9]KTV[2.0];B[cc]KT[@0])")
+        assert not loaded.children[0].load_analysis()
+
+    def test_reference_out_of_range_not_loaded(self):
+        root = _analyzed_game(moves=2)
+        loaded = KaTrainSGF.parse_sgf(root.sgf(save_analysis=True))
+        loaded.children[0].analysis_from_sgf = ["@3"]
+        assert not loaded.children[0].load_analysis()
+
+    def test_corrupt_kt_requeues_node(self):
+        node = KaTrainSGF.parse_sgf("(;SZ[9];B[cc])").children[0]
+        ownership, policy, _ = analysis_dumps(_analysis(random.Random(6)))
+        node.analysis_from_sgf = [ownership, policy, "H4sIbroken"]
+        assert node.load_analysis()
+        assert not node.analysis_complete
+        assert node.analysis_from_sgf is None
+
+    def test_undecodable_json_requeues_node(self):
+        node = KaTrainSGF.parse_sgf("(;SZ[9];B[cc])").children[0]
+        ownership, policy, _ = analysis_dumps(_analysis(random.Random(7)))
+        node.analysis_from_sgf = [ownership, policy, _encode_kt(b"{not json")]
+        assert node.load_analysis()
+        assert not node.analysis_complete
+        assert node.analysis_from_sgf is None
+
+    def test_block_smaller_than_per_node_values(self):
+        root = _analyzed_game(moves=40)
+        per_node = sum(len("".join(analysis_dumps(n.analysis))) for n in root.nodes_in_tree if n.analysis_complete)
+        block = re.search(r"KTB\[([^\]]*)\]", root.sgf(save_analysis=True))[1]
+        assert len(block) < per_node
+
+
+class TestSidecar:
+    def _save(self, tmp_path) -> tuple[GameNode, str]:
+        root = _analyzed_game()
+        path = str(tmp_path / "game.sgf")
+        with open(path, "w", encoding="utf-8") as f:
+            root.write_sgf(f, save_analysis=True, analysis_sidecar_path=sidecar_path(path))
+        return root, path
+
+    def test_sgf_names_sidecar_instead_of_block(self, tmp_path):
+        _, path = self._save(tmp_path)
+        with open(path, encoding="utf-8") as f:
+            sgf = f.read()
+        assert "KTS[game.kta]" in sgf
+        assert "KTB[" not in sgf
+        assert len(re.findall(r"KT\[@\d+\]", sgf)) == 13
+        assert len(AnalysisSidecar(sidecar_path(path))) == 13
+
+    def test_load_reads_views_from_sidecar(self, tmp_path):
+        original, path = self._save(tmp_path)
+        loaded = KaTrainSGF.parse_file(path)
+        saved_nodes = [n for n in original.nodes_in_tree if n.analysis_complete]
+        loaded_nodes = [n for n in loaded.nodes_in_tree if n.load_analysis()]
+        assert len(loaded_nodes) == len(saved_nodes)
+        for saved, node in zip(saved_nodes, loaded_nodes, strict=True):
+            assert node.analysis["root"] == saved.analysis["root"]
+            assert isinstance(node.analysis.packed("ownership"), memoryview)
+            assert list(node.policy) == _half(saved.policy)
+
+    def test_packed_without_table(self, tmp_path):
+        original, path = self._save(tmp_path)
+        sidecar = AnalysisSidecar(sidecar_path(path))
+        data, count = sidecar.packed(0)["ownership"]  # entry 0 is the root
+        assert list(struct.unpack(f"{count}e", data)) == _half(original.ownership)
+        assert sidecar._table is None
+        with pytest.raises(IndexError):
+            sidecar.packed(13)
+
+    def test_missing_sidecar_not_loaded(self, tmp_path):
+        _, path = self._save(tmp_path)
+        os.remove(sidecar_path(path))
+        loaded = KaTrainSGF.parse_file(path)
+        assert not any(n.load_analysis() for n in loaded.nodes_in_tree)
+
+    def test_truncated_sidecar_rejected(self, tmp_path):
+        _, path = self._save(tmp_path)
+        with open(sidecar_path(path), "r+b") as f:
+            f.truncate(100)
+        with pytest.raises(ValueError):
+            AnalysisSidecar(sidecar_path(path))
+
+    def test_resave_closes_open_sidecar(self, tmp_path):
+        original, path = self._save(tmp_path)
+        loaded = KaTrainSGF.parse_file(path)
+        nodes = [n for n in loaded.nodes_in_tree if n.load_analysis()]
+        assert nodes[1].analysis["root"]  # one opened, the rest still pending
+        sidecar = loaded._analysis_block
+        assert isinstance(sidecar, AnalysisSidecar)
+
+        with open(path, "w", encoding="utf-8") as f:
+            loaded.write_sgf(f, save_analysis=True, analysis_sidecar_path=sidecar_path(path))
+        assert loaded._analysis_block is None
+        assert sidecar._mmap.closed
+        saved_nodes = [n for n in original.nodes_in_tree if n.analysis_complete]
+        for saved, node in zip(saved_nodes, nodes, strict=True):
+            assert list(node.ownership) == _half(saved.ownership)
+        reloaded = KaTrainSGF.parse_file(path)
+        assert sum(1 for n in reloaded.nodes_in_tree if n.load_analysis()) == len(saved_nodes)
+
+    def test_resave_renumbers_references(self, tmp_path):
+        _, path = self._save(tmp_path)
+        loaded = KaTrainSGF.parse_file(path)
+        nodes = [n for n in loaded.nodes_in_tree if n.load_analysis()]
+        expected = [n.analysis["root"] for n in nodes]
+        nodes[1].clear_analysis()  # dropped from the new sidecar, shifting later entries
+
+        with open(path, "w", encoding="utf-8") as f:
+            loaded.write_sgf(f, save_analysis=True, analysis_sidecar_path=sidecar_path(path))
+        assert nodes[1].analysis_from_sgf is None
+        for node, root_info in zip(nodes[2:], expected[2:], strict=True):
+            assert node.load_analysis()
+            assert node.analysis["root"] == root_info
+
+    @pytest.mark.skipif(os.name == "nt", reason="POSIX permission bits")
+    def test_resave_keeps_sidecar_permissions(self, tmp_path):
+        _, path = self._save(tmp_path)
+        os.chmod(sidecar_path(path), 0o640)
+        self._save(tmp_path)
+        assert os.stat(sidecar_path(path)).st_mode & 0o777 == 0o640
@@ -0,0 +1,262 @@
+"""Tests for katrain.core.analysis_cache and its use in engine_query.
+
+Covers:
+- ``AnalysisCache``: round trip, persistence, LRU eviction, counters
+- ``AnalysisCache.key_for_query``: which query fields change the key
+- ``request_analysis``: hits skip the engine, misses store final results
+- cache hits are delivered by the analysis read thread, after the request returns
+- ``request_multi_turn_analysis``: only uncached turns are queried
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from katrain.core import engine_query
+from katrain.core.analysis_cache import AnalysisCache, open_analysis_cache
+from katrain.core.game_node import GameNode
+from katrain.core.sgf_parser import Move
+
+
+def _result(visits: int = 100, winrate: float = 0.5) -> dict:
+    return {
+        "moveInfos": [{"move": "D4", "order": 0, "visits": visits, "winrate": winrate, "pv": ["D4"]}],
+        "rootInfo": {"visits": visits, "winrate": winrate, "scoreLead": 0.0},
+    }
+
+
+def _query(moves: list | None = None, **overrides) -> dict:
+    query = {
+        "id": "QUERY:1",
+        "rules": "japanese",
+        "komi": 6.5,
+        "boardXSize": 19,
+        "boardYSize": 19,
+        "moves": moves if moves is not None else [["B", "D4"], ["W", "Q16"]],
+        "maxVisits": 100,
+        "priority": 0,
+    }
+    query.update(overrides)
+    return query
+
+
+@pytest.fixture
+def cache() -> AnalysisCache:
+    return AnalysisCache(":memory:")
+
+
+class TestAnalysisCache:
+    def test_round_trip_and_counters(self, cache):
+        assert cache.get("k") is None
+        cache.put("k", _result())
+        assert cache.get("k") == _result()
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["stores"], stats["entries"]) == (1, 1, 1, 1)
+        assert stats["hit_rate"] == 0.5
+
+    def test_persists_across_instances(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        AnalysisCache(path).put("k", _result())
+        reopened = AnalysisCache(path)
+        assert reopened.stats()["entries"] == 1
+        assert reopened.get("k") == _result()
+
+    def test_entry_limit_evicts_least_recently_used(self):
+        cache = AnalysisCache(":memory:", max_entries=2)
+        with patch("katrain.core.analysis_cache.time.time", side_effect=[1.0, 2.0, 3.0, 4.0]):
+            cache.put("a", _result())
+            cache.put("b", _result())
+            cache.get("a")  # a is now more recent than b
+            cache.put("c", _result())
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_byte_limit_evicts(self):
+        cache = AnalysisCache(":memory:", max_bytes=1)
+        cache.put("a", _result())
+        cache.put("b", _result())
+        stats = cache.stats()
+        assert stats["entries"] == 1
+        assert cache.get("b") is not None
+
+    def test_replacing_entry_keeps_counts(self, cache):
+        cache.put("a", _result(visits=10))
+        cache.put("a", _result(visits=20))
+        assert cache.stats()["entries"] == 1
+        assert cache.get("a")["rootInfo"]["visits"] == 20
+
+
+class TestKeyForQuery:
+    def test_bookkeeping_fields_ignored(self):
+        assert AnalysisCache.key_for_query(_query(), "m") == AnalysisCache.key_for_query(
+            _query(id="QUERY:99", priority=5, reportDuringSearchEvery=0.3), "m"
+        )
+
+    @pytest.mark.parametrize(
+        "override",
+        [{"komi": 7.5}, {"rules": "chinese"}, {"boardXSize": 13}, {"maxVisits": 200}, {"moves": [["B", "D4"]]}],
+    )
+    def test_position_and_settings_change_key(self, override):
+        assert AnalysisCache.key_for_query(_query(), "m") != AnalysisCache.key_for_query(_query(**override), "m")
+
+    def test_model_changes_key(self):
+        assert AnalysisCache.key_for_query(_query(), "a.bin.gz") != AnalysisCache.key_for_query(_query(), "b.bin.gz")
+
+    def test_turn_matches_single_turn_query(self):
+        multi = _query(analyzeTurns=[0, 1, 2])
+        single = _query(moves=[["B", "D4"]], analyzeTurns=[1])
+        assert AnalysisCache.key_for_query(multi, "m", turn=1) == AnalysisCache.key_for_query(single, "m")
+
+
+def test_open_analysis_cache_disabled_by_default(tmp_path):
+    assert open_analysis_cache({}) is None
+    cache = open_analysis_cache({"analysis_cache": True, "analysis_cache_path": str(tmp_path / "c.sqlite")})
+    assert isinstance(cache, AnalysisCache)
+
+
+def test_unopenable_cache_disables_caching(tmp_path):
+    log_cb = MagicMock()
+    assert open_analysis_cache({"analysis_cache": True, "analysis_cache_path": str(tmp_path)}, log_cb) is None
+    assert "Analysis cache disabled" in log_cb.call_args[0][0]
+
+
+def test_closed_cache_misses_instead_of_raising(cache):
+    cache.put("k", _result())
+    cache.close()
+    assert cache.get("k") is None
+    cache.put("k", _result())
+    assert cache.misses == 1
+
+
+def _make_widget(cache: AnalysisCache) -> MagicMock:
+    widget = MagicMock()
+    widget.config = {
+        "max_visits": 100,
+        "fast_visits": 10,
+        "_enable_ownership": False,
+        "wide_root_noise": 0.0,
+        "analysis_cache": True,
+    }
+    widget.analysis_cache = cache
+    widget.model = "/models/kata1-b18.bin.gz"
+    widget.base_priority = 0
+    widget.override_settings = {}
+    widget.get_rules.return_value = "japanese"
+    widget.PONDER_KEY = "_kt_continuous"
+    widget._stdout_queue = queue.Queue()
+    widget.analysis_thread.is_alive.return_value = True
+    return widget
+
+
+def _run_read_thread(widget: MagicMock) -> None:
+    """Run what the analysis read thread would take from its queue."""
+    while not widget._stdout_queue.empty():
+        widget._stdout_queue.get()()
+
+
+def _branch(num_moves: int) -> list[GameNode]:
+    nodes = [GameNode(properties={"SZ": 19})]
+    for i in range(num_moves):
+        nodes.append(GameNode(parent=nodes[-1], move=Move(coords=(i, 0), player="BW"[i % 2])))
+    return nodes
+
+
+class TestRequestAnalysisCache:
+    def test_miss_stores_final_result_then_hit_skips_engine(self, cache):
+        widget = _make_widget(cache)
+        node = _branch(2)[-1]
+        with patch.object(engine_query, "send_query") as send:
+            engine_query.request_analysis(widget, node, callback=MagicMock())
+            wrapped = send.call_args[0][2]
+            wrapped(_result(visits=50), True)  # partial results are not cached
+            assert cache.stats()["stores"] == 0
+            wrapped(_result(), False)
+            assert cache.stats()["stores"] == 1
+
+            callback = MagicMock()
+            future = engine_query.request_analysis(widget, node, callback=callback)
+        assert send.call_count == 1
+        assert node.analysis_visits_requested == 100
+        callback.assert_not_called()
+        assert not future.done()
+        widget.katrain.update_state.reset_mock()
+
+        _run_read_thread(widget)
+        callback.assert_called_once_with(_result(), False)
+        assert future.result(timeout=0) == _result()
+        widget.katrain.update_state.assert_called_once()
+
+    def test_hit_without_read_thread_delivered_by_another_thread(self, cache):
+        widget = _make_widget(cache)
+        widget.analysis_thread = None
+        node = _branch(1)[-1]
+        with patch.object(engine_query, "send_query") as send:
+            engine_query.request_analysis(widget, node, callback=MagicMock())
+            send.call_args[0][2](_result(), False)
+        threads = []
+        future = engine_query.request_analysis(
+            widget, node, callback=lambda *_: threads.append(threading.current_thread())
+        )
+        assert future.result(timeout=5) == _result()
+        assert threads and threads[0] is not threading.current_thread()
+
+    def test_time_limited_result_not_cached(self, cache):
+        widget = _make_widget(cache)
+        widget.config["max_time"] = 1.0
+        with patch.object(engine_query, "send_query") as send:
+            engine_query.request_analysis(widget, _branch(1)[-1], callback=MagicMock())
+        send.call_args[0][2](_result(visits=30), False)
+        assert cache.stats()["stores"] == 0
+
+    def test_ponder_bypasses_cache(self, cache):
+        widget = _make_widget(cache)
+        with patch.object(engine_query, "send_query"):
+            engine_query.request_analysis(widget, _branch(1)[-1], callback=MagicMock(), ponder=True)
+        assert cache.stats()["misses"] == 0
+
+    def test_disabled_flag_bypasses_cache(self, cache):
+        widget = _make_widget(cache)
+        widget.config["analysis_cache"] = False
+        callback = MagicMock()
+        with patch.object(engine_query, "send_query") as send:
+            engine_query.request_analysis(widget, _branch(1)[-1], callback=callback)
+        assert send.call_args[0][2] is callback
+
+
+class TestMultiTurnCache:
+    def test_only_uncached_turns_are_queried(self, cache):
+        widget = _make_widget(cache)
+        nodes = _branch(3)
+        with patch.object(engine_query, "send_query") as send:
+            engine_query.request_analysis(widget, nodes[1], callback=MagicMock())
+            send.call_args[0][2](_result(), False)
+
+            received = []
+            engine_query.request_multi_turn_analysis(
+                widget, nodes, callback=lambda node, result, partial: received.append(node)
+            )
+        assert received == []
+        _run_read_thread(widget)
+        assert received == [nodes[1]]
+        query, route = send.call_args[0][1], send.call_args[0][2]
+        assert query["analyzeTurns"] == [0, 2, 3]
+
+        route({"turnNumber": 2, **_result()}, False)
+        assert cache.stats()["stores"] == 2
+
+    def test_fully_cached_branch_sends_nothing(self, cache):
+        widget = _make_widget(cache)
+        nodes = _branch(1)
+        with patch.object(engine_query, "send_query") as send:
+            engine_query.request_multi_turn_analysis(widget, nodes, callback=lambda *_: None)
+            route = send.call_args[0][2]
+            for turn in (0, 1):
+                route({"turnNumber": turn, **_result()}, False)
+            send.reset_mock()
+            engine_query.request_multi_turn_analysis(widget, nodes, callback=lambda *_: None)
+        send.assert_not_called()
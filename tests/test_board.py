@@ -1,8 +1,21 @@
+import random
+
 import pytest
 
 from katrain.core.base_katrain import KaTrainBase
 from katrain.core.engine import BaseEngine
-from katrain.core.game import Game, IllegalMoveException, KaTrainSGF, Move
+from katrain.core.game import (
+    NODE_POSITIONS,
+    RECORDED_POSITIONS,
+    BoardCore,
+    Game,
+    IllegalMoveException,
+    KaTrainSGF,
+    Move,
+    PositionCache,
+    PositionTrail,
+    TreeIndex,
+)
 from katrain.core.game_node import GameNode
 
 
@@ -148,3 +161,285 @@ class TestBoard:
                     b.play(Move.from_gtp("B19", player="W"))
                 assert len(b.stones) == 4
                 assert len(b.prisoners) == 0
+
+
+class TestIncrementalPosition:
+    @staticmethod
+    def position(game):
+        return game.board, game.chains, game.prisoners, game.last_capture
+
+    @staticmethod
+    def random_tree(seed: int, n_moves: int = 400, variations: bool = True) -> Game:
+        rng = random.Random(seed)
+        game = Game(MockKaTrain(force_package_config=True), MockEngine(), move_tree=GameNode(properties={"SZ": 9}))
+        nodes = [game.root]
+        for i in range(n_moves):
+            if variations and i % 40 == 39:  # start a variation somewhere
+                game.set_current_node(rng.choice(nodes))
+            player = game.current_node.next_player
+            for _ in range(20):
+                try:
+                    nodes.append(game.play(Move((rng.randrange(9), rng.randrange(9)), player=player)))
+                    break
+                except IllegalMoveException:
+                    continue
+            else:
+                nodes.append(game.play(Move(None, player=player)))
+        return game
+
+    def test_navigation_matches_rebuild(self):
+        game = self.random_tree(seed=1)
+        reference = Game(MockKaTrain(force_package_config=True), MockEngine(), move_tree=game.root)
+        nodes = game.root.nodes_in_tree
+        assert any(len(node.children) > 1 for node in nodes)
+
+        rng = random.Random(2)
+        captures = False
+        for _ in range(300):
+            node = rng.choice(nodes)
+            game.set_current_node(node)
+            reference.current_node = node
+            reference._calculate_groups()
+            assert self.position(game) == self.position(reference)
+            captures |= bool(game.prisoners)
+            if rng.random() < 0.3:
+                game.undo(rng.randint(1, 5))
+                game.redo(rng.randint(1, 5))
+                reference.current_node = game.current_node
+                reference._calculate_groups()
+                assert self.position(game) == self.position(reference)
+        assert captures
+
+    def test_step_applies_one_node(self, monkeypatch):
+        game = self.random_tree(seed=3, n_moves=200, variations=False)
+        game.set_current_node(game.root)
+        game.redo(150)
+        applied = []
+        apply_node = game._apply_node
+        monkeypatch.setattr(game, "_apply_node", lambda node: applied.append(node) or apply_node(node))
+
+        game.redo(1)
+        game.undo(1)
+        game.redo(1)
+        assert len(applied) == 2
+        # back near the start and forward again: far jumps restore a snapshot
+        game.set_current_node(game.root.children[0])
+        applied.clear()
+        game.redo(150)
+        assert len(applied) <= PositionTrail.SNAPSHOT_INTERVAL
+
+    def test_clear_placements(self):
+        root = KaTrainSGF.parse_sgf("(;GM[1]FF[4]SZ[9]AB[aa][bb]AW[cc];B[dd];AE[aa][cc]W[ee];B[ff])")
+        game = Game(MockKaTrain(force_package_config=True), MockEngine(), move_tree=root)
+        game.redo(3)
+        assert sorted(m.gtp() for m in game.stones) == ["B8", "D6", "E5", "F4"]
+        game.undo(2)
+        assert sorted(m.gtp() for m in game.stones) == ["A9", "B8", "C7", "D6"]
+
+
+class TestBoardCore:
+    @staticmethod
+    def flood_fill_chains(stones: dict[tuple[int, int], str]) -> set[frozenset[tuple[int, int]]]:
+        chains, seen = set(), set()
+        for start, player in stones.items():
+            if start in seen:
+                continue
+            chain, todo = set(), [start]
+            while todo:
+                x, y = todo.pop()
+                if (x, y) in chain:
+                    continue
+                chain.add((x, y))
+                todo += [
+                    (x + dx, y + dy)
+                    for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1))
+                    if stones.get((x + dx, y + dy)) == player
+                ]
+            seen |= chain
+            chains.add(frozenset(chain))
+        return chains
+
+    def test_chains_and_liberties_match_flood_fill(self):
+        game = TestIncrementalPosition.random_tree(seed=4)
+        rng = random.Random(5)
+        for node in rng.sample(game.root.nodes_in_tree, 60):
+            game.set_current_node(node)
+            core = game._core
+            stones = {m.coords: m.player for m in game.stones}
+            chains = {frozenset(m.coords for m in chain) for chain in game.chains if chain}
+            assert chains == self.flood_fill_chains(stones)
+            for chain_id, chain in enumerate(game.chains):
+                if chain:
+                    x, y = chain[0].coords
+                    assert game.board[y][x] == chain_id
+                    pairs = sum(
+                        (x + dx, y + dy) not in stones and 0 <= x + dx < 9 and 0 <= y + dy < 9
+                        for x, y in (m.coords for m in chain)
+                        for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1))
+                    )
+                    assert core.chain_liberties(chain_id) == pairs > 0
+
+    def test_place_and_revert(self):
+        core = BoardCore(5, 5)
+        trail = PositionTrail()
+
+        def place(gtp, player):
+            move = Move.from_gtp(gtp, player=player)
+            return core.place(core.point(move.coords), move, trail)
+
+        place("A5", "W")
+        place("B5", "B")
+        assert core.chain_liberties(core.point(Move.from_gtp("A5").coords)) == 1
+        before_capture, mark = core.copy(), len(trail.log)
+
+        assert place("A4", "B") == [Move.from_gtp("A5", player="W")]
+        assert core.color[core.point(Move.from_gtp("A5").coords)] == 0
+        after_capture, capture_mark = core.copy(), len(trail.log)
+        place("A5", "B")  # refill the point of the taken stone, merging all three stones
+        assert core.chain_size[core.find(core.point(Move.from_gtp("A5").coords))] == 3
+
+        trail.revert(capture_mark)
+        for name in BoardCore.__slots__:
+            assert getattr(core, name) == getattr(after_capture, name)
+        trail.revert(mark)
+        for name in BoardCore.__slots__:
+            assert getattr(core, name) == getattr(before_capture, name)
+
+
+class TestPositionHash:
+    def test_transpositions(self):
+        root = KaTrainSGF.parse_sgf(
+            "(;GM[1]FF[4]SZ[9]KM[6.5](;B[aa];W[bb];B[cc])(;B[cc];W[bb];B[aa])(;B[cc];W[aa];B[bb]))"
+        )
+        a, b, c = (branch.children[0].children[0] for branch in root.children)
+        assert a.position_hash == b.position_hash != c.position_hash
+        assert a.parent.position_hash != b.parent.position_hash
+        assert a.analysis_hash == b.analysis_hash
+        assert a.position_hash != root.position_hash
+
+    def test_side_to_move_and_size(self):
+        black = KaTrainSGF.parse_sgf("(;GM[1]FF[4]SZ[9]PL[B]AB[cc])")
+        white = KaTrainSGF.parse_sgf("(;GM[1]FF[4]SZ[9]PL[W]AB[cc])")
+        assert black.position_hash != white.position_hash
+        assert KaTrainSGF.parse_sgf("(;SZ[9])").position_hash != KaTrainSGF.parse_sgf("(;SZ[13])").position_hash
+
+    def test_capture_removes_stones_from_hash(self):
+        # white A9 taken by black B9 + A8, then the same black stones played with no white stone at all
+        captured = KaTrainSGF.parse_sgf("(;GM[1]FF[4]SZ[9];B[ba];W[aa];B[ab];W[ee])")
+        direct = KaTrainSGF.parse_sgf("(;GM[1]FF[4]SZ[9];B[ba];W[ee];B[ab];W[])")
+        assert captured.nodes_in_tree[-1].position_hash == direct.nodes_in_tree[-1].position_hash
+
+    def test_game_hashes_match_replay(self):
+        game = TestIncrementalPosition.random_tree(seed=6, n_moves=200)
+        nodes = game.root.nodes_in_tree
+        rng = random.Random(7)
+        for node in rng.sample(nodes, 40):
+            game.set_current_node(node)
+        played = {id(n): n._position_hash for n in nodes if n._position_hash is not None}
+        assert len(played) > 40
+        game._calculate_groups()  # drops the hashes
+        branch = {id(n) for n in game.current_node.nodes_from_root}  # rebuilt right away
+        assert all(n._position_hash is None for n in nodes if id(n) not in branch)
+        assert all(n.position_hash == played[id(n)] for n in nodes if id(n) in played)
+
+    def test_analysis_hash(self):
+        node = KaTrainSGF.parse_sgf("(;GM[1]FF[4]SZ[9]KM[6.5]RU[japanese];B[cc])").children[0]
+        other_komi = KaTrainSGF.parse_sgf("(;GM[1]FF[4]SZ[9]KM[7.5]RU[japanese];B[cc])").children[0]
+        other_rules = KaTrainSGF.parse_sgf("(;GM[1]FF[4]SZ[9]KM[6.5]RU[chinese];B[cc])").children[0]
+        assert node.position_hash == other_komi.position_hash == other_rules.position_hash
+        assert len({node.analysis_hash, other_komi.analysis_hash, other_rules.analysis_hash}) == 3
+
+
+class TestPositionCache:
+    def test_matches_game(self):
+        game = TestIncrementalPosition.random_tree(seed=8)
+        cache = PositionCache()
+        rng = random.Random(9)
+        for node in rng.sample(game.root.nodes_in_tree, 60):
+            game.set_current_node(node)
+            position = cache.get(node)
+            assert position.stones == {(*m.coords, m.player) for m in game.stones}
+            assert position.board == game.board
+            assert position.chains == game.chains
+            for chain_id, chain in enumerate(position.chains):
+                if chain:
+                    assert (len(position.liberties(chain_id)) > 0) == (game._core.chain_liberties(chain_id) > 0)
+        assert cache.get(node) is position
+
+    def test_lru_bound(self):
+        game = TestIncrementalPosition.random_tree(seed=10, n_moves=100, variations=False)
+        cache = PositionCache(max_entries=5)
+        for node in game.root.nodes_in_tree:
+            cache.get(node)
+        assert len(cache) == 5
+
+    def test_forget_after_edit(self):
+        root = KaTrainSGF.parse_sgf("(;GM[1]FF[4]SZ[9];B[aa];W[bb])")
+        game = Game(MockKaTrain(force_package_config=True), MockEngine(), move_tree=root)
+        leaf = root.children[0].children[0]
+        assert (0, 8, "B") in NODE_POSITIONS.get(leaf).stones
+
+        root.children[0].set_property("B", "cc")
+        game._calculate_groups()
+        assert NODE_POSITIONS.get(leaf).stones == {(2, 6, "B"), (1, 7, "W")}
+
+    def test_setup_stones_capture_like_moves(self):
+        root = KaTrainSGF.parse_sgf("(;GM[1]FF[4]SZ[9]AB[aa]AW[ab][ba];B[ee])")
+        game = Game(MockKaTrain(force_package_config=True), MockEngine(), move_tree=root)
+        game.redo(1)
+        assert sorted(m.gtp() for m in game.stones) == ["A8", "B9", "E5"]
+        assert game.position.stones == {(*m.coords, m.player) for m in game.stones}
+        assert RECORDED_POSITIONS.get(game.current_node).stones == {(0, 8, "B"), (0, 7, "W"), (1, 8, "W"), (4, 4, "B")}
+
+    def test_suicidal_setup_stone_is_illegal(self):
+        root = KaTrainSGF.parse_sgf("(;GM[1]FF[4]SZ[9]AW[ab][ba];AB[aa])")
+        with pytest.raises(RuntimeError, match="Unexpected illegal move"):
+            game = Game(MockKaTrain(force_package_config=True), MockEngine(), move_tree=root)
+            game.redo(1)
+        assert NODE_POSITIONS.get(root.children[0]).stones == {(0, 7, "W"), (1, 8, "W")}
+
+
+class TestTreeIndex:
+    @staticmethod
+    def assert_matches_tree(index, root):
+        nodes = root.nodes_in_tree
+        assert len(index) == len(nodes)
+        mainline = [root]
+        while mainline[-1].children:
+            mainline.append(mainline[-1].children[0])
+        for node in nodes:
+            assert index.node(id(node)) is node
+            assert index.depth(node) == len(node.nodes_from_root) - 1
+            assert index.is_main(node) == (node in mainline)
+            assert index.branch_moves(node) == [m for n in node.nodes_from_root for m in n.moves]
+        assert [index.main_node(i) for i in range(len(mainline) + 1)] == [*mainline, None]
+        assert index.main_move_nodes() == {n.depth: n for n in mainline if n.move is not None}
+
+    def test_matches_tree(self):
+        game = TestIncrementalPosition.random_tree(seed=11, n_moves=200)
+        assert any(len(node.children) > 1 for node in game.root.nodes_in_tree)
+        self.assert_matches_tree(game.tree_index, game.root)
+        assert game._find_node_by_move_number(5) is game.tree_index.main_node(5)
+
+    def test_tree_edits(self):
+        game = TestIncrementalPosition.random_tree(seed=12, n_moves=200)
+        rng = random.Random(13)
+        for _ in range(10):
+            nodes = [n for n in game.root.nodes_in_tree if not n.is_root]
+            game.make_main_branch(rng.choice(nodes))
+            self.assert_matches_tree(game.tree_index, game.root)
+            game.delete_node(rng.choice(nodes[len(nodes) // 2 :]) if len(nodes) > 1 else nodes[0])
+            self.assert_matches_tree(game.tree_index, game.root)
+            game.set_current_node(rng.choice(game.root.nodes_in_tree))
+            game.play(Move(None, player=game.current_node.next_player))
+            game.sync_branch([Move((4, 4), player="B"), Move((3, 3), player="W")])
+            self.assert_matches_tree(game.tree_index, game.root)
+        fresh = TreeIndex(game.root)
+        assert [game.tree_index.main_node(i) for i in range(300)] == [fresh.main_node(i) for i in range(300)]
+
+    def test_nodes_added_below_main_branch(self):
+        game = TestIncrementalPosition.random_tree(seed=14, n_moves=20, variations=False)
+        leaf = game.tree_index.main_node(20)
+        child = leaf.play(Move((0, 0), player=leaf.next_player))  # not through the game
+        assert game.tree_index.main_node(21) is child
+        self.assert_matches_tree(game.tree_index, game.root)
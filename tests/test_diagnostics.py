@@ -18,6 +18,7 @@ from katrain.core.diagnostics import (
     KataGoInfo,
     SystemInfo,
     collect_app_info,
+    collect_engine_latency,
     collect_katago_info,
     collect_settings_snapshot,
     collect_system_info,
@@ -216,6 +217,19 @@ class TestCollectSettingsSnapshot:
         assert snapshot["board"] == config["board"]
 
 
+class TestCollectEngineLatency:
+    def test_reads_latency_stats(self) -> None:
+        class Engine:
+            def latency_stats(self) -> dict:
+                return {"default": {}}
+
+        assert collect_engine_latency(Engine()) == {"default": {}}
+
+    def test_missing_engine_or_api(self) -> None:
+        assert collect_engine_latency(None) == {}
+        assert collect_engine_latency(object()) == {}
+
+
 class TestGenerateDiagnosticsFilename:
     """Tests for generate_diagnostics_filename function."""
 
@@ -303,6 +317,23 @@ class TestZipStructure:
                 manifest = json.loads(zf.read("manifest.json"))
                 assert manifest["generated_at"] == "2026-01-17T14:30:00"
 
+    def test_engine_latency_entry(self, sample_bundle: DiagnosticsBundle, ctx: SanitizationContext) -> None:
+        """engine_latency.json is written only when a latency snapshot was collected."""
+        latency = {"background": {"search": {"count": 3, "p50_ms": 120.0, "p95_ms": 300.0, "p99_ms": 310.0}}}
+        with tempfile.TemporaryDirectory() as tmpdir:
+            plain_path = Path(tmpdir) / "plain.zip"
+            create_diagnostics_zip(sample_bundle, plain_path, ctx)
+            sample_bundle.engine_latency = latency
+            output_path = Path(tmpdir) / "test.zip"
+            create_diagnostics_zip(sample_bundle, output_path, ctx)
+
+            with zipfile.ZipFile(plain_path, "r") as zf:
+                assert "engine_latency.json" not in zf.namelist()
+            with zipfile.ZipFile(output_path, "r") as zf:
+                assert json.loads(zf.read("engine_latency.json")) == latency
+                files = {f["name"]: f["type"] for f in json.loads(zf.read("manifest.json"))["files"]}
+                assert files["engine_latency.json"] == "engine"
+
     def test_all_files_utf8(self, sample_bundle: DiagnosticsBundle, ctx: SanitizationContext) -> None:
         """All files can be decoded as UTF-8."""
         with tempfile.TemporaryDirectory() as tmpdir:
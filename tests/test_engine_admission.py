@@ -0,0 +1,104 @@
+"""Tests for the admission queue in ``engine_query.send_query``.
+
+Queries beyond ``MAX_PENDING_QUERIES`` wait instead of being rejected and are
+released as pending slots free up: foreground first, then by KataGo priority;
+background work never takes the last ``FOREGROUND_RESERVE`` slots.
+"""
+
+from __future__ import annotations
+
+import itertools
+import queue
+import threading
+from concurrent.futures import Future
+from unittest.mock import MagicMock
+
+import pytest
+
+from katrain.core import engine_query
+from katrain.core.engine import KataGoEngine
+from katrain.core.engine_query import FOREGROUND_RESERVE, MAX_ADMISSION_QUEUE, MAX_PENDING_QUERIES
+
+
+@pytest.fixture
+def engine() -> KataGoEngine:
+    engine = object.__new__(KataGoEngine)
+    engine.config = {}
+    engine.katrain = MagicMock()
+    engine.katago_process = MagicMock()
+    engine.katago_process.poll.return_value = None
+    engine.base_priority = 0
+    engine.write_queue = queue.PriorityQueue()
+    engine._write_queue_seq = itertools.count()
+    engine._write_queue_payloads = {}
+    engine._pending_query_count = 0
+    engine._pending_query_lock = threading.Lock()
+    engine._admission = []
+    engine.thread_lock = threading.RLock()
+    engine.queries = {}
+    engine._inflight = {}
+    engine._query_futures = {}
+    engine._main_thread_scheduler = lambda fn: fn()
+    return engine
+
+
+def _sent_ids(engine: KataGoEngine) -> list[str]:
+    return [payload[0]["id"] for payload in engine._write_queue_payloads.values()]
+
+
+def _fill(engine: KataGoEngine, count: int) -> None:
+    engine._pending_query_count = count
+
+
+class TestAdmission:
+    def test_waits_at_limit_and_is_released_on_completion(self, engine):
+        _fill(engine, MAX_PENDING_QUERIES)
+        assert engine.send_query({"id": "late", "priority": 0}, None, None)
+        assert _sent_ids(engine) == []
+        assert engine.queries_remaining() == 1
+        assert not engine.is_idle()
+
+        engine._decrement_pending_count()
+        assert _sent_ids(engine) == ["late"]
+        assert engine.admission_backlog() == 0
+        assert engine.get_pending_count() == MAX_PENDING_QUERIES
+
+    def test_released_in_priority_order(self, engine):
+        _fill(engine, MAX_PENDING_QUERIES)
+        for query_id, priority in [("sweep", -100), ("low", 1), ("high", 10)]:
+            engine.send_query({"id": query_id, "priority": priority}, None, None)
+        for _ in range(FOREGROUND_RESERVE + 3):
+            engine._decrement_pending_count()
+        assert _sent_ids(engine) == ["high", "low", "sweep"]
+
+    def test_background_leaves_foreground_reserve(self, engine):
+        _fill(engine, MAX_PENDING_QUERIES - FOREGROUND_RESERVE)
+        engine.send_query({"id": "sweep", "priority": -100}, None, None)
+        assert engine.admission_backlog() == 1
+
+        engine.send_query({"id": "click", "priority": 0}, None, None)
+        assert _sent_ids(engine) == ["click"]
+
+    def test_later_query_does_not_overtake_waiting_ones(self, engine):
+        _fill(engine, MAX_PENDING_QUERIES)
+        engine.send_query({"id": "first", "priority": 0}, None, None)
+        engine._pending_query_count -= 1  # slot freed without going through release
+        engine.send_query({"id": "second", "priority": 0}, None, None)
+        assert _sent_ids(engine) == ["first"]
+
+    def test_rejected_when_admission_queue_full(self, engine):
+        _fill(engine, MAX_PENDING_QUERIES)
+        engine._admission = [((0, 0), i, ({}, None, None, None, None)) for i in range(MAX_ADMISSION_QUEUE)]
+        errors = []
+        future: Future = Future()
+        assert not engine.send_query({"id": "overflow"}, None, errors.append, future=future)
+        assert "Too many pending queries" in errors[0]["error"]
+        assert future.exception(timeout=0) is not None
+
+    def test_cancel_drops_waiting_queries(self, engine):
+        _fill(engine, MAX_PENDING_QUERIES)
+        future: Future = Future()
+        engine.send_query({"id": "late"}, None, None, future=future)
+        engine_query.cancel_query_futures(engine)
+        assert future.cancelled()
+        assert engine.admission_backlog() == 0
@@ -0,0 +1,158 @@
+"""Tests for katrain.core.engine_async.AsyncKataGoEngine.
+
+A fake engine resolves handles from a worker thread the same way the
+engine read thread does (callback first, then the ``Future``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+
+from katrain.core.engine_async import AsyncKataGoEngine
+from katrain.core.errors import EngineError
+
+
+class FakeEngine:
+    """Engine stand-in: each request is answered by ``respond`` from another thread."""
+
+    def __init__(self) -> None:
+        self.requests: list[tuple[Any, Any, Future, dict[str, Any]]] = []
+        self.terminated: list[str] = []
+        self.sent: dict[str, Future] = {}
+
+    def request_analysis(self, node: Any, callback: Any, **kwargs: Any) -> Future:
+        future: Future = Future()
+        self.requests.append((node, callback, future, kwargs))
+        self.sent[f"QUERY:{len(self.requests)}"] = future
+        return future
+
+    def query_id_for_future(self, future: Future) -> str | None:
+        return next((qid for qid, f in self.sent.items() if f is future), None)
+
+    def terminate_query(self, query_id: str, ignore_further_results: bool = True) -> None:
+        self.terminated.append(query_id)
+
+    def respond(self, index: int, *updates: dict[str, Any]) -> None:
+        def run() -> None:
+            _, callback, future, _ = self.requests[index]
+            for update in updates:
+                callback(update, update["isDuringSearch"])
+            if not future.cancelled():
+                future.set_result(updates[-1])
+
+        threading.Thread(target=run).start()
+
+
+def _update(visits: int, partial: bool) -> dict[str, Any]:
+    return {"isDuringSearch": partial, "rootInfo": {"visits": visits}, "moveInfos": []}
+
+
+async def _wait_for_requests(engine: FakeEngine, count: int) -> None:
+    while len(engine.requests) < count:
+        await asyncio.sleep(0)
+
+
+class TestAnalyze:
+    def test_returns_final_result(self):
+        engine = FakeEngine()
+
+        async def main() -> dict[str, Any]:
+            task = asyncio.create_task(AsyncKataGoEngine(engine).analyze("node", visits=50))
+            await _wait_for_requests(engine, 1)
+            engine.respond(0, _update(10, True), _update(50, False))
+            return await task
+
+        assert asyncio.run(main())["rootInfo"]["visits"] == 50
+        assert engine.requests[0][3] == {"visits": 50}
+
+    def test_engine_error_propagates(self):
+        engine = FakeEngine()
+
+        async def main() -> None:
+            task = asyncio.create_task(AsyncKataGoEngine(engine).analyze("node"))
+            await _wait_for_requests(engine, 1)
+            engine.requests[0][2].set_exception(EngineError("Illegal move"))
+            await task
+
+        with pytest.raises(EngineError):
+            asyncio.run(main())
+
+    def test_cancel_terminates_query(self):
+        engine = FakeEngine()
+
+        async def main() -> None:
+            task = asyncio.create_task(AsyncKataGoEngine(engine).analyze("node"))
+            await _wait_for_requests(engine, 1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(main())
+        assert engine.terminated == ["QUERY:1"]
+        assert engine.requests[0][2].cancelled()
+
+    def test_max_in_flight_limits_sent_queries(self):
+        engine = FakeEngine()
+
+        async def main() -> list[dict[str, Any]]:
+            async_engine = AsyncKataGoEngine(engine, max_in_flight=2)
+            tasks = [asyncio.create_task(async_engine.analyze(i)) for i in range(5)]
+            await _wait_for_requests(engine, 2)
+            for _ in range(10):
+                await asyncio.sleep(0)
+            assert len(engine.requests) == 2
+            answered = 0
+            while answered < 5:
+                await _wait_for_requests(engine, answered + 1)
+                engine.respond(answered, _update(answered, False))
+                answered += 1
+            return await asyncio.gather(*tasks)
+
+        results = asyncio.run(main())
+        assert [r["rootInfo"]["visits"] for r in results] == [0, 1, 2, 3, 4]
+
+    def test_ponder_rejected(self):
+        with pytest.raises(ValueError):
+            asyncio.run(AsyncKataGoEngine(MagicMock()).analyze("node", ponder=True))
+
+
+class TestStream:
+    def test_yields_partials_then_final(self):
+        engine = FakeEngine()
+
+        async def main() -> list[int]:
+            visits = []
+            async_engine = AsyncKataGoEngine(engine)
+            stream = async_engine.stream("node", report_every=0.1)
+            first = asyncio.ensure_future(stream.__anext__())
+            await _wait_for_requests(engine, 1)
+            engine.respond(0, _update(5, True), _update(20, True), _update(40, False))
+            visits.append((await first)["rootInfo"]["visits"])
+            async for update in stream:
+                visits.append(update["rootInfo"]["visits"])
+            return visits
+
+        assert asyncio.run(main()) == [5, 20, 40]
+        assert engine.requests[0][3] == {"report_every": 0.1}
+        assert engine.terminated == []
+
+    def test_break_terminates_query(self):
+        engine = FakeEngine()
+
+        async def main() -> None:
+            stream = AsyncKataGoEngine(engine).stream("node")
+            first = asyncio.ensure_future(stream.__anext__())
+            await _wait_for_requests(engine, 1)
+            _, callback, _, _ = engine.requests[0]
+            callback(_update(5, True), True)
+            await first
+            await stream.aclose()
+
+        asyncio.run(main())
+        assert engine.terminated == ["QUERY:1"]
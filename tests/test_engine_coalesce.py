@@ -0,0 +1,183 @@
+"""Tests for in-flight query coalescing in ``engine_query.send_query``.
+
+Equivalent queries (same position, settings and report interval, with
+priorities of the same foreground / background class) share one KataGo
+query; results fan out to every subscriber.
+"""
+
+from __future__ import annotations
+
+import itertools
+import queue
+import threading
+from concurrent.futures import Future
+from unittest.mock import MagicMock
+
+import pytest
+
+from katrain.core import engine_query
+from katrain.core.engine import KataGoEngine
+
+
+def _query(**overrides) -> dict:
+    query = {
+        "rules": "japanese",
+        "komi": 6.5,
+        "boardXSize": 19,
+        "boardYSize": 19,
+        "moves": [["B", "D4"]],
+        "maxVisits": 100,
+        "includeOwnership": False,
+        "overrideSettings": {},
+        "priority": 0,
+        "analyzeTurns": [1],
+    }
+    query.update(overrides)
+    return query
+
+
+@pytest.fixture
+def engine() -> KataGoEngine:
+    engine = object.__new__(KataGoEngine)
+    engine.config = {}
+    engine.katrain = MagicMock()
+    engine.katago_process = MagicMock()
+    engine.katago_process.poll.return_value = None
+    engine.write_queue = queue.PriorityQueue()
+    engine._write_queue_seq = itertools.count()
+    engine._write_queue_payloads = {}
+    engine._pending_query_count = 0
+    engine._pending_query_lock = threading.Lock()
+    engine._admission = []
+    engine.base_priority = 0
+    engine.thread_lock = threading.RLock()
+    engine._inflight = {}
+    engine._query_futures = {}
+    engine._main_thread_scheduler = lambda fn: fn()
+    return engine
+
+
+def _queued(engine: KataGoEngine) -> list[tuple]:
+    return list(engine._write_queue_payloads.values())
+
+
+class TestCoalesceKey:
+    def test_ignores_bookkeeping_fields(self, engine):
+        a = engine_query.coalesce_key(engine, _query())
+        b = engine_query.coalesce_key(engine, _query(priority=5))
+        assert a == b
+
+    def test_report_interval_and_priority_class_distinguish(self, engine):
+        key = engine_query.coalesce_key(engine, _query())
+        assert key != engine_query.coalesce_key(engine, _query(reportDuringSearchEvery=0.5))
+        assert key != engine_query.coalesce_key(engine, _query(priority=-1))
+
+    @pytest.mark.parametrize(
+        "override",
+        [
+            {"maxVisits": 200},
+            {"komi": 7.5},
+            {"includeOwnership": True},
+            {"overrideSettings": {"maxTime": 1.0}},
+            {"moves": []},
+        ],
+    )
+    def test_settings_distinguish(self, engine, override):
+        assert engine_query.coalesce_key(engine, _query()) != engine_query.coalesce_key(engine, _query(**override))
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            _query(id="mine"),
+            _query(action="terminate"),
+            _query(analyzeTurns=[0, 1]),
+            _query(**{KataGoEngine.PONDER_KEY: True}),
+        ],
+    )
+    def test_not_coalesced(self, engine, query):
+        assert engine_query.coalesce_key(engine, query) is None
+
+    def test_refine_queries_not_coalesced(self, engine):
+        assert engine_query.coalesce_key(engine, _query(), next_move=MagicMock()) is None
+
+    def test_config_flag_disables(self, engine):
+        engine.config["coalesce_queries"] = False
+        assert engine_query.coalesce_key(engine, _query()) is None
+
+
+class TestFanOut:
+    def test_second_caller_attaches_without_new_query(self, engine):
+        assert engine.send_query(_query(), MagicMock(), None)
+        assert engine.send_query(_query(priority=3), MagicMock(), None)
+        assert len(_queued(engine)) == 1
+        assert engine._pending_query_count == 1
+
+    def test_results_fan_out_with_independent_copies(self, engine):
+        first, second = MagicMock(), MagicMock()
+        engine.send_query(_query(), first, None)
+        engine.send_query(_query(), second, None)
+        shared_callback = _queued(engine)[0][1]
+
+        partial = {"rootInfo": {"visits": 5}}
+        shared_callback(partial, True)
+        final = {"rootInfo": {"visits": 100}}
+        shared_callback(final, False)
+
+        assert first.call_count == second.call_count == 2
+        assert first.call_args[0] == (final, False)
+        assert second.call_args[0] == (final, False)
+        assert first.call_args[0][0] is not second.call_args[0][0]
+
+    def test_finished_query_no_longer_shared(self, engine):
+        engine.send_query(_query(), MagicMock(), None)
+        _queued(engine)[0][1]({"rootInfo": {}}, False)
+        assert engine._inflight == {}
+        engine.send_query(_query(), MagicMock(), None)
+        assert len(_queued(engine)) == 2
+
+    def test_handles_resolve_together(self, engine):
+        a, b = Future(), Future()
+        engine.send_query(_query(), None, None, future=a)
+        engine.send_query(_query(), None, None, future=b)
+        shared = _queued(engine)[0][0][engine_query.QUERY_FUTURE_KEY]
+        shared.set_result({"rootInfo": {"visits": 1}})
+        assert a.result(timeout=0) == b.result(timeout=0)
+
+    def test_errors_fan_out(self, engine):
+        errors = []
+        engine.send_query(_query(), None, errors.append)
+        engine.send_query(_query(), None, errors.append)
+        _queued(engine)[0][2]({"error": "Illegal move"})
+        assert len(errors) == 2
+        assert engine._inflight == {}
+
+    def test_cancelled_only_when_every_subscriber_cancels(self, engine):
+        a, b = Future(), Future()
+        engine.send_query(_query(), None, None, future=a)
+        engine.send_query(_query(), None, None, future=b)
+        shared = _queued(engine)[0][0][engine_query.QUERY_FUTURE_KEY]
+        a.cancel()
+        assert not shared.cancelled()
+        b.cancel()
+        assert shared.cancelled()
+
+    def test_terminate_for_node_drops_only_its_subscribers(self, engine):
+        engine.queries = {}
+        engine._turns_remaining = {}
+        engine._terminated_queries = {}
+        engine._state_changed = threading.Condition()
+        engine._state_generation = 0
+        node_a, node_b = MagicMock(), MagicMock()
+        a, b = Future(), Future()
+        engine.send_query(_query(), None, None, node=node_a, future=a)
+        engine.send_query(_query(), None, None, node=node_b, future=b)
+        _, callback, error_callback, _, node = _queued(engine)[0]
+        engine.queries["QUERY:1"] = (callback, error_callback, 0.0, None, node)
+
+        engine_query.terminate_queries(engine, only_for_node=node_b)
+        assert b.cancelled() and not a.done()
+        assert "QUERY:1" in engine.queries
+
+        engine_query.terminate_queries(engine, only_for_node=node_a)
+        assert a.cancelled()
+        assert "QUERY:1" not in engine.queries
@@ -0,0 +1,177 @@
+"""Tests for query completion handles and condition-based waits.
+
+Covers:
+- ``request_analysis`` / ``send_query`` completion ``Future`` semantics
+  (resolved after the callback, failed on rejection / KataGo error,
+  cancelled on terminate / drop)
+- ``wait_until`` / ``wait_until_idle``: wake on notification, timeout, stop flag
+- ``KataGoEngine`` on ``FakePopen``: a waiter wakes on the result from another thread
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from concurrent.futures import Future
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from katrain.core import engine_query
+from katrain.core.engine import KataGoEngine
+from katrain.core.engine_io import analysis_read_thread
+from katrain.core.errors import EngineError
+from tests.fakes import FakePopen, MinimalKatrain
+from tests.test_engine_multi_turn import _make_branch, _make_read_engine, _make_widget, _result_line
+
+
+def _read_engine() -> KataGoEngine:
+    engine = _make_read_engine()
+    engine._query_futures = {}
+    engine._state_changed = threading.Condition()
+    engine._state_generation = 0
+    return engine
+
+
+def _run_read_thread(engine: KataGoEngine, *lines: bytes) -> None:
+    for line in lines:
+        engine._stdout_queue.put(line)
+    engine._stdout_queue.put(None)
+    analysis_read_thread(engine)
+
+
+class TestRequestAnalysisHandle:
+    def test_returns_future_passed_to_send_query(self):
+        widget = _make_widget()
+        with patch.object(engine_query, "send_query") as send:
+            handle = engine_query.request_analysis(widget, _make_branch(1)[-1], callback=MagicMock())
+        assert isinstance(handle, Future)
+        assert send.call_args[0][-1] is handle
+
+    def test_ae_commands_return_cancelled_handle(self):
+        nodes = _make_branch(1)
+        nodes[1].set_property("AE", ["aa"])
+        handle = engine_query.request_analysis(_make_widget(), nodes[1], callback=MagicMock())
+        assert handle.cancelled()
+
+    def test_rejected_query_fails_handle(self):
+        widget = _make_widget()
+        widget.check_alive.return_value = False
+        future: Future = Future()
+        assert engine_query.send_query(widget, {"id": "q"}, None, None, future=future) is False
+        with pytest.raises(EngineError, match="not alive"):
+            future.result(timeout=0)
+
+
+class TestReadThreadResolvesHandles:
+    def test_resolved_after_callback(self):
+        engine = _read_engine()
+        future: Future = Future()
+        seen_in_callback = []
+        engine.queries["QUERY:1"] = (lambda a, p: seen_in_callback.append(future.done()), None, 0.0, None, None)
+        engine._query_futures["QUERY:1"] = future
+        _run_read_thread(engine, _result_line("QUERY:1", 0, partial=True), _result_line("QUERY:1", 0))
+        assert seen_in_callback == [False, False]
+        assert future.result(timeout=0)["turnNumber"] == 0
+        assert engine._query_futures == {}
+
+    def test_multi_turn_resolved_on_last_turn(self):
+        engine = _read_engine()
+        future: Future = Future()
+        engine.queries["QUERY:1"] = (MagicMock(), None, 0.0, None, None)
+        engine._turns_remaining["QUERY:1"] = 2
+        engine._query_futures["QUERY:1"] = future
+        _run_read_thread(engine, _result_line("QUERY:1", 0))
+        assert not future.done()
+        _run_read_thread(engine, _result_line("QUERY:1", 1))
+        assert future.result(timeout=0)["turnNumber"] == 1
+
+    def test_error_fails_handle(self):
+        engine = _read_engine()
+        future: Future = Future()
+        engine.queries["QUERY:1"] = (MagicMock(), MagicMock(), 0.0, None, None)
+        engine._query_futures["QUERY:1"] = future
+        engine._main_thread_scheduler = lambda fn: fn()
+        _run_read_thread(engine, json.dumps({"id": "QUERY:1", "error": "Illegal move"}).encode())
+        with pytest.raises(EngineError, match="Illegal move"):
+            future.result(timeout=0)
+
+    def test_terminate_cancels_handle(self):
+        engine = _read_engine()
+        engine.send_query = MagicMock()
+        future: Future = Future()
+        engine.queries["QUERY:1"] = (MagicMock(), None, 0.0, None, None)
+        engine._query_futures["QUERY:1"] = future
+        engine_query.terminate_query(engine, "QUERY:1")
+        assert future.cancelled()
+
+
+class TestWaitUntil:
+    def test_wakes_on_notification(self):
+        engine = _read_engine()
+        flag = threading.Event()
+
+        def finish() -> None:
+            time.sleep(0.05)
+            flag.set()
+            engine_query.notify_waiters(engine)
+
+        threading.Thread(target=finish).start()
+        start = time.monotonic()
+        with patch.object(engine_query, "WAIT_RECHECK_INTERVAL", 10.0):
+            assert engine_query.wait_until(engine, flag.is_set, timeout=5.0)
+        assert time.monotonic() - start < 2.0
+
+    def test_timeout(self):
+        assert engine_query.wait_until(_read_engine(), lambda: False, timeout=0.05) is False
+
+    def test_should_stop(self):
+        assert engine_query.wait_until(_read_engine(), lambda: False, should_stop=lambda: True) is False
+
+
+def test_end_to_end_waiter_wakes_on_result():
+    config = {
+        "altcommand": "katago analysis",
+        "max_visits": 10,
+        "wide_root_noise": 0.0,
+        "_enable_ownership": False,
+        "allow_recovery": False,
+    }
+    with patch("katrain.core.engine.subprocess.Popen", side_effect=lambda *a, **kw: FakePopen(*a, **kw)):
+        engine = KataGoEngine(MinimalKatrain(), config)
+        try:
+            future: Future = Future()
+            assert engine.send_query({"moves": []}, MagicMock(), None, future=future)
+            assert engine.wait_until(lambda: "QUERY:1" in engine.queries, timeout=5.0)
+            assert not engine.wait_until_idle(timeout=0.05)
+            result = {"id": "QUERY:1", "turnNumber": 0, "moveInfos": [], "rootInfo": {"visits": 10}}
+            # FakePipe reports EOF right away, which ends the engine's own read
+            # thread; replay the result through a fresh one.
+            engine._stdout_queue.put(json.dumps(result).encode())
+            engine._stdout_queue.put(None)
+            threading.Thread(target=analysis_read_thread, args=(engine,), daemon=True).start()
+            assert future.result(timeout=5.0)["rootInfo"]["visits"] == 10
+            assert engine.wait_until_idle(timeout=5.0)
+        finally:
+            engine.shutdown()
+
+
+def test_cancelled_handle_is_not_sent():
+    config = {
+        "altcommand": "katago analysis",
+        "max_visits": 10,
+        "wide_root_noise": 0.0,
+        "_enable_ownership": False,
+        "allow_recovery": False,
+    }
+    with patch("katrain.core.engine.subprocess.Popen", side_effect=lambda *a, **kw: FakePopen(*a, **kw)):
+        engine = KataGoEngine(MinimalKatrain(), config)
+        try:
+            future: Future = Future()
+            future.cancel()
+            assert engine.send_query({"moves": []}, MagicMock(), None, future=future)
+            assert engine.wait_until(lambda: engine.get_pending_count() == 0, timeout=5.0)
+            assert engine.queries == {}
+        finally:
+            engine.shutdown()
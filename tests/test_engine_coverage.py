@@ -295,6 +295,7 @@ def _make_katago_engine_for_inspection() -> Any:
     eng.shutdown_start = None
     eng.shutdown_complete = False
     eng.queries = {}
+    eng._admission = []
     eng.write_queue = MagicMock()
     eng.write_queue.empty.return_value = True
     eng.thread_lock = MagicMock()
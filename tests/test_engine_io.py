@@ -8,19 +8,34 @@ thread functions exist and have the expected signatures.
 
 Coverage targets:
 - ``_ensure_str``: bytes / str / None normalization
+- ``write_stdin_thread``: batched single write/flush, write failure handling
+- ``PartialResultMerger`` / ``analysis_read_thread``: partial result merging
 """
 
 from __future__ import annotations
 
 import inspect
+import itertools
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from unittest.mock import MagicMock
 
+import pytest
+
+from katrain.core.engine import KataGoEngine
 from katrain.core.engine_io import (
+    PartialResultMerger,
     _ensure_str,
     analysis_read_thread,
     pipe_reader_thread,
     read_stderr_thread,
     write_stdin_thread,
 )
+from katrain.core.engine_query import QUERY_FUTURE_KEY
+from tests.test_engine_multi_turn import _make_read_engine, _result_line
 
 # =============================================================================
 # _ensure_str
@@ -91,3 +106,178 @@ class TestThreadFunctionSignatures:
         sig = inspect.signature(analysis_read_thread)
         params = list(sig.parameters)
         assert params == ["widget"]
+
+
+# =============================================================================
+# write_stdin_thread batching
+# =============================================================================
+
+
+class RecordingStdin:
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.writes: list[bytes] = []
+        self.flushes = 0
+
+    def write(self, data: bytes) -> int:
+        if self.fail:
+            raise BrokenPipeError("Pipe closed")
+        self.writes.append(data)
+        return len(data)
+
+    def flush(self) -> None:
+        self.flushes += 1
+
+
+def _writer_engine(stdin: RecordingStdin, **config) -> KataGoEngine:
+    engine = object.__new__(KataGoEngine)
+    engine.config = config
+    engine.katrain = MagicMock()
+    engine.katago_process = MagicMock()
+    engine.katago_process.stdin = stdin
+    engine._shutdown_event = threading.Event()
+    engine.write_queue = queue.Queue()
+    engine._write_queue_seq = itertools.count()
+    engine._write_queue_payloads = {}
+    engine.thread_lock = threading.RLock()
+    engine._pending_query_lock = threading.Lock()
+    engine._pending_query_count = 0
+    engine._admission = []
+    engine.query_counter = 0
+    engine.query_id_prefix = "QUERY"
+    engine.ponder_query = None
+    engine.queries = {}
+    engine._query_futures = {}
+    engine._turns_remaining = {}
+    engine._terminated_queries = {}
+    engine._state_changed = threading.Condition()
+    engine._state_generation = 0
+    return engine
+
+
+def _run_writer(engine: KataGoEngine, *queries: dict) -> None:
+    for query in queries:
+        seq = next(engine._write_queue_seq)
+        engine._write_queue_payloads[seq] = (query, MagicMock(), None, None, None)
+        engine._pending_query_count += 1
+        engine.write_queue.put((0, seq))
+    engine.write_queue.put(None)  # stop after the batch
+    write_stdin_thread(engine)
+
+
+class TestWriteStdinBatching:
+    def test_ready_queries_written_with_one_flush(self):
+        stdin = RecordingStdin()
+        engine = _writer_engine(stdin)
+        _run_writer(engine, {"moves": []}, {"moves": [["B", "D4"]]}, {"moves": [["B", "Q16"]]})
+        assert len(stdin.writes) == stdin.flushes == 1
+        lines = stdin.writes[0].decode().splitlines()
+        assert [json.loads(line)["id"] for line in lines] == ["QUERY:1", "QUERY:2", "QUERY:3"]
+        assert set(engine.queries) == {"QUERY:1", "QUERY:2", "QUERY:3"}
+
+    def test_debug_log_reuses_serialized_line(self):
+        stdin = RecordingStdin()
+        engine = _writer_engine(stdin)
+        _run_writer(engine, {"moves": []})
+        logged = engine.katrain.log.call_args_list[0][0][0]
+        assert logged.endswith(stdin.writes[0].decode().strip())
+
+    def test_unbatched_mode_flushes_per_query(self):
+        stdin = RecordingStdin()
+        engine = _writer_engine(stdin, batch_stdin_writes=False)
+        _run_writer(engine, {"moves": []}, {"moves": []})
+        assert len(stdin.writes) == stdin.flushes == 2
+
+    @pytest.mark.parametrize("batch_stdin_writes", [True, False])
+    def test_write_failure_releases_queries(self, batch_stdin_writes):
+        engine = _writer_engine(RecordingStdin(fail=True), batch_stdin_writes=batch_stdin_writes)
+        future: Future = Future()
+        seq = next(engine._write_queue_seq)
+        engine._write_queue_payloads[seq] = ({"moves": [], QUERY_FUTURE_KEY: future}, MagicMock(), None, None, None)
+        engine._pending_query_count = 1
+        engine.write_queue.put((0, seq))
+        write_stdin_thread(engine)
+        assert engine._pending_query_count == 0
+        assert future.exception(timeout=0) is not None
+
+
+# =============================================================================
+# Partial result merging
+# =============================================================================
+
+
+class TestPartialResultMerger:
+    def test_rate_limits_per_query(self):
+        merger = PartialResultMerger(1.0)
+        assert not merger.hold("Q1", {"n": 1}, 10.0, backlog=False)
+        assert merger.hold("Q1", {"n": 2}, 10.5, backlog=False)
+        assert not merger.hold("Q2", {"n": 1}, 10.5, backlog=False)
+        assert merger.next_due() == 11.0
+        assert merger.pop_due(10.9) == []
+        assert merger.pop_due(11.0) == [({"n": 2}, 10.5)]
+
+    def test_newer_partial_replaces_held_one(self):
+        merger = PartialResultMerger(1.0)
+        merger.hold("Q1", {"n": 1}, 10.0, backlog=True)
+        merger.hold("Q1", {"n": 2}, 10.1, backlog=True)
+        assert merger.merged == 1
+        assert merger.pop_due(10.1) == [({"n": 2}, 10.1)]
+
+    def test_final_result_drops_held_partial(self):
+        merger = PartialResultMerger(1.0)
+        merger.hold("Q1", {"n": 1}, 10.0, backlog=True)
+        merger.finish("Q1")
+        assert merger.next_due() is None
+
+    def test_disabled(self):
+        merger = PartialResultMerger(0.0)
+        assert not merger.hold("Q1", {}, 10.0, backlog=True)
+        assert not merger.hold("Q1", {}, 10.0, backlog=True)
+
+
+class TestReadThreadPartials:
+    def _engine(self, interval: float) -> KataGoEngine:
+        engine = _make_read_engine()
+        engine._partials = PartialResultMerger(interval)
+        engine._query_futures = {}
+        engine._state_changed = threading.Condition()
+        engine._state_generation = 0
+        return engine
+
+    def test_backed_up_partials_collapse_to_final(self):
+        engine = self._engine(10.0)
+        callback = MagicMock()
+        engine.queries["QUERY:1"] = (callback, None, 0.0, None, None)
+        for line in (_result_line("QUERY:1", 0, partial=True), _result_line("QUERY:1", 0, partial=True)):
+            engine._stdout_queue.put(line)
+        engine._stdout_queue.put(_result_line("QUERY:1", 0))
+        engine._stdout_queue.put(None)
+        analysis_read_thread(engine)
+        assert [c[0][1] for c in callback.call_args_list] == [False]
+        assert engine.katrain.update_state.call_count == 1
+
+    def test_held_partial_delivered_when_due(self):
+        engine = self._engine(0.2)
+        received = queue.Queue()
+        engine.queries["QUERY:1"] = (lambda analysis, partial: received.put(time.monotonic()), None, 0.0, None, None)
+        thread = threading.Thread(target=analysis_read_thread, args=(engine,), daemon=True)
+        thread.start()
+        try:
+            engine._stdout_queue.put(_result_line("QUERY:1", 0, partial=True))
+            first = received.get(timeout=5.0)
+            engine._stdout_queue.put(_result_line("QUERY:1", 0, partial=True))
+            second = received.get(timeout=5.0)
+        finally:
+            engine._stdout_queue.put(None)
+            thread.join(timeout=5.0)
+        assert second - first >= 0.15  # held until 0.2s after the first delivery
+
+    def test_cached_delivery_runs_in_order_with_results(self):
+        engine = self._engine(0.0)
+        order = []
+        engine.queries["QUERY:1"] = (lambda analysis, partial: order.append("engine"), None, 0.0, None, None)
+        engine._stdout_queue.put(lambda: order.append("cached"))
+        engine._stdout_queue.put(_result_line("QUERY:1", 0))
+        engine._stdout_queue.put(None)
+        analysis_read_thread(engine)
+        assert order == ["cached", "engine"]
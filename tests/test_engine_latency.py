@@ -0,0 +1,98 @@
+"""Tests for katrain.core.engine_latency and its hooks in the engine threads.
+
+Covers:
+- ``priority_class``: relative priority buckets
+- ``LatencyHistogram`` / ``QueryLatencyTracker``: percentiles, stage flow
+- writer + read thread: queue wait, search, decode and callback recorded
+"""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from katrain.core.constants.priorities import (
+    PRIORITY_DEFAULT,
+    PRIORITY_EXTRA_AI_QUERY,
+    PRIORITY_EXTRA_ANALYSIS,
+    PRIORITY_GAME_ANALYSIS,
+)
+from katrain.core.engine_latency import LatencyHistogram, QueryLatencyTracker, priority_class
+from katrain.core.engine_query import QUERY_ENQUEUED_KEY
+from tests.test_engine_completion import _read_engine, _run_read_thread
+from tests.test_engine_io import RecordingStdin, _run_writer, _writer_engine
+from tests.test_engine_multi_turn import _result_line
+
+
+@pytest.mark.parametrize(
+    "priority, expected",
+    [
+        (PRIORITY_GAME_ANALYSIS, "background"),
+        (PRIORITY_EXTRA_ANALYSIS, "extra"),
+        (PRIORITY_DEFAULT, "default"),
+        (PRIORITY_EXTRA_AI_QUERY, "ai"),
+    ],
+)
+def test_priority_class(priority, expected):
+    assert priority_class(priority) == expected
+
+
+class TestLatencyHistogram:
+    def test_percentiles_in_milliseconds(self):
+        histogram = LatencyHistogram()
+        for ms in range(1, 101):
+            histogram.add(ms / 1000)
+        summary = histogram.summary()
+        assert summary["count"] == 100
+        assert (summary["p50_ms"], summary["p95_ms"], summary["p99_ms"], summary["max_ms"]) == (51, 96, 100, 100)
+        assert summary["mean_ms"] == pytest.approx(50.5)
+
+    def test_window_bounds_samples_but_not_count(self):
+        histogram = LatencyHistogram(window=10)
+        for _ in range(50):
+            histogram.add(1.0)
+        histogram.add(0.0)
+        assert len(histogram.samples) == 10
+        assert histogram.summary()["count"] == 51
+
+    def test_empty(self):
+        assert LatencyHistogram().summary() == {"count": 0}
+
+
+class TestQueryLatencyTracker:
+    def test_stage_flow(self):
+        tracker = QueryLatencyTracker()
+        tracker.sent("Q1", "default", enqueued_at=10.0, written_at=10.5)
+        tracker.record("Q1", "decode", 0.001)
+        tracker.record("Q1", "callback", 0.002)
+        tracker.finished("Q1", received_at=12.5, done_at=12.6)
+        stats = tracker.snapshot()["default"]
+        assert list(stats) == ["queue_wait", "search", "decode", "callback", "total"]
+        assert stats["queue_wait"]["p50_ms"] == 500
+        assert stats["search"]["p50_ms"] == 2000
+        assert stats["total"]["p50_ms"] == pytest.approx(2600)
+
+    def test_unknown_and_discarded_queries_ignored(self):
+        tracker = QueryLatencyTracker()
+        tracker.record("nope", "decode", 0.1)
+        tracker.sent("Q1", "ai", 0.0, 1.0)
+        tracker.discard("Q1")
+        tracker.finished("Q1", received_at=2.0)
+        assert list(tracker.snapshot()["ai"]) == ["queue_wait"]
+
+
+def test_pipeline_records_every_stage():
+    engine = _writer_engine(RecordingStdin())
+    engine.base_priority = 0
+    engine.latency = QueryLatencyTracker()
+    _run_writer(engine, {"moves": [], "priority": PRIORITY_DEFAULT, QUERY_ENQUEUED_KEY: 0.0})
+
+    read_engine = _read_engine()
+    read_engine.latency = engine.latency
+    read_engine.queries["QUERY:1"] = (MagicMock(), None, 0.0, None, None)
+    _run_read_thread(read_engine, _result_line("QUERY:1", 0, partial=True), _result_line("QUERY:1", 0))
+
+    stats = engine.latency.snapshot()["default"]
+    assert stats["queue_wait"]["count"] == stats["search"]["count"] == stats["total"]["count"] == 1
+    assert stats["decode"]["count"] == stats["callback"]["count"] == 2
@@ -0,0 +1,254 @@
+"""Tests for multi-turn (one query per branch) analysis.
+
+Covers:
+- ``build_analysis_query(analyze_turns=...)``
+- ``branch_turn_numbers``: turn mapping and fallback detection
+- ``request_multi_turn_analysis``: one query per visit group, per-turn routing
+- ``analysis_read_thread``: a multi-turn query stays registered (and keeps
+  its pending slot) until every turn has delivered a final result
+- ``AnalysisOrchestrator._branch_groups``: shared prefixes analyzed once
+"""
+
+from __future__ import annotations
+
+import json
+import queue
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from katrain.core import engine_query
+from katrain.core.engine import KataGoEngine
+from katrain.core.engine_io import PartialResultMerger, analysis_read_thread
+from katrain.core.game_node import GameNode
+from katrain.core.sgf_parser import Move
+
+
+def _make_branch(num_moves: int, root: GameNode | None = None) -> list[GameNode]:
+    """Return ``[root, n1, ..., nN]`` with alternating B/W moves down one branch."""
+    root = root or GameNode(properties={"SZ": 19})
+    nodes = [root]
+    for i in range(num_moves):
+        player = "B" if i % 2 == 0 else "W"
+        nodes.append(GameNode(parent=nodes[-1], move=Move(coords=(i, 0), player=player)))
+    return nodes
+
+
+def _make_widget(config: dict | None = None) -> MagicMock:
+    widget = MagicMock()
+    widget.config = {
+        "max_visits": 100,
+        "fast_visits": 10,
+        "_enable_ownership": True,
+        "wide_root_noise": 0.0,
+        "max_time": 5.0,
+        **(config or {}),
+    }
+    widget.base_priority = 0
+    widget.override_settings = {}
+    widget.get_rules.return_value = "japanese"
+    widget.PONDER_KEY = "_kt_continuous"
+    return widget
+
+
+class TestBuildAnalysisQueryTurns:
+    def test_default_analyzes_final_position(self):
+        nodes = _make_branch(3)
+        query = engine_query.build_analysis_query(
+            nodes[-1],
+            visits=10,
+            ponder=False,
+            ownership=False,
+            rules="japanese",
+            base_priority=0,
+            priority=0,
+            override_settings={},
+            wide_root_noise=0.0,
+        )
+        assert query["analyzeTurns"] == [3]
+
+    def test_explicit_turns(self):
+        nodes = _make_branch(3)
+        query = engine_query.build_analysis_query(
+            nodes[-1],
+            visits=10,
+            ponder=False,
+            ownership=False,
+            rules="japanese",
+            base_priority=0,
+            priority=0,
+            override_settings={},
+            wide_root_noise=0.0,
+            analyze_turns=[0, 1, 2, 3],
+        )
+        assert query["analyzeTurns"] == [0, 1, 2, 3]
+        assert len(query["moves"]) == 3
+
+
+class TestBranchTurnNumbers:
+    def test_maps_depth_to_turn(self):
+        nodes = _make_branch(4)
+        turns = engine_query.branch_turn_numbers(nodes)
+        assert turns == {id(n): i for i, n in enumerate(nodes)}
+
+    def test_root_placements_are_allowed(self):
+        root = GameNode(properties={"SZ": 19, "AB": ["dd", "pp"]})
+        nodes = _make_branch(2, root=root)
+        assert engine_query.branch_turn_numbers(nodes) is not None
+
+    def test_setup_stones_below_root_are_rejected(self):
+        nodes = _make_branch(2)
+        nodes[2].add_list_property("AB", ["qq"])
+        assert engine_query.branch_turn_numbers(nodes) is None
+
+    def test_moveless_child_is_rejected(self):
+        nodes = _make_branch(2)
+        nodes.append(GameNode(parent=nodes[-1]))
+        assert engine_query.branch_turn_numbers(nodes) is None
+
+
+class TestRequestMultiTurnAnalysis:
+    def test_single_query_routes_each_turn(self):
+        nodes = _make_branch(4)
+        widget = _make_widget()
+        received = []
+        with patch.object(engine_query, "send_query") as send:
+            engine_query.request_multi_turn_analysis(
+                widget, nodes, callback=lambda node, result, partial: received.append((node, result["turnNumber"]))
+            )
+        assert send.call_count == 1
+        query, route = send.call_args[0][1], send.call_args[0][2]
+        assert query["analyzeTurns"] == [0, 1, 2, 3, 4]
+        for turn in (3, 0, 4):
+            route({"turnNumber": turn}, False)
+        assert received == [(nodes[3], 3), (nodes[0], 0), (nodes[4], 4)]
+        assert all(n.analysis_visits_requested == 100 for n in nodes)
+
+    def test_analysis_focus_splits_into_visit_groups(self):
+        nodes = _make_branch(4)
+        widget = _make_widget({"analysis_focus": "black"})
+        with patch.object(engine_query, "send_query") as send:
+            engine_query.request_multi_turn_analysis(widget, nodes, callback=lambda *_: None)
+        turns_by_visits = {c[0][1]["maxVisits"]: c[0][1]["analyzeTurns"] for c in send.call_args_list}
+        # Black to play at even turns gets full visits, white gets fast_visits
+        assert turns_by_visits == {100: [0, 2, 4], 10: [1, 3]}
+
+    def test_unbatchable_branch_falls_back_to_per_node(self):
+        nodes = _make_branch(2)
+        nodes[1].add_list_property("AW", ["qq"])
+        widget = _make_widget()
+        with (
+            patch.object(engine_query, "send_query") as send,
+            patch.object(engine_query, "request_analysis") as single,
+        ):
+            engine_query.request_multi_turn_analysis(widget, nodes, callback=lambda *_: None)
+        send.assert_not_called()
+        assert single.call_count == 3
+
+    def test_nodes_off_branch_raise(self):
+        nodes = _make_branch(2)
+        sibling = GameNode(parent=nodes[0], move=Move(coords=(5, 5), player="B"))
+        with pytest.raises(ValueError):
+            engine_query.request_multi_turn_analysis(_make_widget(), nodes + [sibling], callback=lambda *_: None)
+
+
+def _make_read_engine() -> KataGoEngine:
+    engine = object.__new__(KataGoEngine)
+    engine.katrain = MagicMock()
+    engine._shutdown_event = threading.Event()
+    engine._stdout_queue = queue.Queue()
+    engine.thread_lock = threading.RLock()
+    engine.queries = {}
+    engine._turns_remaining = {}
+    engine._terminated_queries = {}
+    engine._pending_query_lock = threading.Lock()
+    engine._pending_query_count = 0
+    engine._admission = []
+    engine._last_extra_debug_log_time = 0.0
+    engine._partials = PartialResultMerger(0.0)
+    return engine
+
+
+def _result_line(query_id: str, turn: int, partial: bool = False) -> bytes:
+    result = {
+        "id": query_id,
+        "turnNumber": turn,
+        "isDuringSearch": partial,
+        "moveInfos": [],
+        "rootInfo": {"visits": 1},
+    }
+    return json.dumps(result).encode()
+
+
+class TestAnalysisReadThreadMultiTurn:
+    def test_query_completes_after_last_turn(self):
+        engine = _make_read_engine()
+        callback = MagicMock()
+        engine.queries["QUERY:1"] = (callback, None, 0.0, None, None)
+        engine._turns_remaining["QUERY:1"] = 3
+        engine._pending_query_count = 1
+        for line in (_result_line("QUERY:1", 0), _result_line("QUERY:1", 1, partial=True), _result_line("QUERY:1", 1)):
+            engine._stdout_queue.put(line)
+        engine._stdout_queue.put(None)
+        analysis_read_thread(engine)
+
+        assert callback.call_count == 3
+        assert "QUERY:1" in engine.queries
+        assert engine._turns_remaining["QUERY:1"] == 1
+        assert engine._pending_query_count == 1
+
+        engine._stdout_queue.put(_result_line("QUERY:1", 2))
+        engine._stdout_queue.put(None)
+        analysis_read_thread(engine)
+
+        assert "QUERY:1" not in engine.queries
+        assert "QUERY:1" not in engine._turns_remaining
+        assert engine._pending_query_count == 0
+
+    def test_terminated_query_frees_one_slot(self):
+        engine = _make_read_engine()
+        engine.send_query = MagicMock()
+        engine._query_futures = {}
+        engine._state_changed = threading.Condition()
+        engine._state_generation = 0
+        engine.queries["QUERY:1"] = (MagicMock(), None, 0.0, None, None)
+        engine._turns_remaining["QUERY:1"] = 3
+        engine._pending_query_count = 2
+        engine_query.terminate_query(engine, "QUERY:1")
+
+        lines = [_result_line("QUERY:1", 0, partial=True), _result_line("QUERY:1", 0), _result_line("QUERY:1", 1)]
+        for line in [*lines, _result_line("QUERY:1", 2)]:
+            engine._stdout_queue.put(line)
+        engine._stdout_queue.put(None)
+        analysis_read_thread(engine)
+
+        assert engine._pending_query_count == 1
+        assert engine._terminated_queries == {}
+
+
+class TestBranchGroups:
+    def test_shared_prefix_assigned_once(self, game):
+
+        main = _make_branch(3, root=game.root)
+        variation = GameNode(parent=main[1], move=Move(coords=(9, 9), player="W"))
+        all_nodes = main + [variation]
+
+        groups = game.analysis._branch_groups(all_nodes)
+
+        flattened = [n for g in groups for n in g]
+        assert sorted(map(id, flattened)) == sorted(map(id, all_nodes))
+        assert main in groups
+        assert [variation] in groups
+
+    def test_analyze_all_nodes_multi_turn_uses_one_query_per_branch(self, game, mock_engine):
+
+        _make_branch(5, root=game.root)
+        mock_engine.check_alive = lambda: True
+        mock_engine.request_multi_turn_analysis = MagicMock()
+
+        game.analyze_all_nodes(multi_turn=True)
+
+        mock_engine.request_multi_turn_analysis.assert_called_once()
+        assert len(mock_engine.request_multi_turn_analysis.call_args[0][0]) == 6
+        assert mock_engine.request_analysis_calls == []
@@ -0,0 +1,197 @@
+"""Tests for katrain.core.engine_pool.KataGoEnginePool.
+
+Members are injected through ``engine_factory`` so no KataGo process is
+spawned; one test also runs real ``KataGoEngine`` members on ``FakePopen``.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from katrain.core.engine_pool import KataGoEnginePool
+from tests.fakes import FakePopen, MinimalKatrain
+
+
+class FakeMember:
+    """Minimal stand-in for a ``KataGoEngine`` pool member."""
+
+    def __init__(self, katrain: Any, config: dict[str, Any], **kwargs: Any) -> None:
+        self.katrain = katrain
+        self.config = config
+        self.error_callback = kwargs["error_callback"]
+        self.query_id_prefix = "QUERY"
+        self.alive = True
+        self.restart_revives = True
+        self.pending = 0
+        self.base_priority = 0
+        self.is_pondering = False
+        self.requests: list[dict[str, Any]] = []
+        self.terminated: list[str] = []
+        self.restarts = 0
+        self.analysis_cache = kwargs.get("analysis_cache")
+        self.shut_down = False
+
+    def check_alive(self) -> bool:
+        return self.alive
+
+    def restart(self) -> None:
+        self.restarts += 1
+        self.alive = self.restart_revives
+
+    def get_pending_count(self) -> int:
+        return self.pending
+
+    def admission_backlog(self) -> int:
+        return 0
+
+    def request_analysis(self, node: Any, callback: Any, **kwargs: Any) -> None:
+        self.pending += 1
+        self.requests.append(kwargs)
+
+    def terminate_query(self, query_id: str, ignore_further_results: bool = True) -> None:
+        self.terminated.append(query_id)
+
+    def is_idle(self) -> bool:
+        return self.pending == 0
+
+    def shutdown(self, finish: bool = False) -> None:
+        self.shut_down = True
+
+
+@pytest.fixture
+def pool() -> KataGoEnginePool:
+    return KataGoEnginePool(MagicMock(), {"max_visits": 10}, size=3, engine_factory=FakeMember)
+
+
+class TestConstruction:
+    def test_size_from_config(self):
+        p = KataGoEnginePool(MagicMock(), {"pool_size": 2}, engine_factory=FakeMember)
+        assert len(p.members) == 2
+
+    def test_size_at_least_one(self):
+        p = KataGoEnginePool(MagicMock(), {}, size=0, engine_factory=FakeMember)
+        assert len(p.members) == 1
+
+    def test_members_get_distinct_query_prefixes(self, pool):
+        assert [m.query_id_prefix for m in pool.members] == ["POOL0", "POOL1", "POOL2"]
+
+    def test_members_share_one_analysis_cache(self, tmp_path):
+        config = {"analysis_cache": True, "analysis_cache_path": str(tmp_path / "c.sqlite")}
+        p = KataGoEnginePool(MagicMock(), config, size=3, engine_factory=FakeMember)
+        cache = p.analysis_cache
+        assert cache is not None
+        assert all(m.analysis_cache is cache for m in p.members)
+        p.shutdown()
+        assert all(m.shut_down and m.analysis_cache is None for m in p.members)
+        assert cache.get("k") is None  # closed: lookups miss instead of raising
+
+    def test_members_share_config(self, pool):
+        assert all(m.config is pool.config for m in pool.members)
+
+
+class TestDispatch:
+    def test_least_loaded_member_receives_query(self, pool):
+        pool.members[0].pending = 5
+        pool.members[1].pending = 1
+        pool.members[2].pending = 3
+        pool.request_analysis(MagicMock(), callback=MagicMock())
+        assert len(pool.members[1].requests) == 1
+
+    def test_queries_spread_across_members(self, pool):
+        for _ in range(6):
+            pool.request_analysis(MagicMock(), callback=MagicMock())
+        assert [m.pending for m in pool.members] == [2, 2, 2]
+
+    def test_ponder_goes_to_first_alive_member(self, pool):
+        pool.members[0].pending = 50
+        pool.request_analysis(MagicMock(), callback=MagicMock(), ponder=True)
+        assert pool.members[0].requests[0]["ponder"] is True
+
+    def test_is_idle_requires_all_members_idle(self, pool):
+        assert pool.is_idle()
+        pool.members[2].pending = 1
+        assert not pool.is_idle()
+
+    def test_terminate_query_routed_by_prefix(self, pool):
+        pool.terminate_query("POOL1:7")
+        assert [m.terminated for m in pool.members] == [[], ["POOL1:7"], []]
+
+    def test_terminate_query_unknown_prefix_goes_to_all(self, pool):
+        pool.terminate_query("other")
+        assert all(m.terminated == ["other"] for m in pool.members)
+
+
+class TestDeadMembers:
+    def test_dead_member_is_restarted(self, pool):
+        pool.members[0].alive = False
+        pool.request_analysis(MagicMock(), callback=MagicMock())
+        assert pool.members[0].restarts == 1
+        assert pool.members[0].alive
+
+    def test_unrecoverable_member_is_skipped(self, pool):
+        dead = pool.members[0]
+        dead.alive = False
+        dead.restart_revives = False
+        for _ in range(4):
+            pool.request_analysis(MagicMock(), callback=MagicMock())
+        assert dead.requests == []
+        assert sum(len(m.requests) for m in pool.members) == 4
+        assert pool.check_alive()
+
+    def test_failed_restart_backs_off(self, pool):
+        dead = pool.members[0]
+        dead.alive = False
+        dead.restart_revives = False
+        for _ in range(4):
+            pool.request_analysis(MagicMock(), callback=MagicMock())
+        assert dead.restarts == 1
+        first_retry = pool._restart_after[0]
+
+        pool._restart_after[0] = 0.0  # backoff over
+        pool.request_analysis(MagicMock(), callback=MagicMock())
+        assert dead.restarts == 2
+        assert pool._restart_after[0] - first_retry >= pool.RESTART_BACKOFF  # doubled
+
+        dead.restart_revives = True
+        pool._restart_after[0] = 0.0
+        pool.request_analysis(MagicMock(), callback=MagicMock())
+        assert dead.alive
+        assert pool._restart_failures[0] == 0
+
+    def test_member_error_not_escalated_while_pool_alive(self):
+        error_callback = MagicMock()
+        p = KataGoEnginePool(MagicMock(), {}, size=2, error_callback=error_callback, engine_factory=FakeMember)
+        p.members[0].alive = False
+        p.members[0].error_callback("died", "c", True)
+        error_callback.assert_not_called()
+
+    def test_member_error_escalated_when_all_dead(self):
+        error_callback = MagicMock()
+        p = KataGoEnginePool(MagicMock(), {}, size=2, error_callback=error_callback, engine_factory=FakeMember)
+        for m in p.members:
+            m.alive = False
+        p.members[1].error_callback("died", "c", True)
+        error_callback.assert_called_once_with("died", "c", True)
+
+
+def test_real_members_on_fake_processes():
+    """Real ``KataGoEngine`` members start, report pending counts and shut down."""
+    config = {
+        "altcommand": "katago analysis",
+        "max_visits": 10,
+        "wide_root_noise": 0.0,
+        "_enable_ownership": False,
+        "allow_recovery": False,
+    }
+    with patch("katrain.core.engine.subprocess.Popen", side_effect=lambda *a, **kw: FakePopen(*a, **kw)):
+        p = KataGoEnginePool(MinimalKatrain(), config, size=2)
+        try:
+            assert p.check_alive()
+            assert p.send_query({"moves": []}, None, None)
+            assert p.get_pending_count() == 1
+            assert p.least_loaded() is p.members[1]
+        finally:
+            p.shutdown()
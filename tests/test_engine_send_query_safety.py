@@ -19,6 +19,8 @@ def minimal_engine():
     # Set up required attributes manually
     engine._pending_query_count = 0
     engine._pending_query_lock = threading.Lock()
+    engine._admission = []
+    engine.base_priority = 0
     engine.katago_process = MagicMock()
     engine.katago_process.poll.return_value = None  # Process alive
     engine.write_queue = queue.PriorityQueue()
@@ -66,11 +68,28 @@ class TestSendQuerySafety:
         assert len(error_received) == 1
         assert "not alive" in error_received[0]["error"].lower()
 
-    def test_rejects_when_pending_limit_exceeded(self, minimal_engine):
-        """Query is rejected when pending limit exceeded."""
+    def test_queued_when_pending_limit_reached(self, minimal_engine):
+        """Query waits for admission instead of being rejected at the pending limit."""
         engine, MAX_PENDING = minimal_engine
         engine._pending_query_count = MAX_PENDING
 
+        error_callback = MagicMock()
+        result = engine.send_query({"id": "overflow"}, callback=MagicMock(), error_callback=error_callback)
+
+        assert result is True
+        error_callback.assert_not_called()
+        assert engine._pending_query_count == MAX_PENDING
+        assert engine.admission_backlog() == 1
+        assert engine.write_queue.empty()
+
+    def test_rejects_when_admission_queue_full(self, minimal_engine):
+        """Query is rejected once the admission queue is full as well."""
+        from katrain.core.engine_query import MAX_ADMISSION_QUEUE
+
+        engine, MAX_PENDING = minimal_engine
+        engine._pending_query_count = MAX_PENDING
+        engine._admission = [((0, 0), i, ({}, None, None, None, None)) for i in range(MAX_ADMISSION_QUEUE)]
+
         error_received = []
 
         mock_clock = MagicMock()
@@ -25,6 +25,8 @@ Covers previously untested paths:
 - Game.build_summary_report
 """
 
+import os
+import stat
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -328,6 +330,64 @@ class TestSGFOutput:
         assert "B[dp]" in content
         assert "W[pd]" in content
 
+    def test_write_sgf_analysis_sidecar(self, game, tmp_path):
+        game.root.analysis = {
+            "moves": {},
+            "root": {"visits": 10, "winrate": 0.5, "scoreLead": 0.0},
+            "ownership": None,
+            "policy": None,
+            "completed": True,
+        }
+        filepath = tmp_path / "test.sgf"
+        trainer_config = {"save_feedback": False, "eval_thresholds": [0, 0.5, 1.0, 2.0, 5.0], "save_analysis": True}
+        game.write_sgf(str(filepath), trainer_config=trainer_config, analysis_sidecar=True)
+        content = filepath.read_text(encoding="utf-8")
+        assert "KTS[test.kta]" in content
+        assert "KT[@0]" in content
+        assert (tmp_path / "test.kta").exists()
+
+    def test_write_sgf_failure_keeps_existing_file(self, game, tmp_path):
+        filepath = tmp_path / "test.sgf"
+        filepath.write_text("(;old)", encoding="utf-8")
+        trainer_config = {"save_feedback": False, "eval_thresholds": [0, 0.5, 1.0, 2.0, 5.0]}
+        with (
+            patch.object(type(game.root), "write_sgf", side_effect=RuntimeError("boom")),
+            pytest.raises(RuntimeError),
+        ):
+            game.write_sgf(str(filepath), trainer_config=trainer_config)
+        assert filepath.read_text(encoding="utf-8") == "(;old)"
+        assert list(tmp_path.iterdir()) == [filepath]
+
+    @pytest.mark.skipif(os.name == "nt", reason="POSIX permission bits")
+    def test_write_sgf_keeps_file_permissions(self, game, tmp_path):
+        trainer_config = {"save_feedback": False, "eval_thresholds": [0, 0.5, 1.0, 2.0, 5.0]}
+        existing = tmp_path / "existing.sgf"
+        existing.write_text("(;old)", encoding="utf-8")
+        existing.chmod(0o640)
+        game.write_sgf(str(existing), trainer_config=trainer_config)
+        assert stat.S_IMODE(existing.stat().st_mode) == 0o640
+
+        umask = os.umask(0o022)
+        try:
+            new = tmp_path / "new.sgf"
+            game.write_sgf(str(new), trainer_config=trainer_config)
+        finally:
+            os.umask(umask)
+        assert stat.S_IMODE(new.stat().st_mode) == 0o644
+
+    @pytest.mark.skipif(not hasattr(os, "symlink") or os.name == "nt", reason="needs POSIX symlinks")
+    def test_write_sgf_keeps_symlink(self, game, tmp_path):
+        trainer_config = {"save_feedback": False, "eval_thresholds": [0, 0.5, 1.0, 2.0, 5.0]}
+        target = tmp_path / "games" / "target.sgf"
+        target.parent.mkdir()
+        target.write_text("(;old)", encoding="utf-8")
+        link = tmp_path / "link.sgf"
+        link.symlink_to(target)
+        game.write_sgf(str(link), trainer_config=trainer_config)
+        assert link.is_symlink()
+        assert target.read_text(encoding="utf-8") != "(;old)"
+        assert sorted(p.name for p in target.parent.iterdir()) == ["target.sgf"]
+
 
 # ---------------------------------------------------------------------------
 # Game.analyze_all_nodes
@@ -351,7 +411,7 @@ class TestAnalyzeAllNodes:
         assert game_9x9.current_node.is_root
 
     def test_analyze_all_nodes_throttle_timeout(self, game_9x9):
-        """When engine.has_query_capacity returns False, node is skipped after timeout."""
+        """When engine.has_query_capacity returns False, nodes are still sent after the timeout."""
         # Mock engine to always return False for capacity
         game_9x9.engines["B"].has_query_capacity = MagicMock(return_value=False)
         # テスト高速化: throttle パラメータで短いタイムアウト値を使用
@@ -360,7 +420,8 @@ class TestAnalyzeAllNodes:
             throttle_max_attempts=2,
             throttle_poll_interval=0.001,
         )
-        # No crash means the timeout was handled
+        # The engine's admission queue holds the requests
+        assert len(game_9x9.engines["B"].request_analysis_calls) == len(game_9x9.root.nodes_in_tree)
 
     def test_run_initial_analysis_safely_logs_exception(self, game_9x9):
         """_run_initial_analysis_safely must not propagate exceptions to the thread.
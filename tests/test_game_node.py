@@ -4,6 +4,7 @@ Target: raise katrain/core/game_node.py coverage from 49% to ~85%.
 
 Covers the following previously-untested or under-tested areas:
 - analysis_dumps / load_analysis round-trip (serialization)
+- LazyAnalysis (deferred KT decoding)
 - add_shortcut / remove_shortcut (branch collapsing)
 - update_move_analysis (move merging logic)
 - set_analysis (normal / refine_move / additional_moves modes)
@@ -20,13 +21,14 @@ No Kivy imports — pure core-layer logic.
 from __future__ import annotations
 
 import base64
+import copy
 import gzip
 import json
 from typing import Any
 
 from katrain.core.constants.metadata import SGF_INTERNAL_COMMENTS_MARKER, SGF_SEPARATOR_MARKER
 from katrain.core.constants.priorities import ADDITIONAL_MOVE_ORDER
-from katrain.core.game_node import GameNode, analysis_dumps
+from katrain.core.game_node import GameNode, LazyAnalysis, analysis_dumps
 from katrain.core.sgf_parser import Move
 
 # ---------------------------------------------------------------------------
@@ -150,6 +152,94 @@ class TestAnalysisDumpLoad:
         assert result is False
 
 
+def _stored_analysis() -> dict[str, Any]:
+    return {
+        "moves": {"D4": {"move": "D4", "visits": 10, "order": 0}},
+        "root": {"visits": 10, "winrate": 0.5, "scoreLead": 0.0},
+        "ownership": [0.5] * 361,
+        "policy": [0.25] * 362,
+        "completed": True,
+    }
+
+
+class TestLazyAnalysis:
+    """KT analysis is decoded on access: main data first, ownership / policy only when read."""
+
+    def _loaded(self, root_node) -> GameNode:
+        root_node.analysis_from_sgf = analysis_dumps(_stored_analysis())
+        assert root_node.load_analysis() is True
+        return root_node
+
+    def test_nothing_decoded_until_accessed(self, root_node):
+        node = self._loaded(root_node)
+        assert node._pending_analysis is not None
+        assert node.analysis["root"]["visits"] == 10
+        assert node._pending_analysis is None
+        assert isinstance(node.analysis, LazyAnalysis)
+        assert node.analysis.encoded("ownership") is not None
+
+    def test_floats_decoded_when_read(self, root_node):
+        node = self._loaded(root_node)
+        assert list(node.ownership) == [0.5] * 361
+        assert node.analysis.encoded("ownership") is None
+        assert node.analysis.encoded("policy") is not None
+        assert list(node.analysis["policy"]) == [0.25] * 362
+
+    def test_dict_views_and_copies_are_complete(self, root_node):
+        node = self._loaded(root_node)
+        copied = copy.deepcopy(node.analysis)
+        assert type(copied) is dict
+        assert {
+            **copied,
+            "ownership": list(copied["ownership"]),
+            "policy": list(copied["policy"]),
+        } == _stored_analysis()
+        assert set(node.analysis) == set(_stored_analysis())
+        assert list(dict(node.analysis)["policy"]) == [0.25] * 362
+
+    def test_assignment_replaces_pending_value(self, root_node):
+        node = self._loaded(root_node)
+        node.analysis["ownership"] = None
+        assert node.ownership is None
+        assert "ownership" in node.analysis
+
+    def test_dumps_reuses_undecoded_values(self, root_node):
+        dumped = analysis_dumps(_stored_analysis())
+        root_node.analysis_from_sgf = dumped
+        root_node.load_analysis()
+        redumped = analysis_dumps(root_node.analysis)
+        assert redumped[:2] == dumped[:2]
+        assert json.loads(gzip.decompress(base64.standard_b64decode(redumped[2]))) == json.loads(
+            gzip.decompress(base64.standard_b64decode(dumped[2]))
+        )
+
+    def test_corrupt_main_data_leaves_analysis_empty(self, root_node):
+        dumped = analysis_dumps(_stored_analysis())
+        root_node.analysis_from_sgf = [dumped[0], dumped[1], dumped[2][:40]]
+        assert root_node.load_analysis() is True  # decoded on first access, not while loading
+        assert root_node.analysis["root"] is None
+        assert not root_node.analysis_exists
+        assert root_node.analysis_from_sgf is None
+
+    def test_main_data_decoded_on_first_access(self, root_node, monkeypatch):
+        from katrain.core import game_node as module
+
+        decoded = []
+        decode_kt = module._decode_kt
+        monkeypatch.setattr(module, "_decode_kt", lambda data: decoded.append(data) or decode_kt(data))
+        dumped = analysis_dumps(_stored_analysis())
+        root_node.analysis_from_sgf = dumped
+        assert root_node.load_analysis() is True
+        assert decoded == []
+        assert root_node.analysis["root"] is not None
+        assert decoded == [dumped[2]]
+
+    def test_clear_analysis_cancels_pending_decode(self, root_node):
+        node = self._loaded(root_node)
+        node.clear_analysis()
+        assert node.analysis["root"] is None
+
+
 # ---------------------------------------------------------------------------
 # add_shortcut / remove_shortcut
 # ---------------------------------------------------------------------------
@@ -677,6 +767,14 @@ class TestSgfProperties:
         assert "C" in props
         assert "My note" in props["C"][0]
 
+    def test_saving_does_not_touch_node_comments(self, root_node):
+        root_node.set_property("C", "original")
+        root_node.note = "My note"
+        first = root_node.sgf_properties()
+        second = root_node.sgf_properties()
+        assert first["C"] == second["C"]
+        assert root_node.get_list_property("C") == ["original"]
+
 
 # ---------------------------------------------------------------------------
 # analyze (engine delegation)
@@ -151,6 +151,28 @@ def test_ngf():
     assert root.children[0].get_property("W") == "pq"
 
 
+def test_collection(tmp_path, monkeypatch):
+    games = [f"(;GM[1]SZ[9]PB[p{i}]C[a ( b \\] c \\\\];B[ee](;W[cc])(;W[gg]))" for i in range(5)]
+    file = tmp_path / "collection.sgf"
+    file.write_text("header text )\n" + "\n".join(games), encoding="utf-8")
+    monkeypatch.setattr(SGF, "COLLECTION_CHUNK_SIZE", 7)  # games and values span chunks
+
+    assert list(SGF.iter_file_strings(str(file))) == games
+    roots = list(KaTrainSGF.iter_file(str(file)))
+    assert [root.get_property("PB") for root in roots] == [f"p{i}" for i in range(5)]
+    assert all(root.source_filename == str(file) for root in roots)
+    assert roots[0].note == "a ( b ] c \\"  # GameNode keeps C as the note
+    assert len(roots[4].children[0].children) == 2
+
+
+def test_collection_single_game_and_gib():
+    file = os.path.join(os.path.dirname(__file__), "data/LS vs AG - G4 - English.sgf")
+    (root,) = SGF.iter_file(file)
+    assert root.sgf() == SGF.parse_file(file).sgf()
+    (gib_root,) = SGF.iter_file(os.path.join(os.path.dirname(__file__), "data/test.gib"))
+    assert gib_root.get_property("PB") == "kim"
+
+
 def test_foxwq():
     for sgf in ["data/fox sgf error.sgf", "data/fox sgf works.sgf"]:
         file = os.path.join(os.path.dirname(__file__), sgf)
@@ -225,3 +247,19 @@ def test_chardet7_compat_fallback_to_gbk(tmp_path):
     else:
         # chardet 7 may detect this as utf-8 / Latin-1; nothing to assert.
         assert detected is None or isinstance(detected, str)
+
+
+def test_decode_contents():
+    cp932 = "(;GM[1]CA[Shift_JIS]PB[鈴木一郎])".encode("cp932")
+    assert SGF.decode_contents(cp932) == ("(;GM[1]CA[Shift_JIS]PB[鈴木一郎])", "shift_jis")
+    assert SGF.detect_encoding("(;GM[1]PB[张三])".encode("gb18030")) == "gb18030"
+    assert SGF.detect_encoding(b"(;GM[1]PB[x])", "game.gib") == "utf-8"
+
+    # Only the first bytes are used to choose: a guess that fails on the rest falls back
+    late_gbk = b"(;GM[1]C[" + b"a" * SGF.ENCODING_PREFIX_SIZE + "]PB[张三])".encode("gb18030")
+    assert SGF.detect_encoding(late_gbk) == "utf-8"
+    text, encoding = SGF.decode_contents(late_gbk)
+    assert (text.endswith("PB[张三])"), encoding) == (True, "gb18030")
+
+    # The file's own CA is trusted, invalid bytes are dropped
+    assert SGF.decode_contents(b"(;CA[UTF-8]C[a\xffb])")[0] == "(;CA[UTF-8]C[ab])"
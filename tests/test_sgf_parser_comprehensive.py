@@ -9,8 +9,13 @@ Covers previously untested paths in katrain/core/sgf_parser.py:
 - SGFNode.place_handicap_stones (n=1, 2-9, >9 grid, tygem, 3x3 small)
 - SGF.parse_sgf with FoxGo AP prefix
 - SGF.parse_ngf / parse_gib (happy path)
+- SGF._parse_branch: identical trees to the former recursive parser, deep variations
 """
 
+import io
+import re
+from pathlib import Path
+
 import pytest
 
 from katrain.core.sgf_parser import SGF, Move, ParseError, SGFNode
@@ -699,9 +704,109 @@ class TestSGFNodeSGFOutput:
         root = SGF.parse_sgf(sgf_str)
         assert root.sgf() == sgf_str
 
+    def test_write_sgf_streams_same_output(self):
+        sgf_str = "(;GM[1]FF[4]SZ[19]C[a \\] b \\\\ c];B[dd](;W[pp])(;W[pd]TR[aa][bb]))"
+        root = SGF.parse_sgf(sgf_str)
+        out = io.StringIO()
+        root.write_sgf(out)
+        assert out.getvalue() == root.sgf() == sgf_str
+
+    def test_sgf_properties_shares_values(self):
+        root = SGF.parse_sgf("(;SZ[19]C[hi])")
+        props = root.sgf_properties()
+        props["C"] = ["changed"]
+        assert props["C"] is not root.properties["C"]
+        assert props["SZ"] is root.properties["SZ"]
+        assert root.get_property("C") == "hi"
+
     def test_sgf_filters_empty_properties(self):
         root = SGFNode()
         # Add a property and then clear it - it should still appear (just empty)
         root.set_property("C", "comment")
         s = root.sgf()
         assert "C[comment]" in s
+
+
+# ---------------------------------------------------------------------------
+# SGF._parse_branch: position-based scanner with an explicit branch stack
+# ---------------------------------------------------------------------------
+
+
+class _RecursiveSGF(SGF):
+    """The previous recursive, slice-based parser, kept as a reference."""
+
+    def _parse_branch(self, current_move):
+        while self.ix < len(self.contents):
+            match = re.match(self.SGFPROP_PAT, self.contents[self.ix :])
+            if not match:
+                break
+            self.ix += len(match[0])
+            matched_item = match[0].strip()
+            if matched_item == ")":
+                return
+            if matched_item == "(":
+                self._parse_branch(self._NODE_CLASS(parent=current_move))
+            elif matched_item == ";":
+                useless = self.ix < len(self.contents) and self.contents[self.ix :].strip() == ")"
+                if not (current_move.empty or useless):
+                    current_move = self._NODE_CLASS(parent=current_move)
+            else:
+                property, value = match[1], match[2].strip()[1:-1]
+                values = re.split(r"\]\s*\[", value)
+                current_move.add_list_property(property, [SGFNode._unescape_value(v) for v in values])
+        if self.ix < len(self.contents):
+            raise ParseError(f"Parse Error: unexpected character at {self.contents[self.ix : self.ix + 25]}")
+        raise ParseError("Parse Error: expected ')' at end of input.")
+
+
+def _tree_shape(root: SGFNode) -> list:
+    """Pre-order (depth, properties) of every node, walked without recursion."""
+    shape = []
+    stack = [(root, 0)]
+    while stack:
+        node, depth = stack.pop()
+        shape.append((depth, dict(node.properties)))
+        stack.extend((child, depth + 1) for child in reversed(node.children))
+    return shape
+
+
+_DATA_DIR = Path(__file__).parent / "data"
+
+
+class TestSGFParseBranch:
+    @pytest.mark.parametrize("path", sorted(_DATA_DIR.rglob("*.sgf")), ids=lambda p: str(p.relative_to(_DATA_DIR)))
+    def test_identical_to_recursive_parser(self, path):
+        contents = path.read_text(encoding="utf-8", errors="ignore")
+        try:
+            expected = _tree_shape(_RecursiveSGF.parse_sgf(contents))
+        except ParseError as e:
+            with pytest.raises(ParseError, match=re.escape(str(e))):
+                SGF.parse_sgf(contents)
+            return
+        assert _tree_shape(SGF.parse_sgf(contents)) == expected
+
+    @pytest.mark.parametrize(
+        "sgf",
+        [
+            "(;GM[1]SZ[9];B[aa](;W[bb];B[cc])(;W[cc](;B[dd])(;B[ee]));)",
+            "(;SZ[9]C[a \\] b][c];B[aa];)",
+            "( ; SZ [9] ; B [aa] \n ; W [bb]\n)\n",
+            "(;SZ[9];;B[aa];;W[bb])",
+        ],
+    )
+    def test_identical_on_edge_cases(self, sgf):
+        assert _tree_shape(SGF.parse_sgf(sgf)) == _tree_shape(_RecursiveSGF.parse_sgf(sgf))
+
+    @pytest.mark.parametrize("sgf", ["(;SZ[9];B[aa]", "(;SZ[9];B[aa]!)"])
+    def test_errors_unchanged(self, sgf):
+        with pytest.raises(ParseError) as expected:
+            _RecursiveSGF.parse_sgf(sgf)
+        with pytest.raises(ParseError, match=re.escape(str(expected.value))):
+            SGF.parse_sgf(sgf)
+
+    def test_deep_variations_do_not_recurse(self):
+        depth = 5000
+        sgf = "(;SZ[19]" + "(;B[aa]" * depth + ")" * depth + ")"
+        shape = _tree_shape(SGF.parse_sgf(sgf))
+        assert len(shape) == depth + 1
+        assert shape[-1] == (depth, {"B": ["aa"]})
@@ -12,6 +12,7 @@ Note: これはUI統合テストではなく、配線の正確性を検証する
 - テストでは lambda msg, lvl: None または lambda msg, lvl=0: None のどちらも使用可能
 """
 
+import os
 from unittest.mock import MagicMock, patch
 
 # ========== テスト用ヘルパー ==========
@@ -134,12 +135,18 @@ class TestSummaryManagerPureFunctionWrappers:
             logger=logger,
         )
 
-        with patch("katrain.gui.features.summary_aggregator.scan_player_names") as mock_scan:
+        with (
+            patch("katrain.gui.features.summary_aggregator.scan_player_names") as mock_scan,
+            patch("katrain.core.batch.library_index.open_library_index") as mock_open,
+        ):
             mock_scan.return_value = {"Player1": 5, "Player2": 3}
 
             result = manager.scan_player_names(["game1.sgf", "game2.sgf"])
 
-            mock_scan.assert_called_once_with(["game1.sgf", "game2.sgf"], logger)
+            mock_open.assert_called_once_with(os.getcwd())
+            index = mock_open.return_value
+            mock_scan.assert_called_once_with(["game1.sgf", "game2.sgf"], logger, index=index)
+            index.close.assert_called_once()
             assert result == {"Player1": 5, "Player2": 3}
 
     def test_categorize_games_by_stats_delegates_to_aggregator(self):
@@ -344,3 +344,19 @@ class TestGuessBlackToAttack:
         extrema = [{"i": 0, "j": 0, "black": False}]
         result = guess_black_to_attack(extrema, sizes)
         assert isinstance(result, bool)
+
+
+class TestFromKatrainGame:
+    def test_board_read_from_game_stones(self, game, monkeypatch):
+        from katrain.core import tsumego_frame as module
+        from katrain.core.sgf_parser import Move
+
+        for gtp, player in (("A1", "B"), ("B1", "W"), ("B2", "B"), ("T19", "W"), ("pass", "B")):
+            game.play(Move.from_gtp(gtp, player=player), analyze=False)
+        seen = []
+        monkeypatch.setattr(module, "tsumego_frame", lambda bw_board, *args: seen.append(bw_board) or ([], [], None))
+        module.tsumego_frame_from_katrain_game(game, 6.5, True, False, 2)
+
+        expected = [[game.chains[c][0].player if c >= 0 else "-" for c in line] for line in game.board]
+        assert seen == [expected]
+        assert (seen[0][0][0], seen[0][0][1], seen[0][1][1], seen[0][18][18]) == ("B", "W", "B", "W")